@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'common.middleware.SessionRenouvellementMiddleware',  # Expiration glissante
     'django.middleware.locale.LocaleMiddleware',      
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -123,6 +124,16 @@ DATABASES = {
 #         'NAME': BASE_DIR / 'db_test.sqlite3',
 #     }
 
+# Connexion dédiée au cache partagé (CACHE_BACKEND=base) : même base, mais
+# hors des transactions des requêtes, pour que les entrées et les verrous
+# du cache soient visibles immédiatement par les autres processus et ne
+# soient pas annulés avec la transaction appelante
+DATABASES['cache'] = {
+    **DATABASES['default'],
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['common.routeurs.RouteurCache']
+
 # ===================================================================
 # VALIDATION DES MOTS DE PASSE
 # ===================================================================
@@ -198,7 +209,13 @@ LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 SESSION_COOKIE_AGE = 3600  # 1 heure d'inactivité
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True  # Nécessaire pour la journalisation
+# Pas d'écriture de session à chaque requête (sondages AJAX compris) :
+# common.middleware.SessionRenouvellementMiddleware prolonge l'expiration au
+# plus une fois par SESSION_RENOUVELLEMENT_INTERVALLE secondes. La session
+# expire donc entre 55 et 60 minutes après la dernière activité. Connexions
+# et déconnexions sont tracées par le journal d'audit (accounts/signals.py).
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_RENOUVELLEMENT_INTERVALLE = 300
 SESSION_COOKIE_NAME = 'supper_sessionid'
 SESSION_COOKIE_SECURE = not DEBUG  # HTTPS en production
 SESSION_COOKIE_HTTPONLY = True
@@ -329,6 +346,34 @@ SUPPER_CONFIG = {
     ],
 }
 
+# Journal d'audit : insertion groupée en arrière-plan (common/audit.py)
+# Les actions critiques (connexion, suppression, permissions...) restent synchrones
+SUPPER_AUDIT = {
+    'ASYNC': config('AUDIT_ASYNC', default=True, cast=bool),
+    'BATCH_SIZE': 100,          # Entrées par insertion groupée
+    'FLUSH_INTERVAL': 2.0,      # Délai maximal avant écriture (secondes)
+    'QUEUE_MAXSIZE': 10000,     # Au-delà : écriture synchrone
+}
+
+# Cache disque des rapports PDF (inventaire/services/rapport_cache_service.py)
+# Un rapport est régénéré seulement si ses données sources ont changé
+SUPPER_RAPPORTS_CACHE = {
+    'ACTIF': config('RAPPORTS_CACHE_ACTIF', default=True, cast=bool),
+    'REPERTOIRE': MEDIA_ROOT / 'rapports_cache',
+    'CONSERVATION_JOURS': 30,  # rapports non servis depuis, supprimés
+}
+
+# Profilage des requêtes par vue (common/profilage.py, PerformanceMiddleware)
+# Durée mesurée pour toutes les requêtes, requêtes SQL pour un échantillon
+SUPPER_PROFILAGE = {
+    'ACTIF': config('PROFILAGE_ACTIF', default=True, cast=bool),
+    'TAUX_ECHANTILLONNAGE': config('PROFILAGE_TAUX', default=0.1, cast=float),
+    'SEUIL_N_PLUS_UN': 5,           # même requête SQL répétée au moins 5 fois
+    'SEUIL_REQUETE_LENTE': 2.0,     # secondes (journal)
+    'FLUSH_INTERVAL': 30.0,         # écriture des statistiques (secondes)
+    'RETENTION_JOURS': 30,
+}
+
 # ===================================================================
 # CONFIGURATION EMAIL
 # ===================================================================
@@ -345,14 +390,59 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@supper.cm')
 # CONFIGURATION CACHE
 # ===================================================================
 
-CACHES = {
-    'default': {
+# Cache partagé par tous les processus Gunicorn : tentatives de connexion,
+# versions des instantanés du tableau de bord, calculs coûteux mis en cache
+# (common/cache_partage.py). CACHE_BACKEND :
+# - 'base' (défaut) : table supper_cache de la base PostgreSQL, créée par
+#   la migration common 0001 (ou python manage.py createcachetable),
+#   utilisée par la connexion 'cache' (voir DATABASES) ;
+# - 'fichiers' : répertoire CACHE_REPERTOIRE, partagé par les processus
+#   d'un même serveur ;
+# - 'redis' : serveur REDIS_URL (paquet redis requis) ;
+# - 'memoire' : propre à chaque processus (développement).
+CACHES_DISPONIBLES = {
+    'base': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'supper_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 4},
+    },
+    'fichiers': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_REPERTOIRE', default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 4},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    },
+    'memoire': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'supper-cache',
+    },
+}
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='base')
+
+CACHES = {
+    'default': {
+        **CACHES_DISPONIBLES[CACHE_BACKEND],
         'TIMEOUT': 300,  # 5 minutes
+        'KEY_PREFIX': 'supper',
     }
 }
 
+# Sessions lues depuis le cache quand celui-ci évite la base (Redis,
+# fichiers) ; avec le cache en base, lire django_session directement
+# coûte autant. SESSION_ENGINE peut être imposé par l'environnement.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default=(
+        'django.contrib.sessions.backends.cached_db'
+        if CACHE_BACKEND in ('redis', 'fichiers')
+        else 'django.contrib.sessions.backends.db'
+    ),
+)
+
 # ===================================================================
 # CONFIGURATION PAGINATION
 # ===================================================================
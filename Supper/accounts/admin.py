@@ -11,7 +11,7 @@ from django.http import HttpResponse
 import csv
 import logging
 
-from .models import UtilisateurSUPPER, Poste, JournalAudit, NotificationUtilisateur
+from .models import UtilisateurSUPPER, Poste, JournalAudit, NotificationUtilisateur, StatistiqueVue
 
 logger = logging.getLogger('supper')
 
@@ -371,32 +371,32 @@ class JournalAuditAdmin(admin.ModelAdmin):
     actions = ['export_logs']
     
     def export_logs(self, request, queryset):
-        """Exporter les logs"""
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="journal_audit_supper.csv"'
-        
-        # BOM UTF-8
-        response.write('\ufeff')
-        
-        writer = csv.writer(response, delimiter=';')
-        writer.writerow([
-            'Date/Heure', 'Utilisateur', 'Action', 'Détails',
-            'IP', 'URL', 'Méthode', 'Succès'
-        ])
+        """Exporter les logs (en flux : le journal peut compter des millions de lignes)"""
+        from common.exports import parcourir, reponse_csv
         
-        for log in queryset:
-            writer.writerow([
-                log.timestamp.strftime('%d/%m/%Y %H:%M:%S'),
-                log.utilisateur.username if log.utilisateur else '',
-                log.action,
-                log.details[:100] if log.details else '',
-                log.adresse_ip or '',
-                log.url_acces or '',
-                log.methode_http or '',
-                'Oui' if log.succes else 'Non'
-            ])
+        logs = queryset.values_list(
+            'timestamp', 'utilisateur__username', 'action', 'details',
+            'adresse_ip', 'url_acces', 'methode_http', 'succes'
+        )
+        lignes = (
+            [
+                timestamp.strftime('%d/%m/%Y %H:%M:%S'),
+                username or '',
+                action,
+                details[:100] if details else '',
+                adresse_ip or '',
+                url_acces or '',
+                methode_http or '',
+                'Oui' if succes else 'Non'
+            ]
+            for timestamp, username, action, details, adresse_ip, url_acces, methode_http, succes in parcourir(logs)
+        )
         
-        return response
+        return reponse_csv(
+            ['Date/Heure', 'Utilisateur', 'Action', 'Détails', 'IP', 'URL', 'Méthode', 'Succès'],
+            lignes,
+            'journal_audit_supper.csv',
+        )
     export_logs.short_description = '📥 Exporter les logs'
 
 # ===================================================================
@@ -422,10 +422,10 @@ class NotificationUtilisateurAdmin(admin.ModelAdmin):
             'fields': ('titre', 'message', 'type_notification')
         }),
         ('Destinataires', {
-            'fields': ('destinataire', 'expediteur')
+            'fields': ('destinataire', 'cree_par')
         }),
         ('Statut', {
-            'fields': ('lue', 'date_lecture')
+            'fields': ('lu', 'date_lecture')
         }),
         ('Métadonnées', {
             'fields': ('date_creation',),
@@ -455,7 +455,7 @@ class NotificationUtilisateurAdmin(admin.ModelAdmin):
     
     def lue_badge(self, obj):
         """Badge pour le statut de lecture"""
-        if obj.lue:
+        if obj.lu:
             return format_html('<span class="badge bg-success">✓ Lue</span>')
         return format_html('<span class="badge bg-warning">⚠ Non lue</span>')
     lue_badge.short_description = 'Statut'
@@ -463,24 +463,63 @@ class NotificationUtilisateurAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         """Définir l'expéditeur automatiquement"""
         if not change:  # Nouvelle notification
-            obj.expediteur = request.user
+            obj.cree_par = request.user
         super().save_model(request, obj, form, change)
     
     # Actions
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
-        """Marquer comme lues"""
-        count = queryset.update(lue=True)
+        """Marquer comme lues (compteurs des destinataires ajustés)"""
+        from inventaire.services.notification_service import NotificationService
+        count = NotificationService.marquer_lues(queryset)
         self.message_user(request, f'✓ {count} notification(s) marquée(s) comme lue(s).')
     mark_as_read.short_description = '✓ Marquer comme lues'
     
     def mark_as_unread(self, request, queryset):
-        """Marquer comme non lues"""
-        count = queryset.update(lue=False)
+        """Marquer comme non lues (compteurs des destinataires ajustés)"""
+        from inventaire.services.notification_service import NotificationService
+        count = NotificationService.marquer_lues(queryset, lu=False)
         self.message_user(request, f'✓ {count} notification(s) marquée(s) comme non lue(s).')
     mark_as_unread.short_description = '⚠ Marquer comme non lues'
 
+# ===================================================================
+# STATISTIQUES DE PERFORMANCE PAR VUE
+# ===================================================================
+
+@admin.register(StatistiqueVue)
+class StatistiqueVueAdmin(admin.ModelAdmin):
+    """
+    Statistiques horaires brutes du profilage ; percentiles par vue sur
+    une fenêtre glissante : common:statistiques_performances
+    """
+    
+    list_display = (
+        'periode', 'methode', 'vue', 'nombre_requetes', 'duree_moyenne',
+        'duree_max_ms', 'requetes_sql_max', 'nombre_n_plus_un'
+    )
+    
+    list_filter = ('methode', 'periode')
+    search_fields = ('vue', 'signature_n_plus_un')
+    date_hierarchy = 'periode'
+    ordering = ('-periode', 'vue')
+    
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+    
+    def has_add_permission(self, request):
+        """Alimentées uniquement par le profilage"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def duree_moyenne(self, obj):
+        if not obj.nombre_requetes:
+            return '-'
+        return f"{obj.duree_totale_ms / obj.nombre_requetes:.0f} ms"
+    duree_moyenne.short_description = 'Durée moyenne'
+
 # ===================================================================
 # CONFIGURATION DU SITE ADMIN
 # ===================================================================
@@ -0,0 +1,37 @@
+# accounts/management/commands/recalculer_compteurs_notifications.py
+"""
+Commande Django pour recalculer les compteurs de notifications par utilisateur
+À lancer après la migration qui crée la table, puis en cas de doute
+(notifications modifiées hors application, restauration de sauvegarde) :
+    python manage.py recalculer_compteurs_notifications
+    python manage.py recalculer_compteurs_notifications --utilisateur 12
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventaire.services.notification_service import NotificationService
+import logging
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de notifications (non lues / total) depuis les notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--utilisateur',
+            action='append',
+            type=int,
+            help="Identifiant d'utilisateur à recalculer, répétable ; tous par défaut",
+        )
+
+    def handle(self, *args, **options):
+        debut = timezone.now()
+        compteurs = NotificationService.recalculer(options['utilisateur'])
+        duree = (timezone.now() - debut).total_seconds()
+
+        logger.info(f"Compteurs de notifications recalculés : {len(compteurs)} utilisateur(s)")
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(compteurs)} compteur(s) recalculé(s) en {duree:.1f} s")
+        )
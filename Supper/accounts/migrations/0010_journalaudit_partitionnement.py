@@ -0,0 +1,194 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:43
+
+from datetime import date, datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+TABLE = 'accounts_journalaudit'
+MOIS_D_AVANCE = 3
+
+
+def _mois_suivant(jour):
+    if jour.month == 12:
+        return date(jour.year + 1, 1, 1)
+    return date(jour.year, jour.month + 1, 1)
+
+
+def _borne(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def partitionner_journal(apps, schema_editor):
+    """
+    Convertit accounts_journalaudit en table partitionnée par mois (PostgreSQL)
+
+    La clé primaire physique devient (id, timestamp), exigence de PostgreSQL
+    pour une table partitionnée ; côté Django la clé reste `id`, alimentée
+    par une séquence dédiée. Les lignes existantes sont recopiées dans les
+    partitions mensuelles, les index recréés sur la table parente.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    qn = schema_editor.quote_name
+    ancien = f"{TABLE}_ancien"
+    sequence = f"{TABLE}_id_seq_part"
+    table_utilisateur = apps.get_model('accounts', 'UtilisateurSUPPER')._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] == 'p':
+            return
+
+        # Index secondaires existants (hors clé primaire), recréés plus bas
+        cursor.execute(
+            "SELECT i.indexdef FROM pg_indexes i "
+            "JOIN pg_class c ON c.relname = i.indexname "
+            "JOIN pg_index x ON x.indexrelid = c.oid "
+            "WHERE i.tablename = %s AND NOT x.indisprimary",
+            [TABLE]
+        )
+        definitions_index = [ligne[0] for ligne in cursor.fetchall()]
+
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(ancien)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(ancien)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (timestamp)"
+        )
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {qn(sequence)} AS bigint")
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {qn(ancien)}), 0) + 1, false)",
+            [sequence]
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)",
+            [sequence]
+        )
+        cursor.execute(f"ALTER SEQUENCE {qn(sequence)} OWNED BY {qn(TABLE)}.id")
+
+        # Partitions : du mois de la plus ancienne ligne jusqu'à 3 mois d'avance
+        cursor.execute(f"SELECT MIN(timestamp) FROM {qn(ancien)}")
+        plus_ancien = cursor.fetchone()[0]
+        aujourd_hui = timezone.localdate()
+        mois = date(aujourd_hui.year, aujourd_hui.month, 1)
+        if plus_ancien is not None:
+            premier = timezone.localtime(plus_ancien).date()
+            mois = min(mois, date(premier.year, premier.month, 1))
+
+        dernier = aujourd_hui
+        for _ in range(MOIS_D_AVANCE):
+            dernier = _mois_suivant(dernier)
+
+        while mois <= dernier:
+            nom = f"{TABLE}_p{mois.year:04d}_{mois.month:02d}"
+            cursor.execute(
+                f"CREATE TABLE {qn(nom)} PARTITION OF {qn(TABLE)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [_borne(mois), _borne(_mois_suivant(mois))]
+            )
+            mois = _mois_suivant(mois)
+        cursor.execute(f"CREATE TABLE {qn(TABLE + '_defaut')} PARTITION OF {qn(TABLE)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(ancien)}")
+        cursor.execute(f"DROP TABLE {qn(ancien)}")
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_pkey')} "
+            f"PRIMARY KEY (id, timestamp)"
+        )
+
+        # Les définitions ont été lues avant le renommage : elles visent déjà la
+        # nouvelle table, et les noms sont libérés par la suppression ci-dessus
+        for definition in definitions_index:
+            cursor.execute(definition)
+
+        # Clé étrangère ajoutée en dernier : une contrainte différée posée
+        # avant la copie bloquerait la création des index (événements en attente)
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_utilisateur_fk')} "
+            f"FOREIGN KEY (utilisateur_id) REFERENCES {qn(table_utilisateur)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+def departitionner_journal(apps, schema_editor):
+    """Retour à une table simple (les partitions sont recopiées)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    qn = schema_editor.quote_name
+    ancien = f"{TABLE}_partitionne"
+    table_utilisateur = apps.get_model('accounts', 'UtilisateurSUPPER')._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] != 'p':
+            return
+
+        cursor.execute(
+            "SELECT i.indexdef FROM pg_indexes i "
+            "JOIN pg_class c ON c.relname = i.indexname "
+            "JOIN pg_index x ON x.indexrelid = c.oid "
+            "WHERE i.tablename = %s AND NOT x.indisprimary",
+            [TABLE]
+        )
+        definitions_index = [ligne[0] for ligne in cursor.fetchall()]
+
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(ancien)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(ancien)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(ancien)}")
+        cursor.execute(f"ALTER SEQUENCE {qn(TABLE + '_id_seq_part')} OWNED BY {qn(TABLE)}.id")
+        cursor.execute(f"DROP TABLE {qn(ancien)} CASCADE")
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_pkey')} PRIMARY KEY (id)"
+        )
+
+        for definition in definitions_index:
+            cursor.execute(definition.replace(' ON ONLY ', ' ON '))
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_utilisateur_fk')} "
+            f"FOREIGN KEY (utilisateur_id) REFERENCES {qn(table_utilisateur)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_utilisateursupper_date_personnalisation_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='journalaudit',
+            name='accounts_jo_utilisa_2d3ca9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='journalaudit',
+            name='accounts_jo_action_824eb2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='journalaudit',
+            name='accounts_jo_timesta_984bdc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='journalaudit',
+            index=models.Index(fields=['utilisateur', '-timestamp', '-id'], name='audit_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalaudit',
+            index=models.Index(fields=['action', '-timestamp', '-id'], name='audit_action_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalaudit',
+            index=models.Index(fields=['-timestamp', '-id'], name='audit_date_id_idx'),
+        ),
+        migrations.RunPython(partitionner_journal, departitionner_journal),
+    ]
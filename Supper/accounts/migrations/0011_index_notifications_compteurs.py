@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_journalaudit_partitionnement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurNotifications',
+            fields=[
+                ('utilisateur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compteur_notifications', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('non_lues', models.IntegerField(default=0, verbose_name='Notifications non lues')),
+                ('total', models.IntegerField(default=0, verbose_name='Total des notifications')),
+            ],
+            options={
+                'verbose_name': 'Compteur de notifications',
+                'verbose_name_plural': 'Compteurs de notifications',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='notificationutilisateur',
+            name='accounts_no_destina_dfc9ea_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notificationutilisateur',
+            index=models.Index(fields=['destinataire', 'lu', '-date_creation'], name='notif_dest_lu_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationutilisateur',
+            index=models.Index(fields=['destinataire', '-date_creation'], name='notif_dest_date_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_index_notifications_compteurs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueVue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vue', models.CharField(max_length=200, verbose_name='Vue')),
+                ('methode', models.CharField(max_length=10, verbose_name='Méthode HTTP')),
+                ('periode', models.DateTimeField(help_text="Début de l'heure agrégée", verbose_name='Heure')),
+                ('nombre_requetes', models.PositiveIntegerField(default=0, verbose_name='Requêtes HTTP')),
+                ('nombre_erreurs', models.PositiveIntegerField(default=0, verbose_name='Réponses en erreur (5xx)')),
+                ('duree_totale_ms', models.FloatField(default=0, verbose_name='Durée totale (ms)')),
+                ('duree_max_ms', models.FloatField(default=0, verbose_name='Durée maximale (ms)')),
+                ('histogramme', models.JSONField(default=list, verbose_name='Histogramme des durées')),
+                ('nombre_echantillons', models.PositiveIntegerField(default=0, verbose_name='Requêtes échantillonnées')),
+                ('requetes_sql_total', models.PositiveIntegerField(default=0, verbose_name='Requêtes SQL (total)')),
+                ('requetes_sql_max', models.PositiveIntegerField(default=0, verbose_name='Requêtes SQL (max par requête)')),
+                ('duree_sql_ms', models.FloatField(default=0, verbose_name='Durée SQL totale (ms)')),
+                ('nombre_n_plus_un', models.PositiveIntegerField(default=0, verbose_name='Requêtes avec requête SQL répétée (N+1)')),
+                ('signature_n_plus_un', models.TextField(blank=True, verbose_name='Dernière requête SQL répétée')),
+                ('repetitions_n_plus_un', models.PositiveIntegerField(default=0, verbose_name='Répétitions de cette requête SQL')),
+            ],
+            options={
+                'verbose_name': 'Statistique de vue',
+                'verbose_name_plural': 'Statistiques de vues',
+                'ordering': ['-periode', 'vue'],
+                'indexes': [models.Index(fields=['periode'], name='statvue_periode_idx')],
+                'unique_together': {('vue', 'methode', 'periode')},
+            },
+        ),
+    ]
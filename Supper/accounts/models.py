@@ -241,36 +241,39 @@ class Poste(models.Model):
         return f"{self.nom} ({self.get_type_display()}) - {self.region}"
     
     def get_realisation_annee(self, annee=None):
-        """Calcule le total réalisé pour une année donnée"""
-        from inventaire.models import RecetteJournaliere
-        from django.db.models import Sum
+        """Calcule le total réalisé pour une année donnée (agrégat annuel)"""
+        from datetime import date
+        from inventaire.services.agregats_recettes_service import AgregatsRecettesService
         
         if annee is None:
             annee = timezone.now().year
+        
+        # Poste annoté par ObjectifsService.annoter_realisations : aucune requête
+        if getattr(self, 'annee_objectif', None) == annee:
+            return self.realise_annee
             
-        total = RecetteJournaliere.objects.filter(
-            poste=self,
-            date__year=annee
-        ).aggregate(total=Sum('montant_declare'))['total']
+        total = AgregatsRecettesService.montant(date(annee, 1, 1), date(annee, 12, 31), self)
         
         return Decimal(str(total or 0))
     
     def get_taux_realisation(self, annee=None):
         """Calcule le taux de réalisation par rapport à l'objectif de l'année"""
-        from inventaire.models import ObjectifAnnuel
+        from inventaire.services.objectifs_service import ObjectifsService
         
         if annee is None:
             annee = timezone.now().year
         
-        try:
-            objectif = ObjectifAnnuel.objects.get(poste=self, annee=annee)
-            objectif_annuel = objectif.montant_objectif
-        except:
+        # Objectif et réalisé en une requête, sauf si le poste est déjà annoté
+        poste = self
+        if getattr(self, 'annee_objectif', None) != annee:
+            poste = ObjectifsService.annoter_realisations(Poste.objects.filter(pk=self.pk), annee).first()
+        
+        objectif_annuel = poste.objectif_annee if poste is not None else None
+        if objectif_annuel is None:
             return None
         
-        if objectif_annuel and objectif_annuel > 0:
-            realise = self.get_realisation_annee(annee)
-            return (realise / objectif_annuel * 100)
+        if objectif_annuel > 0:
+            return (poste.realise_annee / objectif_annuel * 100)
         return 0
     
     def get_nom_court(self):
@@ -1413,11 +1416,15 @@ class JournalAudit(models.Model):
         verbose_name = _("Journal d'audit")
         verbose_name_plural = _("Journal d'audit")
         ordering = ['-timestamp']
+        # Index composites alignés sur les filtres de l'écran d'audit
+        # (utilisateur / action / date) et sur la pagination par curseur
+        # (timestamp, id). Sous PostgreSQL la table est partitionnée par mois
+        # (voir common/partitions.py) : ces index sont créés sur chaque partition.
         indexes = [
-            models.Index(fields=['utilisateur', 'timestamp']),
-            models.Index(fields=['action']),
+            models.Index(fields=['utilisateur', '-timestamp', '-id'], name='audit_user_date_idx'),
+            models.Index(fields=['action', '-timestamp', '-id'], name='audit_action_date_idx'),
             models.Index(fields=['succes']),
-            models.Index(fields=['-timestamp']),
+            models.Index(fields=['-timestamp', '-id'], name='audit_date_id_idx'),
         ]
     
     def __str__(self):
@@ -1534,7 +1541,9 @@ class NotificationUtilisateur(models.Model):
         verbose_name_plural = _("Notifications")
         ordering = ['-date_creation']
         indexes = [
-            models.Index(fields=['destinataire', 'lu']),
+            # Boîte de réception : non lues récentes, puis toutes les récentes
+            models.Index(fields=['destinataire', 'lu', '-date_creation'], name='notif_dest_lu_date_idx'),
+            models.Index(fields=['destinataire', '-date_creation'], name='notif_dest_date_idx'),
             models.Index(fields=['type_notification']),
             models.Index(fields=['-date_creation']),
         ]
@@ -1546,9 +1555,11 @@ class NotificationUtilisateur(models.Model):
     def marquer_comme_lue(self):
         """Marque la notification comme lue"""
         if not self.lu:
+            from inventaire.services.notification_service import NotificationService
+            
+            NotificationService.marquer_lues(NotificationUtilisateur.objects.filter(pk=self.pk))
             self.lu = True
             self.date_lecture = timezone.now()
-            self.save(update_fields=['lu', 'date_lecture'])
     
     @property
     def age_formatee(self):
@@ -1564,4 +1575,141 @@ class NotificationUtilisateur(models.Model):
             minutes = delta.seconds // 60
             return f"il y a {minutes} minute(s)"
         else:
-            return "À l'instant"
\ No newline at end of file
+            return "À l'instant"
+
+
+class CompteurNotifications(models.Model):
+    """
+    Compteurs de notifications d'un utilisateur (non lues / total), tenus à
+    jour à chaque écriture (voir inventaire/services/notification_service.py)
+    pour que le badge de notifications coûte une lecture par clé primaire
+    """
+    
+    utilisateur = models.OneToOneField(
+        UtilisateurSUPPER,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compteur_notifications',
+        verbose_name=_("Utilisateur")
+    )
+    
+    non_lues = models.IntegerField(
+        default=0,
+        verbose_name=_("Notifications non lues")
+    )
+    
+    total = models.IntegerField(
+        default=0,
+        verbose_name=_("Total des notifications")
+    )
+    
+    class Meta:
+        verbose_name = _("Compteur de notifications")
+        verbose_name_plural = _("Compteurs de notifications")
+    
+    def __str__(self):
+        return f"{self.utilisateur_id} : {self.non_lues} non lue(s) / {self.total}"
+
+
+# ===================================================================
+# STATISTIQUES DE PERFORMANCE PAR VUE
+# ===================================================================
+
+class StatistiqueVue(models.Model):
+    """
+    Statistiques de performance d'une vue sur une heure, alimentées par le
+    profilage des requêtes (common/profilage.py, PerformanceMiddleware)
+
+    Les durées sont réparties dans un histogramme à bornes fixes
+    (BORNES_HISTOGRAMME_MS) : les histogrammes de plusieurs heures et de
+    plusieurs processus s'additionnent, d'où les percentiles p50/p95/p99
+    sur une fenêtre glissante.
+    """
+    
+    vue = models.CharField(
+        max_length=200,
+        verbose_name=_("Vue")
+    )
+    
+    methode = models.CharField(
+        max_length=10,
+        verbose_name=_("Méthode HTTP")
+    )
+    
+    periode = models.DateTimeField(
+        verbose_name=_("Heure"),
+        help_text=_("Début de l'heure agrégée")
+    )
+    
+    nombre_requetes = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Requêtes HTTP")
+    )
+    
+    nombre_erreurs = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Réponses en erreur (5xx)")
+    )
+    
+    duree_totale_ms = models.FloatField(
+        default=0,
+        verbose_name=_("Durée totale (ms)")
+    )
+    
+    duree_max_ms = models.FloatField(
+        default=0,
+        verbose_name=_("Durée maximale (ms)")
+    )
+    
+    histogramme = models.JSONField(
+        default=list,
+        verbose_name=_("Histogramme des durées")
+    )
+    
+    # Requêtes SQL : mesurées sur les seules requêtes échantillonnées
+    nombre_echantillons = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Requêtes échantillonnées")
+    )
+    
+    requetes_sql_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Requêtes SQL (total)")
+    )
+    
+    requetes_sql_max = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Requêtes SQL (max par requête)")
+    )
+    
+    duree_sql_ms = models.FloatField(
+        default=0,
+        verbose_name=_("Durée SQL totale (ms)")
+    )
+    
+    nombre_n_plus_un = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Requêtes avec requête SQL répétée (N+1)")
+    )
+    
+    signature_n_plus_un = models.TextField(
+        blank=True,
+        verbose_name=_("Dernière requête SQL répétée"),
+    )
+    
+    repetitions_n_plus_un = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Répétitions de cette requête SQL")
+    )
+    
+    class Meta:
+        verbose_name = _("Statistique de vue")
+        verbose_name_plural = _("Statistiques de vues")
+        ordering = ['-periode', 'vue']
+        unique_together = [['vue', 'methode', 'periode']]
+        indexes = [
+            models.Index(fields=['periode'], name='statvue_periode_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.methode} {self.vue} - {self.periode:%d/%m/%Y %H}h ({self.nombre_requetes})"
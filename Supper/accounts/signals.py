@@ -351,6 +351,7 @@ def log_user_login_and_redirect(sender, request, user, **kwargs):
         request.session['redirect_after_login'] = redirect_url
         request.session['user_category'] = category
         request.session['user_niveau_acces'] = niveau_acces
+        request.session['connexion_le'] = int(timezone.now().timestamp())
         
     except Exception as e:
         logger.error(f"Erreur journalisation connexion: {str(e)}")
@@ -418,14 +419,16 @@ def log_user_logout(sender, request, user, **kwargs):
             category = request.session.get('user_category', get_user_category(user))
             interface_type = get_interface_type(user)
             
-            # Calculer la durée de session si possible
+            # Durée de session depuis l'horodatage posé à la connexion
             session_duration = "Non calculée"
-            pages_visited = request.session.get('pages_visited', 0) if request.session else 0
+            connexion_le = request.session.get('connexion_le')
+            if connexion_le:
+                minutes = max(0, int(timezone.now().timestamp()) - connexion_le) // 60
+                session_duration = f"{minutes // 60}h{minutes % 60:02d}"
             
             details = [
                 f"Déconnexion {interface_type}",
                 f"Catégorie: {category}",
-                f"Pages visitées: {pages_visited}",
                 f"Durée session: {session_duration}"
             ]
             
@@ -901,6 +904,46 @@ def log_notification_creation(sender, instance, created, **kwargs):
         logger.error(f"Erreur signal notification: {str(e)}")
 
 
+@receiver(pre_save, sender='accounts.NotificationUtilisateur')
+def memoriser_etat_notification(sender, instance, raw=False, **kwargs):
+    """Destinataire et statut de lecture d'origine d'une notification modifiée"""
+    if raw or instance.pk is None:
+        return
+    instance._etat_compteurs = sender.objects.filter(pk=instance.pk).values_list(
+        'destinataire_id', 'lu'
+    ).first()
+
+
+@receiver(post_save, sender='accounts.NotificationUtilisateur')
+def ajuster_compteurs_notification(sender, instance, created, raw=False, **kwargs):
+    """
+    Compteurs de notifications ajustés pour un enregistrement unitaire (les
+    écritures groupées de NotificationService les ajustent elles-mêmes)
+    """
+    from inventaire.services.notification_service import NotificationService
+    
+    if raw:
+        return
+    
+    ancien = instance.__dict__.pop('_etat_compteurs', None)
+    nouveau = (instance.destinataire_id, instance.lu)
+    if ancien == nouveau:
+        return
+    if ancien is not None:
+        NotificationService.ajuster_compteurs({ancien[0]: -1}, non_lues=0 if ancien[1] else 1, total=1)
+    NotificationService.ajuster_compteurs({nouveau[0]: 1}, non_lues=0 if nouveau[1] else 1, total=1)
+
+
+@receiver(post_delete, sender='accounts.NotificationUtilisateur')
+def decompter_notification_supprimee(sender, instance, **kwargs):
+    """Compteurs du destinataire d'une notification supprimée"""
+    from inventaire.services.notification_service import NotificationService
+    
+    NotificationService.ajuster_compteurs(
+        {instance.destinataire_id: -1}, non_lues=0 if instance.lu else 1, total=1
+    )
+
+
 # ===================================================================
 # SIGNAUX PANEL ADMIN DJANGO
 # ===================================================================
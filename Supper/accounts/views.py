@@ -27,6 +27,8 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.core.paginator import Paginator
+from common.pagination import paginer_par_curseur
+from urllib.parse import urlencode
 from datetime import datetime, timedelta
 from django.conf import settings
 from functools import wraps
@@ -46,7 +48,7 @@ logger = logging.getLogger('supper')
 # IMPORTS DES MODÈLES ET FORMULAIRES SUPPER
 # ===================================================================
 from .models import (
-    UtilisateurSUPPER, Poste, JournalAudit, NotificationUtilisateur,
+    UtilisateurSUPPER, Poste, JournalAudit,
     Habilitation, TypePoste, Region, Departement
 )
 from .forms import (
@@ -431,11 +433,9 @@ class ProfileView(LoginRequiredMixin, BilingualMixin, AuditMixin, TemplateView):
         # Statistiques personnelles
         stats_user = self._get_user_stats(user)
         
-        # Notifications non lues
-        notifications_non_lues = NotificationUtilisateur.objects.filter(
-            destinataire=user,
-            lu=False
-        ).count()
+        # Notifications non lues (compteur tenu à jour à l'écriture)
+        from inventaire.services.notification_service import NotificationService
+        notifications_non_lues = NotificationService.compteurs(user)['non_lues']
         
         context.update({
             'user': user,
@@ -2392,58 +2392,32 @@ def journal_audit(request):
     date_debut = request.GET.get('date_debut', '')
     date_fin = request.GET.get('date_fin', '')
     
-    # Construction requête
-    logs = JournalAudit.objects.select_related('utilisateur').all()
-    
-    if search:
-        logs = logs.filter(
-            Q(action__icontains=search) |
-            Q(details__icontains=search) |
-            Q(utilisateur__username__icontains=search) |
-            Q(utilisateur__nom_complet__icontains=search)
-        )
-    
-    if action_filter:
-        logs = logs.filter(action__icontains=action_filter)
-    
-    if user_filter:
-        logs = logs.filter(utilisateur__username=user_filter)
-    
-    if succes_filter:
-        logs = logs.filter(succes=succes_filter == 'true')
-    
-    if date_debut:
-        try:
-            logs = logs.filter(timestamp__gte=datetime.strptime(date_debut, '%Y-%m-%d'))
-        except ValueError:
-            pass
-    
-    if date_fin:
-        try:
-            logs = logs.filter(timestamp__lte=datetime.strptime(date_fin, '%Y-%m-%d'))
-        except ValueError:
-            pass
-    
-    logs = logs.order_by('-timestamp')
+    # Construction requête (filtres alignés sur les index du journal)
+    logs = filtrer_journal_audit(
+        JournalAudit.objects.select_related('utilisateur'),
+        search=search, action=action_filter, user=user_filter,
+        succes=succes_filter, date_debut=date_debut, date_fin=date_fin,
+    )
     
-    # Pagination
-    paginator = Paginator(logs, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur (timestamp, id) : pas d'OFFSET ni de COUNT(*)
+    page_obj = paginer_par_curseur(
+        logs, ('-timestamp', '-id'),
+        apres=request.GET.get('apres'),
+        avant=request.GET.get('avant'),
+        par_page=50,
+    )
     
-    # Statistiques
-    today = timezone.now().date()
-    stats = {
-        'total': JournalAudit.objects.count(),
-        'today': JournalAudit.objects.filter(timestamp__date=today).count(),
-        'success': JournalAudit.objects.filter(succes=True).count(),
-        'errors': JournalAudit.objects.filter(succes=False).count(),
-    }
+    # Statistiques et actions disponibles (cache de quelques minutes)
+    donnees_journal = get_statistiques_journal_audit()
+    stats = donnees_journal['stats']
+    actions_uniques = donnees_journal['actions_uniques']
     
-    # Actions uniques pour filtre
-    actions_uniques = JournalAudit.objects.values_list(
-        'action', flat=True
-    ).distinct()[:30]
+    filtres_query = urlencode({
+        cle: valeur for cle, valeur in [
+            ('search', search), ('action', action_filter), ('user', user_filter),
+            ('succes', succes_filter), ('date_debut', date_debut), ('date_fin', date_fin),
+        ] if valeur
+    })
     
     # Utilisateurs actifs récemment
     users_actifs = UtilisateurSUPPER.objects.filter(
@@ -2452,6 +2426,7 @@ def journal_audit(request):
     
     context = {
         'page_obj': page_obj,
+        'filtres_query': filtres_query,
         'stats': stats,
         'search': search,
         'action_filter': action_filter,
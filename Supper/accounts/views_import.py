@@ -10,6 +10,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
 from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.core.exceptions import ValidationError
 import openpyxl
@@ -20,6 +21,7 @@ from datetime import datetime
 import logging
 
 from accounts.models import Poste, UtilisateurSUPPER
+from common.exports import parcourir, reponse_xlsx
 from common.utils import (
     log_user_action,
     log_erreur_action,
@@ -1135,63 +1137,48 @@ def export_postes_excel(request):
     Exporte la liste des postes au format Excel
     """
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Postes SUPPER"
-    
-    # Styles
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
     # En-têtes
     headers = ['Code', 'Nom', 'Type', 'Région', 'Département', 'Axe Routier', 'Actif', 'Date Création']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
     
-    # Données
-    postes = Poste.objects.all().order_by('region', 'type', 'nom')
-    
-    for row_num, poste in enumerate(postes, 2):
-        ws.cell(row=row_num, column=1).value = poste.code
-        ws.cell(row=row_num, column=2).value = poste.nom
-        ws.cell(row=row_num, column=3).value = 'Péage' if poste.type == 'peage' else 'Pesage'
-        ws.cell(row=row_num, column=4).value = poste.region
-        ws.cell(row=row_num, column=5).value = poste.departement or ''
-        ws.cell(row=row_num, column=6).value = getattr(poste, 'axe_routier', '') or ''
-        ws.cell(row=row_num, column=7).value = 'Oui' if poste.is_active else 'Non'
-        ws.cell(row=row_num, column=8).value = poste.date_creation.strftime('%d/%m/%Y')
-    
-    # Ajuster largeurs
-    widths = [15, 40, 12, 18, 20, 30, 8, 15]
-    for col, width in enumerate(widths, 1):
-        ws.column_dimensions[get_column_letter(col)].width = width
-    
-    # Journaliser
-    log_user_action(
-        request.user,
-        "EXPORT_POSTES",
-        f"Export Excel de {postes.count()} postes",
-        request,
-        nb_postes=postes.count(),
-        format="Excel"
+    # Données (colonnes utiles seulement, lues par lots)
+    postes = Poste.objects.all().order_by('region', 'type', 'nom').values_list(
+        'code', 'nom', 'type', 'region__nom', 'departement__nom', 'axe_routier', 'is_active', 'date_creation'
+    )
+    lignes = (
+        [
+            code,
+            nom,
+            'Péage' if type_poste == 'peage' else 'Pesage',
+            region or '',
+            departement or '',
+            axe_routier or '',
+            'Oui' if is_active else 'Non',
+            timezone.localtime(date_creation).strftime('%d/%m/%Y'),
+        ]
+        for code, nom, type_poste, region, departement, axe_routier, is_active, date_creation in parcourir(postes)
     )
     
-    # Sauvegarder
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    # Journaliser
+    def journaliser(nombre):
+        log_user_action(
+            request.user,
+            "EXPORT_POSTES",
+            f"Export Excel de {nombre} postes",
+            request,
+            nb_postes=nombre,
+            format="Excel"
+        )
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return reponse_xlsx(
+        headers,
+        lignes,
+        f'export_postes_{timestamp}.xlsx',
+        titre="Postes SUPPER",
+        largeurs=[15, 40, 12, 18, 20, 30, 8, 15],
+        couleur_entete="4472C4",
+        a_la_fin=journaliser,
     )
-    response['Content-Disposition'] = f'attachment; filename=export_postes_{timestamp}.xlsx'
-    
-    return response
 
 
 @login_required
@@ -1201,64 +1188,50 @@ def export_utilisateurs_excel(request):
     Exporte la liste des utilisateurs au format Excel
     """
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Utilisateurs SUPPER"
-    
-    # Styles
-    header_fill = PatternFill(start_color="2E7D32", end_color="2E7D32", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
     # En-têtes
     headers = ['Matricule', 'Nom Complet', 'Téléphone', 'Email', 'Habilitation', 
                'Poste Affectation', 'Actif', 'Dernière Connexion']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
     
-    # Données
-    utilisateurs = UtilisateurSUPPER.objects.all().select_related('poste_affectation').order_by('nom_complet')
-    
-    for row_num, user in enumerate(utilisateurs, 2):
-        ws.cell(row=row_num, column=1).value = user.username
-        ws.cell(row=row_num, column=2).value = user.nom_complet
-        ws.cell(row=row_num, column=3).value = user.telephone
-        ws.cell(row=row_num, column=4).value = user.email or ''
-        ws.cell(row=row_num, column=5).value = get_habilitation_label(user.habilitation)
-        ws.cell(row=row_num, column=6).value = user.poste_affectation.nom if user.poste_affectation else ''
-        ws.cell(row=row_num, column=7).value = 'Oui' if user.is_active else 'Non'
-        ws.cell(row=row_num, column=8).value = user.last_login.strftime('%d/%m/%Y %H:%M') if user.last_login else 'Jamais'
-    
-    # Ajuster largeurs
-    widths = [15, 35, 18, 30, 25, 30, 8, 18]
-    for col, width in enumerate(widths, 1):
-        ws.column_dimensions[get_column_letter(col)].width = width
-    
-    # Journaliser
-    log_user_action(
-        request.user,
-        "EXPORT_UTILISATEURS",
-        f"Export Excel de {utilisateurs.count()} utilisateurs",
-        request,
-        nb_utilisateurs=utilisateurs.count(),
-        format="Excel"
+    # Données (colonnes utiles seulement, lues par lots)
+    utilisateurs = UtilisateurSUPPER.objects.all().order_by('nom_complet').values_list(
+        'username', 'nom_complet', 'telephone', 'email', 'habilitation',
+        'poste_affectation__nom', 'is_active', 'last_login'
+    )
+    lignes = (
+        [
+            username,
+            nom_complet,
+            telephone,
+            email or '',
+            get_habilitation_label(habilitation),
+            poste or '',
+            'Oui' if is_active else 'Non',
+            timezone.localtime(last_login).strftime('%d/%m/%Y %H:%M') if last_login else 'Jamais',
+        ]
+        for username, nom_complet, telephone, email, habilitation, poste, is_active, last_login in parcourir(utilisateurs)
     )
     
-    # Sauvegarder
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    # Journaliser
+    def journaliser(nombre):
+        log_user_action(
+            request.user,
+            "EXPORT_UTILISATEURS",
+            f"Export Excel de {nombre} utilisateurs",
+            request,
+            nb_utilisateurs=nombre,
+            format="Excel"
+        )
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return reponse_xlsx(
+        headers,
+        lignes,
+        f'export_utilisateurs_{timestamp}.xlsx',
+        titre="Utilisateurs SUPPER",
+        largeurs=[15, 35, 18, 30, 25, 30, 8, 18],
+        couleur_entete="2E7D32",
+        a_la_fin=journaliser,
     )
-    response['Content-Disposition'] = f'attachment; filename=export_utilisateurs_{timestamp}.xlsx'
-    
-    return response
 
 
 # ===================================================================
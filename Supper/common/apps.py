@@ -41,5 +41,11 @@ class CommonConfig(AppConfig):
         # Import des utilitaires communs
         try:
             import common.utils
+        except ImportError:
+            pass
+        
+        # Import des signaux d'invalidation des caches
+        try:
+            import common.signals
         except ImportError:
             pass
\ No newline at end of file
@@ -0,0 +1,247 @@
+# ===================================================================
+# common/audit.py - Écriture asynchrone et groupée du journal d'audit
+# ===================================================================
+"""
+File d'attente en mémoire pour les entrées du JournalAudit.
+
+Les entrées sont empilées par log_user_action puis insérées par lots
+(bulk_create) depuis un thread de fond : vidage quand le lot est plein,
+toutes les FLUSH_INTERVAL secondes et à l'arrêt du processus.
+
+Les événements de sécurité (connexion, accès refusé, suppression, mots de
+passe, permissions...) restent écrits de manière synchrone, de même que
+toutes les entrées quand la file est pleine ou que le mode asynchrone est
+désactivé (SUPPER_AUDIT['ASYNC'] = False, utile pour les tests).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger('supper')
+
+
+AUDIT_CONFIG_DEFAUT = {
+    'ASYNC': True,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,     # secondes
+    'QUEUE_MAXSIZE': 10000,
+}
+
+# Mots-clés d'actions toujours journalisées de manière synchrone
+ACTIONS_CRITIQUES = [
+    'CONNEXION', 'LOGIN', 'LOGOUT',
+    'ACCÈS_REFUSÉ', 'ACCES_REFUSE', 'REFUS',
+    'SUPPRESSION', 'DELETE',
+    'MOT DE PASSE', 'PASSWORD',
+    'PERMISSION', 'HABILITATION',
+    'ERREUR',
+]
+
+
+def get_audit_config():
+    """Configuration du journal d'audit (settings.SUPPER_AUDIT + valeurs par défaut)"""
+    config = dict(AUDIT_CONFIG_DEFAUT)
+    config.update(getattr(settings, 'SUPPER_AUDIT', {}))
+    return config
+
+
+def est_action_critique(action):
+    """Indique si une action doit être journalisée de manière synchrone"""
+    action_upper = (action or '').upper()
+    return any(mot in action_upper for mot in ACTIONS_CRITIQUES)
+
+
+class AuditJournalWriter:
+    """
+    Écrivain du journal d'audit par lots
+
+    Chaque entrée est un dict contenant les champs du JournalAudit plus,
+    optionnellement, une fonction 'preparer' appelée dans le thread de fond
+    pour construire le message détaillé (évite les requêtes de description
+    utilisateur/poste dans le cycle de la requête HTTP).
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {
+            'enfilees': 0,
+            'ecrites': 0,
+            'synchrones': 0,
+            'lots': 0,
+            'erreurs': 0,
+        }
+
+    # ---------------------------------------------------------------
+    # API publique
+    # ---------------------------------------------------------------
+
+    def enregistrer(self, entree, synchrone=False):
+        """
+        Enregistre une entrée de journal
+
+        Args:
+            entree: dict des champs JournalAudit (+ 'preparer' optionnel)
+            synchrone: True pour écrire immédiatement (événement critique)
+        """
+        config = get_audit_config()
+
+        if synchrone or not config['ASYNC']:
+            self._ecrire_synchrone(entree)
+            return
+
+        # N'empiler qu'après commit : l'utilisateur référencé doit être visible
+        # depuis la connexion du thread de fond
+        transaction.on_commit(lambda: self._enfiler(entree, config))
+
+    def vider(self):
+        """Vide immédiatement la file (appelé à l'arrêt du processus)"""
+        if self._queue is None:
+            return 0
+
+        lot = []
+        while True:
+            try:
+                lot.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if lot:
+            self._ecrire_lot(lot)
+        return len(lot)
+
+    def arreter(self):
+        """Arrête le thread de fond après un dernier vidage"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.vider()
+
+    def get_statut(self):
+        """Statistiques de fonctionnement (supervision)"""
+        return dict(
+            self.stats,
+            en_attente=self._queue.qsize() if self._queue is not None else 0,
+            thread_actif=bool(self._thread and self._thread.is_alive()),
+        )
+
+    # ---------------------------------------------------------------
+    # Fonctionnement interne
+    # ---------------------------------------------------------------
+
+    def _enfiler(self, entree, config):
+        self._assurer_thread(config)
+        try:
+            self._queue.put_nowait(entree)
+            self.stats['enfilees'] += 1
+        except queue.Full:
+            # File saturée : ne jamais perdre une entrée d'audit
+            logger.warning("Journal d'audit: file pleine, écriture synchrone")
+            self._ecrire_synchrone(entree)
+
+    def _assurer_thread(self, config):
+        """Démarre le thread de fond (une fois par processus, y compris après fork)"""
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+
+            self._queue = queue.Queue(maxsize=config['QUEUE_MAXSIZE'])
+            self._stop.clear()
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._boucle,
+                args=(config['BATCH_SIZE'], config['FLUSH_INTERVAL']),
+                name='supper-audit-writer',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _boucle(self, taille_lot, intervalle):
+        lot = []
+        while not self._stop.is_set():
+            try:
+                lot.append(self._queue.get(timeout=intervalle))
+                if len(lot) < taille_lot:
+                    continue
+            except queue.Empty:
+                pass
+
+            if lot:
+                self._ecrire_lot(lot)
+                lot = []
+
+        if lot:
+            self._ecrire_lot(lot)
+
+    def _construire(self, entree):
+        from accounts.models import JournalAudit
+
+        champs = dict(entree)
+        preparer = champs.pop('preparer', None)
+        if preparer:
+            champs.update(preparer())
+        return JournalAudit(**champs)
+
+    def _ecrire_synchrone(self, entree):
+        try:
+            self._construire(entree).save()
+            self.stats['synchrones'] += 1
+        except Exception as e:
+            self.stats['erreurs'] += 1
+            logger.error(f"Erreur journalisation: {str(e)}")
+
+    def _ecrire_lot(self, lot):
+        from accounts.models import JournalAudit
+
+        try:
+            objets = []
+            for entree in lot:
+                try:
+                    objets.append(self._construire(entree))
+                except Exception as e:
+                    self.stats['erreurs'] += 1
+                    logger.error(f"Erreur préparation entrée d'audit: {str(e)}")
+
+            try:
+                JournalAudit.objects.bulk_create(objets)
+                self.stats['ecrites'] += len(objets)
+            except Exception as e:
+                # Isoler la ou les entrées fautives sans perdre le reste du lot
+                logger.error(f"Erreur insertion groupée du journal ({len(objets)} entrées): {str(e)}")
+                for objet in objets:
+                    try:
+                        objet.save()
+                        self.stats['ecrites'] += 1
+                    except Exception as e_ligne:
+                        self.stats['erreurs'] += 1
+                        logger.error(f"Entrée d'audit perdue ({objet.action}): {str(e_ligne)}")
+
+            self.stats['lots'] += 1
+        finally:
+            # Le thread de fond ne doit pas conserver de connexion ouverte
+            if threading.current_thread() is self._thread:
+                connections.close_all()
+
+
+audit_writer = AuditJournalWriter()
+
+
+@atexit.register
+def _vider_journal_a_l_arret():
+    try:
+        audit_writer.arreter()
+    except Exception as e:
+        logger.error(f"Erreur vidage du journal d'audit à l'arrêt: {str(e)}")
@@ -0,0 +1,196 @@
+# ===================================================================
+# common/cache_partage.py - Calculs coûteux dans le cache partagé
+# ===================================================================
+"""
+Mise en cache des calculs coûteux (prévisions de recettes, classements...)
+dans le cache partagé par tous les processus (settings.CACHES : table
+PostgreSQL par défaut, répertoire ou Redis en option).
+
+cached_computation(nom, calcul, parametres, ...) :
+- clé versionnée : nom du calcul, version (à incrémenter quand la structure
+  du résultat change) et empreinte des paramètres ;
+- étiquettes d'invalidation ('poste:12', 'postes', 'calendrier') : chaque
+  étiquette a un jeton en cache, renouvelé par invalider_etiquettes /
+  invalider_postes. Le résultat mémorise les jetons de ses étiquettes au
+  moment du calcul et devient périmé dès que l'un d'eux change ;
+- un seul recalcul à la fois : le premier processus qui trouve le résultat
+  périmé ou expiré pose un verrou (cache.add) et recalcule, les autres
+  servent l'ancien résultat en attendant. Sans ancien résultat, ils
+  attendent brièvement celui du processus qui calcule, puis calculent
+  eux-mêmes en dernier recours.
+
+Un résultat est frais pendant `duree` secondes, puis peut encore être servi
+périmé pendant `delai_grace` secondes, le temps d'un recalcul.
+
+cache.add est atomique avec les caches base de données et Redis ; avec le
+cache fichiers, deux processus peuvent exceptionnellement recalculer en
+même temps.
+
+Usage:
+    return cached_computation(
+        'prevision_recettes',
+        lambda: ForecastingService._prevoir_recettes(poste, nb_jours),
+        parametres=[poste.id, nb_jours, date_reference],
+        etiquettes=[etiquette_poste(poste.id)],
+        duree=6 * 3600,
+    )
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger('supper')
+
+
+PREFIXE = 'calcul'
+
+DUREE_DEFAUT = 15 * 60          # résultat frais (secondes)
+DELAI_GRACE_DEFAUT = 60 * 60    # résultat périmé encore servi pendant un recalcul
+VERROU_TIMEOUT = 120            # au-delà, un calcul bloqué ne retient plus les autres
+ATTENTE_MAX = 5.0               # attente du résultat d'un autre processus (secondes)
+INTERVALLE_ATTENTE = 0.1
+
+# Étiquettes communes
+ETIQUETTE_TOUS_POSTES = 'postes'      # calculs portant sur l'ensemble des postes
+ETIQUETTE_CALENDRIER = 'calendrier'   # configurations de jours (ConfigurationJour)
+
+
+def etiquette_poste(poste_id):
+    return f"poste:{poste_id}"
+
+
+def etiquettes_postes(postes_ids=None):
+    """Étiquettes d'un calcul portant sur les postes donnés, ou sur tous (None)"""
+    if postes_ids is None:
+        return [ETIQUETTE_TOUS_POSTES]
+    return [etiquette_poste(poste_id) for poste_id in sorted(set(postes_ids))]
+
+
+def _cle_etiquette(etiquette):
+    return f"{PREFIXE}:etiquette:{etiquette}"
+
+
+def _cle_calcul(nom, version, parametres):
+    empreinte = hashlib.sha256(
+        json.dumps(parametres, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:24]
+    return f"{PREFIXE}:{nom}:v{version}:{empreinte}"
+
+
+def _jetons(etiquettes, lues):
+    """
+    Jetons courants des étiquettes ; une étiquette sans jeton (jamais
+    invalidée, ou évincée du cache) en reçoit un nouveau : un résultat ne
+    peut donc pas redevenir frais après l'éviction d'un jeton
+    """
+    jetons = {}
+    for etiquette in etiquettes:
+        cle = _cle_etiquette(etiquette)
+        jeton = lues.get(cle)
+        if jeton is None:
+            cache.add(cle, time.time_ns(), None)
+            jeton = cache.get(cle)
+        jetons[etiquette] = jeton
+    return jetons
+
+
+# ===================================================================
+# CALCUL EN CACHE
+# ===================================================================
+
+def cached_computation(nom, calcul, parametres=None, version=1, etiquettes=(),
+                       duree=DUREE_DEFAUT, delai_grace=DELAI_GRACE_DEFAUT):
+    """
+    Retourne le résultat en cache de calcul(), recalculé au plus par un
+    processus à la fois lorsqu'il a expiré ou que l'une de ses étiquettes
+    a été invalidée
+
+    Args:
+        nom: identifiant du calcul
+        calcul: fonction sans argument produisant le résultat (picklable)
+        parametres: valeurs JSON-sérialisables (str() sinon) distinguant les résultats
+        version: version du calcul, à incrémenter quand le résultat change de forme
+        etiquettes: étiquettes d'invalidation (etiquettes_postes, ETIQUETTE_CALENDRIER...)
+        duree: durée de fraîcheur du résultat (secondes)
+        delai_grace: durée supplémentaire pendant laquelle le résultat peut
+            être servi périmé pendant qu'un autre processus le recalcule
+    """
+    cle = _cle_calcul(nom, version, parametres)
+    etiquettes = list(etiquettes)
+    lues = cache.get_many([cle] + [_cle_etiquette(etiquette) for etiquette in etiquettes])
+    jetons = _jetons(etiquettes, lues)
+
+    entree = lues.get(cle)
+    if entree is not None and entree['jetons'] == jetons and time.time() < entree['expire_le']:
+        return entree['valeur']
+
+    verrou = f"{cle}:verrou"
+    if cache.add(verrou, 1, VERROU_TIMEOUT):
+        try:
+            return _calculer(nom, cle, calcul, jetons, duree, delai_grace)
+        finally:
+            cache.delete(verrou)
+
+    # Un autre processus recalcule : servir l'ancien résultat
+    if entree is not None:
+        logger.debug(f"[CACHE] {nom}: recalcul en cours ailleurs, résultat périmé servi")
+        return entree['valeur']
+
+    # Aucun résultat à servir : attendre celui de l'autre processus
+    limite = time.monotonic() + ATTENTE_MAX
+    while time.monotonic() < limite:
+        time.sleep(INTERVALLE_ATTENTE)
+        entree = cache.get(cle)
+        if entree is not None:
+            return entree['valeur']
+
+    logger.warning(f"[CACHE] {nom}: résultat toujours absent après {ATTENTE_MAX:.0f} s, calcul sans verrou")
+    return _calculer(nom, cle, calcul, jetons, duree, delai_grace)
+
+
+def _calculer(nom, cle, calcul, jetons, duree, delai_grace):
+    """Calcule et enregistre le résultat avec les jetons lus avant le calcul"""
+    debut = time.monotonic()
+    valeur = calcul()
+    duree_ms = int((time.monotonic() - debut) * 1000)
+
+    entree = {
+        'valeur': valeur,
+        'jetons': jetons,
+        'expire_le': time.time() + duree,
+    }
+    try:
+        cache.set(cle, entree, duree + delai_grace)
+    except Exception as e:
+        # Résultat non sérialisable ou cache indisponible : le calcul reste servi
+        logger.warning(f"[CACHE] {nom}: enregistrement impossible: {e}")
+
+    logger.debug(f"[CACHE] {nom} recalculé en {duree_ms} ms")
+    return valeur
+
+
+# ===================================================================
+# INVALIDATION
+# ===================================================================
+
+def invalider_etiquettes(*etiquettes):
+    """Rend périmés tous les résultats portant l'une des étiquettes"""
+    if not etiquettes:
+        return
+    jeton = time.time_ns()
+    cache.set_many({_cle_etiquette(etiquette): jeton for etiquette in etiquettes}, None)
+
+
+def invalider_postes(postes_ids):
+    """
+    Écriture sur des postes : résultats de ces postes et résultats portant
+    sur l'ensemble des postes
+    """
+    invalider_etiquettes(
+        ETIQUETTE_TOUS_POSTES,
+        *(etiquette_poste(poste_id) for poste_id in postes_ids if poste_id),
+    )
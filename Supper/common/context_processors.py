@@ -4,70 +4,91 @@
 # ===================================================================
 
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from datetime import timedelta
+import logging
 
 User = get_user_model()
+logger = logging.getLogger('supper')
+
+# Durée de vie courte : les statistiques du jour sont aussi invalidées par signaux (common/signals.py)
+COMPTEURS_CACHE_TIMEOUT = 60
+
+
+def cle_compteurs_jour(jour):
+    """Clé de cache des statistiques rapides de la sidebar pour un jour"""
+    return f"ctx_stats_jour_{jour.isoformat()}"
+
+
+def _compteurs_notifications(user):
+    """Compteurs de notifications (non lues / total), tenus à jour à l'écriture"""
+    try:
+        from inventaire.services.notification_service import NotificationService
+        return NotificationService.compteurs(user)
+    except Exception as e:
+        logger.warning(f"Compteurs notifications indisponibles: {str(e)}")
+        return {'non_lues': 0, 'total': 0}
+
+
+def _compteurs_jour():
+    """Utilisateurs actifs, inventaires et recettes du jour, servis depuis le cache"""
+    today = timezone.now().date()
+    cle = cle_compteurs_jour(today)
+    compteurs = cache.get(cle)
+    
+    if compteurs is None:
+        try:
+            from inventaire.models import InventaireJournalier, RecetteJournaliere
+            
+            compteurs = {
+                'users_count': User.objects.filter(is_active=True).count(),
+                'inventaires_today': InventaireJournalier.objects.filter(date=today).count(),
+                'recettes_today': RecetteJournaliere.objects.filter(date=today).count(),
+            }
+        except Exception as e:
+            logger.warning(f"Statistiques sidebar indisponibles: {str(e)}")
+            return {'users_count': 0, 'inventaires_today': 0, 'recettes_today': 0}
+        cache.set(cle, compteurs, COMPTEURS_CACHE_TIMEOUT)
+    
+    return compteurs
+
 
 def admin_context(request):
     """
     Context processor pour l'interface admin
     Fournit des données communes à tous les templates admin
-    """
-    context = {}
     
+    Les valeurs sont paresseuses : aucune requête n'est exécutée tant qu'un
+    template ne les utilise pas, et chaque bloc n'est calculé qu'une fois
+    par requête (puis servi depuis le cache pendant COMPTEURS_CACHE_TIMEOUT).
+    """
     # Données utilisateur uniquement si connecté
-    if hasattr(request, 'user') and request.user.is_authenticated:
-        user = request.user
-        
-        # Notifications non lues
-        try:
-            unread_count = user.notifications_recues.filter(lue=False).count()
-            recent_notifications = user.notifications_recues.order_by('-date_creation')[:5]
-            total_notifications = user.notifications_recues.count()
-            
-            context.update({
-                'unread_notifications_count': unread_count,
-                'recent_notifications': recent_notifications,
-                'total_notifications_count': total_notifications,
-            })
-        except Exception:
-            # Si le modèle NotificationUtilisateur n'existe pas encore
-            context.update({
-                'unread_notifications_count': 0,
-                'recent_notifications': [],
-                'total_notifications_count': 0,
-            })
-        
+    if not (hasattr(request, 'user') and request.user.is_authenticated):
+        return {}
+    
+    # Mémoïsation par requête (plusieurs rendus de templates par requête)
+    context = getattr(request, '_supper_admin_context', None)
+    if context is not None:
+        return context
+    
+    user = request.user
+    notifications = SimpleLazyObject(lambda: _compteurs_notifications(user))
+    stats_jour = SimpleLazyObject(lambda: _compteurs_jour())
+    
+    context = {
+        # Notifications
+        'unread_notifications_count': SimpleLazyObject(lambda: notifications['non_lues']),
+        'recent_notifications': user.notifications_recues.order_by('-date_creation')[:5],
+        'total_notifications_count': SimpleLazyObject(lambda: notifications['total']),
         # Statistiques rapides pour la sidebar
-        try:
-            # Compter les utilisateurs
-            users_count = User.objects.filter(is_active=True).count()
-            
-            # Compter les inventaires d'aujourd'hui
-            from inventaire.models import InventaireJournalier
-            today = timezone.now().date()
-            inventaires_today = InventaireJournalier.objects.filter(date=today).count()
-            
-            # Compter les recettes d'aujourd'hui
-            from inventaire.models import RecetteJournaliere
-            recettes_today = RecetteJournaliere.objects.filter(date=today).count()
-            
-            context.update({
-                'users_count': users_count,
-                'inventaires_today': inventaires_today,
-                'recettes_today': recettes_today,
-            })
-            
-        except Exception:
-            # Si les modèles n'existent pas encore
-            context.update({
-                'users_count': 0,
-                'inventaires_today': 0,
-                'recettes_today': 0,
-            })
+        'users_count': SimpleLazyObject(lambda: stats_jour['users_count']),
+        'inventaires_today': SimpleLazyObject(lambda: stats_jour['inventaires_today']),
+        'recettes_today': SimpleLazyObject(lambda: stats_jour['recettes_today']),
+    }
     
+    request._supper_admin_context = context
     return context
 
 
@@ -0,0 +1,174 @@
+# ===================================================================
+# common/exports.py - Exports CSV / Excel en flux
+# ===================================================================
+"""
+Moteur d'export commun des listes (quittancements, historique de stock,
+postes, utilisateurs, journal d'audit...).
+
+La mémoire consommée ne dépend pas du nombre de lignes exportées :
+- les lignes sont lues par lots (`queryset.iterator(chunk_size=...)`,
+  curseur côté serveur sous PostgreSQL), jamais chargées en bloc dans le
+  cache du queryset ;
+- CSV : StreamingHttpResponse, chaque lot de lignes est envoyé au client
+  dès qu'il est formaté ;
+- Excel : classeur openpyxl en mode écriture seule (les lignes sont
+  sérialisées au fil de l'eau dans un fichier temporaire), puis servi par
+  FileResponse qui le lit par blocs et le supprime à la fermeture.
+
+Usage:
+    lignes = ([q.numero, q.poste.nom, ...] for q in parcourir(queryset))
+    return reponse_csv(entetes, lignes, 'quittancements.csv')
+    return reponse_xlsx(entetes, lignes, 'quittancements.xlsx', titre='Quittancements')
+"""
+
+import csv
+import logging
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+logger = logging.getLogger('supper')
+
+
+TAILLE_LOT_EXPORT = 2000
+LIGNES_PAR_ENVOI = 500
+
+TYPE_CSV = 'text/csv; charset=utf-8'
+TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+# ===================================================================
+# LECTURE PAR LOTS
+# ===================================================================
+
+def parcourir(queryset, taille_lot=TAILLE_LOT_EXPORT):
+    """
+    Itère un queryset par lots, sans remplir son cache
+
+    Sous PostgreSQL les lignes proviennent d'un curseur côté serveur : au
+    plus `taille_lot` instances sont en mémoire à la fois.
+    """
+    return queryset.iterator(chunk_size=taille_lot)
+
+
+# ===================================================================
+# CSV
+# ===================================================================
+
+class _TamponLigne:
+    """Pseudo-fichier pour csv.writer : retourne la ligne formatée"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def reponse_csv(entetes, lignes, nom_fichier, delimiteur=';', a_la_fin=None):
+    """
+    Réponse CSV en flux (BOM UTF-8 et séparateur ';' pour Excel)
+
+    Args:
+        entetes: libellés des colonnes
+        lignes: itérable de séquences de valeurs, consommé pendant l'envoi
+        nom_fichier: nom du fichier téléchargé
+        a_la_fin: fonction appelée avec le nombre de lignes une fois le
+            fichier entièrement envoyé (journalisation)
+
+    Returns:
+        StreamingHttpResponse
+    """
+    writer = csv.writer(_TamponLigne(), delimiter=delimiteur)
+
+    def flux():
+        nombre = 0
+        lot = ['\ufeff', writer.writerow(entetes)]
+        for ligne in lignes:
+            lot.append(writer.writerow(['' if valeur is None else valeur for valeur in ligne]))
+            nombre += 1
+            if len(lot) >= LIGNES_PAR_ENVOI:
+                yield ''.join(lot)
+                lot = []
+        yield ''.join(lot)
+
+        logger.info(f"📤 EXPORT CSV | {nom_fichier} | {nombre} ligne(s)")
+        if a_la_fin is not None:
+            a_la_fin(nombre)
+
+    response = StreamingHttpResponse(flux(), content_type=TYPE_CSV)
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    return response
+
+
+# ===================================================================
+# EXCEL
+# ===================================================================
+
+def reponse_xlsx(entetes, lignes, nom_fichier, titre='Export', largeurs=None,
+                 couleur_entete='4472C4', bordures=False, a_la_fin=None):
+    """
+    Réponse Excel (.xlsx) construite en mode écriture seule
+
+    Args:
+        entetes: libellés des colonnes (en gras, sur fond couleur_entete)
+        lignes: itérable de séquences de valeurs
+        nom_fichier: nom du fichier téléchargé
+        titre: nom de la feuille
+        largeurs: largeur de chaque colonne, ou nombre unique pour toutes
+        bordures: encadre chaque cellule de données
+        a_la_fin: fonction appelée avec le nombre de lignes écrites
+
+    Returns:
+        FileResponse sur un fichier temporaire supprimé après envoi
+
+    Raises:
+        ImportError: openpyxl non installé
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(titre[:31])
+
+    # Les largeurs doivent précéder toute ligne en mode écriture seule
+    if isinstance(largeurs, (int, float)):
+        largeurs = [largeurs] * len(entetes)
+    for col, largeur in enumerate(largeurs or [], 1):
+        ws.column_dimensions[get_column_letter(col)].width = largeur
+
+    cote = Side(style='thin')
+    bordure = Border(left=cote, right=cote, top=cote, bottom=cote) if bordures else None
+
+    def cellule(valeur, entete=False):
+        cell = WriteOnlyCell(ws, value=valeur)
+        if entete:
+            cell.font = Font(bold=True, color='FFFFFF')
+            cell.fill = PatternFill(start_color=couleur_entete, end_color=couleur_entete, fill_type='solid')
+            cell.alignment = Alignment(horizontal='center')
+        if bordure is not None:
+            cell.border = bordure
+        return cell
+
+    ws.append([cellule(entete, entete=True) for entete in entetes])
+
+    nombre = 0
+    for ligne in lignes:
+        if bordure is not None:
+            ws.append([cellule(valeur) for valeur in ligne])
+        else:
+            ws.append(ligne)
+        nombre += 1
+
+    fichier = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        wb.save(fichier)
+        fichier.seek(0)
+    except Exception:
+        fichier.close()
+        raise
+
+    logger.info(f"📤 EXPORT EXCEL | {nom_fichier} | {nombre} ligne(s)")
+    if a_la_fin is not None:
+        a_la_fin(nombre)
+
+    return FileResponse(fichier, as_attachment=True, filename=nom_fichier, content_type=TYPE_XLSX)
@@ -4,8 +4,6 @@
 # ===================================================================
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
 import logging
 
 logger = logging.getLogger('supper')
@@ -36,7 +34,7 @@ class Command(BaseCommand):
     
     def handle(self, *args, **options):
         try:
-            from accounts.models import JournalAudit
+            from common.partitions import appliquer_retention
         except ImportError:
             self.stdout.write(
                 self.style.ERROR('Impossible d\'importer JournalAudit')
@@ -47,13 +45,18 @@ class Command(BaseCommand):
         dry_run = options['dry_run']
         verbose = options['verbose']
         
-        cutoff_date = timezone.now() - timedelta(days=days)
+        # Table partitionnée (PostgreSQL) : suppression des partitions mensuelles
+        # périmées ; sinon suppression par lots (voir common/partitions.py)
+        resultat = appliquer_retention(days, dry_run=dry_run)
+        cutoff_date = resultat['date_limite']
+        count = resultat['lignes']
         
-        # Compter les logs à supprimer
-        logs_to_delete = JournalAudit.objects.filter(timestamp__lt=cutoff_date)
-        count = logs_to_delete.count()
+        if verbose:
+            self.stdout.write(f'Date limite: {cutoff_date}')
+            for nom in resultat['partitions']:
+                self.stdout.write(f'Partition concernée: {nom}')
         
-        if count == 0:
+        if count == 0 and not resultat['partitions']:
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Aucun log à supprimer (antérieur à {cutoff_date.date()})'
@@ -61,10 +64,6 @@ class Command(BaseCommand):
             )
             return
         
-        if verbose:
-            self.stdout.write(f'Logs trouvés pour suppression: {count}')
-            self.stdout.write(f'Date limite: {cutoff_date}')
-        
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(
@@ -73,15 +72,12 @@ class Command(BaseCommand):
                 )
             )
         else:
-            # Suppression effective
-            deleted_count = logs_to_delete.delete()[0]
-            
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Supprimé {deleted_count} entrées de log '
+                    f'Supprimé {count} entrées de log '
                     f'antérieures à {cutoff_date.date()}'
                 )
             )
             
             # Journaliser cette action de maintenance
-            logger.info(f'Nettoyage automatique: {deleted_count} logs supprimés')
+            logger.info(f'Nettoyage automatique: {count} logs supprimés')
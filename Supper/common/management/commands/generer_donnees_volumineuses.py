@@ -0,0 +1,729 @@
+# ===================================================================
+# common/management/commands/generer_donnees_volumineuses.py
+# Génère un jeu de données à la volumétrie de production
+# ===================================================================
+"""
+Peuple une base vide avec un jeu de données synthétique reproductible, à la
+volumétrie de la production, pour mesurer les performances (voir la
+commande mesurer_performances) :
+- ~100 postes de péage et ~20 stations de pesage répartis sur les régions,
+  avec leurs chefs de poste, agents d'inventaire et régisseurs ;
+- plusieurs années d'inventaires journaliers (les 10 périodes horaires
+  08h-18h) et de recettes déclarées, quelques jours manquants par poste ;
+- pour chaque poste de péage, un chargement mensuel de tickets puis les
+  ventes de chaque recette : séries vendues fragmentées (une série par
+  recette, deux à la jonction de deux lots), séries restant en stock,
+  historique de stock et événements StockEvent ;
+- pour chaque station de pesage, des centaines de milliers d'amendes sur un
+  parc de véhicules récurrents, leurs événements d'émission et de
+  paiement, les pesées journalières et les quittancements par décade.
+
+Les lignes sont insérées par bulk_create, sans signaux : les tables
+dérivées (agrégats de recettes et d'amendes, index des mouvements de
+tickets, instantanés du tableau de bord) sont reconstruites à la fin par
+leurs commandes dédiées.
+
+Une même graine produit les mêmes données : deux mesures faites sur deux
+commits différents portent sur un jeu identique (à la date de fin près,
+qui est la veille du jour de génération).
+
+Usage:
+    python manage.py generer_donnees_volumineuses
+    python manage.py generer_donnees_volumineuses --graine 7 --postes 20 --stations 5 --annees 1 --amendes 20000
+"""
+
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import logging
+import random
+from time import perf_counter
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+
+# Préfixe des codes de postes et des matricules générés
+PREFIXE = 'VOL'
+MOT_DE_PASSE = 'Volume2024!'
+PRIX_TICKET = 500
+
+REGIONS = [
+    'Adamaoua', 'Centre', 'Est', 'Extrême-Nord', 'Littoral',
+    'Nord', 'Nord-Ouest', 'Ouest', 'Sud', 'Sud-Ouest',
+]
+VILLES = [
+    'Ngaoundéré', 'Yaoundé', 'Bertoua', 'Maroua', 'Douala', 'Garoua',
+    'Bamenda', 'Bafoussam', 'Ebolowa', 'Buea', 'Edéa', 'Kribi', 'Limbé',
+    'Nkongsamba', 'Dschang', 'Foumban', 'Mbalmayo', 'Obala', 'Mbanga',
+    'Kumba', 'Sangmélima', 'Batouri', 'Meiganga', 'Guider', 'Mora',
+]
+COULEURS = ['Bleu', 'Vert', 'Rouge', 'Jaune', 'Orange']
+PRODUITS = [
+    'Ciment', 'Bois', 'Carburant', 'Cacao', 'Café', 'Coton', 'Riz',
+    'Sable', 'Gravier', 'Fer à béton', 'Conteneur', 'Bétail', 'Engrais',
+]
+NOMS = [
+    'Mbarga', 'Nkoulou', 'Fouda', 'Abena', 'Tchoua', 'Ngono', 'Ekambi',
+    'Kamga', 'Njoya', 'Bello', 'Hamadou', 'Moussa', 'Essomba', 'Atangana',
+    'Manga', 'Etoa', 'Djomo', 'Tchakounte', 'Ngassa', 'Oumarou',
+]
+PRENOMS = [
+    'Jean', 'Paul', 'Marie', 'Aïcha', 'Ibrahim', 'Serge', 'Brigitte',
+    'Alain', 'Fatimatou', 'Eric', 'Christelle', 'Ousmane', 'Pierre',
+    'Sandrine', 'Boris', 'Hervé', 'Yannick', 'Mireille',
+]
+MONTANTS_AMENDES = [25000, 50000, 75000, 100000, 150000, 250000, 500000]
+
+# Probabilités par poste et par jour
+TAUX_INVENTAIRE_MANQUANT = 0.05
+TAUX_RECETTE_MANQUANTE = 0.03
+TAUX_JOURNEE_IMPERTINENTE = 0.02
+TAUX_AMENDES_PAYEES = 0.75
+
+
+def _moment(jour, heure, minute=0):
+    """Datetime aware du fuseau du projet"""
+    return timezone.make_aware(datetime.combine(jour, time(heure, minute)))
+
+
+@contextmanager
+def _horodatages_fournis(*champs):
+    """
+    Désactive auto_now_add sur les champs donnés le temps de la génération :
+    les dates de création sont celles de l'historique simulé
+    """
+    anciens = [(champ, champ.auto_now_add) for champ in champs]
+    for champ in champs:
+        champ.auto_now_add = False
+    try:
+        yield
+    finally:
+        for champ, valeur in anciens:
+            champ.auto_now_add = valeur
+
+
+class Command(BaseCommand):
+    help = 'Génère un jeu de données reproductible à la volumétrie de production'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--graine',
+            type=int,
+            default=42,
+            help='Graine du générateur aléatoire (défaut: 42)'
+        )
+        parser.add_argument(
+            '--postes',
+            type=int,
+            default=100,
+            help='Nombre de postes de péage (défaut: 100)'
+        )
+        parser.add_argument(
+            '--stations',
+            type=int,
+            default=20,
+            help='Nombre de stations de pesage (défaut: 20)'
+        )
+        parser.add_argument(
+            '--annees',
+            type=int,
+            default=3,
+            help="Nombre d'années d'historique (défaut: 3)"
+        )
+        parser.add_argument(
+            '--amendes',
+            type=int,
+            default=300000,
+            help="Nombre d'amendes de pesage (défaut: 300000)"
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=5000,
+            help='Lignes par INSERT groupé (défaut: 5000)'
+        )
+        parser.add_argument(
+            '--sans-reconstruction',
+            action='store_true',
+            help='Ne pas reconstruire les agrégats et instantanés à la fin'
+        )
+
+    def handle(self, *args, **options):
+        from accounts.models import Poste
+        from inventaire.models import (
+            HistoriqueStock, InventaireJournalier, RecetteJournaliere,
+            SerieTicket, StockEvent,
+        )
+        from inventaire.models_pesage import AmendeEmise
+
+        if options['postes'] < 1 or options['stations'] < 1 or options['annees'] < 1:
+            raise CommandError('--postes, --stations et --annees doivent être positifs')
+
+        if Poste.objects.filter(code__startswith=f'{PREFIXE}-').exists():
+            raise CommandError(
+                f"Des données générées existent déjà (postes {PREFIXE}-*). "
+                f"Repartir d'une base vide : python manage.py flush"
+            )
+
+        self.rng = random.Random(options['graine'])
+        self.taille_lot = options['taille_lot']
+        self.fin = timezone.localdate() - timedelta(days=1)
+        self.debut = self.fin - timedelta(days=365 * options['annees'] - 1)
+        self.jours = [self.debut + timedelta(days=i) for i in range((self.fin - self.debut).days + 1)]
+        self.volumes = Counter()
+
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"GÉNÉRATION - GRAINE {options['graine']} - PÉRIODE {self.debut} → {self.fin}")
+        self.stdout.write(f"{'='*60}\n")
+
+        debut_chrono = perf_counter()
+
+        champs_dates = [
+            InventaireJournalier._meta.get_field('date_creation'),
+            RecetteJournaliere._meta.get_field('date_saisie'),
+            HistoriqueStock._meta.get_field('date_mouvement'),
+            SerieTicket._meta.get_field('date_reception'),
+            StockEvent._meta.get_field('created_at'),
+            AmendeEmise._meta.get_field('date_creation'),
+        ]
+        with _horodatages_fournis(*champs_dates), transaction.atomic():
+            postes, stations, equipes = self._creer_referentiel(options['postes'], options['stations'])
+            self._generer_peage(postes, equipes)
+            self._generer_pesage(stations, equipes, options['amendes'])
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        if not options['sans_reconstruction']:
+            self._reconstruire()
+
+        duree = perf_counter() - debut_chrono
+        self.stdout.write('')
+        for modele, nombre in sorted(self.volumes.items()):
+            self.stdout.write(f"  {modele:<48} {nombre:>10}")
+        logger.info(
+            f"Données volumineuses générées (graine {options['graine']}) : "
+            f"{sum(self.volumes.values())} lignes en {duree:.0f} s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {sum(self.volumes.values())} lignes générées en {duree:.0f} s "
+            f"(mot de passe des comptes {PREFIXE}*: {MOT_DE_PASSE})"
+        ))
+
+    # ===================================================================
+    # INSERTION
+    # ===================================================================
+
+    def _inserer(self, model, objets):
+        """bulk_create par lots ; les objets reçoivent leur clé primaire"""
+        for indice in range(0, len(objets), self.taille_lot):
+            model.objects.bulk_create(objets[indice:indice + self.taille_lot])
+        self.volumes[model._meta.label] += len(objets)
+        return objets
+
+    # ===================================================================
+    # RÉFÉRENTIEL : RÉGIONS, POSTES, UTILISATEURS
+    # ===================================================================
+
+    def _creer_referentiel(self, nombre_postes, nombre_stations):
+        from django.contrib.auth.hashers import make_password
+        from accounts.models import Poste, Region, UtilisateurSUPPER
+
+        regions = [Region.objects.get_or_create(nom=nom)[0] for nom in REGIONS]
+
+        postes = [
+            Poste(
+                code=f'{PREFIXE}-P{indice:03d}',
+                nom=f'Péage {VILLES[indice % len(VILLES)]} {indice:03d}',
+                type='peage',
+                region=regions[indice % len(regions)],
+                is_active=True,
+            )
+            for indice in range(1, nombre_postes + 1)
+        ]
+        stations = [
+            Poste(
+                code=f'{PREFIXE}-S{indice:03d}',
+                nom=f'Pesage {VILLES[indice % len(VILLES)]} {indice:03d}',
+                type='pesage',
+                region=regions[indice % len(regions)],
+                is_active=True,
+            )
+            for indice in range(1, nombre_stations + 1)
+        ]
+        self._inserer(Poste, postes + stations)
+
+        # Un mot de passe haché une seule fois pour tous les comptes ;
+        # save() individuel pour l'attribution des permissions
+        mot_de_passe = make_password(MOT_DE_PASSE)
+        equipes = {}
+        roles = {
+            'peage': ('chef_peage', 'agent_inventaire'),
+            'pesage': ('chef_station_pesage', 'regisseur_pesage'),
+        }
+        for poste in postes + stations:
+            equipe = []
+            for numero, habilitation in enumerate(roles[poste.type], 1):
+                utilisateur = UtilisateurSUPPER(
+                    username=f'{PREFIXE}{poste.code[4:]}{numero}',
+                    nom_complet=f'{self.rng.choice(PRENOMS)} {self.rng.choice(NOMS)}',
+                    telephone=f'+2376{self.rng.randint(10000000, 99999999)}',
+                    habilitation=habilitation,
+                    poste_affectation=poste,
+                    password=mot_de_passe,
+                )
+                utilisateur.save()
+                equipe.append(utilisateur)
+            equipes[poste.id] = equipe
+
+        # Compte d'administration utilisé par mesurer_performances
+        UtilisateurSUPPER(
+            username=f'{PREFIXE}ADMIN',
+            nom_complet='Administrateur Volumétrie',
+            telephone='+237600000000',
+            habilitation='admin_principal',
+            is_staff=True,
+            is_superuser=True,
+            password=mot_de_passe,
+        ).save()
+        self.volumes[UtilisateurSUPPER._meta.label] += len(equipes) * 2 + 1
+
+        self.stdout.write(f"📍 {len(postes)} poste(s) de péage, {len(stations)} station(s) de pesage")
+        return postes, stations, equipes
+
+    # ===================================================================
+    # PÉAGE : INVENTAIRES, RECETTES, STOCK DE TICKETS
+    # ===================================================================
+
+    def _generer_peage(self, postes, equipes):
+        from inventaire.models import CouleurTicket, GestionStock
+
+        couleurs = [CouleurTicket.obtenir_ou_creer(libelle) for libelle in COULEURS]
+        # Dernier numéro attribué par (couleur, année) : pas de chevauchement entre postes
+        compteurs_tickets = defaultdict(int)
+        stocks = []
+
+        for rang, poste in enumerate(postes, 1):
+            chef, agent = equipes[poste.id]
+            inventaires = self._generer_inventaires(poste, agent)
+            recettes = self._generer_recettes(poste, chef, inventaires)
+            tickets_en_stock = self._generer_stock(poste, chef, recettes, couleurs, compteurs_tickets)
+            stocks.append(GestionStock(
+                poste=poste,
+                valeur_monetaire=Decimal(tickets_en_stock * PRIX_TICKET),
+                nombre_tickets=tickets_en_stock,
+            ))
+
+            if rang % 10 == 0 or rang == len(postes):
+                self.stdout.write(f"🛣️  Péage : {rang}/{len(postes)} poste(s)")
+
+        self._inserer(GestionStock, stocks)
+
+    def _generer_inventaires(self, poste, agent):
+        """Inventaires des 10 périodes horaires, trafic propre au poste"""
+        from inventaire.models import DetailInventairePeriode, InventaireJournalier, PeriodeHoraire
+
+        rng = self.rng
+        trafic = rng.randint(60, 320)
+        inventaires = []
+        comptages = []
+        for jour in self.jours:
+            if rng.random() < TAUX_INVENTAIRE_MANQUANT:
+                continue
+            facteur = 0.8 if jour.weekday() >= 5 else 1.0
+            comptes = [max(0, int(rng.gauss(trafic * facteur, trafic * 0.2))) for _ in PeriodeHoraire.values]
+            inventaires.append(InventaireJournalier(
+                poste=poste,
+                date=jour,
+                type_inventaire='normal',
+                agent_saisie=agent,
+                total_vehicules=sum(comptes),
+                nombre_periodes_saisies=len(comptes),
+                date_creation=_moment(jour, 18, rng.randint(0, 59)),
+            ))
+            comptages.append(comptes)
+        self._inserer(InventaireJournalier, inventaires)
+
+        self._inserer(DetailInventairePeriode, [
+            DetailInventairePeriode(inventaire=inventaire, periode=periode, nombre_vehicules=nombre)
+            for inventaire, comptes in zip(inventaires, comptages)
+            for periode, nombre in zip(PeriodeHoraire.values, comptes)
+        ])
+        return {inventaire.date: inventaire for inventaire in inventaires}
+
+    def _generer_recettes(self, poste, chef, inventaires):
+        """
+        Recettes déclarées sous la recette potentielle (taux de déperdition
+        de -45 % à -6 %), quelques journées impertinentes
+        """
+        from inventaire.models import PeriodeHoraire, RecetteJournaliere
+
+        rng = self.rng
+        nombre_periodes = len(PeriodeHoraire.values)
+        recettes = []
+        for jour in self.jours:
+            if rng.random() < TAUX_RECETTE_MANQUANTE:
+                continue
+            inventaire = inventaires.get(jour)
+            if inventaire is not None:
+                potentielle = inventaire.total_vehicules / nombre_periodes * 24 * 0.75 * PRIX_TICKET
+            else:
+                potentielle = 150 * 24 * 0.75 * PRIX_TICKET
+            if rng.random() < TAUX_JOURNEE_IMPERTINENTE:
+                taux = rng.uniform(-0.05, 0.02)
+            else:
+                taux = rng.uniform(-0.45, -0.06)
+            tickets = max(1, round(potentielle * (1 + taux) / PRIX_TICKET))
+
+            recette = RecetteJournaliere(
+                poste=poste,
+                date=jour,
+                montant_declare=Decimal(tickets * PRIX_TICKET),
+                chef_poste=chef,
+                inventaire_associe=inventaire,
+                date_saisie=_moment(jour, 19, rng.randint(0, 59)),
+            )
+            if inventaire is not None:
+                recette.calculer_indicateurs(totaux=(inventaire.total_vehicules, nombre_periodes))
+            recettes.append(recette)
+        return recettes
+
+    def _generer_stock(self, poste, chef, recettes, couleurs, compteurs_tickets):
+        """
+        Chargement mensuel couvrant les ventes du mois, puis une vente par
+        recette prélevée sur les lots dans l'ordre de réception
+
+        Returns:
+            int: nombre de tickets restant en stock
+        """
+        from inventaire.models import HistoriqueStock, RecetteJournaliere, SerieTicket, StockEvent
+
+        rng = self.rng
+        lots = deque()  # [couleur, premier, dernier, date_reception]
+        en_stock = 0
+        mouvements = []  # (historique, type d'événement, séries vendues)
+        series = []
+
+        par_mois = defaultdict(list)
+        for recette in recettes:
+            par_mois[(recette.date.year, recette.date.month)].append(recette)
+
+        for (annee, mois), recettes_mois in sorted(par_mois.items()):
+            besoin = sum(int(recette.montant_declare) // PRIX_TICKET for recette in recettes_mois)
+            quantite = int(besoin * rng.uniform(1.0, 1.25)) // 100 * 100 + 100 - en_stock
+            if quantite > 0:
+                couleur = couleurs[annee % len(couleurs)]
+                premier = compteurs_tickets[(couleur.id, annee)] + 1
+                dernier = premier + quantite - 1
+                compteurs_tickets[(couleur.id, annee)] = dernier
+                reception = _moment(max(date(annee, mois, 1), self.debut), 7, rng.randint(0, 59))
+                lots.append([couleur, premier, dernier, reception])
+                mouvements.append((HistoriqueStock(
+                    poste=poste,
+                    type_mouvement='CREDIT',
+                    type_stock='imprimerie_nationale',
+                    montant=Decimal(quantite * PRIX_TICKET),
+                    nombre_tickets=quantite,
+                    stock_avant=Decimal(en_stock * PRIX_TICKET),
+                    stock_apres=Decimal((en_stock + quantite) * PRIX_TICKET),
+                    effectue_par=chef,
+                    date_mouvement=reception,
+                    numero_premier_ticket=premier,
+                    numero_dernier_ticket=dernier,
+                    couleur_principale=couleur,
+                    commentaire=f'Chargement {couleur.libelle_affichage} #{premier}-#{dernier}',
+                ), 'CHARGEMENT', []))
+                en_stock += quantite
+
+            for recette in recettes_mois:
+                restant = int(recette.montant_declare) // PRIX_TICKET
+                vendues = []
+                while restant:
+                    couleur, premier, dernier, reception = lots[0]
+                    pris = min(restant, dernier - premier + 1)
+                    vendues.append(SerieTicket(
+                        poste=poste,
+                        couleur=couleur,
+                        numero_premier=premier,
+                        numero_dernier=premier + pris - 1,
+                        nombre_tickets=pris,
+                        valeur_monetaire=Decimal(pris * PRIX_TICKET),
+                        statut='vendu',
+                        type_entree='imprimerie_nationale',
+                        date_reception=reception,
+                        date_utilisation=recette.date,
+                        reference_recette=recette,
+                        responsable_reception=chef,
+                    ))
+                    if pris == dernier - premier + 1:
+                        lots.popleft()
+                    else:
+                        lots[0][1] += pris
+                    restant -= pris
+
+                nombre = int(recette.montant_declare) // PRIX_TICKET
+                recette.stock_tickets_restant = en_stock - nombre
+                mouvements.append((HistoriqueStock(
+                    poste=poste,
+                    type_mouvement='DEBIT',
+                    montant=recette.montant_declare,
+                    nombre_tickets=nombre,
+                    stock_avant=Decimal(en_stock * PRIX_TICKET),
+                    stock_apres=Decimal((en_stock - nombre) * PRIX_TICKET),
+                    effectue_par=chef,
+                    date_mouvement=recette.date_saisie,
+                    reference_recette=recette,
+                    numero_premier_ticket=vendues[0].numero_premier,
+                    numero_dernier_ticket=vendues[-1].numero_dernier,
+                    couleur_principale=vendues[0].couleur,
+                    commentaire=f'Vente du {recette.date:%d/%m/%Y}',
+                ), 'VENTE', vendues))
+                series.extend(vendues)
+                en_stock -= nombre
+
+        for couleur, premier, dernier, reception in lots:
+            series.append(SerieTicket(
+                poste=poste,
+                couleur=couleur,
+                numero_premier=premier,
+                numero_dernier=dernier,
+                nombre_tickets=dernier - premier + 1,
+                valeur_monetaire=Decimal((dernier - premier + 1) * PRIX_TICKET),
+                statut='stock',
+                type_entree='imprimerie_nationale',
+                date_reception=reception,
+                responsable_reception=chef,
+            ))
+
+        self._inserer(RecetteJournaliere, recettes)
+        self._inserer(HistoriqueStock, [historique for historique, _, _ in mouvements])
+        self._inserer(SerieTicket, series)
+
+        Liaison = HistoriqueStock.series_tickets_associees.through
+        self._inserer(Liaison, [
+            Liaison(historiquestock_id=historique.id, serieticket_id=serie.id)
+            for historique, _, vendues in mouvements
+            for serie in vendues
+        ])
+
+        self._inserer(StockEvent, [
+            StockEvent(
+                poste=poste,
+                event_type=type_evenement,
+                event_datetime=historique.date_mouvement,
+                montant_variation=historique.montant if historique.type_mouvement == 'CREDIT' else -historique.montant,
+                nombre_tickets_variation=(
+                    historique.nombre_tickets if historique.type_mouvement == 'CREDIT'
+                    else -historique.nombre_tickets
+                ),
+                stock_resultant=historique.stock_apres,
+                tickets_resultants=int(historique.stock_apres) // PRIX_TICKET,
+                effectue_par=chef,
+                reference_id=str(historique.id),
+                reference_type='HistoriqueStock',
+                metadata={'historique_id': historique.id},
+                commentaire=historique.commentaire,
+                created_at=historique.date_mouvement,
+            )
+            for historique, type_evenement, _ in mouvements
+        ])
+        return en_stock
+
+    # ===================================================================
+    # PESAGE : AMENDES, ÉVÉNEMENTS, PESÉES, QUITTANCEMENTS
+    # ===================================================================
+
+    def _generer_pesage(self, stations, equipes, nombre_amendes):
+        from inventaire.models_pesage import AmendeEmise, PeseesJournalieres
+        from inventaire.utils_pesage import normalize_immatriculation, normalize_search_text
+
+        rng = self.rng
+        # Parc de véhicules récurrents : les premiers reviennent bien plus souvent
+        vehicules = [
+            f"{rng.choice('CE LT OU NO SW SU AD EN ES NW'.split())} "
+            f"{rng.randint(100, 9999)} {rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}"
+            for _ in range(max(500, nombre_amendes // 8))
+        ]
+        transporteurs = [
+            f"{rng.choice(['Transports', 'Ets', 'Société', 'Logistique'])} {rng.choice(NOMS)} {indice}"
+            for indice in range(1, 401)
+        ]
+        operateurs = [f'{rng.choice(PRENOMS)} {rng.choice(NOMS)}' for _ in range(3000)]
+
+        poids = [rng.uniform(0.5, 2.0) for _ in stations]
+        tirages = sorted(
+            (rng.choice(self.jours), rng.randint(6, 21), rng.randint(0, 59))
+            for _ in range(nombre_amendes)
+        )
+        limite_paiement = _moment(self.fin, 23, 59)
+        encaissements = defaultdict(Decimal)  # (station_id, jour) → montant payé
+        amendes_par_jour = Counter()
+
+        lot = []
+        for numero, (jour, heure, minute) in enumerate(tirages, 1):
+            station = rng.choices(stations, poids)[0]
+            chef, regisseur = equipes[station.id]
+            emission = _moment(jour, heure, minute)
+            indice = int(len(vehicules) * rng.random() ** 2)
+            tirage = rng.random()
+            montant = Decimal(rng.choice(MONTANTS_AMENDES))
+
+            date_paiement = None
+            if rng.random() < TAUX_AMENDES_PAYEES:
+                date_paiement = emission + timedelta(minutes=rng.randint(30, 20 * 24 * 60))
+                if date_paiement > limite_paiement:
+                    date_paiement = None
+            if date_paiement is not None:
+                encaissements[(station.id, timezone.localtime(date_paiement).date())] += montant
+
+            immatriculation = vehicules[indice]
+            transporteur = transporteurs[indice % len(transporteurs)]
+            operateur = rng.choice(operateurs)
+            lot.append(AmendeEmise(
+                numero_ticket=f'{station.code}-{numero:08d}',
+                station=station,
+                immatriculation=immatriculation,
+                transporteur=transporteur,
+                provenance=rng.choice(VILLES),
+                destination=rng.choice(VILLES),
+                produit_transporte=rng.choice(PRODUITS),
+                operateur=operateur,
+                est_surcharge=tirage < 0.85,
+                est_hors_gabarit=tirage > 0.7,
+                montant_amende=montant,
+                statut='paye' if date_paiement else 'non_paye',
+                date_heure_emission=emission,
+                date_paiement=date_paiement,
+                saisi_par=chef,
+                valide_par=regisseur if date_paiement else None,
+                immatriculation_normalise=normalize_immatriculation(immatriculation),
+                transporteur_normalise=normalize_search_text(transporteur),
+                operateur_normalise=normalize_search_text(operateur),
+                date_creation=emission,
+            ))
+            amendes_par_jour[(station.id, jour)] += 1
+
+            if len(lot) >= self.taille_lot:
+                self._inserer_amendes(lot, equipes)
+                lot = []
+                if numero % (self.taille_lot * 10) == 0:
+                    self.stdout.write(f"⚖️  Pesage : {numero}/{nombre_amendes} amende(s)")
+        self._inserer_amendes(lot, equipes)
+
+        pesees = []
+        for station in stations:
+            chef = equipes[station.id][0]
+            for jour in self.jours:
+                pesees.append(PeseesJournalieres(
+                    station=station,
+                    date=jour,
+                    nombre_pesees=amendes_par_jour[(station.id, jour)] * rng.randint(4, 12) + rng.randint(20, 80),
+                    saisi_par=chef,
+                ))
+        self._inserer(PeseesJournalieres, pesees)
+
+        self._generer_quittancements(stations, equipes, encaissements)
+        self.stdout.write(f"⚖️  Pesage : {nombre_amendes} amende(s), {len(pesees)} journée(s) de pesées")
+
+    def _inserer_amendes(self, amendes, equipes):
+        """Amendes puis leurs événements (métadonnées de creer_evenement_*)"""
+        from inventaire.models_pesage import AmendeEmise, AmendeEvent
+
+        self._inserer(AmendeEmise, amendes)
+        evenements = []
+        for amende in amendes:
+            evenements.append(AmendeEvent(
+                amende=amende,
+                event_type='EMISSION',
+                event_datetime=amende.date_heure_emission,
+                montant=amende.montant_amende,
+                effectue_par=amende.saisi_par,
+                metadata={
+                    'numero_ticket': amende.numero_ticket,
+                    'immatriculation': amende.immatriculation,
+                    'est_surcharge': amende.est_surcharge,
+                    'est_hors_gabarit': amende.est_hors_gabarit,
+                    'station_id': amende.station_id,
+                },
+            ))
+            if amende.date_paiement is not None:
+                evenements.append(AmendeEvent(
+                    amende=amende,
+                    event_type='PAIEMENT',
+                    event_datetime=amende.date_paiement,
+                    montant=amende.montant_amende,
+                    effectue_par=amende.valide_par,
+                    metadata={
+                        'numero_ticket': amende.numero_ticket,
+                        'validated_by': amende.valide_par.username,
+                    },
+                ))
+        self._inserer(AmendeEvent, evenements)
+
+    def _generer_quittancements(self, stations, equipes, encaissements):
+        """Un quittancement par décade close, écart occasionnel"""
+        from inventaire.models_pesage import QuittancementPesage
+
+        rng = self.rng
+        aujourd_hui = timezone.localdate()
+        quittancements = []
+        for station in stations:
+            regisseur = equipes[station.id][1]
+            mois = date(self.debut.year, self.debut.month, 1)
+            while mois <= self.fin:
+                suivant = (mois + timedelta(days=32)).replace(day=1)
+                for debut_decade, fin_decade in (
+                    (mois.replace(day=1), mois.replace(day=10)),
+                    (mois.replace(day=11), mois.replace(day=20)),
+                    (mois.replace(day=21), suivant - timedelta(days=1)),
+                ):
+                    if debut_decade < self.debut or fin_decade > self.fin:
+                        continue
+                    attendu = sum(
+                        (encaissements[(station.id, debut_decade + timedelta(days=i))]
+                         for i in range((fin_decade - debut_decade).days + 1)),
+                        Decimal('0')
+                    )
+                    quittance = attendu
+                    if attendu and rng.random() < 0.1:
+                        quittance = attendu - Decimal(rng.choice(MONTANTS_AMENDES))
+                        quittance = max(quittance, Decimal('0'))
+                    quittancements.append(QuittancementPesage(
+                        numero_quittance=f'QT-{station.code}-{len(quittancements) + 1:06d}',
+                        station=station,
+                        exercice=debut_decade.year,
+                        mois=f'{debut_decade:%Y-%m}',
+                        type_declaration='decade',
+                        date_quittancement=min(fin_decade + timedelta(days=rng.randint(1, 3)), aujourd_hui),
+                        date_debut_decade=debut_decade,
+                        date_fin_decade=fin_decade,
+                        montant_quittance=quittance,
+                        montant_attendu=attendu,
+                        ecart=quittance - attendu,
+                        saisi_par=regisseur,
+                        verrouille=True,
+                    ))
+                mois = suivant
+        self._inserer(QuittancementPesage, quittancements)
+
+    # ===================================================================
+    # TABLES DÉRIVÉES
+    # ===================================================================
+
+    def _reconstruire(self):
+        """Agrégats, index des tickets et instantanés alimentés d'ordinaire par signaux"""
+        for commande, parametres in (
+            ('reconstruire_agregats_recettes', {}),
+            ('reconstruire_agregats_amendes', {}),
+            ('indexer_mouvements_tickets', {'reset': True}),
+            ('precalculer_dashboard', {}),
+        ):
+            self.stdout.write(f"\n🔄 {commande}")
+            call_command(commande, stdout=self.stdout, **parametres)
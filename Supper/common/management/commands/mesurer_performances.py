@@ -0,0 +1,441 @@
+# ===================================================================
+# common/management/commands/mesurer_performances.py
+# Mesure des scénarios clés sur la base courante
+# ===================================================================
+"""
+Exécute des scénarios nommés représentatifs de l'usage en production et
+produit un rapport JSON comparable d'un commit à l'autre :
+- tableau_de_bord : page d'accueil (index)
+- liste_stocks : liste des stocks de tous les postes
+- pv_confrontation : aperçu du PV de confrontation d'une station sur le
+  dernier mois complet
+- classement_agents : classement annuel des agents d'inventaire
+- recherche_vehicule, api_recherche_vehicule : historique du véhicule le
+  plus verbalisé (page, puis API de recherche multi-critères)
+- import_matriciel : import d'une matrice de recettes (postes × 365 jours)
+
+Chaque répétition s'exécute dans une transaction annulée à la fin : la base
+n'est pas modifiée, y compris par l'import. Les pages sont appelées par le
+client de test Django, connecté avec un superutilisateur ; le cache est
+vidé avant chaque répétition (mesure à froid) sauf avec --cache-chaud.
+
+Pour chaque scénario : durées de chaque répétition, médiane, minimum et,
+pour la répétition médiane, nombre et temps des requêtes SQL ainsi que la
+requête la plus répétée (signe d'un N+1).
+
+À lancer sur une base peuplée par generer_donnees_volumineuses :
+    python manage.py mesurer_performances --sortie avant.json
+    (changement de code)
+    python manage.py mesurer_performances --sortie apres.json --reference avant.json
+    python manage.py mesurer_performances --scenario liste_stocks --scenario classement_agents
+"""
+
+from datetime import datetime, timedelta
+import json
+import logging
+import statistics
+import subprocess
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from common.profilage import MesureSQL
+
+logger = logging.getLogger('supper')
+
+
+SCENARIOS = {
+    'tableau_de_bord': 'Tableau de bord (index)',
+    'liste_stocks': 'Liste des stocks de tous les postes',
+    'pv_confrontation': "Aperçu du PV de confrontation d'une station, dernier mois complet",
+    'classement_agents': 'Classement annuel des agents',
+    'recherche_vehicule': 'Historique du véhicule le plus verbalisé',
+    'api_recherche_vehicule': 'API de recherche multi-critères (immatriculation)',
+    'import_matriciel': 'Import matriciel des recettes, postes × 365 jours',
+}
+
+# Scénarios trop longs pour être répétés : une seule exécution mesurée
+SCENARIOS_UNIQUES = {'import_matriciel'}
+
+VOLUMES = [
+    ('accounts', 'Poste'),
+    ('accounts', 'UtilisateurSUPPER'),
+    ('inventaire', 'InventaireJournalier'),
+    ('inventaire', 'DetailInventairePeriode'),
+    ('inventaire', 'RecetteJournaliere'),
+    ('inventaire', 'HistoriqueStock'),
+    ('inventaire', 'SerieTicket'),
+    ('inventaire', 'StockEvent'),
+    ('inventaire', 'AmendeEmise'),
+    ('inventaire', 'AmendeEvent'),
+]
+
+
+def _commit_courant():
+    """Commit git du code mesuré ('+modifie' si l'arbre a des changements)"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10, check=True,
+        ).stdout.strip()
+        modifie = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=30, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return f'{commit}+modifie' if modifie else commit
+
+
+class _ContexteScenarios:
+    """Paramètres des scénarios, résolus une fois avant les mesures"""
+
+    def __init__(self, client, utilisateur):
+        from django.db.models import Count
+        from accounts.models import Poste
+        from inventaire.models_pesage import AmendeEmise
+
+        self.client = client
+        self.utilisateur = utilisateur
+
+        hier = timezone.localdate() - timedelta(days=1)
+        self.fin_mois = hier.replace(day=1) - timedelta(days=1)
+        self.debut_mois = self.fin_mois.replace(day=1)
+        self.annee = hier.year - 1
+
+        self.station = Poste.objects.filter(type='pesage', is_active=True).order_by('code').first()
+        vehicule = (
+            AmendeEmise.objects.values('immatriculation_normalise')
+            .annotate(nombre=Count('id'))
+            .order_by('-nombre', 'immatriculation_normalise')
+            .first()
+        )
+        self.immatriculation = vehicule['immatriculation_normalise'] if vehicule else None
+        self.fin_import = hier
+        self.debut_import = hier - timedelta(days=364)
+
+
+class Command(BaseCommand):
+    help = 'Mesure les scénarios clés (durée, requêtes SQL) et produit un rapport JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=list(SCENARIOS),
+            help='Scénario à mesurer, répétable ; tous par défaut'
+        )
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=5,
+            help='Répétitions mesurées par scénario (défaut: 5)'
+        )
+        parser.add_argument(
+            '--echauffement',
+            type=int,
+            default=1,
+            help='Exécutions non mesurées avant les répétitions (défaut: 1)'
+        )
+        parser.add_argument(
+            '--cache-chaud',
+            action='store_true',
+            help='Ne pas vider le cache avant chaque répétition'
+        )
+        parser.add_argument(
+            '--utilisateur',
+            type=str,
+            help='Matricule du superutilisateur connecté (défaut: le premier actif)'
+        )
+        parser.add_argument(
+            '--sortie',
+            type=str,
+            help='Fichier JSON du rapport (défaut: sortie standard)'
+        )
+        parser.add_argument(
+            '--reference',
+            type=str,
+            help='Rapport JSON précédent à comparer'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20.0,
+            help='Hausse de la médiane tolérée en %% avant de signaler une régression (défaut: 20)'
+        )
+        parser.add_argument(
+            '--ecart-minimal',
+            type=float,
+            default=10.0,
+            help='Hausse absolue de la médiane (ms) en deçà de laquelle rien n\'est signalé (défaut: 10)'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Code de sortie en erreur si une régression est signalée'
+        )
+
+    def handle(self, *args, **options):
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from accounts.models import UtilisateurSUPPER
+
+        if options['repetitions'] < 1:
+            raise CommandError('--repetitions doit être positif')
+
+        reference = None
+        if options['reference']:
+            try:
+                with open(options['reference'], encoding='utf-8') as fichier:
+                    reference = json.load(fichier)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Rapport de référence illisible: {e}")
+
+        utilisateurs = UtilisateurSUPPER.objects.filter(is_superuser=True, is_active=True)
+        if options['utilisateur']:
+            utilisateurs = utilisateurs.filter(username=options['utilisateur'].upper())
+        utilisateur = utilisateurs.order_by('id').first()
+        if utilisateur is None:
+            raise CommandError(
+                'Aucun superutilisateur actif : python manage.py createsuperuser '
+                '(ou generer_donnees_volumineuses)'
+            )
+
+        # Environnement de test : hôte 'testserver' autorisé ; requêtes en
+        # HTTPS (secure=True) pour ne pas être redirigées par SECURE_SSL_REDIRECT
+        setup_test_environment()
+        client = Client(raise_request_exception=False)
+        client.force_login(utilisateur)
+        contexte = _ContexteScenarios(client, utilisateur)
+
+        noms = options['scenario'] or list(SCENARIOS)
+        resultats = {}
+        for nom in noms:
+            self.stderr.write(f"▶ {nom}")
+            resultats[nom] = self._mesurer(nom, contexte, options)
+            resultat = resultats[nom]
+            if resultat['statut'] == 'ok':
+                self.stderr.write(
+                    f"  médiane {resultat['mediane_ms']:.0f} ms, "
+                    f"{resultat['requetes_sql']} requête(s) SQL ({resultat['duree_sql_ms']:.0f} ms)"
+                )
+            else:
+                self.stderr.write(self.style.WARNING(f"  {resultat['statut']}: {resultat.get('erreur', '')}"))
+
+        rapport = {
+            'commit': _commit_courant(),
+            'date': timezone.now().isoformat(),
+            'base': {
+                'moteur': connection.vendor,
+                'volumes': self._volumes(),
+            },
+            'repetitions': options['repetitions'],
+            'cache': 'chaud' if options['cache_chaud'] else 'froid',
+            'scenarios': resultats,
+        }
+
+        contenu = json.dumps(rapport, indent=2, ensure_ascii=False)
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                fichier.write(contenu + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Rapport écrit dans {options['sortie']}"))
+        else:
+            self.stdout.write(contenu)
+
+        logger.info(
+            f"[PERFORMANCES] {len(resultats)} scénario(s) mesuré(s), commit {rapport['commit']}"
+        )
+
+        if reference is not None:
+            regressions = self._comparer(reference, rapport, options['tolerance'], options['ecart_minimal'])
+            if regressions and options['strict']:
+                raise CommandError(f"{len(regressions)} régression(s): {', '.join(regressions)}")
+
+    # ===================================================================
+    # MESURE
+    # ===================================================================
+
+    def _mesurer(self, nom, contexte, options):
+        """Échauffement puis répétitions mesurées, chacune annulée"""
+        scenario = getattr(self, f'_scenario_{nom}')
+        repetitions = 1 if nom in SCENARIOS_UNIQUES else options['repetitions']
+        echauffement = 0 if nom in SCENARIOS_UNIQUES else options['echauffement']
+        resultat = {'description': SCENARIOS[nom], 'statut': 'ok'}
+
+        mesures = []
+        for indice in range(echauffement + repetitions):
+            if not options['cache_chaud']:
+                cache.clear()
+            mesure_sql = MesureSQL()
+            try:
+                with transaction.atomic():
+                    with connection.execute_wrapper(mesure_sql):
+                        debut = perf_counter()
+                        statut = scenario(contexte)
+                        duree = perf_counter() - debut
+                    transaction.set_rollback(True)
+            except _ScenarioIgnore as e:
+                return dict(resultat, statut='ignore', erreur=str(e))
+            except Exception as e:
+                logger.exception(f"[PERFORMANCES] Scénario {nom} en erreur")
+                return dict(resultat, statut='erreur', erreur=f'{type(e).__name__}: {e}')
+
+            if statut >= 400:
+                return dict(resultat, statut='erreur', erreur=f'HTTP {statut}')
+            if indice >= echauffement:
+                signature, repetitions_sql = mesure_sql.requete_repetee()
+                mesures.append({
+                    'duree_ms': duree * 1000,
+                    'requetes_sql': mesure_sql.nombre,
+                    'duree_sql_ms': mesure_sql.duree * 1000,
+                    'requete_repetee': {'sql': signature[:300], 'repetitions': repetitions_sql},
+                })
+
+        mediane = sorted(mesures, key=lambda mesure: mesure['duree_ms'])[(len(mesures) - 1) // 2]
+        return dict(
+            resultat,
+            durees_ms=[round(mesure['duree_ms'], 1) for mesure in mesures],
+            mediane_ms=round(statistics.median(mesure['duree_ms'] for mesure in mesures), 1),
+            min_ms=round(min(mesure['duree_ms'] for mesure in mesures), 1),
+            requetes_sql=mediane['requetes_sql'],
+            duree_sql_ms=round(mediane['duree_sql_ms'], 1),
+            requete_repetee=mediane['requete_repetee'],
+        )
+
+    def _volumes(self):
+        from django.apps import apps
+
+        return {
+            f'{application}.{modele}': apps.get_model(application, modele).objects.count()
+            for application, modele in VOLUMES
+        }
+
+    # ===================================================================
+    # SCÉNARIOS : chacun retourne un code de statut HTTP
+    # ===================================================================
+
+    def _get(self, contexte, nom_url, args=None, parametres=None):
+        response = contexte.client.get(reverse(nom_url, args=args), parametres or {}, secure=True)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code
+
+    def _scenario_tableau_de_bord(self, contexte):
+        return self._get(contexte, 'index')
+
+    def _scenario_liste_stocks(self, contexte):
+        return self._get(contexte, 'inventaire:liste_postes_stocks')
+
+    def _scenario_pv_confrontation(self, contexte):
+        if contexte.station is None:
+            raise _ScenarioIgnore('aucune station de pesage active')
+        return self._get(contexte, 'inventaire:apercu_pv_confrontation', args=[
+            contexte.station.id,
+            contexte.debut_mois.strftime('%Y-%m-%d'),
+            contexte.fin_mois.strftime('%Y-%m-%d'),
+        ])
+
+    def _scenario_classement_agents(self, contexte):
+        return self._get(contexte, 'inventaire:classement_agents_performances', parametres={
+            'periode': 'annuel',
+            'annee': contexte.annee,
+        })
+
+    def _scenario_recherche_vehicule(self, contexte):
+        if contexte.immatriculation is None:
+            raise _ScenarioIgnore('aucune amende')
+        return self._get(contexte, 'inventaire:recherche_historique_vehicule', parametres={
+            'immatriculation': contexte.immatriculation,
+        })
+
+    def _scenario_api_recherche_vehicule(self, contexte):
+        if contexte.immatriculation is None:
+            raise _ScenarioIgnore('aucune amende')
+        return self._get(contexte, 'inventaire:api_recherche_historique', parametres={
+            'immat': contexte.immatriculation,
+        })
+
+    def _scenario_import_matriciel(self, contexte):
+        """
+        Ré-import (écrasement) des recettes existantes des 365 derniers jours :
+        une ligne par poste de péage, une colonne par date
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            raise _ScenarioIgnore('pandas non installé')
+        from collections import defaultdict
+        from inventaire.models import RecetteJournaliere
+        from inventaire.views_import import traiter_import_recettes_matriciel
+
+        montants = defaultdict(dict)
+        recettes = RecetteJournaliere.objects.filter(
+            date__range=(contexte.debut_import, contexte.fin_import),
+            poste__type='peage',
+            poste__is_active=True,
+        ).values_list('poste__nom', 'date', 'montant_declare')
+        for nom_poste, jour, montant in recettes:
+            montants[nom_poste][jour] = float(montant)
+        if not montants:
+            raise _ScenarioIgnore('aucune recette sur les 365 derniers jours')
+
+        jours = [contexte.debut_import + timedelta(days=i) for i in range(365)]
+        matrice = pd.DataFrame(
+            [[nom_poste] + [montants[nom_poste].get(jour) for jour in jours] for nom_poste in sorted(montants)],
+            columns=['Poste'] + [datetime.combine(jour, datetime.min.time()) for jour in jours],
+        )
+        resultat = traiter_import_recettes_matriciel(matrice, 'ecraser', contexte.utilisateur)
+        if not resultat.get('success', True) or resultat.get('nb_erreurs'):
+            raise RuntimeError(resultat.get('erreur') or f"{resultat.get('nb_erreurs')} erreur(s) d'import")
+        return 200
+
+    # ===================================================================
+    # COMPARAISON
+    # ===================================================================
+
+    def _comparer(self, reference, rapport, tolerance, ecart_minimal):
+        """
+        Affiche l'écart de chaque scénario à la référence
+
+        Returns:
+            list: scénarios dont la médiane dépasse la tolérance (et d'au
+            moins ecart_minimal ms) ou dont le nombre de requêtes SQL augmente
+        """
+        regressions = []
+        self.stderr.write(f"\n{'='*60}")
+        self.stderr.write(f"COMPARAISON AVEC {reference.get('commit') or 'la référence'}")
+        self.stderr.write(f"{'='*60}")
+        if reference.get('base', {}).get('volumes') != rapport['base']['volumes']:
+            self.stderr.write(self.style.WARNING('⚠️ Volumes différents : comparaison indicative'))
+
+        for nom, resultat in rapport['scenarios'].items():
+            ancien = reference.get('scenarios', {}).get(nom)
+            if not ancien or ancien.get('statut') != 'ok' or resultat['statut'] != 'ok':
+                self.stderr.write(f"  {nom:<24} non comparable")
+                continue
+
+            ecart = resultat['mediane_ms'] - ancien['mediane_ms']
+            variation = ecart / ancien['mediane_ms'] * 100 if ancien['mediane_ms'] else 0
+            significatif = abs(ecart) >= ecart_minimal
+            ligne = (
+                f"  {nom:<24} {ancien['mediane_ms']:>9.0f} → {resultat['mediane_ms']:>9.0f} ms "
+                f"({variation:+.0f} %)   SQL {ancien['requetes_sql']} → {resultat['requetes_sql']}"
+            )
+            if (significatif and variation > tolerance) or resultat['requetes_sql'] > ancien['requetes_sql']:
+                regressions.append(nom)
+                self.stderr.write(self.style.ERROR(ligne))
+            elif significatif and variation < -tolerance:
+                self.stderr.write(self.style.SUCCESS(ligne))
+            else:
+                self.stderr.write(ligne)
+
+        return regressions
+
+
+class _ScenarioIgnore(Exception):
+    """Scénario sans objet sur cette base"""
@@ -0,0 +1,130 @@
+# ===================================================================
+# common/management/commands/partitions_journal_audit.py
+# Gestion des partitions mensuelles du journal d'audit
+# ===================================================================
+"""
+Crée, détache et supprime les partitions mensuelles de accounts_journalaudit.
+
+Usage (à planifier chaque mois, par exemple le 1er via cron) :
+    python manage.py partitions_journal_audit --creer
+    python manage.py partitions_journal_audit --retention
+    python manage.py partitions_journal_audit --detacher 2025-01
+    python manage.py partitions_journal_audit --supprimer 2025-01
+    python manage.py partitions_journal_audit --lister
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import partitions
+
+
+class Command(BaseCommand):
+    help = "Gère les partitions mensuelles du journal d'audit (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--creer',
+            action='store_true',
+            help="Crée les partitions du mois courant et des mois à venir"
+        )
+        parser.add_argument(
+            '--mois-avance',
+            type=int,
+            default=partitions.MOIS_D_AVANCE,
+            help=f"Nombre de mois créés d'avance (défaut: {partitions.MOIS_D_AVANCE})"
+        )
+        parser.add_argument(
+            '--detacher',
+            metavar='AAAA-MM',
+            help="Détache la partition du mois (conservée comme table d'archive)"
+        )
+        parser.add_argument(
+            '--supprimer',
+            metavar='AAAA-MM',
+            help="Supprime définitivement la partition du mois"
+        )
+        parser.add_argument(
+            '--retention',
+            action='store_true',
+            help="Supprime les partitions entièrement antérieures à la durée de rétention"
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help="Durée de rétention en jours (défaut: SUPPER_CONFIG['RETENTION_LOGS_JOURS'])"
+        )
+        parser.add_argument(
+            '--lister',
+            action='store_true',
+            help="Liste les partitions existantes"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Simulation sans modification'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        partitionne = partitions.journal_est_partitionne()
+
+        if not partitionne:
+            self.stdout.write(self.style.WARNING(
+                "Le journal d'audit n'est pas partitionné (base non PostgreSQL ?) : "
+                "seule la rétention par lots est disponible."
+            ))
+
+        if options['detacher'] or options['supprimer']:
+            if not partitionne:
+                raise CommandError("Opération impossible sur une table non partitionnée")
+
+        if options['creer'] and partitionne:
+            if dry_run:
+                self.stdout.write(f"SIMULATION: création de {options['mois_avance'] + 1} partition(s) si absentes")
+            else:
+                creees = partitions.creer_partitions_a_venir(options['mois_avance'])
+                for nom in creees:
+                    self.stdout.write(f"  + {nom}")
+                self.stdout.write(self.style.SUCCESS(f"{len(creees)} partition(s) créée(s)"))
+
+        if options['detacher']:
+            mois = self._parse_mois(options['detacher'])
+            if dry_run:
+                self.stdout.write(f"SIMULATION: détachement de {partitions.nom_partition(mois)}")
+            else:
+                nom = partitions.detacher_partition(mois)
+                self.stdout.write(self.style.SUCCESS(f"Partition détachée : {nom}"))
+
+        if options['supprimer']:
+            mois = self._parse_mois(options['supprimer'])
+            if dry_run:
+                self.stdout.write(f"SIMULATION: suppression de {partitions.nom_partition(mois)}")
+            else:
+                nom = partitions.supprimer_partition(mois)
+                self.stdout.write(self.style.SUCCESS(f"Partition supprimée : {nom}"))
+
+        if options['retention']:
+            resultat = partitions.appliquer_retention(options['days'], dry_run=dry_run)
+            prefixe = 'SIMULATION: ' if dry_run else ''
+            for nom in resultat['partitions']:
+                self.stdout.write(f"  - {nom}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefixe}{len(resultat['partitions'])} partition(s), "
+                f"{resultat['lignes']} ligne(s) antérieures au "
+                f"{resultat['date_limite'].date()} supprimées"
+            ))
+
+        if options['lister'] and partitionne:
+            for partition in partitions.lister_partitions():
+                self.stdout.write(
+                    f"  {partition['nom']:<40} ~{partition['lignes_estimees']} ligne(s)"
+                )
+
+    def _parse_mois(self, valeur):
+        try:
+            return datetime.strptime(valeur, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f"Mois invalide '{valeur}' (format attendu: AAAA-MM)")
@@ -4,6 +4,7 @@
 # ===================================================================
 
 import logging
+import random
 import time
 import threading
 from datetime import timedelta
@@ -14,6 +15,7 @@ from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.conf import settings
+from django.db import connection
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpResponseForbidden
 
@@ -50,6 +52,29 @@ class UserContextMiddleware(MiddlewareMixin):
             del _thread_local.request
 
 
+class SessionRenouvellementMiddleware(MiddlewareMixin):
+    """
+    Expiration glissante des sessions sans écriture à chaque requête :
+    la session n'est réenregistrée (nouvelle date d'expiration) que si son
+    dernier renouvellement date de plus de SESSION_RENOUVELLEMENT_INTERVALLE
+    secondes. Placé après SessionMiddleware, qui enregistre la session.
+    """
+    
+    CLE_SESSION = '_renouvelee_le'
+    
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is None or session.modified or session.is_empty():
+            return response
+        
+        maintenant = int(time.time())
+        intervalle = getattr(settings, 'SESSION_RENOUVELLEMENT_INTERVALLE', 300)
+        if maintenant - session.get(self.CLE_SESSION, 0) >= intervalle:
+            # Marque la session modifiée : SessionMiddleware la réenregistre
+            session[self.CLE_SESSION] = maintenant
+        return response
+
+
 def get_current_user():
     """Récupérer l'utilisateur actuel depuis n'importe où"""
     return getattr(_thread_local, 'user', None)
@@ -164,19 +189,61 @@ class SecurityMiddleware(MiddlewareMixin):
         return False
 
 
-class PerformanceMiddleware(MiddlewareMixin):
-    """Middleware pour surveiller les performances"""
+class PerformanceMiddleware:
+    """
+    Middleware pour surveiller les performances : en-tête X-Response-Time,
+    journal des requêtes lentes et profilage par vue (durée de chaque
+    requête ; requêtes SQL d'un échantillon), voir common/profilage.py
+    """
     
-    def process_request(self, request):
-        request._start_time = time.time()
+    def __init__(self, get_response):
+        self.get_response = get_response
     
-    def process_response(self, request, response):
-        if hasattr(request, '_start_time'):
-            duration = time.time() - request._start_time
-            if duration > 2.0:
-                logger.warning(f"PERFORMANCE - Requête lente: {duration:.3f}s - URL: {request.path}")
-            response['X-Response-Time'] = f"{duration:.3f}s"
+    def __call__(self, request):
+        from common.profilage import (
+            get_profilage_config, est_chemin_exclu, MesureSQL,
+        )
+        
+        config = get_profilage_config()
+        profiler = config['ACTIF'] and not est_chemin_exclu(request.path, config)
+        mesure = None
+        
+        start_time = time.perf_counter()
+        try:
+            if profiler and random.random() < config['TAUX_ECHANTILLONNAGE']:
+                mesure = MesureSQL()
+                with connection.execute_wrapper(mesure):
+                    response = self.get_response(request)
+            else:
+                response = self.get_response(request)
+        except Exception:
+            # Exception non convertie en réponse (page d'erreur elle-même en échec)
+            if profiler:
+                self._profiler(request, 500, time.perf_counter() - start_time, mesure, config)
+            raise
+        duration = time.perf_counter() - start_time
+        
+        if duration > config['SEUIL_REQUETE_LENTE']:
+            details_sql = f" - SQL: {mesure.nombre} requête(s), {mesure.duree:.3f}s" if mesure else ""
+            logger.warning(f"PERFORMANCE - Requête lente: {duration:.3f}s - URL: {request.path}{details_sql}")
+        response['X-Response-Time'] = f"{duration:.3f}s"
+        
+        if profiler:
+            self._profiler(request, response.status_code, duration, mesure, config)
+        
         return response
+    
+    def _profiler(self, request, statut, duration, mesure, config):
+        from common.profilage import profileur_vues, VUE_NON_RESOLUE
+        
+        resolver_match = getattr(request, 'resolver_match', None)
+        try:
+            profileur_vues.enregistrer(
+                resolver_match.view_name if resolver_match else VUE_NON_RESOLUE,
+                request.method, statut, duration, mesure, config,
+            )
+        except Exception as e:
+            logger.error(f"Profilage de {request.path} impossible: {str(e)}")
 
 
 # ===================================================================
@@ -0,0 +1,18 @@
+# Table du cache partagé (settings.CACHES, CACHE_BACKEND=base)
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def creer_table_cache(apps, schema_editor):
+    # Sans effet si la table existe déjà ou si le cache n'est pas en base
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(creer_table_cache, migrations.RunPython.noop),
+    ]
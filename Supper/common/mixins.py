@@ -896,30 +896,33 @@ class ExportMixin:
         
         queryset = self.get_queryset()
         filename = self.export_filename or f"{self.__class__.__name__.lower()}"
+        nb_elements = queryset.count()
         
         # Journaliser l'export
         utils['log_user_action'](
             user=self.request.user,
             action="EXPORT_DONNEES",
-            details=f"Export {format_type.upper()} de {queryset.count()} éléments",
+            details=f"Export {format_type.upper()} de {nb_elements} éléments",
             request=self.request,
             format=format_type.upper(),
-            nb_elements=queryset.count(),
+            nb_elements=nb_elements,
             vue=self.__class__.__name__
         )
         
         logger.info(
             f"📤 EXPORT | {utils['get_user_short_description'](self.request.user)} | "
-            f"Format: {format_type.upper()} | {queryset.count()} éléments"
+            f"Format: {format_type.upper()} | {nb_elements} éléments"
         )
         
-        from common.utils import exporter_donnees_csv
+        from common.utils import exporter_donnees_csv, exporter_donnees_excel
         
         if hasattr(self, 'export_fields') and self.export_fields:
             fields = self.export_fields
         else:
             fields = self.model._meta.fields
         
+        if format_type == 'excel':
+            return exporter_donnees_excel(queryset, fields, filename)
         return exporter_donnees_csv(queryset, fields, filename)
 
 
@@ -0,0 +1,141 @@
+# ===================================================================
+# common/pagination.py - Pagination par curseur (keyset)
+# ===================================================================
+"""
+Pagination par curseur pour les grandes tables (journal d'audit, ...).
+
+Au lieu de OFFSET/LIMIT et d'un COUNT(*) complet (Paginator), chaque page est
+lue à partir de la dernière clé affichée : WHERE (timestamp, id) < (t, i)
+ORDER BY timestamp DESC, id DESC LIMIT n+1. Le coût d'une page est constant
+quelle que soit sa profondeur, à condition qu'un index couvre l'ordre de tri.
+
+Les champs de tri doivent être non nuls et se terminer par une clé unique
+(typiquement 'id') pour que l'ordre soit total.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class PageCurseur:
+    """Page de résultats compatible avec les gabarits (itération, has_next...)"""
+
+    def __init__(self, objets, curseur_suivant=None, curseur_precedent=None, par_page=50):
+        self.object_list = objets
+        self.curseur_suivant = curseur_suivant
+        self.curseur_precedent = curseur_precedent
+        self.par_page = par_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.curseur_suivant is not None
+
+    def has_previous(self):
+        return self.curseur_precedent is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _champs_tri(ordre):
+    return [(champ.lstrip('-'), champ.startswith('-')) for champ in ordre]
+
+
+def encoder_curseur(objet, ordre):
+    """Encode la position d'un objet dans l'ordre de tri (jeton opaque pour l'URL)"""
+    valeurs = []
+    for nom, _ in _champs_tri(ordre):
+        valeur = getattr(objet, nom)
+        valeurs.append(valeur.isoformat() if hasattr(valeur, 'isoformat') else str(valeur))
+    brut = json.dumps(valeurs, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(brut).decode('ascii').rstrip('=')
+
+
+def decoder_curseur(jeton, model, ordre):
+    """Décode un jeton ; retourne None s'il est absent ou invalide"""
+    if not jeton:
+        return None
+
+    try:
+        brut = base64.urlsafe_b64decode(jeton + '=' * (-len(jeton) % 4))
+        valeurs = json.loads(brut.decode('utf-8'))
+        champs = _champs_tri(ordre)
+        if not isinstance(valeurs, list) or len(valeurs) != len(champs):
+            return None
+        return [
+            model._meta.get_field(nom).to_python(valeur)
+            for (nom, _), valeur in zip(champs, valeurs)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _condition_apres(ordre, valeurs, inverse=False):
+    """
+    Condition « strictement après » la position donnée dans l'ordre de tri
+    (comparaison lexicographique de tuples, exploitable par un index composite)
+    """
+    champs = _champs_tri(ordre)
+    condition = Q()
+    for i, (nom, descendant) in enumerate(champs):
+        egalites = {champs[j][0]: valeurs[j] for j in range(i)}
+        vers_le_bas = descendant != inverse
+        operateur = 'lt' if vers_le_bas else 'gt'
+        condition |= Q(**egalites, **{f"{nom}__{operateur}": valeurs[i]})
+
+    # Borne redondante sur le premier champ : donne au planificateur une
+    # plage d'index à parcourir malgré la disjonction
+    premier, descendant = champs[0]
+    borne = 'lte' if descendant != inverse else 'gte'
+    return Q(**{f"{premier}__{borne}": valeurs[0]}) & condition
+
+
+def paginer_par_curseur(queryset, ordre, apres=None, avant=None, par_page=50):
+    """
+    Retourne une PageCurseur
+
+    Args:
+        queryset: requête déjà filtrée
+        ordre: champs de tri, ex. ('-timestamp', '-id')
+        apres: jeton de la page suivante (paramètre GET 'apres')
+        avant: jeton de la page précédente (paramètre GET 'avant')
+        par_page: taille de page
+    """
+    model = queryset.model
+    en_arriere = bool(avant) and not apres
+    position = decoder_curseur(avant if en_arriere else apres, model, ordre)
+    if position is None:
+        en_arriere = False
+
+    if position is not None:
+        queryset = queryset.filter(_condition_apres(ordre, position, inverse=en_arriere))
+
+    tri = [
+        ('-' if descendant != en_arriere else '') + nom
+        for nom, descendant in _champs_tri(ordre)
+    ]
+    objets = list(queryset.order_by(*tri)[:par_page + 1])
+    encore = len(objets) > par_page
+    objets = objets[:par_page]
+
+    if en_arriere:
+        objets.reverse()
+        a_suivant, a_precedent = True, encore
+    else:
+        a_suivant, a_precedent = encore, position is not None
+
+    curseur_suivant = encoder_curseur(objets[-1], ordre) if objets and a_suivant else None
+    curseur_precedent = encoder_curseur(objets[0], ordre) if objets and a_precedent else None
+
+    return PageCurseur(objets, curseur_suivant, curseur_precedent, par_page)
@@ -0,0 +1,333 @@
+# ===================================================================
+# common/partitions.py - Partitionnement mensuel du JournalAudit
+# ===================================================================
+"""
+Gestion des partitions mensuelles de la table accounts_journalaudit.
+
+Sous PostgreSQL la table est partitionnée par plage sur `timestamp`
+(migration accounts 0010) : une partition par mois
+(accounts_journalaudit_pAAAA_MM) plus une partition par défaut qui
+recueille les lignes hors plage. La rétention consiste alors à détacher /
+supprimer des partitions entières au lieu d'un DELETE de millions de lignes.
+
+Sur les autres bases (SQLite en développement) ou tant que la table n'est
+pas partitionnée, la rétention retombe sur une suppression par lots.
+"""
+
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+
+TABLE_JOURNAL = 'accounts_journalaudit'
+SUFFIXE_DEFAUT = 'defaut'
+MOIS_D_AVANCE = 3
+TAILLE_LOT_SUPPRESSION = 5000
+
+_RE_PARTITION = re.compile(r'^%s_p(\d{4})_(\d{2})$' % TABLE_JOURNAL)
+
+
+# ===================================================================
+# OUTILS DE DATES
+# ===================================================================
+
+def debut_mois(jour):
+    """Premier jour du mois de la date donnée"""
+    return date(jour.year, jour.month, 1)
+
+
+def mois_suivant(jour):
+    """Premier jour du mois suivant"""
+    if jour.month == 12:
+        return date(jour.year + 1, 1, 1)
+    return date(jour.year, jour.month + 1, 1)
+
+
+def nom_partition(mois):
+    """Nom de la partition couvrant le mois donné"""
+    return f"{TABLE_JOURNAL}_p{mois.year:04d}_{mois.month:02d}"
+
+
+def _borne(jour):
+    """Borne de partition (début de journée dans le fuseau du projet)"""
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def get_retention_jours():
+    """Durée de rétention du journal (SUPPER_CONFIG['RETENTION_LOGS_JOURS'])"""
+    return getattr(settings, 'SUPPER_CONFIG', {}).get('RETENTION_LOGS_JOURS', 180)
+
+
+# ===================================================================
+# INTROSPECTION
+# ===================================================================
+
+def journal_est_partitionne():
+    """Indique si accounts_journalaudit est une table partitionnée PostgreSQL"""
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind FROM pg_class c "
+            "WHERE c.oid = to_regclass(%s)",
+            [TABLE_JOURNAL]
+        )
+        ligne = cursor.fetchone()
+    return bool(ligne) and ligne[0] == 'p'
+
+
+def lister_partitions():
+    """
+    Partitions mensuelles attachées, triées par mois
+
+    Returns:
+        list de dicts {'nom', 'mois', 'lignes_estimees'}
+    """
+    if not journal_est_partitionne():
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, GREATEST(c.reltuples, 0)::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [TABLE_JOURNAL]
+        )
+        lignes = cursor.fetchall()
+
+    partitions = []
+    for nom, estimation in lignes:
+        match = _RE_PARTITION.match(nom)
+        if match:
+            partitions.append({
+                'nom': nom,
+                'mois': date(int(match.group(1)), int(match.group(2)), 1),
+                'lignes_estimees': estimation,
+            })
+    return sorted(partitions, key=lambda p: p['mois'])
+
+
+def estimer_total_journal():
+    """
+    Nombre d'entrées du journal pour l'affichage
+
+    Sous PostgreSQL on lit l'estimation du planificateur (pg_class.reltuples,
+    sommée sur les partitions) plutôt qu'un COUNT(*) sur toute la table.
+    """
+    from accounts.models import JournalAudit
+
+    if connection.vendor != 'postgresql':
+        return JournalAudit.objects.count()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint "
+            "FROM pg_class c "
+            "WHERE c.oid = to_regclass(%s) AND c.relkind = 'r' "
+            "   OR c.oid IN (SELECT inhrelid FROM pg_inherits "
+            "                WHERE inhparent = to_regclass(%s))",
+            [TABLE_JOURNAL, TABLE_JOURNAL]
+        )
+        estimation = cursor.fetchone()[0]
+
+    # Table jamais analysée : l'estimation vaut 0
+    if not estimation:
+        return JournalAudit.objects.count()
+    return estimation
+
+
+# ===================================================================
+# CRÉATION / DÉTACHEMENT / SUPPRESSION
+# ===================================================================
+
+def creer_partition(mois):
+    """
+    Crée la partition du mois donné si elle n'existe pas
+
+    Les lignes de ce mois déjà tombées dans la partition par défaut y sont
+    déplacées avant l'attachement (sinon PostgreSQL refuse la création).
+
+    Returns:
+        True si la partition a été créée, False si elle existait déjà
+    """
+    mois = debut_mois(mois)
+    nom = nom_partition(mois)
+    debut, fin = _borne(mois), _borne(mois_suivant(mois))
+    defaut = f"{TABLE_JOURNAL}_{SUFFIXE_DEFAUT}"
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [nom])
+        if cursor.fetchone()[0] is not None:
+            return False
+
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(defaut)} "
+            f"WHERE timestamp >= %s AND timestamp < %s)",
+            [debut, fin]
+        )
+        lignes_dans_defaut = cursor.fetchone()[0]
+
+        if not lignes_dans_defaut:
+            cursor.execute(
+                f"CREATE TABLE {qn(nom)} PARTITION OF {qn(TABLE_JOURNAL)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [debut, fin]
+            )
+        else:
+            cursor.execute(
+                f"CREATE TABLE {qn(nom)} (LIKE {qn(TABLE_JOURNAL)} "
+                f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"WITH deplacees AS (DELETE FROM {qn(defaut)} "
+                f"WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+                f"INSERT INTO {qn(nom)} SELECT * FROM deplacees",
+                [debut, fin]
+            )
+            cursor.execute(
+                f"ALTER TABLE {qn(TABLE_JOURNAL)} ATTACH PARTITION {qn(nom)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [debut, fin]
+            )
+            logger.warning(
+                f"Partition {nom} créée a posteriori : lignes déplacées depuis {defaut}"
+            )
+
+    logger.info(f"Partition du journal d'audit créée : {nom}")
+    return True
+
+
+def creer_partitions_a_venir(mois_d_avance=MOIS_D_AVANCE, reference=None):
+    """Crée les partitions du mois courant et des `mois_d_avance` mois suivants"""
+    if not journal_est_partitionne():
+        return []
+
+    mois = debut_mois(reference or timezone.localdate())
+    creees = []
+    for _ in range(mois_d_avance + 1):
+        if creer_partition(mois):
+            creees.append(nom_partition(mois))
+        mois = mois_suivant(mois)
+    return creees
+
+
+def detacher_partition(mois):
+    """
+    Détache la partition du mois : ses lignes sortent du journal mais la
+    table reste disponible pour archivage (pg_dump) avant suppression.
+    """
+    nom = nom_partition(debut_mois(mois))
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE_JOURNAL)} DETACH PARTITION {qn(nom)}"
+        )
+    logger.info(f"Partition du journal d'audit détachée : {nom}")
+    return nom
+
+
+def supprimer_partition(mois):
+    """Supprime définitivement la partition du mois (attachée ou détachée)"""
+    nom = nom_partition(debut_mois(mois))
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {qn(nom)}")
+    logger.info(f"Partition du journal d'audit supprimée : {nom}")
+    return nom
+
+
+# ===================================================================
+# RÉTENTION
+# ===================================================================
+
+def supprimer_par_lots(queryset, taille_lot=TAILLE_LOT_SUPPRESSION):
+    """
+    Supprime les lignes d'un queryset par lots de clés primaires
+
+    Chaque lot est une transaction courte : pas de verrou long ni de
+    transaction géante comme avec un unique DELETE sur des millions de lignes.
+    """
+    total = 0
+    model = queryset.model
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:taille_lot])
+        if not ids:
+            break
+        with transaction.atomic():
+            supprimes, _ = model.objects.filter(pk__in=ids).delete()
+        total += supprimes
+    return total
+
+
+def appliquer_retention(jours=None, dry_run=False):
+    """
+    Applique la politique de rétention au journal d'audit
+
+    - Table partitionnée : suppression des partitions dont tout le mois est
+      antérieur à la date limite, puis suppression par lots des lignes
+      périmées restées dans la partition par défaut.
+    - Sinon : suppression par lots des lignes antérieures à la date limite.
+
+    Returns:
+        dict {'date_limite', 'partitions', 'lignes'} (lignes estimées pour
+        les partitions supprimées)
+    """
+    from accounts.models import JournalAudit
+
+    jours = jours if jours is not None else get_retention_jours()
+    date_limite = timezone.now() - timedelta(days=jours)
+    resultat = {'date_limite': date_limite, 'partitions': [], 'lignes': 0}
+
+    if journal_est_partitionne():
+        jour_limite = timezone.localtime(date_limite).date()
+        for partition in lister_partitions():
+            if mois_suivant(partition['mois']) > jour_limite:
+                continue
+            resultat['partitions'].append(partition['nom'])
+            resultat['lignes'] += partition['lignes_estimees']
+            if not dry_run:
+                supprimer_partition(partition['mois'])
+
+        defaut = f"{TABLE_JOURNAL}_{SUFFIXE_DEFAUT}"
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if dry_run:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {qn(defaut)} WHERE timestamp < %s",
+                    [date_limite]
+                )
+                resultat['lignes'] += cursor.fetchone()[0]
+            else:
+                while True:
+                    cursor.execute(
+                        f"DELETE FROM {qn(defaut)} WHERE ctid IN ("
+                        f"SELECT ctid FROM {qn(defaut)} WHERE timestamp < %s "
+                        f"LIMIT %s)",
+                        [date_limite, TAILLE_LOT_SUPPRESSION]
+                    )
+                    if cursor.rowcount <= 0:
+                        break
+                    resultat['lignes'] += cursor.rowcount
+    else:
+        perimees = JournalAudit.objects.filter(timestamp__lt=date_limite)
+        if dry_run:
+            resultat['lignes'] = perimees.count()
+        else:
+            resultat['lignes'] = supprimer_par_lots(perimees)
+
+    if not dry_run:
+        logger.info(
+            f"Rétention journal d'audit ({jours} jours): "
+            f"{len(resultat['partitions'])} partition(s), {resultat['lignes']} ligne(s) supprimées"
+        )
+    return resultat
@@ -0,0 +1,429 @@
+# ===================================================================
+# common/profilage.py - Profilage des requêtes et statistiques par vue
+# ===================================================================
+"""
+Profilage léger des requêtes HTTP en production (sans debug toolbar).
+
+Pour chaque requête, PerformanceMiddleware transmet au profileur la vue
+résolue, la méthode, le statut et la durée totale. Une requête sur
+TAUX_ECHANTILLONNAGE est en plus exécutée sous connection.execute_wrapper
+(MesureSQL) : nombre et durée des requêtes SQL, et détection d'une même
+requête SQL répétée au moins SEUIL_N_PLUS_UN fois (signature N+1).
+
+Les mesures sont cumulées en mémoire par (vue, méthode, heure) puis
+fusionnées dans la table StatistiqueVue par un thread de fond toutes les
+FLUSH_INTERVAL secondes et à l'arrêt du processus. Les durées sont rangées
+dans un histogramme à bornes fixes : les histogrammes s'additionnent entre
+heures et entre processus, d'où les percentiles p50/p95/p99 sur une fenêtre
+glissante (statistiques_par_vue). Les heures plus anciennes que
+RETENTION_JOURS sont supprimées au fil des écritures.
+
+Pour une réponse en flux (exports CSV), la durée et les requêtes SQL
+mesurées s'arrêtent au renvoi de la réponse par la vue.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+
+PROFILAGE_CONFIG_DEFAUT = {
+    'ACTIF': True,
+    'TAUX_ECHANTILLONNAGE': 0.1,     # part des requêtes dont le SQL est mesuré
+    'SEUIL_N_PLUS_UN': 5,            # même requête SQL répétée au moins N fois
+    'SEUIL_REQUETE_LENTE': 2.0,      # secondes (journal)
+    'FLUSH_INTERVAL': 30.0,          # secondes
+    'RETENTION_JOURS': 30,
+    'CHEMINS_EXCLUS': ('/static/', '/media/', '/favicon.ico'),
+}
+
+# Bornes supérieures (ms) des cases de l'histogramme ; dernière case : au-delà
+BORNES_HISTOGRAMME_MS = (
+    5, 10, 25, 50, 75, 100, 150, 250, 400, 600, 800,
+    1000, 1500, 2000, 3000, 5000, 8000, 15000, 30000,
+)
+
+VUE_NON_RESOLUE = '(non résolue)'
+
+
+def get_profilage_config():
+    """Configuration du profilage (settings.SUPPER_PROFILAGE + valeurs par défaut)"""
+    config = dict(PROFILAGE_CONFIG_DEFAUT)
+    config.update(getattr(settings, 'SUPPER_PROFILAGE', {}))
+    return config
+
+
+def est_chemin_exclu(chemin, config):
+    return any(chemin.startswith(prefixe) for prefixe in config['CHEMINS_EXCLUS'])
+
+
+# ===================================================================
+# HISTOGRAMME DES DURÉES
+# ===================================================================
+
+def histogramme_vide():
+    return [0] * (len(BORNES_HISTOGRAMME_MS) + 1)
+
+
+def fusionner_histogrammes(cible, source):
+    """Ajoute les cases de source à celles de cible"""
+    if len(cible) < len(source):
+        cible.extend([0] * (len(source) - len(cible)))
+    for index, nombre in enumerate(source):
+        cible[index] += nombre
+    return cible
+
+
+def percentile(histogramme, rang, duree_max=None):
+    """
+    Percentile (0-100) estimé depuis l'histogramme, par interpolation
+    linéaire dans la case ; borné par la durée maximale observée
+
+    Returns:
+        float (ms) ou None si l'histogramme est vide
+    """
+    total = sum(histogramme)
+    if not total:
+        return None
+
+    cible = rang / 100 * total
+    cumul = 0
+    for index, nombre in enumerate(histogramme):
+        if nombre and cumul + nombre >= cible:
+            bas = BORNES_HISTOGRAMME_MS[index - 1] if index else 0
+            if index < len(BORNES_HISTOGRAMME_MS):
+                haut = BORNES_HISTOGRAMME_MS[index]
+            else:
+                haut = max(duree_max or bas, bas)
+            valeur = bas + (haut - bas) * (cible - cumul) / nombre
+            return min(valeur, duree_max) if duree_max else valeur
+        cumul += nombre
+    return duree_max
+
+
+# ===================================================================
+# MESURE DES REQUÊTES SQL D'UNE REQUÊTE HTTP
+# ===================================================================
+
+class MesureSQL:
+    """
+    Wrapper d'exécution (connection.execute_wrapper) : nombre, durée et
+    répétitions des requêtes SQL
+
+    Les paramètres étant transmis séparément, le texte SQL sert de
+    signature : une même requête exécutée en boucle avec des identifiants
+    différents a une seule signature.
+    """
+
+    def __init__(self):
+        self.nombre = 0
+        self.duree = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree += time.perf_counter() - debut
+            self.nombre += 1
+            self.signatures[sql] += 1
+
+    def requete_repetee(self):
+        """(signature, répétitions) de la requête SQL la plus répétée"""
+        if not self.signatures:
+            return '', 0
+        return self.signatures.most_common(1)[0]
+
+
+# ===================================================================
+# CUMUL EN MÉMOIRE ET ÉCRITURE PÉRIODIQUE
+# ===================================================================
+
+def _cumul_vide():
+    return {
+        'nombre_requetes': 0,
+        'nombre_erreurs': 0,
+        'duree_totale_ms': 0.0,
+        'duree_max_ms': 0.0,
+        'histogramme': histogramme_vide(),
+        'nombre_echantillons': 0,
+        'requetes_sql_total': 0,
+        'requetes_sql_max': 0,
+        'duree_sql_ms': 0.0,
+        'nombre_n_plus_un': 0,
+        'signature_n_plus_un': '',
+        'repetitions_n_plus_un': 0,
+    }
+
+
+class ProfileurVues:
+    """
+    Cumul par (vue, méthode, heure) des mesures du processus et écriture
+    périodique dans StatistiqueVue (même fonctionnement que l'écrivain du
+    journal d'audit, common/audit.py)
+    """
+
+    def __init__(self):
+        self._cumuls = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._derniere_purge = None
+        self.stats = {
+            'mesurees': 0,
+            'echantillonnees': 0,
+            'ecritures': 0,
+            'erreurs': 0,
+        }
+
+    # ---------------------------------------------------------------
+    # API publique
+    # ---------------------------------------------------------------
+
+    def enregistrer(self, vue, methode, statut, duree, mesure=None, config=None):
+        """
+        Cumule la mesure d'une requête HTTP
+
+        Args:
+            vue: nom de la vue résolue (namespace:nom ou chemin Python)
+            methode: méthode HTTP
+            statut: code de statut de la réponse
+            duree: durée totale (secondes)
+            mesure: MesureSQL si la requête a été échantillonnée
+        """
+        config = config or get_profilage_config()
+        self._assurer_thread(config)
+
+        duree_ms = duree * 1000
+        cle = (vue[:200], methode[:10], timezone.now().replace(minute=0, second=0, microsecond=0))
+
+        with self._lock:
+            cumul = self._cumuls.get(cle)
+            if cumul is None:
+                cumul = self._cumuls[cle] = _cumul_vide()
+
+            cumul['nombre_requetes'] += 1
+            if statut >= 500:
+                cumul['nombre_erreurs'] += 1
+            cumul['duree_totale_ms'] += duree_ms
+            cumul['duree_max_ms'] = max(cumul['duree_max_ms'], duree_ms)
+            cumul['histogramme'][bisect_left(BORNES_HISTOGRAMME_MS, duree_ms)] += 1
+            self.stats['mesurees'] += 1
+
+            if mesure is not None:
+                cumul['nombre_echantillons'] += 1
+                cumul['requetes_sql_total'] += mesure.nombre
+                cumul['requetes_sql_max'] = max(cumul['requetes_sql_max'], mesure.nombre)
+                cumul['duree_sql_ms'] += mesure.duree * 1000
+                signature, repetitions = mesure.requete_repetee()
+                if repetitions >= config['SEUIL_N_PLUS_UN']:
+                    cumul['nombre_n_plus_un'] += 1
+                    if repetitions >= cumul['repetitions_n_plus_un']:
+                        cumul['signature_n_plus_un'] = signature
+                        cumul['repetitions_n_plus_un'] = repetitions
+                self.stats['echantillonnees'] += 1
+
+    def vider(self):
+        """Écrit immédiatement les cumuls en attente"""
+        with self._lock:
+            cumuls, self._cumuls = self._cumuls, {}
+        if cumuls:
+            self._ecrire(cumuls)
+        return len(cumuls)
+
+    def arreter(self):
+        """Arrête le thread de fond après un dernier vidage"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.vider()
+
+    def get_statut(self):
+        """Statistiques de fonctionnement (supervision)"""
+        return dict(
+            self.stats,
+            en_attente=len(self._cumuls),
+            thread_actif=bool(self._thread and self._thread.is_alive()),
+        )
+
+    # ---------------------------------------------------------------
+    # Fonctionnement interne
+    # ---------------------------------------------------------------
+
+    def _assurer_thread(self, config):
+        """Démarre le thread de fond (une fois par processus, y compris après fork)"""
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+
+            if self._pid != pid:
+                # Cumuls hérités du processus parent : déjà comptés par lui
+                self._cumuls = {}
+            self._stop.clear()
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._boucle,
+                args=(config['FLUSH_INTERVAL'], config['RETENTION_JOURS']),
+                name='supper-profileur-vues',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _boucle(self, intervalle, retention_jours):
+        while not self._stop.wait(intervalle):
+            try:
+                self.vider()
+                self._purger(retention_jours)
+            finally:
+                # Le thread de fond ne doit pas conserver de connexion ouverte
+                connections.close_all()
+
+    def _ecrire(self, cumuls):
+        """Fusionne les cumuls dans StatistiqueVue (une ligne par vue et par heure)"""
+        from accounts.models import StatistiqueVue
+
+        for (vue, methode, periode), cumul in cumuls.items():
+            try:
+                with transaction.atomic():
+                    stat, cree = StatistiqueVue.objects.select_for_update().get_or_create(
+                        vue=vue, methode=methode, periode=periode, defaults=cumul
+                    )
+                    if not cree:
+                        for champ in ('nombre_requetes', 'nombre_erreurs', 'duree_totale_ms',
+                                      'nombre_echantillons', 'requetes_sql_total',
+                                      'duree_sql_ms', 'nombre_n_plus_un'):
+                            setattr(stat, champ, getattr(stat, champ) + cumul[champ])
+                        stat.duree_max_ms = max(stat.duree_max_ms, cumul['duree_max_ms'])
+                        stat.requetes_sql_max = max(stat.requetes_sql_max, cumul['requetes_sql_max'])
+                        stat.histogramme = fusionner_histogrammes(
+                            list(stat.histogramme or []), cumul['histogramme']
+                        )
+                        if cumul['repetitions_n_plus_un'] >= stat.repetitions_n_plus_un:
+                            stat.signature_n_plus_un = cumul['signature_n_plus_un']
+                            stat.repetitions_n_plus_un = cumul['repetitions_n_plus_un']
+                        stat.save()
+                self.stats['ecritures'] += 1
+            except Exception as e:
+                self.stats['erreurs'] += 1
+                logger.error(f"Profilage: statistiques perdues pour {methode} {vue}: {str(e)}")
+
+    def _purger(self, retention_jours):
+        """Supprime les heures périmées (au plus une fois par heure)"""
+        from accounts.models import StatistiqueVue
+
+        maintenant = timezone.now()
+        if self._derniere_purge and (maintenant - self._derniere_purge).total_seconds() < 3600:
+            return
+        self._derniere_purge = maintenant
+
+        try:
+            supprimees, _ = StatistiqueVue.objects.filter(
+                periode__lt=maintenant - timedelta(days=retention_jours)
+            ).delete()
+            if supprimees:
+                logger.info(f"Profilage: {supprimees} statistique(s) horaire(s) supprimée(s)")
+        except Exception as e:
+            logger.error(f"Profilage: purge des statistiques impossible: {str(e)}")
+
+
+profileur_vues = ProfileurVues()
+
+
+@atexit.register
+def _vider_profileur_a_l_arret():
+    try:
+        profileur_vues.arreter()
+    except Exception as e:
+        logger.error(f"Erreur vidage des statistiques de profilage à l'arrêt: {str(e)}")
+
+
+# ===================================================================
+# LECTURE : PERCENTILES PAR VUE SUR UNE FENÊTRE GLISSANTE
+# ===================================================================
+
+TRIS_STATISTIQUES = ('p95', 'p99', 'p50', 'nombre_requetes', 'duree_totale_ms', 'sql_moyen', 'nombre_n_plus_un')
+
+
+def statistiques_par_vue(heures=24, tri='p95', limite=50, vue=None):
+    """
+    Statistiques par (vue, méthode) sur les `heures` dernières heures
+
+    Returns:
+        list de dict : vue, methode, nombre_requetes, nombre_erreurs,
+        moyenne_ms, p50, p95, p99, max_ms, duree_totale_ms, sql_moyen,
+        sql_max, duree_sql_moyenne_ms, nombre_echantillons,
+        nombre_n_plus_un, signature_n_plus_un, repetitions_n_plus_un
+    """
+    from accounts.models import StatistiqueVue
+
+    depuis = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=heures - 1)
+    lignes = StatistiqueVue.objects.filter(periode__gte=depuis).order_by()
+    if vue:
+        lignes = lignes.filter(vue=vue)
+
+    par_vue = {}
+    for stat in lignes.iterator():
+        cle = (stat.vue, stat.methode)
+        cumul = par_vue.get(cle)
+        if cumul is None:
+            cumul = par_vue[cle] = _cumul_vide()
+        for champ in ('nombre_requetes', 'nombre_erreurs', 'duree_totale_ms',
+                      'nombre_echantillons', 'requetes_sql_total',
+                      'duree_sql_ms', 'nombre_n_plus_un'):
+            cumul[champ] += getattr(stat, champ)
+        cumul['duree_max_ms'] = max(cumul['duree_max_ms'], stat.duree_max_ms)
+        cumul['requetes_sql_max'] = max(cumul['requetes_sql_max'], stat.requetes_sql_max)
+        fusionner_histogrammes(cumul['histogramme'], stat.histogramme or histogramme_vide())
+        if stat.repetitions_n_plus_un >= cumul['repetitions_n_plus_un'] and stat.signature_n_plus_un:
+            cumul['signature_n_plus_un'] = stat.signature_n_plus_un
+            cumul['repetitions_n_plus_un'] = stat.repetitions_n_plus_un
+
+    resultats = []
+    for (nom_vue, methode), cumul in par_vue.items():
+        nombre = cumul['nombre_requetes']
+        echantillons = cumul['nombre_echantillons']
+        resultats.append({
+            'vue': nom_vue,
+            'methode': methode,
+            'nombre_requetes': nombre,
+            'nombre_erreurs': cumul['nombre_erreurs'],
+            'moyenne_ms': round(cumul['duree_totale_ms'] / nombre, 1) if nombre else None,
+            'p50': _arrondi(percentile(cumul['histogramme'], 50, cumul['duree_max_ms'])),
+            'p95': _arrondi(percentile(cumul['histogramme'], 95, cumul['duree_max_ms'])),
+            'p99': _arrondi(percentile(cumul['histogramme'], 99, cumul['duree_max_ms'])),
+            'max_ms': round(cumul['duree_max_ms'], 1),
+            'duree_totale_ms': round(cumul['duree_totale_ms'], 1),
+            'nombre_echantillons': echantillons,
+            'sql_moyen': round(cumul['requetes_sql_total'] / echantillons, 1) if echantillons else None,
+            'sql_max': cumul['requetes_sql_max'],
+            'duree_sql_moyenne_ms': round(cumul['duree_sql_ms'] / echantillons, 1) if echantillons else None,
+            'nombre_n_plus_un': cumul['nombre_n_plus_un'],
+            'signature_n_plus_un': cumul['signature_n_plus_un'],
+            'repetitions_n_plus_un': cumul['repetitions_n_plus_un'],
+        })
+
+    if tri not in TRIS_STATISTIQUES:
+        tri = 'p95'
+    resultats.sort(key=lambda ligne: ligne[tri] if ligne[tri] is not None else -1, reverse=True)
+    return resultats[:limite] if limite else resultats
+
+
+def _arrondi(valeur):
+    return round(valeur, 1) if valeur is not None else None
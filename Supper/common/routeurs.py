@@ -0,0 +1,30 @@
+# ===================================================================
+# common/routeurs.py - Routage des bases de données
+# ===================================================================
+"""
+Le cache en base (DatabaseCache) passe par la connexion 'cache' : ses
+écritures sont validées immédiatement (autocommit), quelle que soit la
+transaction en cours sur la connexion 'default'.
+"""
+
+ALIAS_CACHE = 'cache'
+
+
+class RouteurCache:
+    """Lectures et écritures du cache en base sur la connexion dédiée"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'django_cache':
+            return ALIAS_CACHE
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'django_cache':
+            return ALIAS_CACHE
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Une seule base physique : les migrations ne passent que par 'default'
+        if db == ALIAS_CACHE:
+            return False
+        return None
@@ -0,0 +1,22 @@
+# ===================================================================
+# common/signals.py - Invalidation des caches partagés
+# ===================================================================
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from common.context_processors import cle_compteurs_jour
+
+logger = logging.getLogger('supper')
+
+
+@receiver(post_save, sender='inventaire.InventaireJournalier')
+@receiver(post_delete, sender='inventaire.InventaireJournalier')
+@receiver(post_save, sender='inventaire.RecetteJournaliere')
+@receiver(post_delete, sender='inventaire.RecetteJournaliere')
+def invalider_compteurs_jour(sender, instance, **kwargs):
+    """Invalide les statistiques rapides du jour concerné"""
+    if instance.date:
+        cache.delete(cle_compteurs_jour(instance.date))
@@ -1,3 +1,300 @@
-from django.test import TestCase
+from datetime import timedelta
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+
+# ===================================================================
+# PROFILAGE PAR VUE (common/profilage.py)
+# ===================================================================
+
+class PercentileTest(TestCase):
+
+    def _histogramme(self, **cases):
+        from common.profilage import histogramme_vide
+
+        histogramme = histogramme_vide()
+        for index, nombre in cases.items():
+            histogramme[int(index[1:])] = nombre
+        return histogramme
+
+    def test_histogramme_vide(self):
+        from common.profilage import histogramme_vide, percentile
+
+        self.assertIsNone(percentile(histogramme_vide(), 95))
+
+    def test_interpolation_dans_la_case(self):
+        from common.profilage import percentile
+
+        # 10 requêtes entre 5 et 10 ms
+        histogramme = self._histogramme(c1=10)
+        self.assertAlmostEqual(percentile(histogramme, 50), 7.5)
+        self.assertAlmostEqual(percentile(histogramme, 100), 10)
+
+    def test_case_du_percentile(self):
+        from common.profilage import percentile
+
+        # 90 requêtes sous 5 ms, 10 entre 75 et 100 ms
+        histogramme = self._histogramme(c0=90, c5=10)
+        self.assertAlmostEqual(percentile(histogramme, 50), 50 / 90 * 5)
+        self.assertAlmostEqual(percentile(histogramme, 95), 87.5)
+
+    def test_borne_par_la_duree_maximale(self):
+        from common.profilage import percentile
+
+        self.assertAlmostEqual(percentile(self._histogramme(c1=10), 100, duree_max=9), 9)
+
+    def test_derniere_case_jusqu_a_la_duree_maximale(self):
+        from common.profilage import BORNES_HISTOGRAMME_MS, percentile
+
+        derniere = len(BORNES_HISTOGRAMME_MS)
+        histogramme = self._histogramme(**{f'c{derniere}': 4})
+        self.assertAlmostEqual(percentile(histogramme, 50, duree_max=40000), 35000)
+
+
+class ProfileurVuesTest(TestCase):
+
+    def setUp(self):
+        from common.profilage import ProfileurVues
+
+        self.profileur = ProfileurVues()
+        self.periode = timezone.now().replace(minute=0, second=0, microsecond=0)
+        # Pas de thread de fond : les écritures sont déclenchées par le test
+        patcher = mock.patch.object(ProfileurVues, '_assurer_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _mesure(self, nombre, repetitions):
+        mesure = mock.Mock(nombre=nombre, duree=0.01)
+        mesure.requete_repetee.return_value = ('SELECT ...', repetitions)
+        return mesure
+
+    def _enregistrer(self, duree, statut=200, mesure=None):
+        from common.profilage import get_profilage_config
+
+        self.profileur.enregistrer('inventaire:liste', 'GET', statut, duree, mesure, get_profilage_config())
+
+    def test_ecriture_cree_puis_fusionne_la_ligne_horaire(self):
+        from accounts.models import StatistiqueVue
+
+        self._enregistrer(0.007)
+        self._enregistrer(0.090, statut=500, mesure=self._mesure(12, 6))
+        self.assertEqual(self.profileur.vider(), 1)
+
+        self._enregistrer(0.200, mesure=self._mesure(30, 20))
+        self.assertEqual(self.profileur.vider(), 1)
+
+        stat = StatistiqueVue.objects.get(vue='inventaire:liste', methode='GET', periode=self.periode)
+        self.assertEqual(stat.nombre_requetes, 3)
+        self.assertEqual(stat.nombre_erreurs, 1)
+        self.assertAlmostEqual(stat.duree_totale_ms, 297)
+        self.assertAlmostEqual(stat.duree_max_ms, 200)
+        self.assertEqual(sum(stat.histogramme), 3)
+        self.assertEqual(stat.nombre_echantillons, 2)
+        self.assertEqual(stat.requetes_sql_total, 42)
+        self.assertEqual(stat.requetes_sql_max, 30)
+        self.assertEqual(stat.nombre_n_plus_un, 2)
+        self.assertEqual(stat.repetitions_n_plus_un, 20)
+        self.assertEqual(self.profileur.stats['ecritures'], 2)
+        self.assertEqual(self.profileur.stats['erreurs'], 0)
+
+    def test_vider_sans_mesure(self):
+        self.assertEqual(self.profileur.vider(), 0)
+
+    def test_percentiles_sur_plusieurs_heures(self):
+        from accounts.models import StatistiqueVue
+        from common.profilage import _cumul_vide, statistiques_par_vue
+
+        cumuls = {}
+        for decalage, duree_ms, case in ((0, 7, 1), (1, 90, 5)):
+            cumul = _cumul_vide()
+            cumul.update(nombre_requetes=10, duree_totale_ms=10 * duree_ms, duree_max_ms=duree_ms)
+            cumul['histogramme'][case] = 10
+            cumuls[('inventaire:liste', 'GET', self.periode - timedelta(hours=decalage))] = cumul
+        self.profileur._ecrire(cumuls)
+
+        self.assertEqual(StatistiqueVue.objects.count(), 2)
+        ligne, = statistiques_par_vue(heures=24)
+        self.assertEqual(ligne['nombre_requetes'], 20)
+        self.assertEqual(ligne['moyenne_ms'], 48.5)
+        self.assertEqual(ligne['p50'], 10)
+        # Interpolé à 97,5 ms dans la case 75-100 ms, borné par le maximum observé
+        self.assertEqual(ligne['p95'], 90)
+        self.assertEqual(ligne['max_ms'], 90)
+
+
+# ===================================================================
+# CALCULS EN CACHE PARTAGÉ (common/cache_partage.py)
+# ===================================================================
+
+class Compteur:
+    """Calcul factice comptant ses exécutions"""
+
+    def __init__(self, duree=0):
+        self.appels = 0
+        self.duree = duree
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.appels += 1
+            appel = self.appels
+        time.sleep(self.duree)
+        return appel
+
+
+class CachedComputationTest(TestCase):
+
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_resultat_servi_depuis_le_cache(self):
+        from common.cache_partage import cached_computation
+
+        calcul = Compteur()
+        self.assertEqual(cached_computation('test', calcul, [1]), 1)
+        self.assertEqual(cached_computation('test', calcul, [1]), 1)
+        self.assertEqual(calcul.appels, 1)
+
+    def test_parametres_et_version_distinguent_les_resultats(self):
+        from common.cache_partage import cached_computation
+
+        calcul = Compteur()
+        cached_computation('test', calcul, [1])
+        cached_computation('test', calcul, [2])
+        cached_computation('test', calcul, [1], version=2)
+        self.assertEqual(calcul.appels, 3)
+
+    def test_expiration(self):
+        from common.cache_partage import cached_computation
+
+        calcul = Compteur()
+        cached_computation('test', calcul, [1], duree=60)
+        with mock.patch('common.cache_partage.time.time', return_value=time.time() + 61):
+            self.assertEqual(cached_computation('test', calcul, [1], duree=60), 2)
+
+    def test_invalidation_par_poste(self):
+        from common.cache_partage import cached_computation, etiquettes_postes, invalider_postes
+
+        calcul_5, calcul_7, calcul_tous = Compteur(), Compteur(), Compteur()
+        lancer = lambda: (
+            cached_computation('p5', calcul_5, etiquettes=etiquettes_postes([5])),
+            cached_computation('p7', calcul_7, etiquettes=etiquettes_postes([7])),
+            cached_computation('tous', calcul_tous, etiquettes=etiquettes_postes()),
+        )
+        lancer()
+        invalider_postes([5])
+        lancer()
+
+        # Poste 5 et calcul sur tous les postes recalculés, poste 7 intact
+        self.assertEqual((calcul_5.appels, calcul_7.appels, calcul_tous.appels), (2, 1, 2))
+
+    def test_etiquette_evincee_ne_rend_pas_un_resultat_frais(self):
+        from common.cache_partage import _cle_etiquette, cached_computation, etiquette_poste
+
+        calcul = Compteur()
+        cached_computation('test', calcul, etiquettes=[etiquette_poste(5)])
+        cache.delete(_cle_etiquette(etiquette_poste(5)))
+        cached_computation('test', calcul, etiquettes=[etiquette_poste(5)])
+        self.assertEqual(calcul.appels, 2)
+
+    def test_resultat_perime_servi_pendant_un_recalcul_en_cours(self):
+        from common.cache_partage import _cle_calcul, cached_computation, etiquette_poste, invalider_postes
+
+        calcul = Compteur()
+        cached_computation('test', calcul, [1], etiquettes=[etiquette_poste(5)])
+        invalider_postes([5])
+
+        # Un autre processus tient le verrou de recalcul
+        cache.add(f"{_cle_calcul('test', 1, [1])}:verrou", 1, 60)
+        self.assertEqual(cached_computation('test', calcul, [1], etiquettes=[etiquette_poste(5)]), 1)
+        self.assertEqual(calcul.appels, 1)
+
+    def test_calcul_sans_verrou_apres_attente(self):
+        from common.cache_partage import _cle_calcul, cached_computation
+
+        calcul = Compteur()
+        cache.add(f"{_cle_calcul('test', 1, [1])}:verrou", 1, 60)
+        with mock.patch('common.cache_partage.ATTENTE_MAX', 0.2):
+            self.assertEqual(cached_computation('test', calcul, [1]), 1)
+
+    def test_verrou_libere_apres_une_erreur(self):
+        from common.cache_partage import _cle_calcul, cached_computation
+
+        def echec():
+            raise RuntimeError('calcul impossible')
+
+        with self.assertRaises(RuntimeError):
+            cached_computation('test', echec, [1])
+        self.assertIsNone(cache.get(f"{_cle_calcul('test', 1, [1])}:verrou"))
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Écritures simultanées des connexions default et cache : base SQLite verrouillée",
+    )
+    def test_sauvegarde_recette_invalide_le_poste(self):
+        from accounts.models import Poste, Region
+        from common.cache_partage import cached_computation, etiquette_poste
+        from inventaire.models import RecetteJournaliere
+
+        poste = Poste.objects.create(code='TST-P01', nom='Péage Test', type='peage', region=Region.objects.create(nom='Centre'))
+        calcul = Compteur()
+        cached_computation('test', calcul, etiquettes=[etiquette_poste(poste.id)])
+
+        # Hors transaction de test, l'unité de travail traite l'invalidation au commit
+        with self.captureOnCommitCallbacks(execute=True):
+            RecetteJournaliere.objects.create(poste=poste, date=timezone.localdate(), montant_declare=100000)
+        cached_computation('test', calcul, etiquettes=[etiquette_poste(poste.id)])
+        self.assertEqual(calcul.appels, 2)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Cache en base partagé vérifié sous PostgreSQL uniquement")
+class CachedComputationConcurrenceTest(TransactionTestCase):
+    """Cache en base (CACHE_BACKEND=base) et plusieurs fils d'exécution réels"""
+
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_un_seul_calcul_pour_des_demandes_simultanees(self):
+        from common.cache_partage import cached_computation
+
+        calcul = Compteur(duree=0.5)
+        depart = threading.Barrier(5)
+        resultats = []
+
+        def demander():
+            try:
+                depart.wait()
+                resultats.append(cached_computation('simultane', calcul, [1]))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=demander) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertEqual(calcul.appels, 1)
+        self.assertEqual(resultats, [1] * 5)
+
+    def test_ecritures_du_cache_hors_transaction_appelante(self):
+        from common.cache_partage import cached_computation
+
+        calcul = Compteur()
+        with transaction.atomic():
+            cached_computation('rollback', calcul, [1])
+            transaction.set_rollback(True)
+
+        self.assertEqual(cached_computation('rollback', calcul, [1]), 1)
+        self.assertEqual(calcul.appels, 1)
@@ -48,6 +48,15 @@ urlpatterns = [
          views.api_notifications, 
          name='api_notifications'),
 
+    # Profilage des vues (percentiles de durée, requêtes SQL)
+    path('admin/performances/', 
+         views.statistiques_performances, 
+         name='statistiques_performances'),
+    
+    path('admin/api/performances/', 
+         views.api_statistiques_performances, 
+         name='api_statistiques_performances'),
+
     # API pour données dashboard
     # path('api/stats-generales/', views.StatsGeneralesAPIView.as_view(), name='api_stats_generales'),
     # path('api/activite-recente/', views.ActiviteRecenteAPIView.as_view(), name='api_activite_recente'),
@@ -340,30 +340,40 @@ def get_user_short_description(user):
 # FONCTION PRINCIPALE DE JOURNALISATION - VERSION CORRIGÉE
 # ===================================================================
 
-def log_user_action(user, action, details="", request=None, **extra_data):
+def log_user_action(user, action, details="", request=None, critique=None, **extra_data):
     """
     Fonction PRINCIPALE pour journaliser une action utilisateur.
     
     VERSION CORRIGÉE: Anti-duplication SUPPRIMÉE pour éviter le blocage des logs.
     Chaque appel crée maintenant une entrée dans le journal.
     
+    L'entrée est confiée à common.audit.audit_writer : insertion groupée en
+    arrière-plan, sauf pour les actions critiques (connexion, suppression,
+    permissions...) écrites immédiatement.
+    
     Args:
         user: Utilisateur effectuant l'action
         action: Nom de l'action (ex: "SAISIE_RECETTE", "Modification utilisateur")
         details: Détails de l'action (texte libre)
         request: Objet request Django (optionnel mais recommandé)
+        critique: Forcer (True) ou désactiver (False) l'écriture synchrone,
+                  détection automatique par mots-clés si None
         **extra_data: Données supplémentaires structurées
     
     Returns:
-        JournalAudit: L'entrée de journal créée, ou None en cas d'erreur
+        bool: True si l'entrée a été enregistrée ou mise en file, None en cas d'erreur
     """
     try:
-        from accounts.models import JournalAudit
+        from common.audit import audit_writer, est_action_critique
         
         # NOTE: Section ANTI-DUPLICATION SUPPRIMÉE volontairement
         # car elle bloquait tous les logs en production.
         # Chaque appel à log_user_action crée maintenant une entrée.
         
+        if user is None or getattr(user, 'pk', None) is None:
+            logger.warning(f"Journalisation ignorée (utilisateur non identifié): {action}")
+            return None
+        
         # ===================================================================
         # EXTRACTION DES INFORMATIONS DE REQUÊTE
         # ===================================================================
@@ -380,7 +390,7 @@ def log_user_action(user, action, details="", request=None, **extra_data):
             ip = x_forwarded_for.split(',')[0].strip() if x_forwarded_for else request.META.get('REMOTE_ADDR')
             
             # Session
-            session_key = getattr(request.session, 'session_key', '') or ''
+            session_key = getattr(getattr(request, 'session', None), 'session_key', '') or ''
             
             # User agent
             user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
@@ -395,41 +405,49 @@ def log_user_action(user, action, details="", request=None, **extra_data):
                 duration = timedelta(seconds=duration_seconds)
         
         # ===================================================================
-        # CONSTRUCTION DU MESSAGE DÉTAILLÉ
+        # CONSTRUCTION DU MESSAGE DÉTAILLÉ (différée au moment de l'écriture)
         # ===================================================================
-        user_desc = get_user_description(user, include_poste=True)
-        
-        formatted_message = _format_action_message(
-            user=user,
-            user_desc=user_desc,
-            action=action,
-            details=details,
-            extra_data=extra_data
-        )
+        def preparer():
+            user_desc = get_user_description(user, include_poste=True)
+            
+            formatted_message = _format_action_message(
+                user=user,
+                user_desc=user_desc,
+                action=action,
+                details=details,
+                extra_data=extra_data
+            )
+            
+            # Log dans le fichier système
+            category = get_user_category(user)
+            icon = _get_category_icon(category)
+            logger.info(f"{icon} {action} | {get_user_short_description(user)} | {details[:100] if details else 'OK'}")
+            
+            return {'details': formatted_message}
         
         # ===================================================================
         # CRÉATION DE L'ENTRÉE DE JOURNAL
         # ===================================================================
-        log_entry = JournalAudit.objects.create(
-            utilisateur=user,
-            action=action,
-            details=formatted_message,
-            adresse_ip=ip,
-            user_agent=user_agent,
-            session_key=session_key,
-            url_acces=url,
-            methode_http=method,
-            succes=True,
-            statut_reponse=200,
-            duree_execution=duration
-        )
+        entree = {
+            'utilisateur': user,
+            'action': action[:100],
+            'adresse_ip': ip,
+            'user_agent': user_agent,
+            'session_key': session_key[:40],
+            'url_acces': url,
+            'methode_http': method,
+            'succes': True,
+            'statut_reponse': 200,
+            'duree_execution': duration,
+            'preparer': preparer,
+        }
         
-        # Log dans le fichier système
-        category = get_user_category(user)
-        icon = _get_category_icon(category)
-        logger.info(f"{icon} {action} | {get_user_short_description(user)} | {details[:100] if details else 'OK'}")
+        if critique is None:
+            critique = est_action_critique(action)
         
-        return log_entry
+        audit_writer.enregistrer(entree, synchrone=critique)
+        
+        return True
         
     except Exception as e:
         logger.error(f"Erreur journalisation: {str(e)}")
@@ -1114,42 +1132,100 @@ def generer_code_poste(nom_poste, region, type_poste='peage'):
     return f"{type_prefix}-{nom_code}-{region_code}-{numero}"
 
 
+def _ligne_export(obj, champs):
+    """Valeurs affichables des champs d'une instance, pour les exports"""
+    ligne = []
+    for field in champs:
+        value = getattr(obj, field.name, '')
+        if hasattr(value, 'strftime'):
+            value = value.strftime('%d/%m/%Y %H:%M') if hasattr(value, 'hour') else value.strftime('%d/%m/%Y')
+        elif callable(value):
+            value = value()
+        ligne.append(str(value) if value is not None else '')
+    return ligne
+
+
+def _lignes_export(queryset, champs):
+    """Lignes d'export lues par lots, clés étrangères jointes"""
+    from common.exports import parcourir
+
+    relations = [field.name for field in champs if getattr(field, 'many_to_one', False)]
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return (_ligne_export(obj, champs) for obj in parcourir(queryset))
+
+
 def exporter_donnees_csv(queryset, champs, nom_fichier="export"):
-    """Exporte un queryset en CSV"""
-    import csv
-    from django.http import HttpResponse
-    
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow([field.verbose_name for field in champs])
-    
-    for obj in queryset:
-        row = []
-        for field in champs:
-            value = getattr(obj, field.name, '')
-            if hasattr(value, 'strftime'):
-                value = value.strftime('%d/%m/%Y %H:%M') if hasattr(value, 'hour') else value.strftime('%d/%m/%Y')
-            elif callable(value):
-                value = value()
-            row.append(str(value) if value is not None else '')
-        writer.writerow(row)
-    
-    return response
+    """Exporte un queryset en CSV, en flux"""
+    from common.exports import reponse_csv
+
+    return reponse_csv(
+        [field.verbose_name for field in champs],
+        _lignes_export(queryset, champs),
+        f"{nom_fichier}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv",
+    )
+
+
+def exporter_donnees_excel(queryset, champs, nom_fichier="export"):
+    """Exporte un queryset en Excel (.xlsx), en mode écriture seule"""
+    from common.exports import reponse_xlsx
+
+    return reponse_xlsx(
+        [str(field.verbose_name) for field in champs],
+        _lignes_export(queryset, champs),
+        f"{nom_fichier}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        titre=nom_fichier,
+        largeurs=18,
+    )
+
+
+def plage_journees(champ, date_debut=None, date_fin=None):
+    """
+    Filtre « du jour date_debut au jour date_fin inclus » sur un DateTimeField
+
+    Remplace champ__date__gte / champ__date__lte par une plage semi-ouverte
+    [début de date_debut, début du lendemain de date_fin) : la comparaison
+    porte sur la colonne elle-même et reste exploitable par un index, ce que
+    le cast en date ne permet pas. Les journées sont celles du fuseau courant,
+    comme pour le lookup __date.
+
+    Usage: AmendeEmise.objects.filter(**plage_journees('date_paiement', debut, fin))
+    """
+    def _debut_journee(jour, decalage=0):
+        if isinstance(jour, str):
+            jour = datetime.strptime(jour, '%Y-%m-%d')
+        if isinstance(jour, datetime):
+            jour = jour.date()
+        return timezone.make_aware(
+            datetime.combine(jour + timedelta(days=decalage), datetime.min.time())
+        )
+
+    filtres = {}
+    if date_debut is not None:
+        filtres[f"{champ}__gte"] = _debut_journee(date_debut)
+    if date_fin is not None:
+        filtres[f"{champ}__lt"] = _debut_journee(date_fin, decalage=1)
+    return filtres
 
 
 def nettoyer_donnees_anciennes(model_class, champ_date, jours_retention):
-    """Supprime les données anciennes selon une politique de rétention"""
+    """
+    Supprime les données anciennes selon une politique de rétention
+    
+    Le journal d'audit passe par la suppression de partitions mensuelles ;
+    les autres modèles sont supprimés par lots de clés primaires.
+    """
+    from accounts.models import JournalAudit
+    from common.partitions import appliquer_retention, supprimer_par_lots
+    
+    if model_class is JournalAudit and champ_date == 'timestamp':
+        return appliquer_retention(jours_retention)['lignes']
+    
     date_limite = timezone.now() - timedelta(days=jours_retention)
     
     filter_kwargs = {f"{champ_date}__lt": date_limite}
-    objets_a_supprimer = model_class.objects.filter(**filter_kwargs)
-    
-    count = objets_a_supprimer.count()
+    count = supprimer_par_lots(model_class.objects.filter(**filter_kwargs))
     if count > 0:
-        objets_a_supprimer.delete()
         logger.info(f"Nettoyage {model_class.__name__}: {count} objets supprimés")
     
     return count
@@ -1181,6 +1257,101 @@ def get_statistiques_utilisateur(user, jours=30):
     return stats
 
 
+JOURNAL_AUDIT_STATS_CACHE_TIMEOUT = 300  # secondes
+JOURNAL_AUDIT_FENETRE_ACTIONS_JOURS = 90
+
+
+def filtrer_journal_audit(logs, search='', action='', user='', succes='',
+                          date_debut='', date_fin=''):
+    """
+    Applique les filtres de l'écran d'audit sous une forme exploitable par les
+    index composites (utilisateur / action / date) et l'élagage des partitions :
+    égalités sur utilisateur_id et action, plages semi-ouvertes sur timestamp.
+    """
+    from django.db.models import Q
+    from accounts.models import UtilisateurSUPPER
+
+    if user:
+        utilisateur_id = UtilisateurSUPPER.objects.filter(
+            username=user
+        ).values_list('id', flat=True).first()
+        if utilisateur_id is None:
+            return logs.none()
+        logs = logs.filter(utilisateur_id=utilisateur_id)
+
+    if action:
+        logs = logs.filter(action=action)
+
+    if succes:
+        logs = logs.filter(succes=succes == 'true')
+
+    if date_debut:
+        try:
+            jour = datetime.strptime(date_debut, '%Y-%m-%d')
+            logs = logs.filter(timestamp__gte=timezone.make_aware(jour))
+        except ValueError:
+            pass
+
+    if date_fin:
+        try:
+            jour = datetime.strptime(date_fin, '%Y-%m-%d') + timedelta(days=1)
+            logs = logs.filter(timestamp__lt=timezone.make_aware(jour))
+        except ValueError:
+            pass
+
+    if search:
+        logs = logs.filter(
+            Q(action__icontains=search) |
+            Q(details__icontains=search) |
+            Q(utilisateur__username__icontains=search) |
+            Q(utilisateur__nom_complet__icontains=search)
+        )
+
+    return logs
+
+
+def get_statistiques_journal_audit():
+    """
+    Compteurs et listes de filtres de l'écran d'audit, mis en cache
+
+    Le total provient de l'estimation PostgreSQL (pas de COUNT(*) sur la table
+    entière) ; les réussites s'en déduisent à partir du nombre d'erreurs,
+    lu via l'index sur `succes`.
+    """
+    from django.core.cache import cache
+    from accounts.models import JournalAudit
+    from common.partitions import estimer_total_journal
+
+    cle = 'journal_audit_stats'
+    donnees = cache.get(cle)
+    if donnees is not None:
+        return donnees
+
+    maintenant = timezone.now()
+    debut_jour = timezone.make_aware(
+        datetime.combine(timezone.localdate(), datetime.min.time())
+    )
+    total = estimer_total_journal()
+    erreurs = JournalAudit.objects.filter(succes=False).count()
+
+    donnees = {
+        'stats': {
+            'total': total,
+            'today': JournalAudit.objects.filter(timestamp__gte=debut_jour).count(),
+            'success': max(total - erreurs, 0),
+            'errors': erreurs,
+        },
+        # Actions récentes uniquement : ne parcourt que les dernières partitions
+        'actions_uniques': list(
+            JournalAudit.objects.filter(
+                timestamp__gte=maintenant - timedelta(days=JOURNAL_AUDIT_FENETRE_ACTIONS_JOURS)
+            ).order_by('action').values_list('action', flat=True).distinct()[:30]
+        ),
+    }
+    cache.set(cle, donnees, JOURNAL_AUDIT_STATS_CACHE_TIMEOUT)
+    return donnees
+
+
 def get_resume_permissions(user):
     """Retourne un résumé lisible des permissions d'un utilisateur"""
     if not user:
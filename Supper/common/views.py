@@ -132,14 +132,17 @@ def index_dashboard(request):
     - Permissions utilisées pour le filtrage
     """
     
-    from inventaire.services.objectifs_service import ObjectifsService
+    from inventaire.services.dashboard_service import (
+        DashboardService, PORTEE_NATIONALE, portee_poste, portee_utilisateur
+    )
     
     user = request.user
     today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
     current_year = today.year
     
+    # Portée des blocs précalculés (national ou poste d'affectation)
+    portee = portee_utilisateur(user)
+    
     logger.info(f"[DASHBOARD] Utilisateur {user.username} ({user.habilitation}) accède au dashboard")
     
     # ================================================================
@@ -190,13 +193,7 @@ def index_dashboard(request):
     )
     
     if can_view_global_stats:
-        stats_globales = {
-            'total_utilisateurs': UtilisateurSUPPER.objects.count(),
-            'utilisateurs_actifs': UtilisateurSUPPER.objects.filter(is_active=True).count(),
-            'total_postes': Poste.objects.filter(is_active=True).count(),
-            'postes_peage': Poste.objects.filter(type='peage', is_active=True).count(),
-            'postes_pesage': Poste.objects.filter(type='pesage', is_active=True).count(),
-        }
+        stats_globales = DashboardService.obtenir('globales')
         logger.debug(f"[DASHBOARD] Stats globales chargées pour {user.username}")
     
     # ================================================================
@@ -205,28 +202,12 @@ def index_dashboard(request):
     stats_inventaires = None
     
     can_view_inventaires = (
-        postes_accessibles.exists() and 
+        portee is not None and postes_accessibles.exists() and 
         has_any_permission(user, ['peut_voir_liste_inventaires', 'peut_voir_liste_inventaires_admin'])
     )
     
     if can_view_inventaires:
-        stats_inventaires = {
-            'total_inventaires': InventaireJournalier.objects.filter(
-                poste__in=postes_accessibles
-            ).count(),
-            'inventaires_today': InventaireJournalier.objects.filter(
-                poste__in=postes_accessibles,
-                date=today
-            ).count(),
-            'inventaires_semaine': InventaireJournalier.objects.filter(
-                poste__in=postes_accessibles,
-                date__gte=week_ago
-            ).count(),
-            'inventaires_mois': InventaireJournalier.objects.filter(
-                poste__in=postes_accessibles,
-                date__gte=month_ago
-            ).count(),
-        }
+        stats_inventaires = DashboardService.obtenir('inventaires', portee, jour=today.isoformat())
         logger.debug(f"[DASHBOARD] Stats inventaires chargées pour {user.username}")
     
     # ================================================================
@@ -235,7 +216,7 @@ def index_dashboard(request):
     stats_recettes = None
     
     can_view_recettes_peage = (
-        postes_accessibles.exists() and
+        portee is not None and postes_accessibles.exists() and
         has_any_permission(user, [
             'peut_voir_liste_recettes_peage', 
             'peut_voir_stats_recettes_peage'
@@ -243,37 +224,21 @@ def index_dashboard(request):
     )
     
     if can_view_recettes_peage:
-        recettes_mois = RecetteJournaliere.objects.filter(
-            poste__in=postes_accessibles,
-            date__month=today.month,
-            date__year=today.year
-        )
-        
-        aggregations = recettes_mois.aggregate(
-            total_montant=Sum('montant_declare'),
-            total_potentiel=Sum('recette_potentielle'),
-            taux_moyen=Avg('taux_deperdition'),
-            nombre_recettes=Count('id')
-        )
+        bloc_recettes = DashboardService.obtenir('recettes', portee, jour=today.isoformat())
         
-        montant_mois = float(aggregations['total_montant'] or 0)
-        montant_potentiel = float(aggregations['total_potentiel'] or 0)
+        montant_mois = bloc_recettes['montant_mois']
+        montant_potentiel = bloc_recettes['montant_potentiel_mois']
         
         # Vérifier si l'utilisateur peut voir les recettes potentielles
         can_view_potentiel = has_permission(user, 'voir_recettes_potentielles')
         
         stats_recettes = {
-            'total_recettes': RecetteJournaliere.objects.filter(
-                poste__in=postes_accessibles
-            ).count(),
-            'recettes_today': RecetteJournaliere.objects.filter(
-                poste__in=postes_accessibles,
-                date=today
-            ).count(),
+            'total_recettes': bloc_recettes['total_recettes'],
+            'recettes_today': bloc_recettes['recettes_today'],
             'montant_mois': montant_mois,
             'montant_potentiel_mois': montant_potentiel if can_view_potentiel else None,
-            'taux_moyen_mois': float(aggregations['taux_moyen'] or 0) if has_permission(user, 'voir_taux_deperdition') else None,
-            'nombre_recettes_mois': aggregations['nombre_recettes'],
+            'taux_moyen_mois': bloc_recettes['taux_moyen_mois'] if has_permission(user, 'voir_taux_deperdition') else None,
+            'nombre_recettes_mois': bloc_recettes['nombre_recettes_mois'],
             'ecart_mois': (montant_mois - montant_potentiel) if can_view_potentiel else None,
             # Flags pour le template
             'can_view_potentiel': can_view_potentiel,
@@ -290,10 +255,7 @@ def index_dashboard(request):
     
     if can_view_objectifs:
         try:
-            stats_objectifs = ObjectifsService.calculer_objectifs_annuels(
-                annee=current_year,
-                inclure_postes_inactifs=False
-            )
+            stats_objectifs = DashboardService.obtenir('objectifs', annee=str(current_year))
             logger.debug(f"[DASHBOARD] Objectifs annuels chargés pour {user.username}")
         except Exception as e:
             logger.error(f"[DASHBOARD] Erreur calcul objectifs: {str(e)}")
@@ -316,105 +278,32 @@ def index_dashboard(request):
 
     if has_pesage_access:
         try:
-            from inventaire.models_pesage import AmendeEmise, PeseesJournalieres, QuittancementPesage
+            from inventaire.models_pesage import AmendeEmise
             import pytz
             
             CAMEROUN_TZ = pytz.timezone('Africa/Douala')
             
+            # Calculs pour AUJOURD'HUI (logique 9h-9h Cameroun)
+            from datetime import time
+            jour_travail = DashboardService.jour_travail_pesage()
+            
             # Déterminer la station accessible selon les permissions
             if user_has_acces_tous_postes(user):
                 station_pesage = None
-                stations_pesage_filter = Poste.objects.filter(type='pesage', is_active=True)
-                amendes_base = AmendeEmise.objects.filter(station__in=stations_pesage_filter)
-                pesees_base = PeseesJournalieres.objects.filter(station__in=stations_pesage_filter)
-                quittancements_base = QuittancementPesage.objects.filter(station__in=stations_pesage_filter)
+                portee_pesage = PORTEE_NATIONALE
                 label_scope = "Toutes stations"
             else:
                 station_pesage = user.poste_affectation if user.poste_affectation and user.poste_affectation.type == 'pesage' else None
-                
-                if station_pesage:
-                    amendes_base = AmendeEmise.objects.filter(station=station_pesage)
-                    pesees_base = PeseesJournalieres.objects.filter(station=station_pesage)
-                    quittancements_base = QuittancementPesage.objects.filter(station=station_pesage)
-                    label_scope = station_pesage.nom
-                else:
-                    amendes_base = AmendeEmise.objects.none()
-                    pesees_base = PeseesJournalieres.objects.none()
-                    quittancements_base = QuittancementPesage.objects.none()
-                    label_scope = "Aucune station"
+                portee_pesage = portee_poste(station_pesage.id) if station_pesage else None
+                label_scope = station_pesage.nom if station_pesage else "Aucune station"
             
-            # Calculs pour AUJOURD'HUI (logique 9h-9h Cameroun)
-            from datetime import time
-            maintenant_cameroun = timezone.now().astimezone(CAMEROUN_TZ)
-            HEURE_DEBUT = time(9, 0, 0)
-            
-            if maintenant_cameroun.time() < HEURE_DEBUT:
-                jour_travail = (maintenant_cameroun - timedelta(days=1)).date()
+            if portee_pesage:
+                bloc_pesage = DashboardService.obtenir(
+                    'pesage', portee_pesage,
+                    jour_travail=jour_travail.isoformat(), jour=today.isoformat()
+                )
             else:
-                jour_travail = maintenant_cameroun.date()
-            
-            datetime_debut_jour = CAMEROUN_TZ.localize(
-                datetime.combine(jour_travail, HEURE_DEBUT)
-            )
-            datetime_fin_jour = CAMEROUN_TZ.localize(
-                datetime.combine(jour_travail + timedelta(days=1), time(8, 59, 59))
-            )
-            
-            # Amendes émises aujourd'hui (9h-9h)
-            amendes_jour = amendes_base.filter(
-                date_heure_emission__gte=datetime_debut_jour,
-                date_heure_emission__lte=datetime_fin_jour
-            )
-            
-            # Amendes payées aujourd'hui (9h-9h)
-            amendes_payees_jour = amendes_base.filter(
-                statut='paye',
-                date_paiement__gte=datetime_debut_jour,
-                date_paiement__lte=datetime_fin_jour
-            )
-            
-            # Agrégations jour
-            stats_jour = amendes_jour.aggregate(
-                emissions=Count('id'),
-                hors_gabarit=Count('id', filter=Q(est_hors_gabarit=True)),
-                montant_emis=Sum('montant_amende')
-            )
-            
-            stats_payees_jour = amendes_payees_jour.aggregate(
-                count=Count('id'),
-                montant=Sum('montant_amende')
-            )
-            
-            # Amendes non payées (global)
-            amendes_non_payees = amendes_base.filter(statut='non_paye')
-            stats_non_payees = amendes_non_payees.aggregate(
-                count=Count('id'),
-                montant=Sum('montant_amende')
-            )
-            
-            # Pesées du jour - seulement si permission
-            pesees_jour = 0
-            if has_permission(user, 'peut_saisir_pesee_jour') or has_permission(user, 'peut_voir_historique_pesees'):
-                pesees_jour = pesees_base.filter(date=jour_travail).aggregate(
-                    total=Sum('nombre_pesees')
-                )['total'] or 0
-            
-            # Stats du mois en cours
-            premier_jour_mois = today.replace(day=1)
-            amendes_mois = amendes_base.filter(
-                date_heure_emission__date__gte=premier_jour_mois,
-                date_heure_emission__date__lte=today
-            )
-            
-            stats_mois = amendes_mois.aggregate(
-                emissions=Count('id'),
-                montant_emis=Sum('montant_amende'),
-                montant_recouvre=Sum('montant_amende', filter=Q(statut='paye'))
-            )
-            
-            montant_emis_mois = float(stats_mois['montant_emis'] or 0)
-            montant_recouvre_mois = float(stats_mois['montant_recouvre'] or 0)
-            taux_recouvrement_mois = (montant_recouvre_mois / montant_emis_mois * 100) if montant_emis_mois > 0 else 0
+                bloc_pesage = {}
             
             stats_pesage = {
                 'station': station_pesage,
@@ -424,23 +313,26 @@ def index_dashboard(request):
                 'is_admin_pesage': is_admin_user(user),
                 
                 # Stats du jour
-                'emissions_jour': stats_jour['emissions'] or 0,
-                'hors_gabarit_jour': stats_jour['hors_gabarit'] or 0,
-                'montant_emis_jour': float(stats_jour['montant_emis'] or 0),
-                'paiements_jour': stats_payees_jour['count'] or 0,
-                'montant_recouvre_jour': float(stats_payees_jour['montant'] or 0),
-                'pesees_jour': pesees_jour,
-                'reste_a_recouvrer_jour': float(stats_jour['montant_emis'] or 0) - float(stats_payees_jour['montant'] or 0),
+                'emissions_jour': bloc_pesage.get('emissions_jour', 0),
+                'hors_gabarit_jour': bloc_pesage.get('hors_gabarit_jour', 0),
+                'montant_emis_jour': bloc_pesage.get('montant_emis_jour', 0),
+                'paiements_jour': bloc_pesage.get('paiements_jour', 0),
+                'montant_recouvre_jour': bloc_pesage.get('montant_recouvre_jour', 0),
+                # Pesées du jour - seulement si permission
+                'pesees_jour': bloc_pesage.get('pesees_jour', 0) if (
+                    has_permission(user, 'peut_saisir_pesee_jour') or has_permission(user, 'peut_voir_historique_pesees')
+                ) else 0,
+                'reste_a_recouvrer_jour': bloc_pesage.get('reste_a_recouvrer_jour', 0),
                 
                 # Stats globales non payées
-                'amendes_non_payees': stats_non_payees['count'] or 0,
-                'montant_non_paye_total': float(stats_non_payees['montant'] or 0),
+                'amendes_non_payees': bloc_pesage.get('amendes_non_payees', 0),
+                'montant_non_paye_total': bloc_pesage.get('montant_non_paye_total', 0),
                 
                 # Stats du mois
-                'emissions_mois': stats_mois['emissions'] or 0,
-                'montant_emis_mois': montant_emis_mois,
-                'montant_recouvre_mois': montant_recouvre_mois,
-                'taux_recouvrement_mois': round(taux_recouvrement_mois, 1),
+                'emissions_mois': bloc_pesage.get('emissions_mois', 0),
+                'montant_emis_mois': bloc_pesage.get('montant_emis_mois', 0),
+                'montant_recouvre_mois': bloc_pesage.get('montant_recouvre_mois', 0),
+                'taux_recouvrement_mois': bloc_pesage.get('taux_recouvrement_mois', 0),
                 
                 # Flags de permissions pour le template
                 'can_saisir_amende': has_permission(user, 'peut_saisir_amende'),
@@ -454,34 +346,19 @@ def index_dashboard(request):
             
             # Stats quittancements si permission
             if has_permission(user, 'peut_saisir_quittance_pesage') or has_permission(user, 'peut_voir_liste_quittancements_pesage'):
-                quittancements_mois = quittancements_base.filter(
-                    date_quittancement__month=today.month,
-                    date_quittancement__year=today.year
-                ).aggregate(
-                    count=Count('id'),
-                    montant=Sum('montant_quittance')
-                )
-                stats_pesage['quittancements_mois'] = quittancements_mois['count'] or 0
-                stats_pesage['montant_quittance_mois'] = float(quittancements_mois['montant'] or 0)
-                
+                stats_pesage['quittancements_mois'] = bloc_pesage.get('quittancements_mois', 0)
+                stats_pesage['montant_quittance_mois'] = bloc_pesage.get('montant_quittance_mois', 0)
                 # Demandes de confirmation en attente
-                try:
-                    from inventaire.models_confirmation import DemandeConfirmationPaiement, StatutDemandeConfirmation
-                    if station_pesage:
-                        demandes_attente = DemandeConfirmationPaiement.objects.filter(
-                            station_concernee=station_pesage,
-                            statut=StatutDemandeConfirmation.EN_ATTENTE
-                        ).count()
-                    else:
-                        demandes_attente = DemandeConfirmationPaiement.objects.filter(
-                            statut=StatutDemandeConfirmation.EN_ATTENTE
-                        ).count()
-                    stats_pesage['demandes_confirmation_attente'] = demandes_attente
-                except ImportError:
-                    stats_pesage['demandes_confirmation_attente'] = 0
+                stats_pesage['demandes_confirmation_attente'] = bloc_pesage.get('demandes_confirmation_attente', 0)
             
-            # Stats propres saisies si l'utilisateur peut saisir des amendes
+            # Stats propres saisies si l'utilisateur peut saisir des amendes (propres à l'utilisateur, non précalculées)
             if has_permission(user, 'peut_saisir_amende'):
+                datetime_debut_jour = CAMEROUN_TZ.localize(
+                    datetime.combine(jour_travail, time(9, 0, 0))
+                )
+                datetime_fin_jour = CAMEROUN_TZ.localize(
+                    datetime.combine(jour_travail + timedelta(days=1), time(8, 59, 59))
+                )
                 mes_saisies_jour = AmendeEmise.objects.filter(
                     saisi_par=user,
                     date_heure_emission__gte=datetime_debut_jour,
@@ -546,11 +423,8 @@ def index_dashboard(request):
     # Alertes jours non configurés - uniquement si peut programmer
     if has_permission(user, 'peut_programmer_inventaire'):
         jours_futurs = [today + timedelta(days=i) for i in range(1, 8)]
-        jours_non_configures = []
-        
-        for jour in jours_futurs:
-            if not ConfigurationJour.objects.filter(date=jour).exists():
-                jours_non_configures.append(jour)
+        jours_configures = ConfigurationJour.resolveur(jours_futurs[0], jours_futurs[-1]).jours_configures()
+        jours_non_configures = [jour for jour in jours_futurs if jour not in jours_configures]
         
         if jours_non_configures:
             alertes.append({
@@ -599,40 +473,18 @@ def index_dashboard(request):
     graph_data = {}
     
     can_view_graphs = (
-        postes_accessibles.exists() and
+        portee is not None and postes_accessibles.exists() and
         has_any_permission(user, ['peut_voir_stats_recettes_peage', 'peut_voir_stats_deperdition'])
     )
     
     if can_view_graphs:
-        jours = [(today - timedelta(days=i)) for i in range(6, -1, -1)]
-        
-        labels = []
-        recettes = []
-        taux = []
-        
-        for jour in jours:
-            labels.append(jour.strftime('%d/%m'))
-            
-            stats_jour = RecetteJournaliere.objects.filter(
-                poste__in=postes_accessibles,
-                date=jour
-            ).aggregate(
-                total=Sum('montant_declare'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            recettes.append(float(stats_jour['total'] or 0))
-            
-            # Taux uniquement si permission
-            if has_permission(user, 'voir_taux_deperdition'):
-                taux.append(float(stats_jour['taux_moyen'] or 0))
-            else:
-                taux.append(None)
+        evolution = DashboardService.obtenir('evolution_7j', portee, jour=today.isoformat())
         
         graph_data['evolution_7j'] = {
-            'labels': labels,
-            'recettes': recettes,
-            'taux': taux if has_permission(user, 'voir_taux_deperdition') else [],
+            'labels': [date.fromisoformat(jour).strftime('%d/%m') for jour in evolution['jours']],
+            'recettes': evolution['recettes'],
+            # Taux uniquement si permission
+            'taux': [t or 0 for t in evolution['taux']] if has_permission(user, 'voir_taux_deperdition') else [],
             'show_taux': has_permission(user, 'voir_taux_deperdition'),
         }
         logger.debug(f"[DASHBOARD] Données graphiques chargées pour {user.username}")
@@ -645,21 +497,7 @@ def index_dashboard(request):
     can_view_classement = has_permission(user, 'peut_voir_classement_peage_rendement')
     
     if can_view_classement:
-        top_query = RecetteJournaliere.objects.filter(
-            date__gte=month_ago
-        ).values(
-            'poste__nom', 'poste__code'
-        ).annotate(
-            total_recettes=Sum('montant_declare')
-        ).order_by('-total_recettes')[:5]
-        
-        for idx, item in enumerate(top_query):
-            top_postes.append({
-                'rang': idx + 1,
-                'nom': item['poste__nom'],
-                'code': item['poste__code'],
-                'total': float(item['total_recettes'])
-            })
+        top_postes = DashboardService.obtenir('top_postes_30j', jour=today.isoformat())
         logger.debug(f"[DASHBOARD] Top postes chargé pour {user.username}")
     
     # ================================================================
@@ -809,8 +647,16 @@ def index_dashboard(request):
     if user.poste_affectation and user.poste_affectation.type == 'peage':
         if has_permission(user, 'peut_voir_classement_peage_rendement'):
             try:
-                from inventaire.services.classement_service import get_rang_poste_peage
-                rang_poste_peage = get_rang_poste_peage(user.poste_affectation, current_year)
+                classement_peage = DashboardService.obtenir(
+                    'classement_peage', annee=str(current_year), jour=today.isoformat()
+                )
+                rang_poste_peage = next(
+                    (
+                        {'rang': item['rang'], 'total_postes': len(classement_peage), 'total_recettes': item['total']}
+                        for item in classement_peage if item['poste_id'] == user.poste_affectation.id
+                    ),
+                    {'rang': None, 'total_postes': len(classement_peage), 'total_recettes': 0}
+                )
                 logger.debug(f"[DASHBOARD] Rang péage calculé pour {user.poste_affectation.nom}")
             except Exception as e:
                 logger.error(f"[DASHBOARD] Erreur calcul rang péage: {e}")
@@ -819,8 +665,21 @@ def index_dashboard(request):
     if stats_pesage and stats_pesage.get('station'):
         if has_permission(user, 'peut_voir_classement_station_pesage'):
             try:
-                from inventaire.views_classement_pesage import get_rang_station_pesage
-                rang_station_pesage = get_rang_station_pesage(stats_pesage['station'], current_year)
+                classement_pesage = DashboardService.obtenir(
+                    'classement_pesage', annee=str(current_year), jour=today.isoformat()
+                )
+                rang_station_pesage = next(
+                    (
+                        {
+                            'rang': item['rang'],
+                            'total_stations': len(classement_pesage),
+                            'total_recouvre': item['total_recouvre'],
+                            'taux_recouvrement': item['taux_recouvrement'],
+                        }
+                        for item in classement_pesage if item['station_id'] == stats_pesage['station'].id
+                    ),
+                    {'rang': None, 'total_stations': len(classement_pesage), 'total_recouvre': 0, 'taux_recouvrement': 0}
+                )
                 logger.debug(f"[DASHBOARD] Rang pesage calculé pour {stats_pesage['station'].nom}")
             except Exception as e:
                 logger.error(f"[DASHBOARD] Erreur calcul rang pesage: {e}")
@@ -830,22 +689,18 @@ def index_dashboard(request):
         try:
             # Top postes péage
             if has_permission(user, 'peut_voir_classement_peage_rendement'):
-                top_peage = RecetteJournaliere.objects.filter(
-                    date__year=current_year
-                ).values('poste__nom', 'poste__code').annotate(
-                    total=Sum('montant_declare')
-                ).order_by('-total')[:5]
-                
                 top_postes_peage = [
-                    {'rang': i+1, 'nom': p['poste__nom'], 'code': p['poste__code'], 'total': float(p['total'])}
-                    for i, p in enumerate(top_peage)
+                    {'rang': p['rang'], 'nom': p['nom'], 'code': p['code'], 'total': p['total']}
+                    for p in DashboardService.obtenir(
+                        'classement_peage', annee=str(current_year), jour=today.isoformat()
+                    )[:5]
                 ]
             
             # Top stations pesage
             if has_permission(user, 'peut_voir_classement_station_pesage'):
-                from inventaire.views_classement_pesage import calculer_classement_pesage
-                classement_pesage = calculer_classement_pesage()[:5]
-                top_stations_pesage = classement_pesage
+                top_stations_pesage = DashboardService.obtenir(
+                    'classement_pesage', annee=str(current_year), jour=today.isoformat()
+                )[:5]
                 
         except Exception as e:
             logger.error(f"[DASHBOARD] Erreur calcul tops: {e}")
@@ -1469,21 +1324,19 @@ def api_stats_dashboard(request):
     if user.habilitation in ['admin_principal', 'coord_psrr', 'serv_info', 'serv_emission'] or user.is_superuser:
         # Admin : toutes les stats
         try:
+            from inventaire.services.dashboard_service import DashboardService
+            
+            bloc = DashboardService.obtenir('api_stats', jour=today.isoformat())
             data['stats'] = {
-                'inventaires_today': InventaireJournalier.objects.filter(date=today).count(),
-                'recettes_today': RecetteJournaliere.objects.filter(date=today).count(),
-                'taux_moyen_today': RecetteJournaliere.objects.filter(
-                    date=today
-                ).aggregate(Avg('taux_deperdition'))['taux_deperdition__avg'] or 0,
-                'postes_actifs': Poste.objects.filter(is_active=True).count(),
+                'inventaires_today': bloc['inventaires_today'],
+                'recettes_today': bloc['recettes_today'],
+                'taux_moyen_today': bloc['taux_moyen_today'],
+                'postes_actifs': bloc['postes_actifs'],
             }
             
             # Admin peut voir alertes déperdition
             data['alertes'] = {
-                'deperdition_critique': RecetteJournaliere.objects.filter(
-                    date__gte=today - timedelta(days=7),
-                    taux_deperdition__lt=-30
-                ).count()
+                'deperdition_critique': bloc['deperdition_critique']
             }
         except Exception as e:
             logger.error(f"Erreur API stats admin: {str(e)}")
@@ -1553,51 +1406,36 @@ def api_graphique_evolution(request):
     ]:
         return JsonResponse({'error': 'Non autorisé'}, status=403)
     
-    # Période : 7 derniers jours
-    semaine = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    from inventaire.services.dashboard_service import DashboardService, PORTEE_NATIONALE, portee_poste
     
+    # Période : 7 derniers jours (bloc précalculé evolution_7j)
     try:
         if user.habilitation in ['admin_principal', 'coord_psrr', 'serv_info', 'serv_emission']:
             # Admin : vue globale
-            evolution_taux = []
-            evolution_recettes = []
-            
-            for jour in semaine:
-                stats_jour = RecetteJournaliere.objects.filter(date=jour).aggregate(
-                    taux_moyen=Avg('taux_deperdition'),
-                    recettes_total=Sum('montant_declare')
-                )
-                evolution_taux.append(round(stats_jour['taux_moyen'] or 0, 1))
-                evolution_recettes.append(float(stats_jour['recettes_total'] or 0))
+            evolution = DashboardService.obtenir(
+                'evolution_7j', PORTEE_NATIONALE, jour=today.isoformat(), inclure_inactifs='1'
+            )
             
             data = {
-                'dates': [jour.strftime('%d/%m') for jour in semaine],
-                'taux_deperdition': evolution_taux,
-                'recettes': evolution_recettes,
+                'dates': [date.fromisoformat(jour).strftime('%d/%m') for jour in evolution['jours']],
+                'taux_deperdition': [round(taux or 0, 1) for taux in evolution['taux']],
+                'recettes': evolution['recettes'],
                 'scope': 'global'
             }
         
         elif user.habilitation in ['chef_peage', 'chef_pesage'] and user.poste_affectation:
             # Chef : son poste seulement
-            evolution_taux = []
-            evolution_recettes = []
-            
-            for jour in semaine:
-                try:
-                    recette = RecetteJournaliere.objects.get(
-                        poste=user.poste_affectation,
-                        date=jour
-                    )
-                    evolution_taux.append(round(recette.taux_deperdition or 0, 1))
-                    evolution_recettes.append(float(recette.montant_declare))
-                except RecetteJournaliere.DoesNotExist:
-                    evolution_taux.append(None)
-                    evolution_recettes.append(0)
+            evolution = DashboardService.obtenir(
+                'evolution_7j', portee_poste(user.poste_affectation.id), jour=today.isoformat()
+            )
             
             data = {
-                'dates': [jour.strftime('%d/%m') for jour in semaine],
-                'taux_deperdition': evolution_taux,
-                'recettes': evolution_recettes,
+                'dates': [date.fromisoformat(jour).strftime('%d/%m') for jour in evolution['jours']],
+                'taux_deperdition': [
+                    round(taux or 0, 1) if nombre else None
+                    for taux, nombre in zip(evolution['taux'], evolution['nombre'])
+                ],
+                'recettes': evolution['recettes'],
                 'scope': 'poste',
                 'poste': user.poste_affectation.nom
             }
@@ -1712,74 +1550,11 @@ def api_graphique_hebdomadaire(request):
     # Calculer la semaine (lundi à dimanche)
     today = datetime.now().date()
     debut_semaine = today - timedelta(days=today.weekday())  # Lundi
-    fin_semaine = debut_semaine + timedelta(days=6)  # Dimanche
     
     try:
-        # Données par jour de la semaine
-        jours_semaine = []
-        taux_moyens = []
-        recettes_totales = []
-        postes_actifs = []
-        
-        for i in range(7):
-            jour = debut_semaine + timedelta(days=i)
-            
-            # Statistiques du jour
-            stats_jour = RecetteJournaliere.objects.filter(date=jour).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                recettes_total=Sum('montant_declare'),
-                nb_postes=Count('poste', distinct=True)
-            )
-            
-            jours_semaine.append(jour.strftime('%A %d/%m'))  # "Lundi 15/01"
-            taux_moyens.append(round(stats_jour['taux_moyen'] or 0, 1))
-            recettes_totales.append(float(stats_jour['recettes_total'] or 0))
-            postes_actifs.append(stats_jour['nb_postes'] or 0)
-        
-        # Classement des postes par taux de déperdition (semaine)
-        classement_postes = RecetteJournaliere.objects.filter(
-            date__gte=debut_semaine,
-            date__lte=fin_semaine
-        ).values(
-            'poste__nom',
-            'poste__region'
-        ).annotate(
-            taux_moyen=Avg('taux_deperdition'),
-            recettes_total=Sum('montant_declare'),
-            nb_jours=Count('date', distinct=True)
-        ).order_by('taux_moyen')[:20]  # 20 meilleurs/pires postes
+        from inventaire.services.dashboard_service import DashboardService
         
-        data = {
-            'periode': f"Semaine du {debut_semaine.strftime('%d/%m/%Y')} au {fin_semaine.strftime('%d/%m/%Y')}",
-            'graphique_journalier': {
-                'jours': jours_semaine,
-                'taux_moyens': taux_moyens,
-                'recettes_totales': recettes_totales,
-                'postes_actifs': postes_actifs
-            },
-            'classement_postes': [
-                {
-                    'rang': idx + 1,
-                    'poste': item['poste__nom'],
-                    'region': item['poste__region'],
-                    'taux_moyen': round(item['taux_moyen'] or 0, 1),
-                    'recettes_total': float(item['recettes_total'] or 0),
-                    'nb_jours_actifs': item['nb_jours'],
-                    'performance': 'Excellent' if (item['taux_moyen'] or 0) >= -5 
-                                  else 'Bon' if (item['taux_moyen'] or 0) >= -15
-                                  else 'Moyen' if (item['taux_moyen'] or 0) >= -25
-                                  else 'Critique'
-                }
-                for idx, item in enumerate(classement_postes)
-            ],
-            'resume_semaine': {
-                'taux_global': round(sum(taux_moyens) / len([t for t in taux_moyens if t != 0]) if any(taux_moyens) else 0, 1),
-                'recettes_totales': sum(recettes_totales),
-                'postes_actifs_total': len(set(item['poste__nom'] for item in classement_postes)),
-                'meilleur_jour': jours_semaine[taux_moyens.index(max(taux_moyens))] if taux_moyens else None,
-                'pire_jour': jours_semaine[taux_moyens.index(min(taux_moyens))] if taux_moyens else None
-            }
-        }
+        data = DashboardService.obtenir('hebdomadaire', debut_semaine=debut_semaine.isoformat())
     
     except Exception as e:
         logger.error(f"Erreur API graphique hebdomadaire: {str(e)}")
@@ -1800,191 +1575,11 @@ def api_graphique_mensuel(request):
     
     # Mois courant
     today = datetime.now().date()
-    debut_mois = today.replace(day=1)
-    
-    # Calculer fin du mois
-    if debut_mois.month == 12:
-        fin_mois = debut_mois.replace(year=debut_mois.year + 1, month=1) - timedelta(days=1)
-    else:
-        fin_mois = debut_mois.replace(month=debut_mois.month + 1) - timedelta(days=1)
     
     try:
-        # Données par semaine du mois
-        semaines = []
-        taux_semaines = []
-        recettes_semaines = []
-        
-        date_courante = debut_mois
-        semaine_num = 1
-        
-        while date_courante <= fin_mois:
-            # Calculer fin de semaine (dimanche ou fin du mois)
-            fin_semaine = date_courante + timedelta(days=6 - date_courante.weekday())
-            if fin_semaine > fin_mois:
-                fin_semaine = fin_mois
-            
-            # Statistiques de la semaine
-            stats_semaine = RecetteJournaliere.objects.filter(
-                date__gte=date_courante,
-                date__lte=fin_semaine
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                recettes_total=Sum('montant_declare')
-            )
-            
-            semaines.append(f"S{semaine_num} ({date_courante.strftime('%d/%m')} - {fin_semaine.strftime('%d/%m')})")
-            taux_semaines.append(round(stats_semaine['taux_moyen'] or 0, 1))
-            recettes_semaines.append(float(stats_semaine['recettes_total'] or 0))
-            
-            # Passer à la semaine suivante (lundi)
-            date_courante = fin_semaine + timedelta(days=1)
-            if date_courante.weekday() != 0:  # Si pas lundi
-                date_courante += timedelta(days=7 - date_courante.weekday())
-            semaine_num += 1
-        
-        # Classement mensuel des postes avec évolution
-        classement_mensuel = RecetteJournaliere.objects.filter(
-            date__gte=debut_mois,
-            date__lte=fin_mois
-        ).values(
-            'poste__nom',
-            'poste__region',
-            'poste__type_poste'
-        ).annotate(
-            taux_moyen=Avg('taux_deperdition'),
-            recettes_total=Sum('montant_declare'),
-            nb_jours=Count('date', distinct=True),
-        ).order_by('taux_moyen')
-        
-        # Top 10 meilleurs et pires postes
-        meilleurs_postes = list(classement_mensuel.filter(taux_moyen__gte=-10)[:10])
-        pires_postes = list(classement_mensuel.filter(taux_moyen__lt=-30).order_by('taux_moyen')[:10])
-        
-        # Évolution hebdomadaire par région
-        evolution_regions = {}
-        regions = Poste.objects.values_list('region', flat=True).distinct()
-        
-        for region in regions:
-            if not region:
-                continue
-                
-            taux_region = []
-            for i, semaine in enumerate(semaines):
-                # Retrouver les dates de cette semaine
-                date_debut_sem = debut_mois + timedelta(weeks=i)
-                date_fin_sem = min(date_debut_sem + timedelta(days=6), fin_mois)
-                
-                taux_sem = RecetteJournaliere.objects.filter(
-                    date__gte=date_debut_sem,
-                    date__lte=date_fin_sem,
-                    poste__region=region
-                ).aggregate(Avg('taux_deperdition'))['taux_deperdition__avg']
-                
-                taux_region.append(round(taux_sem or 0, 1))
-            
-            evolution_regions[region] = taux_region
-        
-        # Statistiques comparatives avec mois précédent
-        mois_precedent_debut = (debut_mois - timedelta(days=1)).replace(day=1)
-        mois_precedent_fin = debut_mois - timedelta(days=1)
-        
-        stats_mois_precedent = RecetteJournaliere.objects.filter(
-            date__gte=mois_precedent_debut,
-            date__lte=mois_precedent_fin
-        ).aggregate(
-            taux_moyen=Avg('taux_deperdition'),
-            recettes_total=Sum('montant_declare')
-        )
-        
-        stats_mois_actuel = RecetteJournaliere.objects.filter(
-            date__gte=debut_mois,
-            date__lte=today
-        ).aggregate(
-            taux_moyen=Avg('taux_deperdition'),
-            recettes_total=Sum('montant_declare')
-        )
-        
-        # Calcul évolution
-        evolution_taux = 0
-        evolution_recettes = 0
-        
-        if stats_mois_precedent['taux_moyen'] and stats_mois_actuel['taux_moyen']:
-            evolution_taux = stats_mois_actuel['taux_moyen'] - stats_mois_precedent['taux_moyen']
-        
-        if stats_mois_precedent['recettes_total'] and stats_mois_actuel['recettes_total']:
-            evolution_recettes = ((stats_mois_actuel['recettes_total'] - stats_mois_precedent['recettes_total']) / stats_mois_precedent['recettes_total']) * 100
+        from inventaire.services.dashboard_service import DashboardService
         
-        data = {
-            'periode': f"Mois de {debut_mois.strftime('%B %Y')}",
-            'graphique_hebdomadaire': {
-                'semaines': semaines,
-                'taux_moyens': taux_semaines,
-                'recettes_totales': recettes_semaines
-            },
-            'evolution_regions': evolution_regions,
-            'classement_complet': [
-                {
-                    'rang': idx + 1,
-                    'poste': item['poste__nom'],
-                    'region': item['poste__region'],
-                    'type': item['poste__type_poste'],
-                    'taux_moyen': round(item['taux_moyen'] or 0, 1),
-                    'recettes_total': float(item['recettes_total'] or 0),
-                    'nb_jours_actifs': item['nb_jours'],
-                    'performance_color': (
-                        '#28a745' if (item['taux_moyen'] or 0) >= -10 else
-                        '#ffc107' if (item['taux_moyen'] or 0) >= -25 else
-                        '#dc3545'
-                    )
-                }
-                for idx, item in enumerate(classement_mensuel)
-            ],
-            'top_performers': {
-                'meilleurs': [
-                    {
-                        'rang': idx + 1,
-                        'poste': item['poste__nom'],
-                        'region': item['poste__region'],
-                        'taux': round(item['taux_moyen'], 1),
-                        'recettes': float(item['recettes_total'])
-                    }
-                    for idx, item in enumerate(meilleurs_postes)
-                ],
-                'a_ameliorer': [
-                    {
-                        'rang': idx + 1,
-                        'poste': item['poste__nom'],
-                        'region': item['poste__region'],
-                        'taux': round(item['taux_moyen'], 1),
-                        'recettes': float(item['recettes_total'])
-                    }
-                    for idx, item in enumerate(pires_postes)
-                ]
-            },
-            'comparaison_mensuelle': {
-                'mois_actuel': {
-                    'taux_moyen': round(stats_mois_actuel['taux_moyen'] or 0, 1),
-                    'recettes_total': float(stats_mois_actuel['recettes_total'] or 0)
-                },
-                'mois_precedent': {
-                    'taux_moyen': round(stats_mois_precedent['taux_moyen'] or 0, 1),
-                    'recettes_total': float(stats_mois_precedent['recettes_total'] or 0)
-                },
-                'evolution': {
-                    'taux': round(evolution_taux, 1),
-                    'recettes_pourcent': round(evolution_recettes, 1),
-                    'tendance_taux': 'amélioration' if evolution_taux > 0 else 'dégradation' if evolution_taux < 0 else 'stable',
-                    'tendance_recettes': 'hausse' if evolution_recettes > 0 else 'baisse' if evolution_recettes < 0 else 'stable'
-                }
-            },
-            'resume_mensuel': {
-                'nb_postes_total': len(classement_mensuel),
-                'nb_postes_bons': len([p for p in classement_mensuel if (p['taux_moyen'] or 0) >= -10]),
-                'nb_postes_critiques': len([p for p in classement_mensuel if (p['taux_moyen'] or 0) < -30]),
-                'recettes_totales': sum(recettes_semaines),
-                'taux_global': round(sum(taux_semaines) / len([t for t in taux_semaines if t != 0]) if any(taux_semaines) else 0, 1)
-            }
-        }
+        data = DashboardService.obtenir('mensuel', jour=today.isoformat())
     
     except Exception as e:
         logger.error(f"Erreur API graphique mensuel: {str(e)}")
@@ -2010,49 +1605,22 @@ def api_statistiques_postes_ordonnes(request):
     region = request.GET.get('region', '')       # filtrage par région
     
     try:
+        from inventaire.services.dashboard_service import (
+            DashboardService, PORTEE_NATIONALE, portee_region
+        )
+        
         # Définir la période
         today = datetime.now().date()
         
-        if periode == 'semaine':
-            debut_periode = today - timedelta(days=today.weekday())
-            fin_periode = debut_periode + timedelta(days=6)
-        elif periode == 'trimestre':
-            # Trimestre actuel
-            trimestre = ((today.month - 1) // 3) + 1
-            debut_periode = datetime(today.year, (trimestre - 1) * 3 + 1, 1).date()
-            if trimestre == 4:
-                fin_periode = datetime(today.year, 12, 31).date()
-            else:
-                fin_periode = datetime(today.year, trimestre * 3 + 1, 1).date() - timedelta(days=1)
-        else:  # mois par défaut
-            debut_periode = today.replace(day=1)
-            fin_periode = today
-        
-        # Requête de base
-        queryset = RecetteJournaliere.objects.filter(
-            date__gte=debut_periode,
-            date__lte=fin_periode
-        )
-        
-        # Filtrage par région si spécifié
-        if region:
-            queryset = queryset.filter(poste__region=region)
-        
-        # Agrégation par poste
-        stats_postes = queryset.values(
-            'poste__id',
-            'poste__nom',
-            'poste__code',
-            'poste__region',
-            'poste__type_poste'
-        ).annotate(
-            taux_moyen=Avg('taux_deperdition'),
-            taux_min=Min('taux_deperdition'),
-            taux_max=Max('taux_deperdition'),
-            recettes_total=Sum('montant_declare'),
-            recettes_moyenne=Avg('montant_declare'),
-            nb_jours=Count('date', distinct=True),
+        # Agrégation par poste (bloc précalculé, filtré par région si spécifié)
+        bloc = DashboardService.obtenir(
+            'postes_ordonnes',
+            portee_region(int(region)) if region else PORTEE_NATIONALE,
+            periode=periode if periode in ('semaine', 'trimestre') else 'mois',
+            jour=today.isoformat()
         )
+        debut_periode = date.fromisoformat(bloc['debut_periode'])
+        fin_periode = date.fromisoformat(bloc['fin_periode'])
         
         # Tri selon critère
         if tri_par == 'recettes':
@@ -2062,10 +1630,12 @@ def api_statistiques_postes_ordonnes(request):
         else:  # taux par défaut
             field_tri = 'taux_moyen'
         
-        if ordre == 'desc':
-            field_tri = f'-{field_tri}'
-        
-        stats_postes = stats_postes.order_by(field_tri)
+        # Valeurs nulles en fin de tri croissant (comme en SQL)
+        stats_postes = sorted(
+            bloc['postes'],
+            key=lambda poste: (poste[field_tri] is None, poste[field_tri] or 0),
+            reverse=(ordre == 'desc')
+        )
         
         # Formater les données pour le frontend
         postes_ordonnes = []
@@ -2094,11 +1664,11 @@ def api_statistiques_postes_ordonnes(request):
             
             postes_ordonnes.append({
                 'rang': idx + 1,
-                'poste_id': poste['poste__id'],
-                'nom': poste['poste__nom'],
-                'code': poste['poste__code'],
-                'region': poste['poste__region'],
-                'type': poste['poste__type_poste'],
+                'poste_id': poste['poste_id'],
+                'nom': poste['nom'],
+                'code': poste['code'],
+                'region': poste['region'],
+                'type': poste['type'],
                 'statistiques': {
                     'taux_moyen': round(taux, 1),
                     'taux_min': round(poste['taux_min'] or 0, 1),
@@ -2165,6 +1735,9 @@ def api_statistiques_postes_ordonnes(request):
 
 from django.views.generic import ListView
 from django.contrib.auth.decorators import login_required
+from urllib.parse import urlencode
+from common.pagination import paginer_par_curseur
+from common.utils import filtrer_journal_audit, get_statistiques_journal_audit
 from django.utils.decorators import method_decorator
 from django.http import JsonResponse, HttpResponse
 from django.template.response import TemplateResponse
@@ -2241,14 +1814,42 @@ class AuditLogView(LoginRequiredMixin, AdminRequiredMixin, ListView):
     model = JournalAudit
     template_name = 'accounts/journal_audit.html'
     context_object_name = 'logs'
-    paginate_by = 50
-    ordering = ['-timestamp']
+    paginate_by = None  # pagination par curseur, voir get_context_data
+    ordering = ['-timestamp', '-id']
+    
+    FILTRES = ('search', 'action', 'user', 'succes', 'date_debut', 'date_fin')
+    
+    def get_queryset(self):
+        filtres = {cle: self.request.GET.get(cle, '') for cle in self.FILTRES}
+        return filtrer_journal_audit(
+            JournalAudit.objects.select_related('utilisateur'), **filtres
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        page_obj = paginer_par_curseur(
+            self.object_list, self.ordering,
+            apres=self.request.GET.get('apres'),
+            avant=self.request.GET.get('avant'),
+            par_page=50,
+        )
+        donnees_journal = get_statistiques_journal_audit()
+        filtres = {cle: self.request.GET.get(cle, '') for cle in self.FILTRES}
         context.update({
             'page_title': 'Journal d\'Audit',
-            'total_logs': JournalAudit.objects.count(),
+            'logs': page_obj,
+            'page_obj': page_obj,
+            'is_paginated': page_obj.has_other_pages(),
+            'stats': donnees_journal['stats'],
+            'actions_uniques': donnees_journal['actions_uniques'],
+            'total_logs': donnees_journal['stats']['total'],
+            'filtres_query': urlencode({cle: v for cle, v in filtres.items() if v}),
+            'search': filtres['search'],
+            'action_filter': filtres['action'],
+            'user_filter': filtres['user'],
+            'succes_filter': filtres['succes'],
+            'date_debut': filtres['date_debut'],
+            'date_fin': filtres['date_fin'],
         })
         return context
 
@@ -2279,9 +1880,13 @@ class SystemHealthView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
                 'error': True,
             }
         
+        # Recalculs différés des signaux d'inventaire (unité de travail)
+        from inventaire.services.unite_travail_service import UniteDeTravail
+        
         context.update({
             'page_title': 'Santé du Système',
             'system_stats': system_stats,
+            'recalculs_differes': UniteDeTravail.statistiques(),
         })
         return context
 
@@ -2431,6 +2036,84 @@ def api_check_urls(request):
         })
 
 
+# ===================================================================
+# PROFILAGE DES VUES (common/profilage.py)
+# ===================================================================
+
+def _parametres_statistiques_performances(request):
+    """Fenêtre (heures), tri, limite et vue demandés, bornés"""
+    from common.profilage import get_profilage_config, TRIS_STATISTIQUES
+    
+    heures_max = get_profilage_config()['RETENTION_JOURS'] * 24
+    try:
+        heures = min(max(int(request.GET.get('heures', 24)), 1), heures_max)
+    except ValueError:
+        heures = 24
+    try:
+        limite = min(max(int(request.GET.get('limite', 50)), 1), 500)
+    except ValueError:
+        limite = 50
+    tri = request.GET.get('tri', 'p95')
+    if tri not in TRIS_STATISTIQUES:
+        tri = 'p95'
+    return heures, tri, limite, request.GET.get('vue') or None
+
+
+@login_required
+def statistiques_performances(request):
+    """
+    Supervision des performances : p50/p95/p99, requêtes SQL et requêtes
+    SQL répétées (N+1) par vue sur une fenêtre glissante
+    """
+    if not _check_admin_permission(request.user):
+        messages.error(request, _("Accès non autorisé."))
+        return redirect('common:dashboard')
+    
+    from common.profilage import (
+        get_profilage_config, profileur_vues, statistiques_par_vue, TRIS_STATISTIQUES,
+    )
+    
+    heures, tri, limite, vue = _parametres_statistiques_performances(request)
+    
+    context = {
+        'statistiques': statistiques_par_vue(heures=heures, tri=tri, limite=limite, vue=vue),
+        'heures': heures,
+        'tri': tri,
+        'limite': limite,
+        'vue': vue,
+        'tris': TRIS_STATISTIQUES,
+        'fenetres': [1, 6, 24, 24 * 7, 24 * 30],
+        'config': get_profilage_config(),
+        'statut_profileur': profileur_vues.get_statut(),
+        'title': 'Performances par vue',
+    }
+    return render(request, 'common/statistiques_performances.html', context)
+
+
+@login_required
+def api_statistiques_performances(request):
+    """
+    API JSON des statistiques de performance par vue
+
+    Paramètres GET: heures (24), tri (p95, p99, p50, nombre_requetes,
+    duree_totale_ms, sql_moyen, nombre_n_plus_un), limite (50), vue
+    """
+    if not _check_admin_permission(request.user):
+        return JsonResponse({'error': 'Non autorisé'}, status=403)
+    
+    from common.profilage import profileur_vues, statistiques_par_vue
+    
+    heures, tri, limite, vue = _parametres_statistiques_performances(request)
+    
+    return JsonResponse({
+        'heures': heures,
+        'tri': tri,
+        'timestamp': timezone.now().isoformat(),
+        'profileur': profileur_vues.get_statut(),
+        'vues': statistiques_par_vue(heures=heures, tri=tri, limite=limite, vue=vue),
+    })
+
+
 # ===================================================================
 # FONCTIONS UTILITAIRES POUR ÉVITER LES ERREURS
 # ===================================================================
@@ -2849,20 +2532,44 @@ def action_marquer_impertinent(request):
         })
 
 
-@staff_member_required
-@require_http_methods(["GET"])
+@login_required
+@require_http_methods(["GET", "POST"])
 def api_notifications(request):
     """
-    API pour récupérer les notifications de l'utilisateur
+    API des notifications de l'utilisateur (interrogée périodiquement par
+    chaque onglet ouvert) : compteur tenu à jour à l'écriture et 5 dernières
+    notifications par index, sans comptage des notifications
+    
+    POST (JSON) : {'action': 'mark_read', 'id': ...} ou {'action': 'mark_all_read'}
     """
     try:
         from accounts.models import NotificationUtilisateur
+        from inventaire.services.notification_service import NotificationService
         
-        # Compter les notifications non lues
-        unread_count = NotificationUtilisateur.objects.filter(
-            destinataire=request.user,
-            lue=False
-        ).count()
+        if request.method == 'POST':
+            try:
+                donnees = json.loads(request.body or '{}')
+            except ValueError:
+                donnees = {}
+            action = donnees.get('action')
+            
+            if action == 'mark_read':
+                modifiees = NotificationService.marquer_lues(
+                    NotificationUtilisateur.objects.filter(destinataire=request.user, pk=donnees.get('id'))
+                )
+            elif action == 'mark_all_read':
+                modifiees = NotificationService.marquer_toutes_lues(request.user)
+            else:
+                return JsonResponse({'success': False, 'message': _('Action inconnue')}, status=400)
+            
+            return JsonResponse({
+                'success': True,
+                'updated': modifiees,
+                'unread_count': NotificationService.compteurs(request.user)['non_lues'],
+            })
+        
+        # Compteur de notifications non lues
+        unread_count = NotificationService.compteurs(request.user)['non_lues']
         
         # Récupérer les dernières notifications
         recent_notifications = NotificationUtilisateur.objects.filter(
@@ -2874,10 +2581,12 @@ def api_notifications(request):
             notifications_data.append({
                 'id': notif.id,
                 'title': notif.titre,
+                'titre': notif.titre,
                 'message': notif.message,
                 'type': notif.type_notification,
-                'read': notif.lue,
+                'read': notif.lu,
                 'created': notif.date_creation.isoformat(),
+                'date': notif.age_formatee,
             })
         
         return JsonResponse({
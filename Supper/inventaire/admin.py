@@ -1458,6 +1458,42 @@ class StatistiquesPeriodiquesAdmin(admin.ModelAdmin):
         )
     taux_moyen_badge.short_description = 'Taux moyen'
 
+
+@admin.register(AgregatRecettes)
+class AgregatRecettesAdmin(admin.ModelAdmin):
+    """Consultation des agrégats de recettes (tenus à jour automatiquement)"""
+
+    list_display = [
+        'poste', 'granularite', 'debut_periode', 'montant_total',
+        'nombre_recettes', 'nombre_impertinents', 'date_mise_a_jour'
+    ]
+
+    list_filter = ['granularite', 'poste__region']
+    search_fields = ['poste__nom', 'poste__code']
+    date_hierarchy = 'debut_periode'
+    list_select_related = ['poste']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CompteurNumerotation)
+class CompteurNumerotationAdmin(admin.ModelAdmin):
+    """Consultation des compteurs de numérotation (bordereaux, demandes de confirmation)"""
+
+    list_display = ['prefixe', 'periode', 'valeur', 'date_mise_a_jour']
+    list_filter = ['prefixe']
+    search_fields = ['periode']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(ObjectifAnnuel)
 class ObjectifAnnuelAdmin(admin.ModelAdmin):
     list_display = ['poste', 'annee', 'montant_objectif_formatted', 'cree_par', 'date_creation']
@@ -8,6 +8,7 @@ from django.utils.translation import gettext_lazy as _
 from datetime import date, datetime
 from decimal import Decimal
 from accounts.models import *
+from .services.saisie_inventaire_service import SaisieInventaireService
 
 class InventaireJournalierForm(forms.ModelForm):
     """Formulaire personnalisé pour la saisie d'inventaire"""
@@ -282,18 +283,13 @@ class SaisieRapideInventaireForm(forms.Form):
             observations=self.cleaned_data.get('observations', '')
         )
         
-        # Créer les détails par période
-        for field_name, value in self.cleaned_data.items():
-            if field_name.startswith('periode_') and value is not None and value > 0:
-                periode_code = field_name.replace('periode_', '')
-                DetailInventairePeriode.objects.create(
-                    inventaire=inventaire,
-                    periode=periode_code,
-                    nombre_vehicules=value
-                )
-        
-        # Recalculer les totaux
-        inventaire.recalculer_totaux()
+        # Créer les détails par période et calculer les totaux en une étape
+        valeurs = {
+            field_name.replace('periode_', ''): value
+            for field_name, value in self.cleaned_data.items()
+            if field_name.startswith('periode_') and value is not None and value > 0
+        }
+        SaisieInventaireService.enregistrer_periodes(inventaire, valeurs)
         
         return inventaire
 
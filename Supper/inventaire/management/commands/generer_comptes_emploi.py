@@ -0,0 +1,83 @@
+# inventaire/management/commands/generer_comptes_emploi.py
+"""
+Commande Django pour générer les comptes d'emploi de tout le réseau
+Usage (ex. clôture trimestrielle) :
+    python manage.py generer_comptes_emploi --debut 2025-01-01 --fin 2025-03-31
+    python manage.py generer_comptes_emploi --debut 2025-01-01 --fin 2025-03-31 --format zip --sortie /tmp
+    python manage.py generer_comptes_emploi --debut 2025-01-01 --fin 2025-03-31 --poste PG001 --poste PG002
+"""
+
+from datetime import date
+import os
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import Poste
+from inventaire.views_rapports import generer_pdf_comptes_emploi_lot
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = "Génère les comptes d'emploi de tous les postes de péage (PDF fusionné ou ZIP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', required=True, help='Date de début (AAAA-MM-JJ)')
+        parser.add_argument('--fin', required=True, help='Date de fin (AAAA-MM-JJ)')
+
+        parser.add_argument(
+            '--format',
+            choices=['pdf', 'zip'],
+            default='pdf',
+            help='pdf : un document fusionné ; zip : un PDF par poste (défaut: pdf)',
+        )
+
+        parser.add_argument(
+            '--poste',
+            action='append',
+            help='Code du poste à inclure, répétable ; tous les postes de péage actifs par défaut',
+        )
+
+        parser.add_argument(
+            '--sortie',
+            default='.',
+            help='Répertoire de destination (défaut: répertoire courant)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_debut = date.fromisoformat(options['debut'])
+            date_fin = date.fromisoformat(options['fin'])
+        except ValueError:
+            raise CommandError("Format de date invalide (attendu : AAAA-MM-JJ)")
+
+        if date_debut > date_fin:
+            raise CommandError("La date de début doit être antérieure à la date de fin")
+
+        postes = Poste.objects.filter(type='peage', is_active=True)
+        if options['poste']:
+            postes = postes.filter(code__in=options['poste'])
+        postes = list(postes.order_by('region', 'nom'))
+
+        if not postes:
+            raise CommandError("Aucun poste de péage correspondant")
+
+        debut = timezone.now()
+        contenu, filename, _ = generer_pdf_comptes_emploi_lot(
+            postes, date_debut, date_fin, format_sortie=options['format']
+        )
+
+        chemin = os.path.join(options['sortie'], filename)
+        with open(chemin, 'wb') as fichier:
+            fichier.write(contenu)
+
+        duree = (timezone.now() - debut).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(postes)} compte(s) d'emploi générés en {duree:.1f} s → {chemin}")
+        )
+        logger.info(
+            f"[COMPTE_EMPLOI] Génération groupée: {len(postes)} poste(s), "
+            f"{date_debut} - {date_fin}, {chemin}"
+        )
@@ -0,0 +1,159 @@
+# inventaire/management/commands/indexer_mouvements_tickets.py
+"""
+Commande Django pour construire l'index de traçabilité des tickets (MouvementTicket)
+à partir des HistoriqueStock, des bordereaux de transfert et des SerieTicket existants.
+Usage: python manage.py indexer_mouvements_tickets [--reset] [--annee 2025] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = "Construit l'index de traçabilité des tickets (chargements, transferts, ventes)"
+    
+    TAILLE_LOT = 2000
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help="Vider l'index avant reconstruction"
+        )
+        parser.add_argument(
+            '--annee',
+            type=int,
+            help='Limiter aux mouvements de cette année'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Simulation sans modification de la base de données'
+        )
+    
+    def handle(self, *args, **options):
+        from inventaire.models import (
+            HistoriqueStock, SerieTicket, CouleurTicket, MouvementTicket
+        )
+        
+        annee = options.get('annee')
+        dry_run = options.get('dry_run', False)
+        
+        if dry_run:
+            self.stdout.write(self.style.WARNING("MODE SIMULATION - Aucune modification ne sera effectuée"))
+        
+        if options['reset'] and not dry_run:
+            index = MouvementTicket.objects.all()
+            if annee:
+                index = index.filter(annee=annee)
+            nb_supprimes, _ = index.delete()
+            self.stdout.write(f"Index vidé: {nb_supprimes} ligne(s) supprimée(s)")
+        
+        # Couleurs en mémoire pour l'analyse des commentaires
+        couleurs = {c.code_normalise: c for c in CouleurTicket.objects.all()}
+        
+        # Historiques déjà indexés (reprise sans doublon)
+        deja_indexes = set(
+            MouvementTicket.objects.filter(historique__isnull=False)
+            .values_list('historique_id', flat=True)
+        )
+        
+        historiques = HistoriqueStock.objects.select_related(
+            'reference_recette'
+        ).order_by('id')
+        if annee:
+            historiques = historiques.filter(date_mouvement__year=annee)
+        
+        self.stdout.write(f"Historiques à analyser: {historiques.count()}")
+        
+        self._en_attente = []
+        lot = []
+        total_crees = 0
+        historiques_ignores = 0
+        
+        for historique in historiques.iterator(chunk_size=self.TAILLE_LOT):
+            if historique.id in deja_indexes:
+                continue
+            
+            mouvements = MouvementTicket.construire_depuis_historique(historique, couleurs)
+            if not mouvements:
+                historiques_ignores += 1
+                continue
+            
+            lot.extend(mouvements)
+            if len(lot) >= self.TAILLE_LOT:
+                total_crees += self._enregistrer(lot, dry_run)
+                lot = []
+        
+        total_crees += self._enregistrer(lot, dry_run)
+        
+        # Chargements initiaux sans historique associé (anciennes données).
+        # Les restes de découpage (vente/transfert partiel) héritent du type
+        # d'entrée de la série mère : on ignore ceux déjà couverts par un chargement.
+        chargements = {}
+        for couleur_id, annee_mvt, premier, dernier in MouvementTicket.objects.filter(
+            type_mouvement='chargement'
+        ).values_list('couleur_id', 'annee', 'numero_premier', 'numero_dernier'):
+            chargements.setdefault((couleur_id, annee_mvt), []).append((premier, dernier))
+        for mouvement in self._en_attente:
+            if mouvement.type_mouvement == 'chargement':
+                chargements.setdefault((mouvement.couleur_id, mouvement.annee), []).append(
+                    (mouvement.numero_premier, mouvement.numero_dernier)
+                )
+        
+        series_orphelines = SerieTicket.objects.filter(
+            type_entree__in=['imprimerie_nationale', 'regularisation'],
+            historiques__isnull=True
+        )
+        if annee:
+            series_orphelines = series_orphelines.filter(date_reception__year=annee)
+        
+        lot = []
+        for serie in series_orphelines.iterator(chunk_size=self.TAILLE_LOT):
+            annee_serie = timezone.localtime(serie.date_reception).year
+            deja_couverte = any(
+                premier <= serie.numero_premier and serie.numero_dernier <= dernier
+                for premier, dernier in chargements.get((serie.couleur_id, annee_serie), [])
+            )
+            if deja_couverte:
+                continue
+            
+            lot.append(MouvementTicket(
+                couleur_id=serie.couleur_id,
+                annee=annee_serie,
+                numero_premier=serie.numero_premier,
+                numero_dernier=serie.numero_dernier,
+                type_mouvement='chargement',
+                poste_id=serie.poste_id,
+                date_mouvement=serie.date_reception,
+                type_stock=serie.type_entree,
+            ))
+        nb_series = self._enregistrer(lot, dry_run)
+        total_crees += nb_series
+        
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('✅ Indexation terminée !'))
+        self.stdout.write(f"  • Plages indexées: {total_crees}")
+        self.stdout.write(f"  • Dont chargements sans historique: {nb_series}")
+        self.stdout.write(f"  • Historiques sans plage identifiable: {historiques_ignores}")
+        
+        logger.info(
+            f"Index traçabilité tickets: {total_crees} plage(s) indexée(s)"
+            f"{' (simulation)' if dry_run else ''}"
+        )
+    
+    def _enregistrer(self, mouvements, dry_run):
+        from inventaire.models import MouvementTicket
+        
+        if not mouvements:
+            return 0
+        if dry_run:
+            self._en_attente.extend(mouvements)
+        else:
+            with transaction.atomic():
+                MouvementTicket.objects.bulk_create(mouvements, batch_size=self.TAILLE_LOT)
+        return len(mouvements)
@@ -0,0 +1,48 @@
+# inventaire/management/commands/precalculer_dashboard.py
+"""
+Commande Django pour précalculer les blocs du tableau de bord
+Usage (à planifier toutes les 5 à 10 minutes via cron) :
+    python manage.py precalculer_dashboard
+    python manage.py precalculer_dashboard --portee national --portee poste:12
+    python manage.py precalculer_dashboard --purger 7
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventaire.services.dashboard_service import DashboardService
+import logging
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = 'Précalcule les instantanés du tableau de bord (national, régions, postes)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--portee',
+            action='append',
+            help="Portée à recalculer ('national', 'region:<id>', 'poste:<id>'), répétable ; toutes par défaut",
+        )
+        
+        parser.add_argument(
+            '--purger',
+            type=int,
+            metavar='JOURS',
+            help='Supprime les instantanés non recalculés depuis JOURS jours',
+        )
+    
+    def handle(self, *args, **options):
+        debut = timezone.now()
+        
+        nb_blocs = DashboardService.precalculer(portees=options['portee'])
+        duree = (timezone.now() - debut).total_seconds()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f"{nb_blocs} bloc(s) recalculé(s) en {duree:.1f} s")
+        )
+        logger.info(f"[DASHBOARD] Précalcul: {nb_blocs} blocs en {duree:.1f} s")
+        
+        if options['purger'] is not None:
+            supprimes = DashboardService.purger(options['purger'])
+            self.stdout.write(f"{supprimes} instantané(s) obsolète(s) supprimé(s)")
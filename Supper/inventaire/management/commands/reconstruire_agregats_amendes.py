@@ -0,0 +1,86 @@
+# inventaire/management/commands/reconstruire_agregats_amendes.py
+"""
+Commande Django pour reconstruire les agrégats journaliers des amendes
+La migration 0040 remplit la table ; à relancer en cas de doute
+(chargement de données hors application, restauration de sauvegarde) :
+    python manage.py reconstruire_agregats_amendes
+    python manage.py reconstruire_agregats_amendes --station 4 --station 7
+    python manage.py reconstruire_agregats_amendes --verifier
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+from inventaire.models_pesage import AgregatAmendesJour, AmendeEmise
+from inventaire.services.agregats_amendes_service import AgregatsAmendesService
+import logging
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les agrégats journaliers des amendes depuis les amendes émises'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--station',
+            action='append',
+            type=int,
+            help="Identifiant de station à reconstruire, répétable ; toutes par défaut",
+        )
+
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help="Compare seulement les totaux par station et statut aux amendes, sans rien écrire",
+        )
+
+    def handle(self, *args, **options):
+        if options['verifier']:
+            self._verifier(options['station'])
+            return
+
+        debut = timezone.now()
+        nb_lignes = AgregatsAmendesService.reconstruire(stations=options['station'])
+        duree = (timezone.now() - debut).total_seconds()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{nb_lignes} ligne(s) reconstruite(s) en {duree:.1f} s")
+        )
+
+    def _verifier(self, stations):
+        """Écarts entre les agrégats et les amendes, par station et statut"""
+        amendes = AmendeEmise.objects.all()
+        agregats = AgregatAmendesJour.objects.all()
+        if stations:
+            amendes = amendes.filter(station__in=stations)
+            agregats = agregats.filter(station__in=stations)
+
+        attendus = {
+            (ligne['station_id'], ligne['statut']): (ligne['nombre'], ligne['montant'])
+            for ligne in amendes.values('station_id', 'statut').annotate(
+                nombre=Count('id'), montant=Sum('montant_amende')
+            ).order_by()
+        }
+        stockes = {
+            (ligne['station_id'], ligne['statut']): (ligne['nombre'], ligne['montant'])
+            for ligne in agregats.values('station_id', 'statut').annotate(
+                nombre=Sum('nombre_amendes'), montant=Sum('montant_total')
+            ).order_by()
+        }
+
+        ecarts = [
+            (cle, attendus.get(cle), stockes.get(cle))
+            for cle in sorted(set(attendus) | set(stockes))
+            if attendus.get(cle) != stockes.get(cle)
+        ]
+        for (station_id, statut), attendu, stocke in ecarts:
+            self.stdout.write(
+                self.style.WARNING(f"Station {station_id} - {statut}: amendes {attendu}, agrégat {stocke}")
+            )
+
+        if ecarts:
+            logger.warning(f"[AGREGATS_AMENDES] {len(ecarts)} écart(s) détecté(s)")
+            self.stdout.write(self.style.ERROR(f"{len(ecarts)} écart(s) : relancer sans --verifier"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(attendus)} total(aux) cohérent(s)"))
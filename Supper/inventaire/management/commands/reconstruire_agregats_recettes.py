@@ -0,0 +1,82 @@
+# inventaire/management/commands/reconstruire_agregats_recettes.py
+"""
+Commande Django pour reconstruire les agrégats continus des recettes
+La migration 0039 remplit la table ; à relancer en cas de doute
+(chargement de données hors application, restauration de sauvegarde) :
+    python manage.py reconstruire_agregats_recettes
+    python manage.py reconstruire_agregats_recettes --poste 12 --poste 15
+    python manage.py reconstruire_agregats_recettes --verifier
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+from inventaire.models import AgregatRecettes, RecetteJournaliere
+from inventaire.services.agregats_recettes_service import AgregatsRecettesService
+import logging
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les agrégats de recettes (semaine, mois, année) depuis les recettes journalières'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poste',
+            action='append',
+            type=int,
+            help="Identifiant de poste à reconstruire, répétable ; tous par défaut",
+        )
+
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help="Compare seulement les totaux annuels aux recettes, sans rien écrire",
+        )
+
+    def handle(self, *args, **options):
+        if options['verifier']:
+            self._verifier(options['poste'])
+            return
+
+        debut = timezone.now()
+        nb_tranches = AgregatsRecettesService.reconstruire(postes=options['poste'])
+        duree = (timezone.now() - debut).total_seconds()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{nb_tranches} tranche(s) reconstruite(s) en {duree:.1f} s")
+        )
+
+    def _verifier(self, postes):
+        """Écarts entre les agrégats annuels et la somme des recettes"""
+        recettes = RecetteJournaliere.objects.all()
+        agregats = AgregatRecettes.objects.filter(granularite=AgregatRecettes.Granularite.ANNEE)
+        if postes:
+            recettes = recettes.filter(poste__in=postes)
+            agregats = agregats.filter(poste__in=postes)
+
+        attendus = {
+            (ligne['poste_id'], ligne['date__year']): ligne['total']
+            for ligne in recettes.values('poste_id', 'date__year').annotate(total=Sum('montant_declare')).order_by()
+        }
+        stockes = {
+            (agregat.poste_id, agregat.debut_periode.year): agregat.montant_total
+            for agregat in agregats
+        }
+
+        ecarts = [
+            (cle, attendus.get(cle), stockes.get(cle))
+            for cle in sorted(set(attendus) | set(stockes))
+            if attendus.get(cle) != stockes.get(cle)
+        ]
+        for (poste_id, annee), attendu, stocke in ecarts:
+            self.stdout.write(
+                self.style.WARNING(f"Poste {poste_id} - {annee}: recettes {attendu}, agrégat {stocke}")
+            )
+
+        if ecarts:
+            logger.warning(f"[AGREGATS_RECETTES] {len(ecarts)} écart(s) détecté(s)")
+            self.stdout.write(self.style.ERROR(f"{len(ecarts)} écart(s) : relancer sans --verifier"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(attendus)} total(aux) annuel(s) cohérent(s)"))
@@ -0,0 +1,226 @@
+# ===================================================================
+# inventaire/management/commands/verifier_plans_requetes.py
+# Vérifie les plans d'exécution des requêtes de rapports (EXPLAIN)
+# ===================================================================
+"""
+Exécute EXPLAIN sur les requêtes clés des rapports (compte d'emploi,
+bordereaux, recettes pesage) et échoue si l'une d'elles repasse en
+parcours séquentiel, n'utilise plus un des index prévus, ou si sa plage de
+dates n'est plus résolue dans l'index (condition reléguée en Filter).
+
+Par défaut, les parcours séquentiels sont désactivés le temps de l'EXPLAIN
+(SET LOCAL enable_seqscan = off) : on vérifie ainsi qu'un index *peut*
+servir le prédicat, même sur une base de test peu volumineuse. Un prédicat
+non exploitable (ex. cast date_paiement::date) reste en Seq Scan.
+Avec --plan-reel, le planificateur garde ses réglages : à utiliser sur une
+base peuplée à une volumétrie réaliste.
+
+Usage:
+    python manage.py verifier_plans_requetes
+    python manage.py verifier_plans_requetes --plan-reel --verbose
+"""
+
+from datetime import timedelta
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from common.utils import plage_journees
+
+logger = logging.getLogger('supper')
+
+
+class Command(BaseCommand):
+    help = "Vérifie par EXPLAIN que les requêtes de rapports utilisent leurs index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours',
+            type=int,
+            default=30,
+            help='Taille de la période analysée en jours (défaut: 30)'
+        )
+        parser.add_argument(
+            '--plan-reel',
+            action='store_true',
+            help='Ne pas désactiver les parcours séquentiels (base peuplée)'
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Afficher les plans complets'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Base {connection.vendor} : vérification réservée à PostgreSQL, rien à faire."
+            ))
+            return
+
+        verbose = options['verbose']
+        fin = timezone.localdate()
+        debut = fin - timedelta(days=options['jours'] - 1)
+
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"PLANS D'EXÉCUTION - PÉRIODE {debut} → {fin}")
+        self.stdout.write(f"{'='*60}\n")
+
+        from inventaire.models import HistoriqueStock
+        from inventaire.models_pesage import AmendeEmise
+
+        # Statistiques à jour pour que le planificateur estime la volumétrie réelle
+        with connection.cursor() as cursor:
+            for model in (HistoriqueStock, AmendeEmise):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+        echecs = []
+        for libelle, queryset, table, index_attendus, colonne_plage in self._requetes(debut, fin):
+            plan = expliquer(queryset, options['plan_reel'])
+            problemes = problemes_plan(plan, table, index_attendus, colonne_plage)
+
+            if problemes:
+                echecs.append(f"{libelle} : {', '.join(problemes)}")
+                self.stdout.write(self.style.ERROR(f"✗ {libelle} — {', '.join(problemes)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {libelle}"))
+
+            if verbose or problemes:
+                for ligne in plan.splitlines():
+                    self.stdout.write(f"    {ligne}")
+
+        self.stdout.write("")
+        if echecs:
+            logger.warning(f"Plans de requêtes en régression : {echecs}")
+            raise CommandError(f"{len(echecs)} requête(s) en régression")
+
+        self.stdout.write(self.style.SUCCESS("Tous les plans utilisent leurs index."))
+
+    def _requetes(self, debut, fin):
+        """Requêtes clés pour le poste et la station les plus actifs"""
+        from inventaire.models import HistoriqueStock
+        from inventaire.models_pesage import AmendeEmise
+
+        # Poste et station les plus actifs : valeurs représentatives pour le planificateur
+        poste_id = (
+            HistoriqueStock.objects.values('poste_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('poste_id', flat=True).first()
+        )
+        station_id = (
+            AmendeEmise.objects.values('station_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('station_id', flat=True).first()
+        )
+        if poste_id is None or station_id is None:
+            raise CommandError("Base vide : peuplez HistoriqueStock et AmendeEmise avant l'analyse")
+
+        numero = (
+            HistoriqueStock.objects.filter(numero_bordereau__isnull=False)
+            .values_list('numero_bordereau', flat=True).first()
+        ) or 'TR-00000000-000000-001'
+
+        return requetes_cles(debut, fin, poste_id, station_id, numero)
+
+
+# ===================================================================
+# REQUÊTES CLÉS ET ANALYSE DES PLANS (aussi utilisées par inventaire/tests.py)
+# ===================================================================
+
+def expliquer(queryset, plan_reel=False):
+    """EXPLAIN de la requête, parcours séquentiels désactivés sauf plan_reel"""
+    with transaction.atomic():
+        if not plan_reel:
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+def problemes_plan(plan, table, index_attendus, colonne_plage):
+    """Régressions constatées dans un plan (liste vide si le plan est conforme)"""
+    problemes = []
+    if f"Seq Scan on {table}" in plan:
+        problemes.append(f"Seq Scan sur {table}")
+    if index_attendus and not any(nom in plan for nom in index_attendus):
+        problemes.append(f"aucun des index {', '.join(index_attendus)} utilisé")
+    if colonne_plage and not any(
+        colonne_plage in ligne for ligne in plan.splitlines() if 'Index Cond' in ligne
+    ):
+        problemes.append(f"plage sur {colonne_plage} hors index")
+    return problemes
+
+
+def requetes_cles(debut, fin, poste_id, station_id, numero):
+    """
+    Requêtes clés, construites comme dans les rapports
+    Retourne des tuples (libellé, queryset, table, index acceptés, colonne de plage)
+    """
+    from inventaire.models import HistoriqueStock
+    from inventaire.models_pesage import AmendeEmise
+
+    table_historique = HistoriqueStock._meta.db_table
+    table_amendes = AmendeEmise._meta.db_table
+
+    # L'un ou l'autre index sert le prédicat poste + plage de dates
+    index_poste_date = ('hist_stock_poste_mvt_date_idx', 'hist_stock_poste_date_idx')
+
+    return [
+        (
+            "Compte d'emploi - approvisionnements imprimerie",
+            HistoriqueStock.objects.filter(
+                poste_id=poste_id,
+                type_mouvement='CREDIT',
+                type_stock__in=['imprimerie_nationale', 'imprimerie'],
+                **plage_journees('date_mouvement', debut, fin)
+            ),
+            table_historique, index_poste_date, 'date_mouvement',
+        ),
+        (
+            "Compte d'emploi - ventes",
+            HistoriqueStock.objects.filter(
+                poste_id=poste_id,
+                type_mouvement='DEBIT',
+                reference_recette__isnull=False,
+                poste_destination__isnull=True,
+                **plage_journees('date_mouvement', debut, fin)
+            ),
+            # L'index de clé étrangère reference_recette peut être plus sélectif
+            table_historique, (), None,
+        ),
+        (
+            "Historique stock d'un poste",
+            HistoriqueStock.objects.filter(poste_id=poste_id).order_by('-date_mouvement')[:50],
+            table_historique, index_poste_date, None,
+        ),
+        (
+            "Liste des bordereaux de transfert",
+            HistoriqueStock.objects.filter(
+                type_stock='reapprovisionnement',
+                type_mouvement='DEBIT'
+            ).order_by('-date_mouvement')[:50],
+            table_historique, ('hist_stock_cessions_idx',), None,
+        ),
+        (
+            "Bordereau par numéro",
+            HistoriqueStock.objects.filter(numero_bordereau=numero, type_mouvement='DEBIT'),
+            table_historique, ('hist_stock_bordereau_idx',), None,
+        ),
+        (
+            "Recettes pesage - amendes payées d'une station",
+            AmendeEmise.objects.filter(
+                station_id=station_id,
+                statut='paye',
+                **plage_journees('date_paiement', debut, fin)
+            ).values('station_id').annotate(total=Sum('montant_amende')),
+            table_amendes, ('amende_station_paiement_idx',), 'date_paiement',
+        ),
+        (
+            "Émissions pesage d'une station",
+            AmendeEmise.objects.filter(
+                station_id=station_id,
+                **plage_journees('date_heure_emission', debut, fin)
+            ),
+            table_amendes, (), None,
+        ),
+    ]
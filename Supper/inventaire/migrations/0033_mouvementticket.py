@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_utilisateursupper_date_personnalisation_and_more'),
+        ('inventaire', '0032_alter_quittancementpesage_date_quittancement_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MouvementTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('numero_premier', models.IntegerField(verbose_name='Premier numéro')),
+                ('numero_dernier', models.IntegerField(verbose_name='Dernier numéro')),
+                ('type_mouvement', models.CharField(choices=[('chargement', 'Chargement'), ('transfert_sortant', 'Transfert sortant'), ('transfert_entrant', 'Transfert entrant'), ('vente', 'Vente')], max_length=20, verbose_name='Type de mouvement')),
+                ('date_mouvement', models.DateTimeField(verbose_name='Date du mouvement')),
+                ('type_stock', models.CharField(blank=True, max_length=30, verbose_name='Type de stock')),
+                ('numero_bordereau', models.CharField(blank=True, max_length=50, verbose_name='Numéro de bordereau')),
+                ('couleur', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mouvements', to='inventaire.couleurticket', verbose_name='Couleur')),
+                ('historique', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mouvements_tickets', to='inventaire.historiquestock', verbose_name='Historique de stock')),
+                ('poste', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mouvements_tickets', to='accounts.poste', verbose_name='Poste')),
+                ('poste_contrepartie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_tickets_contrepartie', to='accounts.poste', verbose_name='Poste contrepartie (transfert)')),
+                ('recette', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_tickets', to='inventaire.recettejournaliere', verbose_name='Recette associée')),
+            ],
+            options={
+                'verbose_name': 'Mouvement de tickets',
+                'verbose_name_plural': 'Mouvements de tickets',
+                'ordering': ['date_mouvement', 'id'],
+                'indexes': [models.Index(fields=['couleur', 'annee', 'numero_premier', 'numero_dernier'], name='mvt_ticket_plage_idx'), models.Index(fields=['poste', 'date_mouvement'], name='mvt_ticket_poste_date_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('numero_premier__lte', models.F('numero_dernier'))), name='mvt_ticket_premier_inferieur_dernier')],
+            },
+        ),
+    ]
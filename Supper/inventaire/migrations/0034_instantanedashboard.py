@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:52
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventaire', '0033_mouvementticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bloc', models.CharField(max_length=50, verbose_name='Bloc')),
+                ('portee', models.CharField(help_text='national, region:<id> ou poste:<id>', max_length=30, verbose_name='Portée')),
+                ('parametres', models.CharField(blank=True, default='', max_length=200, verbose_name='Paramètres')),
+                ('donnees', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Données')),
+                ('perime', models.BooleanField(default=False, help_text='Une écriture a modifié les données sources depuis le calcul', verbose_name='Périmé')),
+                ('date_calcul', models.DateTimeField(verbose_name='Date calcul')),
+                ('duree_calcul_ms', models.PositiveIntegerField(default=0, verbose_name='Durée du calcul (ms)')),
+            ],
+            options={
+                'verbose_name': 'Instantané tableau de bord',
+                'verbose_name_plural': 'Instantanés tableau de bord',
+                'indexes': [models.Index(fields=['portee', 'perime'], name='dashboard_portee_idx')],
+                'unique_together': {('bloc', 'portee', 'parametres')},
+            },
+        ),
+    ]
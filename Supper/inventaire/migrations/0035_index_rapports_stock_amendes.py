@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventaire', '0034_instantanedashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='amendeemise',
+            index=models.Index(condition=models.Q(('statut', 'paye')), fields=['station', 'date_paiement'], name='amende_station_paiement_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historiquestock',
+            index=models.Index(fields=['poste', 'type_mouvement', 'date_mouvement'], name='hist_stock_poste_mvt_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historiquestock',
+            index=models.Index(fields=['poste', '-date_mouvement'], name='hist_stock_poste_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historiquestock',
+            index=models.Index(condition=models.Q(('type_mouvement', 'DEBIT'), ('type_stock', 'reapprovisionnement')), fields=['-date_mouvement'], name='hist_stock_cessions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historiquestock',
+            index=models.Index(condition=models.Q(('numero_bordereau__isnull', False)), fields=['numero_bordereau'], name='hist_stock_bordereau_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_journalaudit_partitionnement'),
+        ('inventaire', '0035_index_rapports_stock_amendes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregatRecettes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularite', models.CharField(choices=[('semaine', 'Semaine'), ('mois', 'Mois'), ('annee', 'Année')], max_length=10, verbose_name='Granularité')),
+                ('debut_periode', models.DateField(help_text='Lundi de la semaine, 1er du mois ou 1er janvier', verbose_name='Début de période')),
+                ('montant_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15, verbose_name='Total recettes déclarées')),
+                ('recette_potentielle_totale', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15, verbose_name='Total recettes potentielles')),
+                ('nombre_recettes', models.IntegerField(default=0, verbose_name='Nombre de recettes')),
+                ('somme_taux', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15, verbose_name='Somme des taux de déperdition')),
+                ('nombre_taux', models.IntegerField(default=0, verbose_name='Nombre de taux calculés')),
+                ('nombre_impertinents', models.IntegerField(default=0, help_text='Recettes dont le taux de déperdition est supérieur à -5%', verbose_name='Nombre de journées impertinentes')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+                ('poste', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agregats_recettes', to='accounts.poste', verbose_name='Poste')),
+            ],
+            options={
+                'verbose_name': 'Agrégat de recettes',
+                'verbose_name_plural': 'Agrégats de recettes',
+                'ordering': ['-debut_periode', 'poste__nom'],
+                'indexes': [models.Index(fields=['granularite', 'debut_periode'], name='agregat_rec_gran_debut_idx')],
+                'unique_together': {('poste', 'granularite', 'debut_periode')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:45
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_journalaudit_partitionnement'),
+        ('inventaire', '0036_agregats_recettes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregatAmendesJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name="Jour d'émission")),
+                ('statut', models.CharField(choices=[('non_paye', 'Non Payé'), ('paye', 'Payé')], max_length=15, verbose_name='Statut du paiement')),
+                ('est_surcharge', models.BooleanField(default=False, verbose_name='Surcharge')),
+                ('est_hors_gabarit', models.BooleanField(default=False, verbose_name='Hors Gabarit')),
+                ('nombre_amendes', models.IntegerField(default=0, verbose_name="Nombre d'amendes")),
+                ('montant_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15, verbose_name='Montant total')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+                ('station', models.ForeignKey(limit_choices_to={'type': 'pesage'}, on_delete=django.db.models.deletion.CASCADE, related_name='agregats_amendes', to='accounts.poste', verbose_name='Station de pesage')),
+            ],
+            options={
+                'verbose_name': "Agrégat journalier d'amendes",
+                'verbose_name_plural': "Agrégats journaliers d'amendes",
+                'ordering': ['-jour', 'station__nom'],
+                'indexes': [models.Index(fields=['jour'], name='agregat_amende_jour_idx')],
+                'unique_together': {('station', 'jour', 'statut', 'est_surcharge', 'est_hors_gabarit')},
+            },
+        ),
+    ]
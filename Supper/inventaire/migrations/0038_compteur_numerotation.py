@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventaire', '0037_agregats_amendes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurNumerotation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixe', models.CharField(max_length=20, verbose_name='Préfixe')),
+                ('periode', models.CharField(blank=True, help_text='AAAAMMJJ pour une numérotation journalière, AAAA pour une numérotation annuelle', max_length=10, verbose_name='Période')),
+                ('valeur', models.PositiveBigIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Compteur de numérotation',
+                'verbose_name_plural': 'Compteurs de numérotation',
+                'ordering': ['prefixe', '-periode'],
+                'unique_together': {('prefixe', 'periode')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Remplissage des agrégats de recettes créés vides par 0036
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+
+def remplir_agregats_recettes(apps, schema_editor):
+    # Même calcul que AgregatsRecettesService.reconstruire, sur les modèles
+    # historiques : la migration ne dépend pas de l'évolution du service
+    RecetteJournaliere = apps.get_model('inventaire', 'RecetteJournaliere')
+    AgregatRecettes = apps.get_model('inventaire', 'AgregatRecettes')
+    alias = schema_editor.connection.alias
+
+    agregats = []
+    for granularite, troncature in (('semaine', TruncWeek), ('mois', TruncMonth), ('annee', TruncYear)):
+        lignes = (
+            RecetteJournaliere.objects.using(alias)
+            .annotate(tranche=troncature('date'))
+            .values('poste_id', 'tranche')
+            .annotate(
+                montant_total=Sum('montant_declare'),
+                recette_potentielle_totale=Sum('recette_potentielle'),
+                nombre_recettes=Count('id'),
+                somme_taux=Sum('taux_deperdition'),
+                nombre_taux=Count('taux_deperdition'),
+                nombre_impertinents=Count('id', filter=Q(taux_deperdition__gt=Decimal('-5'))),
+            )
+            .order_by()
+        )
+        for ligne in lignes:
+            agregats.append(AgregatRecettes(
+                poste_id=ligne['poste_id'],
+                granularite=granularite,
+                debut_periode=ligne['tranche'],
+                montant_total=ligne['montant_total'] or 0,
+                recette_potentielle_totale=ligne['recette_potentielle_totale'] or 0,
+                nombre_recettes=ligne['nombre_recettes'],
+                somme_taux=ligne['somme_taux'] or 0,
+                nombre_taux=ligne['nombre_taux'],
+                nombre_impertinents=ligne['nombre_impertinents'],
+            ))
+
+    AgregatRecettes.objects.using(alias).all().delete()
+    AgregatRecettes.objects.using(alias).bulk_create(agregats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventaire', '0038_compteur_numerotation'),
+    ]
+
+    operations = [
+        migrations.RunPython(remplir_agregats_recettes, migrations.RunPython.noop),
+    ]
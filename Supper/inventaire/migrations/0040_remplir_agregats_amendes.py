@@ -0,0 +1,47 @@
+# Remplissage des agrégats journaliers d'amendes créés vides par 0037
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def remplir_agregats_amendes(apps, schema_editor):
+    # Même calcul que AgregatsAmendesService.reconstruire, sur les modèles
+    # historiques : la migration ne dépend pas de l'évolution du service
+    AmendeEmise = apps.get_model('inventaire', 'AmendeEmise')
+    AgregatAmendesJour = apps.get_model('inventaire', 'AgregatAmendesJour')
+    alias = schema_editor.connection.alias
+
+    lignes = (
+        AmendeEmise.objects.using(alias)
+        .annotate(jour=TruncDate('date_heure_emission'))
+        .values('station_id', 'jour', 'statut', 'est_surcharge', 'est_hors_gabarit')
+        .annotate(nombre_amendes=Count('id'), montant_total=Sum('montant_amende'))
+        .order_by()
+    )
+    agregats = [
+        AgregatAmendesJour(
+            station_id=ligne['station_id'],
+            jour=ligne['jour'],
+            statut=ligne['statut'],
+            est_surcharge=ligne['est_surcharge'],
+            est_hors_gabarit=ligne['est_hors_gabarit'],
+            nombre_amendes=ligne['nombre_amendes'],
+            montant_total=ligne['montant_total'] or 0,
+        )
+        for ligne in lignes
+    ]
+
+    AgregatAmendesJour.objects.using(alias).all().delete()
+    AgregatAmendesJour.objects.using(alias).bulk_create(agregats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventaire', '0039_remplir_agregats_recettes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remplir_agregats_amendes, migrations.RunPython.noop),
+    ]
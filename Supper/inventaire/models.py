@@ -177,30 +177,19 @@ class ProgrammationInventaire(models.Model):
         Calcule automatiquement le risque de baisse annuel
         Compare les recettes de la période actuelle avec la même période l'année précédente
         """
-        from datetime import date, timedelta
-        from django.db.models import Sum
+        from datetime import date
+        from inventaire.services.agregats_recettes_service import AgregatsRecettesService, TotauxRecettes
         
         # Période actuelle (du 1er janvier à aujourd'hui)
         annee_actuelle = date.today().year
         debut_annee = date(annee_actuelle, 1, 1)
         fin_periode = date.today()
         
-        # Calculer les recettes de la période actuelle
-        recettes_actuelles = RecetteJournaliere.objects.filter(
-            poste=self.poste,
-            date__range=[debut_annee, fin_periode]
-        ).aggregate(total=Sum('montant_declare'))['total'] or 0
-        
-        # Même période l'année précédente
-        annee_precedente = annee_actuelle - 1
-        debut_annee_prec = date(annee_precedente, 1, 1)
-        fin_periode_prec = date(annee_precedente, fin_periode.month, fin_periode.day)
-        
-        # Calculer les recettes de la période précédente
-        recettes_precedentes = RecetteJournaliere.objects.filter(
-            poste=self.poste,
-            date__range=[debut_annee_prec, fin_periode_prec]
-        ).aggregate(total=Sum('montant_declare'))['total'] or 0
+        # Recettes de la période actuelle et de la même période l'année précédente (agrégats)
+        recettes_actuelles = AgregatsRecettesService.montant(debut_annee, fin_periode, self.poste_id)
+        recettes_precedentes = AgregatsRecettesService.meme_periode_annee_precedente(
+            debut_annee, fin_periode, [self.poste_id]
+        ).get(self.poste_id, TotauxRecettes()).montant_total
         
         # Sauvegarder les valeurs
         self.recettes_periode_actuelle = recettes_actuelles
@@ -1024,50 +1013,23 @@ class ConfigurationJour(models.Model):
         return "✓ Oui" if getattr(self, 'permet_saisie_recette', False) else "✗ Non"
     permet_saisie_recette_display.short_description = 'Recette autorisée'
 
+    @classmethod
     def est_jour_ouvert_pour_inventaire(cls, date, poste=None):
-        """Vérifie si la saisie d'inventaire est autorisée pour un jour donné"""
-        try:
-            # Chercher configuration spécifique au poste
-            if poste:
-                config = cls.objects.filter(date=date, poste=poste).first()
-                if config:
-                    return (config.statut == StatutJour.OUVERT and 
-                            getattr(config, 'permet_saisie_inventaire', False))
-            
-            # Chercher configuration globale
-            config_globale = cls.objects.filter(date=date, poste__isnull=True).first()
-            if config_globale:
-                return (config_globale.statut == StatutJour.OUVERT and 
-                        getattr(config_globale, 'permet_saisie_inventaire', False))
-            
-            # Par défaut : fermé si pas de configuration
-            return False
-            
-        except Exception:
-            return False
+        """
+        Vérifie si la saisie d'inventaire est autorisée pour un jour donné
+        Configuration du poste, sinon globale ; fermé si aucune configuration
+        """
+        from inventaire.services.calendrier_service import ResolveurJours
+        return ResolveurJours.pour_mois(date).est_ouvert_pour_inventaire(date, poste)
     
     @classmethod
     def est_jour_ouvert_pour_recette(cls, date, poste=None):
-        """Vérifie si la saisie de recette est autorisée pour un jour donné"""
-        try:
-            # Chercher configuration spécifique au poste
-            if poste:
-                config = cls.objects.filter(date=date, poste=poste).first()
-                if config:
-                    return (config.statut == StatutJour.OUVERT and 
-                            getattr(config, 'permet_saisie_recette', False))
-            
-            # Chercher configuration globale
-            config_globale = cls.objects.filter(date=date, poste__isnull=True).first()
-            if config_globale:
-                return (config_globale.statut == StatutJour.OUVERT and 
-                        getattr(config_globale, 'permet_saisie_recette', False))
-            
-            # Par défaut : fermé si pas de configuration
-            return False
-            
-        except Exception:
-            return False
+        """
+        Vérifie si la saisie de recette est autorisée pour un jour donné
+        Configuration du poste, sinon globale ; fermé si aucune configuration
+        """
+        from inventaire.services.calendrier_service import ResolveurJours
+        return ResolveurJours.pour_mois(date).est_ouvert_pour_recette(date, poste)
     
     # 🔧 CORRECTION : Méthode globale pour les cas génériques
     @classmethod
@@ -1159,11 +1121,14 @@ class ConfigurationJour(models.Model):
     @classmethod
     def est_jour_impertinent(cls, date):
         """Vérifie si un jour est marqué comme impertinent"""
-        try:
-            config = cls.objects.get(date=date)
-            return config.statut == StatutJour.IMPERTINENT
-        except cls.DoesNotExist:
-            return False
+        from inventaire.services.calendrier_service import ResolveurJours
+        return ResolveurJours.pour_mois(date).est_impertinent(date)
+    
+    @classmethod
+    def resolveur(cls, date_debut, date_fin):
+        """Résolveur en mémoire des configurations d'une plage (une requête)"""
+        from inventaire.services.calendrier_service import ResolveurJours
+        return ResolveurJours.pour_periode(date_debut, date_fin)
     @classmethod
     def marquer_impertinent(cls, date, admin_user, commentaire=""):
         """Marque un jour comme impertinent"""
@@ -1467,16 +1432,11 @@ class InventaireJournalier(models.Model):
         return self.total_vehicules
 
     def save(self, *args, **kwargs):
-        """Surcharge pour recalculer automatiquement les totaux"""
+        """
+        La recette liée est recalculée par le signal post_save, une fois par
+        transaction (inventaire.services.unite_travail_service)
+        """
         super().save(*args, **kwargs)
-        
-        # Mettre à jour la recette si elle existe
-        try:
-            if hasattr(self, 'recette'):
-                self.recette.calculer_indicateurs()
-                self.recette.save()
-        except Exception:
-            pass
     
     def link_to_inventaire_mensuel(self):
     # """Lie cet inventaire journalier à un inventaire mensuel s'il existe"""
@@ -1557,11 +1517,11 @@ class DetailInventairePeriode(models.Model):
         return f"{self.inventaire} - {self.get_periode_display()}: {self.nombre_vehicules}"
     
     def save(self, *args, **kwargs):
-        """Surcharge pour recalculer les totaux de l'inventaire"""
+        """
+        Les totaux de l'inventaire sont recalculés par le signal post_save,
+        une fois par transaction (inventaire.services.unite_travail_service)
+        """
         super().save(*args, **kwargs)
-        
-        # Recalculer directement sans sauvegarder l'inventaire
-        self.inventaire.recalculer_totaux()
 
 
 class RecetteJournaliere(models.Model):
@@ -1702,10 +1662,14 @@ class RecetteJournaliere(models.Model):
     def get_absolute_url(self):
         return reverse('recette_detail', kwargs={'pk': self.pk})
     
-    def calculer_indicateurs(self):
+    def calculer_indicateurs(self, totaux=None):
         """
         Calcule tous les indicateurs basés sur l'inventaire associé
         Version corrigée avec conversion sécurisée des Decimal
+        
+        Args:
+            totaux: (somme_vehicules, nombre_periodes) déjà connus (saisie
+                groupée) ; à défaut, relus depuis les détails de l'inventaire
         """
         from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
         
@@ -1724,10 +1688,11 @@ class RecetteJournaliere(models.Model):
             #     self.taux_deperdition = Decimal('0')
             return
         
-        inventaire = self.inventaire_associe
-        details_periodes = inventaire.details_periodes.all()
+        if totaux is None:
+            details_periodes = list(self.inventaire_associe.details_periodes.all())
+            totaux = (sum(detail.nombre_vehicules for detail in details_periodes), len(details_periodes))
         
-        if not details_periodes.exists():
+        if not totaux[1]:
             self.recette_potentielle = None
             self.ecart = None
             self.taux_deperdition = None
@@ -1735,8 +1700,8 @@ class RecetteJournaliere(models.Model):
         
         try:
             # Utiliser uniquement Decimal pour tous les calculs
-            somme_vehicules = Decimal(str(sum(detail.nombre_vehicules for detail in details_periodes)))
-            nombre_periodes = Decimal(str(details_periodes.count()))
+            somme_vehicules = Decimal(str(totaux[0]))
+            nombre_periodes = Decimal(str(totaux[1]))
             
             if nombre_periodes > 0:
                 moyenne_horaire = somme_vehicules / nombre_periodes
@@ -2056,6 +2021,96 @@ class StatistiquesPeriodiques(models.Model):
         return stats
 
 
+class AgregatRecettes(models.Model):
+    """
+    Agrégats des recettes journalières par poste et par période (semaine ISO,
+    mois, année), tenus à jour après chaque enregistrement ou suppression de
+    recette (voir inventaire/services/agregats_recettes_service.py)
+    """
+
+    class Granularite(models.TextChoices):
+        SEMAINE = 'semaine', _('Semaine')
+        MOIS = 'mois', _('Mois')
+        ANNEE = 'annee', _('Année')
+
+    poste = models.ForeignKey(
+        Poste,
+        on_delete=models.CASCADE,
+        related_name='agregats_recettes',
+        verbose_name=_("Poste")
+    )
+
+    granularite = models.CharField(
+        max_length=10,
+        choices=Granularite.choices,
+        verbose_name=_("Granularité")
+    )
+
+    debut_periode = models.DateField(
+        verbose_name=_("Début de période"),
+        help_text=_("Lundi de la semaine, 1er du mois ou 1er janvier")
+    )
+
+    montant_total = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0'),
+        verbose_name=_("Total recettes déclarées")
+    )
+
+    recette_potentielle_totale = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0'),
+        verbose_name=_("Total recettes potentielles")
+    )
+
+    nombre_recettes = models.IntegerField(
+        default=0,
+        verbose_name=_("Nombre de recettes")
+    )
+
+    somme_taux = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0'),
+        verbose_name=_("Somme des taux de déperdition")
+    )
+
+    nombre_taux = models.IntegerField(
+        default=0,
+        verbose_name=_("Nombre de taux calculés")
+    )
+
+    nombre_impertinents = models.IntegerField(
+        default=0,
+        verbose_name=_("Nombre de journées impertinentes"),
+        help_text=_("Recettes dont le taux de déperdition est supérieur à -5%")
+    )
+
+    date_mise_a_jour = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Dernière mise à jour")
+    )
+
+    class Meta:
+        verbose_name = _("Agrégat de recettes")
+        verbose_name_plural = _("Agrégats de recettes")
+        unique_together = [['poste', 'granularite', 'debut_periode']]
+        ordering = ['-debut_periode', 'poste__nom']
+        indexes = [
+            models.Index(fields=['granularite', 'debut_periode'], name='agregat_rec_gran_debut_idx'),
+        ]
+
+    def __str__(self):
+        return f"Agrégat {self.get_granularite_display()} {self.poste.nom} - {self.debut_periode}"
+
+    @property
+    def taux_moyen(self):
+        """Taux de déperdition moyen de la période (None si aucun taux)"""
+        if self.nombre_taux:
+            return self.somme_taux / self.nombre_taux
+        return None
 
 
 class HistoriqueAffectation(models.Model):
@@ -2304,6 +2359,27 @@ class HistoriqueStock(models.Model):
         verbose_name = _("Historique stock")
         verbose_name_plural = _("Historiques stocks")
         ordering = ['-date_mouvement']
+        indexes = [
+            # Compte d'emploi et classement : poste + sens + plage de dates
+            models.Index(
+                fields=['poste', 'type_mouvement', 'date_mouvement'],
+                name='hist_stock_poste_mvt_date_idx'
+            ),
+            # Historique d'un poste, du plus récent au plus ancien
+            models.Index(fields=['poste', '-date_mouvement'], name='hist_stock_poste_date_idx'),
+            # Liste des bordereaux de transfert (une ligne DEBIT par bordereau)
+            models.Index(
+                fields=['-date_mouvement'],
+                name='hist_stock_cessions_idx',
+                condition=models.Q(type_stock='reapprovisionnement', type_mouvement='DEBIT')
+            ),
+            # Recherche d'un bordereau par son numéro
+            models.Index(
+                fields=['numero_bordereau'],
+                name='hist_stock_bordereau_idx',
+                condition=models.Q(numero_bordereau__isnull=False)
+            ),
+        ]
 
     def get_details_approvisionnement_formattes(self):
         """
@@ -2414,6 +2490,45 @@ class HistoriqueStock(models.Model):
         return series_par_couleur
 
 
+class CompteurNumerotation(models.Model):
+    """
+    Compteur des numéros générés (bordereaux de transfert, références de
+    demandes de confirmation) par préfixe et par période, incrémenté sous
+    verrou de ligne (voir inventaire/services/numerotation_service.py)
+    """
+
+    prefixe = models.CharField(
+        max_length=20,
+        verbose_name=_("Préfixe")
+    )
+
+    periode = models.CharField(
+        max_length=10,
+        blank=True,
+        verbose_name=_("Période"),
+        help_text=_("AAAAMMJJ pour une numérotation journalière, AAAA pour une numérotation annuelle")
+    )
+
+    valeur = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name=_("Dernier numéro attribué")
+    )
+
+    date_mise_a_jour = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Dernière mise à jour")
+    )
+
+    class Meta:
+        verbose_name = _("Compteur de numérotation")
+        verbose_name_plural = _("Compteurs de numérotation")
+        unique_together = [['prefixe', 'periode']]
+        ordering = ['prefixe', '-periode']
+
+    def __str__(self):
+        return f"{self.prefixe} {self.periode} : {self.valeur}"
+
+
 class TypeDeclaration(models.TextChoices):
     """Types de déclaration pour quittancement"""
     JOURNALIERE = 'journaliere', _('Journalière (Par Jour)')
@@ -3462,8 +3577,7 @@ class SerieTicket(models.Model):
             tuple (bool, str, SerieTicket, SerieTicket): (success, message, serie_origine, serie_destination)
         """
         from django.db import transaction
-        from inventaire.models import GestionStock, HistoriqueStock, StockEvent
-        from accounts.models import NotificationUtilisateur, UtilisateurSUPPER
+        from inventaire.services.stock_service import BORNER, MouvementStock, StockService
         
         try:
             with transaction.atomic():
@@ -3492,7 +3606,8 @@ class SerieTicket(models.Model):
                     return False, msg, None, None
                 
                 # === ÉTAPE 2: TROUVER ET TRAITER LA SÉRIE AU POSTE ORIGINE ===
-                serie_source = cls.objects.filter(
+                StockService.verrouiller([poste_origine, poste_destination])
+                serie_source = cls.objects.select_for_update().filter(
                     poste=poste_origine,
                     couleur=couleur,
                     statut='stock',
@@ -3582,66 +3697,9 @@ class SerieTicket(models.Model):
                     user, poste_origine, commentaire, timestamp
                 )
                 
-                # === ÉTAPE 4: MISE À JOUR DES STOCKS GLOBAUX ===
-                logger.info("Mise à jour des stocks globaux...")
-                
-                # Stock origine
-                stock_origine, _ = GestionStock.objects.get_or_create(
-                    poste=poste_origine,
-                    defaults={'valeur_monetaire': Decimal('0')}
-                )
-                stock_origine_avant = stock_origine.valeur_monetaire
-                stock_origine.valeur_monetaire = max(Decimal('0'), stock_origine.valeur_monetaire - montant)
-                stock_origine.save()
-                
-                # Stock destination
-                stock_destination, _ = GestionStock.objects.get_or_create(
-                    poste=poste_destination,
-                    defaults={'valeur_monetaire': Decimal('0')}
-                )
-                stock_destination_avant = stock_destination.valeur_monetaire
-                stock_destination.valeur_monetaire += montant
-                stock_destination.save()
-                
-                logger.info(f"Stock {poste_origine.nom}: {stock_origine_avant} → {stock_origine.valeur_monetaire}")
-                logger.info(f"Stock {poste_destination.nom}: {stock_destination_avant} → {stock_destination.valeur_monetaire}")
-                
-                # === ÉTAPE 5: CRÉER LES HISTORIQUES ET ÉVÉNEMENTS ===
+                # === ÉTAPE 4: STOCKS GLOBAUX, HISTORIQUES ET ÉVÉNEMENTS ===
                 numero_bordereau = cls._generer_numero_bordereau_transfert()
                 
-                # Historique origine (DEBIT)
-                HistoriqueStock.objects.create(
-                    poste=poste_origine,
-                    type_mouvement='DEBIT',
-                    type_stock='reapprovisionnement',
-                    montant=montant,
-                    nombre_tickets=nombre_tickets,
-                    stock_avant=stock_origine_avant,
-                    stock_apres=stock_origine.valeur_monetaire,
-                    effectue_par=user,
-                    poste_origine=poste_origine,
-                    poste_destination=poste_destination,
-                    numero_bordereau=numero_bordereau,
-                    commentaire=f"Cession {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}"
-                )
-                
-                # Historique destination (CREDIT)
-                HistoriqueStock.objects.create(
-                    poste=poste_destination,
-                    type_mouvement='CREDIT',
-                    type_stock='reapprovisionnement',
-                    montant=montant,
-                    nombre_tickets=nombre_tickets,
-                    stock_avant=stock_destination_avant,
-                    stock_apres=stock_destination.valeur_monetaire,
-                    effectue_par=user,
-                    poste_origine=poste_origine,
-                    poste_destination=poste_destination,
-                    numero_bordereau=numero_bordereau,
-                    commentaire=f"Réception {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}"
-                )
-                
-                # Events sourcing
                 metadata = {
                     'couleur': couleur.libelle_affichage,
                     'numero_premier': numero_premier,
@@ -3650,32 +3708,40 @@ class SerieTicket(models.Model):
                     'valeur': str(montant),
                     'numero_bordereau': numero_bordereau
                 }
+                champs_historique = {
+                    'type_stock': 'reapprovisionnement',
+                    'poste_origine': poste_origine,
+                    'poste_destination': poste_destination,
+                    'numero_bordereau': numero_bordereau,
+                }
                 
-                StockEvent.objects.create(
-                    poste=poste_origine,
-                    event_type='TRANSFERT_OUT',
-                    event_datetime=timestamp,
-                    montant_variation=-montant,
-                    nombre_tickets_variation=-nombre_tickets,
-                    stock_resultant=stock_origine.valeur_monetaire,
-                    tickets_resultants=int(stock_origine.valeur_monetaire / 500),
-                    effectue_par=user,
-                    metadata={'serie': metadata, 'poste_destination': {'nom': poste_destination.nom}},
-                    commentaire=f"Transfert vers {poste_destination.nom}"
-                )
-                
-                StockEvent.objects.create(
-                    poste=poste_destination,
-                    event_type='TRANSFERT_IN',
-                    event_datetime=timestamp,
-                    montant_variation=montant,
-                    nombre_tickets_variation=nombre_tickets,
-                    stock_resultant=stock_destination.valeur_monetaire,
-                    tickets_resultants=int(stock_destination.valeur_monetaire / 500),
-                    effectue_par=user,
-                    metadata={'serie': metadata, 'poste_origine': {'nom': poste_origine.nom}},
-                    commentaire=f"Réception depuis {poste_origine.nom}"
-                )
+                StockService.appliquer([
+                    MouvementStock(
+                        poste_origine, -montant, 'TRANSFERT_OUT',
+                        historique=dict(
+                            champs_historique,
+                            commentaire=f"Cession {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}"
+                        ),
+                        evenement={
+                            'event_datetime': timestamp,
+                            'metadata': {'serie': metadata, 'poste_destination': {'nom': poste_destination.nom}},
+                            'commentaire': f"Transfert vers {poste_destination.nom}",
+                        },
+                        controle=BORNER,
+                    ),
+                    MouvementStock(
+                        poste_destination, montant, 'TRANSFERT_IN',
+                        historique=dict(
+                            champs_historique,
+                            commentaire=f"Réception {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}"
+                        ),
+                        evenement={
+                            'event_datetime': timestamp,
+                            'metadata': {'serie': metadata, 'poste_origine': {'nom': poste_origine.nom}},
+                            'commentaire': f"Réception depuis {poste_origine.nom}",
+                        },
+                    ),
+                ], user)
                 
                 # Notifications
                 cls._envoyer_notifications_transfert(
@@ -3802,22 +3868,10 @@ class SerieTicket(models.Model):
     @classmethod
     def _generer_numero_bordereau_transfert(cls):
         """Génère un numéro unique de bordereau pour le transfert"""
-        from datetime import datetime
-        from inventaire.models import HistoriqueStock
-        
-        now = datetime.now()
-        
-        # Compter les transferts du jour
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        count_today = HistoriqueStock.objects.filter(
-            type_stock='reapprovisionnement',
-            date_mouvement__gte=today_start
-        ).count()
+        from inventaire.services.numerotation_service import NumerotationService
         
-        # Format : TR-YYYYMMDD-HHMMSS-XXX
-        numero = f"TR-{now.strftime('%Y%m%d')}-{now.strftime('%H%M%S')}-{count_today+1:03d}"
-        
-        return numero
+        # Format : TR-YYYYMMDD-HHMMSS-XXX (compteur journalier verrouillé)
+        return NumerotationService.numero_bordereau_transfert()
 
 
     @staticmethod
@@ -3826,59 +3880,40 @@ class SerieTicket(models.Model):
                                         montant, nombre_tickets, numero_bordereau, user):
         """
         ✅ NOUVELLE MÉTHODE STATIQUE : Envoie les notifications de transfert
+        (chefs des deux postes, une insertion groupée)
         """
-        from accounts.models import UtilisateurSUPPER, NotificationUtilisateur
-        
-        # Chef du poste origine
-        chefs_origine = UtilisateurSUPPER.objects.filter(
-            poste_affectation=poste_origine,
-            habilitation__in=['chef_peage', 'chef_pesage'],
-            is_active=True
-        )
-        
-        for chef in chefs_origine:
-            NotificationUtilisateur.objects.create(
-                destinataire=chef,
-                expediteur=user,
-                titre="Tickets cédés à un autre poste",
-                message=(
-                    f"Transfert de {nombre_tickets} tickets "
-                    f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
-                    f"vers {poste_destination.nom}.\n"
-                    f"Montant : {montant:,.0f} FCFA\n"
-                    f"Bordereau N°{numero_bordereau}"
-                ),
-                type_notification='warning'
-            )
-        
-        # Chef du poste destination
-        chefs_destination = UtilisateurSUPPER.objects.filter(
-            poste_affectation=poste_destination,
-            habilitation__in=['chef_peage', 'chef_pesage'],
-            is_active=True
-        )
-        
-        for chef in chefs_destination:
-            NotificationUtilisateur.objects.create(
-                destinataire=chef,
-                expediteur=user,
-                titre="Nouveaux tickets reçus",
-                message=(
-                    f"Réception de {nombre_tickets} tickets "
-                    f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
-                    f"en provenance de {poste_origine.nom}.\n"
-                    f"Montant : {montant:,.0f} FCFA\n"
-                    f"Bordereau N°{numero_bordereau}"
-                ),
-                type_notification='success'
-            )
+        from inventaire.services.notification_service import NotificationService
+        
+        NotificationService.notifier_chefs_postes([
+            (
+                poste_origine,
+                "Tickets cédés à un autre poste",
+                f"Transfert de {nombre_tickets} tickets "
+                f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
+                f"vers {poste_destination.nom}.\n"
+                f"Montant : {montant:,.0f} FCFA\n"
+                f"Bordereau N°{numero_bordereau}",
+                'warning'
+            ),
+            (
+                poste_destination,
+                "Nouveaux tickets reçus",
+                f"Réception de {nombre_tickets} tickets "
+                f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
+                f"en provenance de {poste_origine.nom}.\n"
+                f"Montant : {montant:,.0f} FCFA\n"
+                f"Bordereau N°{numero_bordereau}",
+                'success'
+            ),
+        ], cree_par=user)
 
     @classmethod
     def obtenir_historique_complet_ticket(cls, numero_ticket, couleur, annee=None):
         """
         Obtient l'historique complet d'un numéro de ticket (tous postes, toutes années)
         
-        AMÉLIORATION : Inclut les transferts entre postes
+        Lit l'index MouvementTicket (une seule recherche par plage) : chargement,
+        cessions/réceptions entre postes et vente, dans l'ordre chronologique.
         
         Args:
             numero_ticket: Numéro du ticket
@@ -3888,69 +3923,44 @@ class SerieTicket(models.Model):
         Returns:
             dict avec l'historique complet par année et par poste
         """
-        from django.db.models import Q
-        from datetime import date
-        
-        # Construire la requête
-        query = Q(
-            numero_premier__lte=numero_ticket,
-            numero_dernier__gte=numero_ticket,
-            couleur=couleur
-        )
-        
-        if annee:
-            debut_annee = date(annee, 1, 1)
-            fin_annee = date(annee, 12, 31)
-            query &= Q(date_reception__range=[debut_annee, fin_annee])
-        
-        # Récupérer toutes les séries contenant ce ticket
-        series = cls.objects.filter(query).select_related(
-            'poste', 'poste_destination_transfert', 'reference_recette'
-        ).order_by('date_reception')
-        
-        # Grouper par année et poste
         historique = {}
         
-        for serie in series:
-            annee_serie = serie.date_reception.year
-            
-            if annee_serie not in historique:
-                historique[annee_serie] = []
+        for mouvement in MouvementTicket.rechercher(numero_ticket, couleur, annee):
+            poste_nom = mouvement.poste.nom
+            contrepartie = mouvement.poste_contrepartie.nom if mouvement.poste_contrepartie else None
+            date_str = timezone.localtime(mouvement.date_mouvement).strftime('%d/%m/%Y')
             
             info = {
-                'poste': serie.poste.nom,
-                'date_reception': serie.date_reception,
-                'statut': serie.statut,
-                'type_entree': serie.get_type_entree_display() if serie.type_entree else 'Non défini',
-                'serie_complete': f"#{serie.numero_premier}-{serie.numero_dernier}",
-                'nombre_tickets': serie.nombre_tickets
+                'poste': poste_nom,
+                'date_mouvement': mouvement.date_mouvement,
+                'type_mouvement': mouvement.type_mouvement,
+                'type_mouvement_display': mouvement.get_type_mouvement_display(),
+                'serie_complete': f"#{mouvement.numero_premier}-{mouvement.numero_dernier}",
+                'nombre_tickets': mouvement.numero_dernier - mouvement.numero_premier + 1,
             }
             
-            # Ajouter les détails selon le statut
-            if serie.statut == 'stock':
-                info['message'] = f"✅ En stock au poste {serie.poste.nom}"
+            if mouvement.type_mouvement == 'chargement':
+                info['message'] = f"📥 Chargé le {date_str} au poste {poste_nom}"
             
-            elif serie.statut == 'vendu':
-                info['date_vente'] = serie.date_utilisation
-                info['message'] = f"💰 Vendu le {serie.date_utilisation.strftime('%d/%m/%Y')} au poste {serie.poste.nom}"
-                
-                if serie.reference_recette:
-                    info['recette'] = serie.reference_recette.montant_declare
+            elif mouvement.type_mouvement == 'transfert_sortant':
+                info['poste_destination'] = contrepartie
+                info['message'] = f"📦 Cédé le {date_str} par {poste_nom} vers {contrepartie or 'poste inconnu'}"
             
-            elif serie.statut == 'transfere':
-                if serie.poste_destination_transfert:
-                    info['poste_destination'] = serie.poste_destination_transfert.nom
-                    info['message'] = (
-                        f"📦 Transféré du poste {serie.poste.nom} "
-                        f"vers {serie.poste_destination_transfert.nom}"
-                    )
-                else:
-                    info['message'] = f"📦 Transféré depuis {serie.poste.nom}"
+            elif mouvement.type_mouvement == 'transfert_entrant':
+                info['poste_origine'] = contrepartie
+                info['message'] = f"📦 Reçu le {date_str} au poste {poste_nom} depuis {contrepartie or 'poste inconnu'}"
             
-            if serie.commentaire:
-                info['commentaire'] = serie.commentaire
+            elif mouvement.type_mouvement == 'vente':
+                if mouvement.recette:
+                    info['date_vente'] = mouvement.recette.date
+                    info['recette'] = mouvement.recette.montant_declare
+                    date_str = mouvement.recette.date.strftime('%d/%m/%Y')
+                info['message'] = f"💰 Vendu le {date_str} au poste {poste_nom}"
             
-            historique[annee_serie].append(info)
+            if mouvement.numero_bordereau:
+                info['numero_bordereau'] = mouvement.numero_bordereau
+            
+            historique.setdefault(mouvement.annee, []).append(info)
         
         return historique
 
@@ -4052,6 +4062,258 @@ class DetailVenteTicket(models.Model):
         super().save(*args, **kwargs)
 
 
+class MouvementTicket(models.Model):
+    """
+    Index du cycle de vie des tickets : une ligne par mouvement d'une plage
+    de numéros (chargement, cession, réception, vente).
+    Alimenté à partir des HistoriqueStock (signal post_save et commande
+    indexer_mouvements_tickets) pour retrouver le parcours d'un ticket
+    avec une seule recherche (couleur, année, numéro).
+    """
+    
+    TYPE_CHOICES = [
+        ('chargement', _('Chargement')),
+        ('transfert_sortant', _('Transfert sortant')),
+        ('transfert_entrant', _('Transfert entrant')),
+        ('vente', _('Vente')),
+    ]
+    
+    couleur = models.ForeignKey(
+        CouleurTicket,
+        on_delete=models.PROTECT,
+        related_name='mouvements',
+        verbose_name=_("Couleur")
+    )
+    
+    annee = models.PositiveSmallIntegerField(
+        verbose_name=_("Année")
+    )
+    
+    numero_premier = models.IntegerField(
+        verbose_name=_("Premier numéro")
+    )
+    
+    numero_dernier = models.IntegerField(
+        verbose_name=_("Dernier numéro")
+    )
+    
+    type_mouvement = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name=_("Type de mouvement")
+    )
+    
+    poste = models.ForeignKey(
+        'accounts.Poste',
+        on_delete=models.CASCADE,
+        related_name='mouvements_tickets',
+        verbose_name=_("Poste")
+    )
+    
+    poste_contrepartie = models.ForeignKey(
+        'accounts.Poste',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvements_tickets_contrepartie',
+        verbose_name=_("Poste contrepartie (transfert)")
+    )
+    
+    date_mouvement = models.DateTimeField(
+        verbose_name=_("Date du mouvement")
+    )
+    
+    type_stock = models.CharField(
+        max_length=30,
+        blank=True,
+        verbose_name=_("Type de stock")
+    )
+    
+    numero_bordereau = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name=_("Numéro de bordereau")
+    )
+    
+    historique = models.ForeignKey(
+        HistoriqueStock,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='mouvements_tickets',
+        verbose_name=_("Historique de stock")
+    )
+    
+    recette = models.ForeignKey(
+        'RecetteJournaliere',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvements_tickets',
+        verbose_name=_("Recette associée")
+    )
+    
+    class Meta:
+        verbose_name = _("Mouvement de tickets")
+        verbose_name_plural = _("Mouvements de tickets")
+        ordering = ['date_mouvement', 'id']
+        indexes = [
+            # Recherche par plage : couleur + année + numéro
+            models.Index(
+                fields=['couleur', 'annee', 'numero_premier', 'numero_dernier'],
+                name='mvt_ticket_plage_idx'
+            ),
+            models.Index(fields=['poste', 'date_mouvement'], name='mvt_ticket_poste_date_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(numero_premier__lte=models.F('numero_dernier')),
+                name='mvt_ticket_premier_inferieur_dernier'
+            )
+        ]
+    
+    def __str__(self):
+        return (
+            f"{self.get_type_mouvement_display()} {self.couleur} "
+            f"#{self.numero_premier}-{self.numero_dernier} ({self.poste})"
+        )
+    
+    @classmethod
+    def rechercher(cls, numero_ticket, couleur, annee=None):
+        """
+        Mouvements contenant un numéro de ticket (une seule requête sur l'index)
+        
+        Args:
+            numero_ticket: Numéro du ticket
+            couleur: Instance ou ID de CouleurTicket
+            annee: Année (optionnel, toutes les années sinon)
+        """
+        filtres = {
+            'couleur': couleur,
+            'numero_premier__lte': numero_ticket,
+            'numero_dernier__gte': numero_ticket,
+        }
+        if annee:
+            filtres['annee'] = annee
+        
+        return cls.objects.filter(**filtres).select_related(
+            'poste', 'poste_contrepartie', 'recette'
+        ).order_by('date_mouvement', 'id')
+    
+    @staticmethod
+    def _plages_depuis_historique(historique, couleurs=None):
+        """
+        Extrait les plages (couleur_id, premier, dernier) d'un historique
+        Ordre : séries du JSONField, champs structurés, détails de vente, commentaire
+        
+        Les séries du JSONField passent avant les champs structurés : un
+        transfert de plusieurs séries ne renseigne que la première dans
+        numero_premier_ticket / numero_dernier_ticket / couleur_principale
+        
+        Args:
+            couleurs: dict optionnel {code_normalise: CouleurTicket} pour éviter
+                      une requête par couleur lors des traitements en masse
+        """
+        details = historique.details_approvisionnement or {}
+        plages = [
+            (s['couleur_id'], int(s['numero_premier']), int(s['numero_dernier']))
+            for s in details.get('series', [])
+            if s.get('couleur_id') and s.get('numero_premier') and s.get('numero_dernier')
+        ]
+        if plages:
+            return plages
+        
+        if historique.numero_premier_ticket and historique.numero_dernier_ticket and historique.couleur_principale_id:
+            return [(
+                historique.couleur_principale_id,
+                historique.numero_premier_ticket,
+                historique.numero_dernier_ticket
+            )]
+        
+        if historique.reference_recette_id:
+            plages = list(
+                DetailVenteTicket.objects.filter(
+                    recette_id=historique.reference_recette_id
+                ).values_list('couleur_id', 'numero_premier', 'numero_dernier')
+            )
+            if plages:
+                return plages
+        
+        if historique.commentaire and '#' in historique.commentaire:
+            pattern = r"(?:Série|Cession|Réception)\s+(.+?)\s+#(\d+)-(\d+)"
+            for match in re.finditer(pattern, historique.commentaire):
+                code = CouleurTicket.normaliser_couleur(match.group(1))
+                if couleurs is not None:
+                    couleur = couleurs.get(code)
+                else:
+                    couleur = CouleurTicket.objects.filter(code_normalise=code).first()
+                if couleur:
+                    plages.append((couleur.id, int(match.group(2)), int(match.group(3))))
+        
+        return plages
+    
+    @classmethod
+    def construire_depuis_historique(cls, historique, couleurs=None):
+        """
+        Construit (sans les sauvegarder) les mouvements d'un HistoriqueStock
+        
+        Returns:
+            list de MouvementTicket non sauvegardés
+        """
+        if historique.type_mouvement == 'CREDIT':
+            if historique.type_stock == 'reapprovisionnement' or (
+                historique.poste_origine_id and historique.poste_origine_id != historique.poste_id
+            ):
+                type_mouvement = 'transfert_entrant'
+                contrepartie_id = historique.poste_origine_id
+            else:
+                type_mouvement = 'chargement'
+                contrepartie_id = None
+        else:
+            if historique.reference_recette_id:
+                type_mouvement = 'vente'
+                contrepartie_id = None
+            elif historique.poste_destination_id:
+                type_mouvement = 'transfert_sortant'
+                contrepartie_id = historique.poste_destination_id
+            else:
+                # Ajustement sans plage de tickets identifiable
+                return []
+        
+        date_mouvement = historique.date_mouvement or timezone.now()
+        if type_mouvement == 'vente' and historique.reference_recette:
+            annee = historique.reference_recette.date.year
+        else:
+            annee = timezone.localtime(date_mouvement).year if timezone.is_aware(date_mouvement) else date_mouvement.year
+        
+        return [
+            cls(
+                couleur_id=couleur_id,
+                annee=annee,
+                numero_premier=premier,
+                numero_dernier=dernier,
+                type_mouvement=type_mouvement,
+                poste_id=historique.poste_id,
+                poste_contrepartie_id=contrepartie_id,
+                date_mouvement=date_mouvement,
+                type_stock=historique.type_stock or '',
+                numero_bordereau=historique.numero_bordereau or '',
+                historique_id=historique.id,
+                recette_id=historique.reference_recette_id,
+            )
+            for couleur_id, premier, dernier in cls._plages_depuis_historique(historique, couleurs)
+            if premier <= dernier
+        ]
+    
+    @classmethod
+    def indexer_historique(cls, historique):
+        """Indexe les plages de tickets d'un nouvel HistoriqueStock"""
+        mouvements = cls.construire_depuis_historique(historique)
+        if mouvements:
+            cls.objects.bulk_create(mouvements)
+        return len(mouvements)
+
+
 class StockEvent(models.Model):
     """
     Modèle Event Sourcing pour les mouvements de stock
@@ -180,10 +180,9 @@ class DemandeConfirmationPaiement(models.Model):
         super().save(*args, **kwargs)
     
     def _generer_reference(self):
-        """Génère une référence unique pour la demande"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        return f"CONF-{timestamp}-{self.station_demandeur_id or 0}"
+        """Génère une référence unique pour la demande (compteur journalier verrouillé)"""
+        from inventaire.services.numerotation_service import NumerotationService
+        return NumerotationService.reference_demande_confirmation(self.station_demandeur_id)
     
     @property
     def est_en_attente(self):
@@ -2,6 +2,7 @@
 # inventaire/models_performance.py - Modèles pour le classement
 # ===================================================================
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
@@ -237,4 +238,64 @@ class PerformanceAgent(models.Model):
         verbose_name = _("Performance agent")
         verbose_name_plural = _("Performances agents")
         unique_together = [['agent', 'poste', 'date_debut']]
-        ordering = ['-note_moyenne', 'agent__nom_complet']
\ No newline at end of file
+        ordering = ['-note_moyenne', 'agent__nom_complet']
+
+
+class InstantaneDashboard(models.Model):
+    """
+    Bloc de statistiques précalculé pour le tableau de bord et les API graphiques
+
+    Un instantané par (bloc, portée, paramètres) : la portée vaut 'national',
+    'region:<id>' ou 'poste:<id>'. Les données sont recalculées par la commande
+    precalculer_dashboard et, à la demande, après qu'une écriture les a
+    marquées périmées (voir inventaire/services/dashboard_service.py).
+    """
+    bloc = models.CharField(
+        max_length=50,
+        verbose_name=_("Bloc")
+    )
+
+    portee = models.CharField(
+        max_length=30,
+        verbose_name=_("Portée"),
+        help_text=_("national, region:<id> ou poste:<id>")
+    )
+
+    parametres = models.CharField(
+        max_length=200,
+        blank=True,
+        default='',
+        verbose_name=_("Paramètres")
+    )
+
+    donnees = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        default=dict,
+        verbose_name=_("Données")
+    )
+
+    perime = models.BooleanField(
+        default=False,
+        verbose_name=_("Périmé"),
+        help_text=_("Une écriture a modifié les données sources depuis le calcul")
+    )
+
+    date_calcul = models.DateTimeField(
+        verbose_name=_("Date calcul")
+    )
+
+    duree_calcul_ms = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Durée du calcul (ms)")
+    )
+
+    class Meta:
+        verbose_name = _("Instantané tableau de bord")
+        verbose_name_plural = _("Instantanés tableau de bord")
+        unique_together = [['bloc', 'portee', 'parametres']]
+        indexes = [
+            models.Index(fields=['portee', 'perime'], name='dashboard_portee_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bloc} [{self.portee}] {self.parametres}"
@@ -208,6 +208,12 @@ class AmendeEmise(models.Model):
             models.Index(fields=['immatriculation_normalise']),
             models.Index(fields=['transporteur_normalise']),
             models.Index(fields=['operateur_normalise']),
+            # Recettes encaissées : amendes payées d'une station sur une plage de dates
+            models.Index(
+                fields=['station', 'date_paiement'],
+                name='amende_station_paiement_idx',
+                condition=Q(statut='paye')
+            ),
         ]
     
     def __str__(self):
@@ -455,6 +461,76 @@ class PeseesJournalieres(models.Model):
         return f"Pesées {self.station.nom} - {self.date}: {self.nombre_pesees}"
 
 
+# ===================================================================
+# MODÈLE : AGRÉGATS JOURNALIERS DES AMENDES
+# ===================================================================
+
+class AgregatAmendesJour(models.Model):
+    """
+    Nombre et montant des amendes par station, jour d'émission (jour
+    calendaire du fuseau courant), statut et type d'infraction ; tenus à jour
+    après chaque enregistrement ou suppression d'amende
+    (voir inventaire/services/agregats_amendes_service.py)
+    """
+    
+    station = models.ForeignKey(
+        'accounts.Poste',
+        on_delete=models.CASCADE,
+        related_name='agregats_amendes',
+        verbose_name=_("Station de pesage"),
+        limit_choices_to={'type': 'pesage'}
+    )
+    
+    jour = models.DateField(
+        verbose_name=_("Jour d'émission")
+    )
+    
+    statut = models.CharField(
+        max_length=15,
+        choices=StatutAmende.choices,
+        verbose_name=_("Statut du paiement")
+    )
+    
+    est_surcharge = models.BooleanField(
+        default=False,
+        verbose_name=_("Surcharge")
+    )
+    
+    est_hors_gabarit = models.BooleanField(
+        default=False,
+        verbose_name=_("Hors Gabarit")
+    )
+    
+    nombre_amendes = models.IntegerField(
+        default=0,
+        verbose_name=_("Nombre d'amendes")
+    )
+    
+    montant_total = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0'),
+        verbose_name=_("Montant total")
+    )
+    
+    date_mise_a_jour = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Dernière mise à jour")
+    )
+    
+    class Meta:
+        verbose_name = _("Agrégat journalier d'amendes")
+        verbose_name_plural = _("Agrégats journaliers d'amendes")
+        unique_together = [['station', 'jour', 'statut', 'est_surcharge', 'est_hors_gabarit']]
+        ordering = ['-jour', 'station__nom']
+        indexes = [
+            models.Index(fields=['jour'], name='agregat_amende_jour_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Amendes {self.station.nom} - {self.jour} ({self.statut}): {self.nombre_amendes}"
+
+
 # ===================================================================
 # MODÈLE : EVENT SOURCING POUR LES AMENDES
 # ===================================================================
@@ -939,6 +1015,7 @@ class QuittancementPesage(models.Model):
             # Fallback si import direct ne fonctionne pas
             AmendeEmise = self.__class__._meta.apps.get_model('inventaire', 'AmendeEmise')
             StatutAmende = type('StatutAmende', (), {'PAYE': 'paye'})
+        from common.utils import plage_journees
         
         if self.type_declaration == 'journaliere':
             if not self.date_recette:
@@ -948,7 +1025,7 @@ class QuittancementPesage(models.Model):
             amendes = AmendeEmise.objects.filter(
                 station=self.station,
                 statut='paye',  # StatutAmende.PAYE
-                date_paiement__date=self.date_recette
+                **plage_journees('date_paiement', self.date_recette, self.date_recette)
             )
         else:  # decade
             if not self.date_debut_decade or not self.date_fin_decade:
@@ -958,8 +1035,7 @@ class QuittancementPesage(models.Model):
             amendes = AmendeEmise.objects.filter(
                 station=self.station,
                 statut='paye',  # StatutAmende.PAYE
-                date_paiement__date__gte=self.date_debut_decade,
-                date_paiement__date__lte=self.date_fin_decade
+                **plage_journees('date_paiement', self.date_debut_decade, self.date_fin_decade)
             )
         
         total = amendes.aggregate(
@@ -1003,6 +1079,7 @@ class QuittancementPesage(models.Model):
             from inventaire.models_pesage import AmendeEmise
         except ImportError:
             AmendeEmise = self.__class__._meta.apps.get_model('inventaire', 'AmendeEmise')
+        from common.utils import plage_journees
         
         if self.type_declaration == 'journaliere':
             if not self.date_recette:
@@ -1011,7 +1088,7 @@ class QuittancementPesage(models.Model):
             return AmendeEmise.objects.filter(
                 station=self.station,
                 statut='paye',
-                date_paiement__date=self.date_recette
+                **plage_journees('date_paiement', self.date_recette, self.date_recette)
             )
         else:
             if not self.date_debut_decade or not self.date_fin_decade:
@@ -1020,8 +1097,7 @@ class QuittancementPesage(models.Model):
             return AmendeEmise.objects.filter(
                 station=self.station,
                 statut='paye',
-                date_paiement__date__gte=self.date_debut_decade,
-                date_paiement__date__lte=self.date_fin_decade
+                **plage_journees('date_paiement', self.date_debut_decade, self.date_fin_decade)
             )
 
 
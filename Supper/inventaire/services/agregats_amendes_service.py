@@ -0,0 +1,195 @@
+# inventaire/services/agregats_amendes_service.py
+"""
+Agrégats journaliers des amendes (table AgregatAmendesJour)
+
+Chaque station dispose d'une ligne par jour d'émission, statut et type
+d'infraction (surcharge / hors gabarit) avec le nombre et le montant des
+amendes : au plus huit lignes par station et par jour.
+
+Maintenance : les receveurs de inventaire/signals.py marquent
+(station_id, jour) à chaque enregistrement ou suppression d'amende ;
+l'unité de travail recalcule, après validation, uniquement les jours touchés.
+
+Consultation : les statistiques d'en-tête de la liste des amendes (station,
+statut, type d'infraction, plage de jours) sont lues dans la table, quel que
+soit le nombre d'amendes ; seule la recherche textuelle, non agrégeable,
+impose de compter les amendes elles-mêmes.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from common.utils import plage_journees
+
+logger = logging.getLogger('supper')
+
+CHAMPS_CLE = ('station_id', 'jour', 'statut', 'est_surcharge', 'est_hors_gabarit')
+
+# Filtre 'type_infraction' de la liste des amendes
+FILTRES_INFRACTION = {
+    'S': {'est_surcharge': True, 'est_hors_gabarit': False},
+    'HG': {'est_surcharge': False, 'est_hors_gabarit': True},
+    'S+HG': {'est_surcharge': True, 'est_hors_gabarit': True},
+}
+
+
+def journee_amende(date_heure_emission):
+    """Jour d'émission d'une amende dans le fuseau courant (comme le lookup __date)"""
+    if timezone.is_aware(date_heure_emission):
+        return timezone.localtime(date_heure_emission).date()
+    return date_heure_emission.date()
+
+
+def _lignes(amendes):
+    """Nombre et montant des amendes groupés par clé d'agrégat"""
+    return (
+        amendes.annotate(jour=TruncDate('date_heure_emission'))
+        .values(*CHAMPS_CLE)
+        .annotate(nombre_amendes=Count('id'), montant_total=Sum('montant_amende'))
+        .order_by()
+    )
+
+
+class AgregatsAmendesService:
+    """Lecture et maintenance des agrégats journaliers d'amendes"""
+
+    # ===============================================================
+    # CONSULTATION
+    # ===============================================================
+
+    @staticmethod
+    def statistiques(stations=None, statut=None, type_infraction=None, date_debut=None, date_fin=None):
+        """
+        Statistiques d'en-tête de la liste des amendes, en une requête sur
+        les agrégats
+
+        Args:
+            stations: identifiant, liste ou queryset de stations (None = toutes)
+            statut, type_infraction, date_debut, date_fin: filtres de la liste
+
+        Returns:
+            dict avec les clés de l'agrégat calculé auparavant sur les
+            amendes (total_montant, total_paye, total_non_paye, count_total,
+            count_paye, count_non_paye)
+        """
+        from inventaire.models_pesage import AgregatAmendesJour, StatutAmende
+
+        agregats = AgregatAmendesJour.objects.all()
+        if stations is not None:
+            if isinstance(stations, (int, str)):
+                agregats = agregats.filter(station_id=stations)
+            else:
+                agregats = agregats.filter(station__in=stations)
+        if statut:
+            agregats = agregats.filter(statut=statut)
+        if type_infraction in FILTRES_INFRACTION:
+            agregats = agregats.filter(**FILTRES_INFRACTION[type_infraction])
+        if date_debut:
+            agregats = agregats.filter(jour__gte=date_debut)
+        if date_fin:
+            agregats = agregats.filter(jour__lte=date_fin)
+
+        stats = agregats.aggregate(
+            total_montant=Sum('montant_total'),
+            total_paye=Sum('montant_total', filter=Q(statut=StatutAmende.PAYE)),
+            total_non_paye=Sum('montant_total', filter=Q(statut=StatutAmende.NON_PAYE)),
+            count_total=Sum('nombre_amendes'),
+            count_paye=Sum('nombre_amendes', filter=Q(statut=StatutAmende.PAYE)),
+            count_non_paye=Sum('nombre_amendes', filter=Q(statut=StatutAmende.NON_PAYE)),
+        )
+        # Comptes à 0 plutôt que None, comme Count sur les amendes
+        for cle in ('count_total', 'count_paye', 'count_non_paye'):
+            stats[cle] = stats[cle] or 0
+        return stats
+
+    # ===============================================================
+    # MAINTENANCE
+    # ===============================================================
+
+    @staticmethod
+    def mettre_a_jour(cles):
+        """
+        Recalcule les agrégats des journées (station_id, jour) de cles :
+        une requête groupée, une écriture groupée
+        """
+        from inventaire.models_pesage import AgregatAmendesJour, AmendeEmise
+
+        jours = defaultdict(set)
+        for station_id, jour in cles:
+            jours[station_id].add(jour)
+
+        filtre_amendes = Q()
+        concernes = Q()
+        for station_id, valeurs in jours.items():
+            for jour in valeurs:
+                filtre_amendes |= Q(station_id=station_id, **plage_journees('date_heure_emission', jour, jour))
+            concernes |= Q(station_id=station_id, jour__in=sorted(valeurs))
+
+        calcules = {
+            tuple(ligne[champ] for champ in CHAMPS_CLE): ligne
+            for ligne in _lignes(AmendeEmise.objects.filter(filtre_amendes))
+        }
+
+        with transaction.atomic():
+            # Lignes devenues vides (statut changé, amende supprimée)
+            vides = [
+                ligne[0] for ligne in AgregatAmendesJour.objects.filter(concernes).values_list('pk', *CHAMPS_CLE)
+                if ligne[1:] not in calcules
+            ]
+            if vides:
+                AgregatAmendesJour.objects.filter(pk__in=vides).delete()
+            AgregatsAmendesService._enregistrer(calcules.values())
+
+        logger.debug(
+            f"[AGREGATS_AMENDES] {len(cles)} journée(s): {len(calcules)} ligne(s) recalculée(s), "
+            f"{len(vides)} supprimée(s)"
+        )
+
+    @staticmethod
+    def reconstruire(stations=None):
+        """
+        Reconstruit tous les agrégats (ou ceux des stations données) depuis
+        les amendes : une requête groupée, une écriture groupée
+
+        Returns:
+            Nombre de lignes enregistrées
+        """
+        from inventaire.models_pesage import AgregatAmendesJour, AmendeEmise
+
+        filtre_stations = Q() if stations is None else Q(station__in=stations)
+        calcules = list(_lignes(AmendeEmise.objects.filter(filtre_stations)))
+
+        with transaction.atomic():
+            AgregatAmendesJour.objects.filter(filtre_stations).delete()
+            AgregatsAmendesService._enregistrer(calcules)
+
+        logger.info(f"[AGREGATS_AMENDES] Reconstruction: {len(calcules)} ligne(s)")
+        return len(calcules)
+
+    @staticmethod
+    def _enregistrer(lignes):
+        """Insère ou met à jour les lignes calculées (une requête par lot)"""
+        from inventaire.models_pesage import AgregatAmendesJour
+
+        maintenant = timezone.now()
+        AgregatAmendesJour.objects.bulk_create(
+            [
+                AgregatAmendesJour(
+                    **{champ: ligne[champ] for champ in CHAMPS_CLE},
+                    nombre_amendes=ligne['nombre_amendes'],
+                    montant_total=ligne['montant_total'] or Decimal('0'),
+                    date_mise_a_jour=maintenant,
+                )
+                for ligne in lignes
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['station', 'jour', 'statut', 'est_surcharge', 'est_hors_gabarit'],
+            update_fields=['nombre_amendes', 'montant_total', 'date_mise_a_jour'],
+        )
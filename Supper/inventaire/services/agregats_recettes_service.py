@@ -0,0 +1,357 @@
+# inventaire/services/agregats_recettes_service.py
+"""
+Agrégats continus des recettes journalières (table AgregatRecettes)
+
+Chaque poste dispose d'une ligne par semaine ISO, par mois et par année
+contenant la somme des montants déclarés et des recettes potentielles, le
+nombre de recettes, la somme et le nombre des taux de déperdition et le
+nombre de journées impertinentes (taux > -5%).
+
+Maintenance : les receveurs de inventaire/signals.py marquent (poste_id, date)
+à chaque enregistrement ou suppression de recette ; l'unité de travail
+recalcule, après validation, uniquement les tranches touchées.
+
+Consultation : une plage quelconque est décomposée en années pleines, mois
+pleins et semaines pleines, lus dans la table, plus les quelques jours de
+bord, lus dans RecetteJournaliere (deux requêtes au plus, tous postes
+confondus).
+"""
+
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+logger = logging.getLogger('supper')
+
+SEUIL_IMPERTINENCE = Decimal('-5')
+CHAMPS_AGREGES = (
+    'montant_total', 'recette_potentielle_totale', 'nombre_recettes',
+    'somme_taux', 'nombre_taux', 'nombre_impertinents',
+)
+
+
+def _annotations():
+    """Agrégats SQL communs au recalcul et à la lecture des jours de bord"""
+    return dict(
+        montant_total=Sum('montant_declare'),
+        recette_potentielle_totale=Sum('recette_potentielle'),
+        nombre_recettes=Count('id'),
+        somme_taux=Sum('taux_deperdition'),
+        nombre_taux=Count('taux_deperdition'),
+        nombre_impertinents=Count('id', filter=Q(taux_deperdition__gt=SEUIL_IMPERTINENCE)),
+    )
+
+
+def _debut_semaine(jour):
+    return jour - timedelta(days=jour.weekday())
+
+
+def _fin_mois(annee, mois):
+    return date(annee, mois, calendar.monthrange(annee, mois)[1])
+
+
+def _meme_jour_annee(jour, annee):
+    """Même jour une autre année (29 février ramené au 28)"""
+    try:
+        return jour.replace(year=annee)
+    except ValueError:
+        return jour.replace(year=annee, day=28)
+
+
+class TotauxRecettes:
+    """Totaux d'un poste sur une plage, cumulables"""
+
+    __slots__ = CHAMPS_AGREGES
+
+    def __init__(self):
+        self.montant_total = Decimal('0')
+        self.recette_potentielle_totale = Decimal('0')
+        self.nombre_recettes = 0
+        self.somme_taux = Decimal('0')
+        self.nombre_taux = 0
+        self.nombre_impertinents = 0
+
+    def ajouter(self, valeurs):
+        """Cumule un agrégat (instance ou dict de valeurs)"""
+        lire = valeurs.get if isinstance(valeurs, dict) else lambda champ: getattr(valeurs, champ)
+        for champ in CHAMPS_AGREGES:
+            setattr(self, champ, getattr(self, champ) + (lire(champ) or 0))
+
+    @property
+    def taux_moyen(self):
+        if self.nombre_taux:
+            return self.somme_taux / self.nombre_taux
+        return None
+
+    @property
+    def moyenne_journaliere(self):
+        if self.nombre_recettes:
+            return self.montant_total / self.nombre_recettes
+        return Decimal('0')
+
+
+class AgregatsRecettesService:
+    """Lecture et maintenance des agrégats de recettes"""
+
+    # ===============================================================
+    # CONSULTATION
+    # ===============================================================
+
+    @staticmethod
+    def decomposer(date_debut, date_fin):
+        """
+        Découpe [date_debut, date_fin] en tranches agrégées et jours de bord
+
+        Returns:
+            (tranches, bords) : tranches = liste de (granularite, debut_periode),
+            bords = liste de (date_debut, date_fin) à lire dans les recettes
+        """
+        from inventaire.models import AgregatRecettes
+
+        Granularite = AgregatRecettes.Granularite
+        tranches, bords = [], []
+        jour = date_debut
+
+        while jour <= date_fin:
+            if jour.month == 1 and jour.day == 1 and date(jour.year, 12, 31) <= date_fin:
+                tranches.append((Granularite.ANNEE, jour))
+                jour = date(jour.year + 1, 1, 1)
+            elif jour.day == 1 and _fin_mois(jour.year, jour.month) <= date_fin:
+                tranches.append((Granularite.MOIS, jour))
+                jour = _fin_mois(jour.year, jour.month) + timedelta(days=1)
+            elif jour.weekday() == 0 and jour + timedelta(days=6) <= min(date_fin, _fin_mois(jour.year, jour.month)):
+                # Semaine pleine à l'intérieur du mois (un mois plein est toujours préféré)
+                tranches.append((Granularite.SEMAINE, jour))
+                jour += timedelta(days=7)
+            else:
+                if bords and bords[-1][1] == jour - timedelta(days=1):
+                    bords[-1] = (bords[-1][0], jour)
+                else:
+                    bords.append((jour, jour))
+                jour += timedelta(days=1)
+
+        return tranches, bords
+
+    @staticmethod
+    def totaux_par_poste(date_debut, date_fin, postes=None):
+        """
+        Totaux de chaque poste sur la plage
+
+        Args:
+            postes: queryset, liste de postes ou d'identifiants (None = tous)
+
+        Returns:
+            dict {poste_id: TotauxRecettes} (postes sans recette absents)
+        """
+        from inventaire.models import AgregatRecettes, RecetteJournaliere
+
+        totaux = defaultdict(TotauxRecettes)
+        if date_debut > date_fin:
+            return totaux
+
+        filtre_postes = Q()
+        if postes is not None:
+            filtre_postes = Q(poste__in=postes)
+
+        tranches, bords = AgregatsRecettesService.decomposer(date_debut, date_fin)
+
+        if tranches:
+            condition = Q()
+            for granularite, debut in tranches:
+                condition |= Q(granularite=granularite, debut_periode=debut)
+            for agregat in AgregatRecettes.objects.filter(filtre_postes, condition).only(
+                'poste_id', *CHAMPS_AGREGES
+            ):
+                totaux[agregat.poste_id].ajouter(agregat)
+
+        if bords:
+            condition = Q()
+            for debut, fin in bords:
+                condition |= Q(date__range=(debut, fin))
+            for ligne in (
+                RecetteJournaliere.objects.filter(filtre_postes, condition)
+                .values('poste_id').annotate(**_annotations()).order_by()
+            ):
+                totaux[ligne['poste_id']].ajouter(ligne)
+
+        return totaux
+
+    @staticmethod
+    def totaux(date_debut, date_fin, poste):
+        """Totaux d'un seul poste sur la plage (TotauxRecettes, éventuellement vides)"""
+        poste_id = getattr(poste, 'pk', poste)
+        return AgregatsRecettesService.totaux_par_poste(date_debut, date_fin, [poste_id]).get(
+            poste_id, TotauxRecettes()
+        )
+
+    @staticmethod
+    def montant(date_debut, date_fin, poste):
+        """Montant déclaré d'un poste sur la plage"""
+        return AgregatsRecettesService.totaux(date_debut, date_fin, poste).montant_total
+
+    @staticmethod
+    def cumul_annuel(date_reference, postes=None):
+        """Cumul depuis le 1er janvier jusqu'à date_reference incluse, par poste"""
+        return AgregatsRecettesService.totaux_par_poste(
+            date(date_reference.year, 1, 1), date_reference, postes
+        )
+
+    @staticmethod
+    def meme_periode_annee_precedente(date_debut, date_fin, postes=None):
+        """Totaux par poste de la même plage un an plus tôt"""
+        return AgregatsRecettesService.totaux_par_poste(
+            _meme_jour_annee(date_debut, date_debut.year - 1),
+            _meme_jour_annee(date_fin, date_fin.year - 1),
+            postes,
+        )
+
+    @staticmethod
+    def total_mois(annee, mois, postes=None):
+        """Totaux par poste d'un mois calendaire"""
+        return AgregatsRecettesService.totaux_par_poste(
+            date(annee, mois, 1), _fin_mois(annee, mois), postes
+        )
+
+    # ===============================================================
+    # MAINTENANCE
+    # ===============================================================
+
+    @staticmethod
+    def mettre_a_jour(cles):
+        """
+        Recalcule les tranches (semaine, mois, année) contenant les journées
+        (poste_id, date) de cles : une requête groupée par mois (années
+        déduites des mois) et une par semaine, puis une écriture groupée
+        """
+        from inventaire.models import AgregatRecettes, RecetteJournaliere
+
+        Granularite = AgregatRecettes.Granularite
+        annees = defaultdict(set)
+        semaines = defaultdict(set)
+        for poste_id, jour in cles:
+            annees[poste_id].add(jour.year)
+            semaines[poste_id].add(_debut_semaine(jour))
+
+        # ========== MOIS ET ANNÉES ==========
+        filtre_annees = Q()
+        for poste_id, valeurs in annees.items():
+            filtre_annees |= Q(poste_id=poste_id, date__year__in=sorted(valeurs))
+
+        calcules = {}
+        for ligne in (
+            RecetteJournaliere.objects.filter(filtre_annees)
+            .annotate(tranche=TruncMonth('date'))
+            .values('poste_id', 'tranche').annotate(**_annotations()).order_by()
+        ):
+            calcules[(ligne['poste_id'], Granularite.MOIS, ligne['tranche'])] = ligne
+            annee = calcules.setdefault(
+                (ligne['poste_id'], Granularite.ANNEE, date(ligne['tranche'].year, 1, 1)),
+                {champ: 0 for champ in CHAMPS_AGREGES},
+            )
+            for champ in CHAMPS_AGREGES:
+                annee[champ] += ligne[champ] or 0
+
+        # ========== SEMAINES ==========
+        filtre_semaines = Q()
+        for poste_id, valeurs in semaines.items():
+            for lundi in valeurs:
+                filtre_semaines |= Q(poste_id=poste_id, date__range=(lundi, lundi + timedelta(days=6)))
+
+        for ligne in (
+            RecetteJournaliere.objects.filter(filtre_semaines)
+            .annotate(tranche=TruncWeek('date'))
+            .values('poste_id', 'tranche').annotate(**_annotations()).order_by()
+        ):
+            calcules[(ligne['poste_id'], Granularite.SEMAINE, ligne['tranche'])] = ligne
+
+        # ========== ÉCRITURE ==========
+        # Tranches recalculées : toutes celles des années et semaines touchées
+        concernees = Q()
+        for poste_id, valeurs in annees.items():
+            concernees |= Q(
+                poste_id=poste_id,
+                granularite__in=[Granularite.MOIS, Granularite.ANNEE],
+                debut_periode__year__in=sorted(valeurs),
+            )
+        for poste_id, valeurs in semaines.items():
+            concernees |= Q(poste_id=poste_id, granularite=Granularite.SEMAINE, debut_periode__in=sorted(valeurs))
+
+        with transaction.atomic():
+            # Tranches devenues vides (dernière recette supprimée)
+            vides = [
+                pk for pk, poste_id, granularite, debut in AgregatRecettes.objects.filter(concernees).values_list(
+                    'pk', 'poste_id', 'granularite', 'debut_periode'
+                )
+                if (poste_id, granularite, debut) not in calcules
+            ]
+            if vides:
+                AgregatRecettes.objects.filter(pk__in=vides).delete()
+            AgregatsRecettesService._enregistrer(calcules)
+
+        logger.debug(
+            f"[AGREGATS_RECETTES] {len(cles)} journée(s): {len(calcules)} tranche(s) recalculée(s), "
+            f"{len(vides)} supprimée(s)"
+        )
+
+    @staticmethod
+    def reconstruire(postes=None):
+        """
+        Reconstruit tous les agrégats (ou ceux des postes donnés) depuis
+        les recettes : trois requêtes groupées, une écriture groupée
+
+        Returns:
+            Nombre de tranches enregistrées
+        """
+        from django.db.models.functions import TruncYear
+        from inventaire.models import AgregatRecettes, RecetteJournaliere
+
+        filtre_postes = Q() if postes is None else Q(poste__in=postes)
+        calcules = {}
+        for granularite, troncature in (
+            (AgregatRecettes.Granularite.SEMAINE, TruncWeek),
+            (AgregatRecettes.Granularite.MOIS, TruncMonth),
+            (AgregatRecettes.Granularite.ANNEE, TruncYear),
+        ):
+            for ligne in (
+                RecetteJournaliere.objects.filter(filtre_postes)
+                .annotate(tranche=troncature('date'))
+                .values('poste_id', 'tranche').annotate(**_annotations()).order_by()
+            ):
+                calcules[(ligne['poste_id'], granularite, ligne['tranche'])] = ligne
+
+        with transaction.atomic():
+            AgregatRecettes.objects.filter(filtre_postes).delete()
+            AgregatsRecettesService._enregistrer(calcules)
+
+        logger.info(f"[AGREGATS_RECETTES] Reconstruction: {len(calcules)} tranche(s)")
+        return len(calcules)
+
+    @staticmethod
+    def _enregistrer(calcules):
+        """Insère ou met à jour les tranches calculées (une requête par lot)"""
+        from django.utils import timezone
+        from inventaire.models import AgregatRecettes
+
+        maintenant = timezone.now()
+        AgregatRecettes.objects.bulk_create(
+            [
+                AgregatRecettes(
+                    poste_id=poste_id,
+                    granularite=granularite,
+                    debut_periode=debut,
+                    date_mise_a_jour=maintenant,
+                    **{champ: valeurs[champ] or 0 for champ in CHAMPS_AGREGES},
+                )
+                for (poste_id, granularite, debut), valeurs in calcules.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['poste', 'granularite', 'debut_periode'],
+            update_fields=[*CHAMPS_AGREGES, 'date_mise_a_jour'],
+        )
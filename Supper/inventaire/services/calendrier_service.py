@@ -0,0 +1,164 @@
+# inventaire/services/calendrier_service.py
+"""
+Résolution des configurations de jours (ConfigurationJour)
+Charge toutes les configurations globales et par poste d'une plage de dates
+en une requête, puis répond aux questions « jour ouvert / impertinent ? »
+en O(1) depuis une table en mémoire.
+
+Trois niveaux :
+- mémoïsation par requête HTTP (attribut de la requête courante)
+- cache partagé versionné, invalidé à chaque écriture de ConfigurationJour
+- base de données (une requête par plage)
+"""
+
+import calendar
+from datetime import date
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger('supper')
+
+CACHE_TIMEOUT = 3600
+CLE_VERSION = 'configuration_jour:version'
+ATTRIBUT_REQUETE = '_resolveurs_jours'
+
+
+def _memo_requete():
+    """Dictionnaire de mémoïsation attaché à la requête courante (ou None)"""
+    from common.middleware import get_current_request
+
+    request = get_current_request()
+    if request is None:
+        return None
+    if not hasattr(request, ATTRIBUT_REQUETE):
+        setattr(request, ATTRIBUT_REQUETE, {})
+    return getattr(request, ATTRIBUT_REQUETE)
+
+
+class ResolveurJours:
+    """
+    Configurations de jours d'une plage [date_debut, date_fin], indexées
+    par date (globales) et par (date, poste_id) (spécifiques à un poste)
+
+    Une date est impertinente dès que l'une de ses configurations, globale
+    ou d'un poste, l'est : même règle que l'anti-jointure des statistiques
+    (statistiques_service.exclure_jours_impertinents)
+    """
+
+    def __init__(self, date_debut, date_fin, configurations):
+        from inventaire.models import StatutJour
+
+        self.date_debut = date_debut
+        self.date_fin = date_fin
+        self._globales = {}
+        self._par_poste = {}
+        self._par_date = {}
+        self._impertinents = set()
+
+        for config in configurations:
+            if config.poste_id is None:
+                self._globales[config.date] = config
+            else:
+                self._par_poste[(config.date, config.poste_id)] = config
+            self._par_date.setdefault(config.date, config)
+            if config.statut == StatutJour.IMPERTINENT:
+                self._impertinents.add(config.date)
+
+    # ===============================================================
+    # CONSTRUCTION
+    # ===============================================================
+
+    @classmethod
+    def pour_periode(cls, date_debut, date_fin):
+        """Résolveur de la plage, mémoïsé par requête et mis en cache"""
+        memo = _memo_requete()
+        cle_memo = (date_debut, date_fin)
+        if memo is not None and cle_memo in memo:
+            return memo[cle_memo]
+
+        version = cache.get(CLE_VERSION, 1)
+        cle = f"configuration_jour:v{version}:{date_debut.isoformat()}:{date_fin.isoformat()}"
+        configurations = cache.get(cle)
+        if configurations is None:
+            from inventaire.models import ConfigurationJour
+
+            configurations = list(ConfigurationJour.objects.filter(
+                date__range=[date_debut, date_fin]
+            ).order_by('date', 'id'))
+            cache.set(cle, configurations, CACHE_TIMEOUT)
+
+        resolveur = cls(date_debut, date_fin, configurations)
+        if memo is not None:
+            memo[cle_memo] = resolveur
+        return resolveur
+
+    @classmethod
+    def pour_mois(cls, jour):
+        """Résolveur du mois contenant jour (granularité partagée par les appels unitaires)"""
+        dernier = calendar.monthrange(jour.year, jour.month)[1]
+        return cls.pour_periode(date(jour.year, jour.month, 1), date(jour.year, jour.month, dernier))
+
+    @staticmethod
+    def invalider():
+        """Invalide le cache partagé et la mémoïsation de la requête courante"""
+        try:
+            cache.incr(CLE_VERSION)
+        except ValueError:
+            cache.set(CLE_VERSION, 2, None)
+
+        memo = _memo_requete()
+        if memo:
+            memo.clear()
+
+    # ===============================================================
+    # CONSULTATION
+    # ===============================================================
+
+    def configuration(self, jour, poste=None):
+        """
+        Configuration applicable : celle du poste si elle existe, sinon la
+        globale ; sans poste, la première configuration de la date
+        """
+        self._verifier_plage(jour)
+        if poste is not None:
+            poste_id = getattr(poste, 'pk', poste)
+            config = self._par_poste.get((jour, poste_id))
+            if config is not None:
+                return config
+            return self._globales.get(jour)
+        return self._par_date.get(jour)
+
+    def est_ouvert_pour_inventaire(self, jour, poste=None):
+        config = self._configuration_saisie(jour, poste)
+        return bool(config and config.permet_saisie_inventaire)
+
+    def est_ouvert_pour_recette(self, jour, poste=None):
+        config = self._configuration_saisie(jour, poste)
+        return bool(config and config.permet_saisie_recette)
+
+    def est_impertinent(self, jour):
+        """Vrai si l'une des configurations de la date est impertinente"""
+        self._verifier_plage(jour)
+        return jour in self._impertinents
+
+    def jours_impertinents(self):
+        """Ensemble des dates impertinentes de la plage"""
+        return set(self._impertinents)
+
+    def jours_configures(self):
+        """Ensemble des dates ayant au moins une configuration"""
+        return set(self._par_date)
+
+    def _configuration_saisie(self, jour, poste):
+        """Configuration du poste, sinon globale (jamais celle d'un autre poste)"""
+        self._verifier_plage(jour)
+        if poste is not None:
+            config = self._par_poste.get((jour, getattr(poste, 'pk', poste)))
+            if config is not None:
+                return config
+        return self._globales.get(jour)
+
+    def _verifier_plage(self, jour):
+        if not (self.date_debut <= jour <= self.date_fin):
+            raise ValueError(f"{jour} hors de la plage {self.date_debut} - {self.date_fin}")
@@ -499,7 +499,7 @@ def get_rang_poste_peage(poste, annee=None):
         dict: {'rang': int, 'total_postes': int, 'total_recettes': Decimal}
     """
     from accounts.models import Poste
-    from inventaire.models import RecetteJournaliere
+    from inventaire.services.agregats_recettes_service import AgregatsRecettesService
     
     if annee is None:
         annee = date.today().year
@@ -508,21 +508,17 @@ def get_rang_poste_peage(poste, annee=None):
     date_debut = date(annee, 1, 1)
     date_fin = today
     
-    # Récupérer tous les postes de péage actifs avec leurs totaux
-    postes_stats = []
-    postes_peage = Poste.objects.filter(type='peage', is_active=True)
+    # Totaux de tous les postes de péage actifs, lus dans les agrégats
+    postes_peage = list(Poste.objects.filter(type='peage', is_active=True).values_list('id', flat=True))
+    totaux = AgregatsRecettesService.totaux_par_poste(date_debut, date_fin, postes_peage)
     
-    for p in postes_peage:
-        total = RecetteJournaliere.objects.filter(
-            poste=p,
-            date__gte=date_debut,
-            date__lte=date_fin
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
-        
-        postes_stats.append({
-            'poste_id': p.id,
-            'total': float(total)
-        })
+    postes_stats = [
+        {
+            'poste_id': poste_id,
+            'total': float(totaux[poste_id].montant_total) if poste_id in totaux else 0.0
+        }
+        for poste_id in postes_peage
+    ]
     
     # Trier par total décroissant
     postes_stats.sort(key=lambda x: x['total'], reverse=True)
@@ -624,7 +620,31 @@ class ClassementService:
             Dict avec:
             - 'agents': Liste des ResultatClassementAgent triés par rang
             - 'statistiques': StatistiquesClassement
+        
+        Le classement est conservé 1 h dans le cache partagé et recalculé
+        dès qu'une saisie touche l'un des postes ou le calendrier.
         """
+        from common.cache_partage import (
+            cached_computation, etiquettes_postes, ETIQUETTE_CALENDRIER
+        )
+        
+        postes = sorted(set(postes_ids)) if postes_ids is not None else None
+        
+        return cached_computation(
+            'classement_periode',
+            lambda: ClassementService._generer_classement_periode(date_debut, date_fin, postes),
+            parametres=[date_debut, date_fin, postes],
+            etiquettes=etiquettes_postes(postes) + [ETIQUETTE_CALENDRIER],
+            duree=3600,
+        )
+    
+    @staticmethod
+    def _generer_classement_periode(
+        date_debut: date,
+        date_fin: date,
+        postes_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Calcul de generer_classement_periode, sans cache"""
         notation_service = get_notation_service()
         
         logger.info(
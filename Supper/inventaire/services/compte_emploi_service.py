@@ -0,0 +1,633 @@
+# inventaire/services/compte_emploi_service.py
+"""
+Service de calcul du compte d'emploi des tickets
+Calcule les données d'un ou de plusieurs postes en une seule passe :
+- stocks de début et de fin via StockEvent (une agrégation groupée par poste)
+- tous les HistoriqueStock de la période chargés une fois, puis répartis
+  par poste et par rubrique (imprimerie, reçus, cédés, ventes)
+- couleurs résolues depuis une table en mémoire (ResolveurCouleurs)
+- fallback StockEvent et séries vendues chargés une fois pour les postes concernés
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+import re
+import logging
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from common.utils import plage_journees
+
+logger = logging.getLogger('supper')
+
+
+class ResolveurCouleurs:
+    """
+    Résout les couleurs de tickets en mémoire
+    Une seule requête (au premier besoin) au lieu d'une par série extraite
+    """
+
+    def __init__(self, couleurs=None):
+        self._couleurs = list(couleurs) if couleurs is not None else None
+        self._par_id = None
+        self._memo = {}
+
+    def _charger(self):
+        if self._couleurs is None:
+            from inventaire.models import CouleurTicket
+            # Même ordre que CouleurTicket.objects (Meta.ordering) pour que
+            # la « première » correspondance soit celle de .first()
+            self._couleurs = list(CouleurTicket.objects.all())
+        if self._par_id is None:
+            self._par_id = {couleur.id: couleur for couleur in self._couleurs}
+
+    def par_id(self, couleur_id):
+        self._charger()
+        try:
+            return self._par_id.get(int(couleur_id))
+        except (TypeError, ValueError):
+            return None
+
+    def par_libelle(self, texte):
+        """Équivalent de filter(libelle_affichage__icontains=texte).first()"""
+        return self._chercher('libelle_affichage', texte)
+
+    def par_code(self, texte):
+        """Équivalent de filter(code_normalise__icontains=texte).first()"""
+        return self._chercher('code_normalise', texte)
+
+    def _chercher(self, champ, texte):
+        cle = (champ, texte)
+        if cle not in self._memo:
+            self._charger()
+            motif = str(texte).lower()
+            self._memo[cle] = next(
+                (c for c in self._couleurs if motif in (getattr(c, champ) or '').lower()),
+                None
+            )
+        return self._memo[cle]
+
+
+def extraire_series_depuis_historique(hist, couleurs=None):
+    """
+    VERSION CORRIGÉE - Extrait les informations des séries depuis un HistoriqueStock
+
+    ORDRE DE PRIORITÉ (données immuables d'abord):
+    1. Champs structurés (numero_premier_ticket, numero_dernier_ticket, couleur_principale)
+    2. JSONField details_approvisionnement
+    3. Parser le commentaire
+    4. ManyToMany series_tickets_associees (DERNIER RECOURS)
+
+    Args:
+        hist: HistoriqueStock (idéalement avec couleur_principale en select_related
+              et series_tickets_associees__couleur en prefetch_related)
+        couleurs: ResolveurCouleurs partagé entre les appels (créé si absent)
+    """
+    if couleurs is None:
+        couleurs = ResolveurCouleurs()
+
+    series = []
+
+    logger.debug(f"  Extraction séries pour historique {hist.id}:")
+    logger.debug(f"    - couleur_principale: {getattr(hist, 'couleur_principale', None)}")
+    logger.debug(f"    - numero_premier_ticket: {getattr(hist, 'numero_premier_ticket', None)}")
+    logger.debug(f"    - numero_dernier_ticket: {getattr(hist, 'numero_dernier_ticket', None)}")
+
+    # SOURCE 1: Champs structurés directs
+    if (hasattr(hist, 'couleur_principale') and hist.couleur_principale and
+        hasattr(hist, 'numero_premier_ticket') and hist.numero_premier_ticket and
+        hasattr(hist, 'numero_dernier_ticket') and hist.numero_dernier_ticket):
+
+        nb_tickets = hist.numero_dernier_ticket - hist.numero_premier_ticket + 1
+        series.append({
+            'couleur': hist.couleur_principale,
+            'couleur_nom': hist.couleur_principale.libelle_affichage,
+            'numero_premier': hist.numero_premier_ticket,
+            'numero_dernier': hist.numero_dernier_ticket,
+            'nombre_tickets': nb_tickets,
+            'valeur': Decimal(nb_tickets) * Decimal('500')
+        })
+        logger.debug(f"    ✓ Source 1 (champs structurés): {hist.couleur_principale.libelle_affichage} "
+                    f"#{hist.numero_premier_ticket}-{hist.numero_dernier_ticket}")
+        return series
+
+    # SOURCE 2: JSONField details_approvisionnement
+    if (hasattr(hist, 'details_approvisionnement') and
+        hist.details_approvisionnement and
+        isinstance(hist.details_approvisionnement, dict)):
+
+        series_data = hist.details_approvisionnement.get('series', [])
+
+        for serie_data in series_data:
+            couleur = None
+            couleur_nom = serie_data.get('couleur_nom', 'Inconnu')
+
+            if 'couleur_id' in serie_data:
+                couleur = couleurs.par_id(serie_data['couleur_id'])
+
+            if not couleur and couleur_nom:
+                couleur = couleurs.par_libelle(couleur_nom)
+
+            num_premier = serie_data.get('numero_premier')
+            num_dernier = serie_data.get('numero_dernier')
+
+            if num_premier and num_dernier:
+                nb_tickets = num_dernier - num_premier + 1
+                series.append({
+                    'couleur': couleur,
+                    'couleur_nom': couleur.libelle_affichage if couleur else couleur_nom,
+                    'numero_premier': num_premier,
+                    'numero_dernier': num_dernier,
+                    'nombre_tickets': nb_tickets,
+                    'valeur': Decimal(str(serie_data.get('valeur', nb_tickets * 500)))
+                })
+
+        if series:
+            logger.debug(f"    ✓ Source 2 (JSON): {len(series)} série(s) trouvée(s)")
+            return series
+
+    # SOURCE 3: Parser le commentaire
+    if hasattr(hist, 'commentaire') and hist.commentaire and '#' in hist.commentaire:
+        patterns = [
+            r"(?:Série\s+)?(\w+(?:\s+\w+)?)\s*#(\d+)[–\-](\d+)",
+            r"(\w+)\s*#(\d+)[–\-](\d+)",
+        ]
+
+        for pattern in patterns:
+            matches = re.findall(pattern, hist.commentaire)
+            if matches:
+                for match in matches:
+                    couleur_nom = match[0].strip()
+                    num_premier = int(match[1])
+                    num_dernier = int(match[2])
+
+                    couleur = couleurs.par_libelle(couleur_nom)
+
+                    if not couleur:
+                        couleur = couleurs.par_code(couleur_nom.lower().replace(' ', '_'))
+
+                    nb_tickets = num_dernier - num_premier + 1
+                    series.append({
+                        'couleur': couleur,
+                        'couleur_nom': couleur.libelle_affichage if couleur else couleur_nom,
+                        'numero_premier': num_premier,
+                        'numero_dernier': num_dernier,
+                        'nombre_tickets': nb_tickets,
+                        'valeur': Decimal(nb_tickets * 500)
+                    })
+
+                if series:
+                    logger.debug(f"    ✓ Source 3 (commentaire parsé): {len(series)} série(s)")
+                    return series
+
+    # SOURCE 4: ManyToMany series_tickets_associees
+    if hasattr(hist, 'series_tickets_associees'):
+        series_associees = hist.series_tickets_associees.all()
+        if 'series_tickets_associees' not in getattr(hist, '_prefetched_objects_cache', {}):
+            series_associees = series_associees.select_related('couleur')
+        series_associees = list(series_associees)
+        if series_associees:
+            for serie in series_associees:
+                series.append({
+                    'couleur': serie.couleur,
+                    'couleur_nom': serie.couleur.libelle_affichage if serie.couleur else 'Inconnu',
+                    'numero_premier': serie.numero_premier,
+                    'numero_dernier': serie.numero_dernier,
+                    'nombre_tickets': serie.nombre_tickets,
+                    'valeur': serie.valeur_monetaire
+                })
+            logger.warning(f"    ⚠ Source 4 (ManyToMany): {len(series)} série(s) - "
+                          f"Attention: données potentiellement modifiées depuis le chargement!")
+            return series
+
+    logger.warning(f"    ✗ Aucune série trouvée pour historique {hist.id}")
+    return series
+
+
+def _fin_journee(jour):
+    """Dernier instant d'une journée (fuseau courant)"""
+    return timezone.make_aware(
+        datetime.combine(jour, datetime.max.time().replace(microsecond=999999))
+    )
+
+
+def _semaine_vente(event_date, date_debut, date_fin):
+    """Semaine (clé, début, fin) d'une vente, découpée à partir de date_debut"""
+    jours_depuis_debut = (event_date - date_debut).days
+    numero_semaine = max(0, jours_depuis_debut // 7)
+
+    semaine_debut = date_debut + timedelta(days=numero_semaine * 7)
+    semaine_fin_theorique = semaine_debut + timedelta(days=6)
+    semaine_fin = min(semaine_fin_theorique, date_fin)
+
+    semaine_key = f"{semaine_debut.strftime('%d/%m')} au {semaine_fin.strftime('%d/%m/%Y')}"
+    return semaine_key, semaine_debut, semaine_fin
+
+
+def _observation_series(series):
+    return ", ".join(
+        f"{s['couleur_nom']} #{s['numero_premier']}-{s['numero_dernier']}" for s in series
+    )
+
+
+class CompteEmploiService:
+    """Calcul du compte d'emploi des tickets pour un ou plusieurs postes"""
+
+    @staticmethod
+    def donnees_initiales():
+        """Structure vide du compte d'emploi d'un poste"""
+        def rubrique(avec_details=True):
+            bloc = {
+                'stocks': Decimal('0'),
+                'ventes': Decimal('0'),
+                'stock_final': Decimal('0'),
+                'stocks_qte': 0,
+                'ventes_qte': 0,
+            }
+            if avec_details:
+                bloc['details'] = []
+            return bloc
+
+        return {
+            'stock_debut': rubrique(avec_details=False),
+            'approv_imprimerie': rubrique(),
+            'reapprov_recu': rubrique(),
+            'reapprov_cede': rubrique(),
+            'total': {
+                'stocks': Decimal('0'),
+                'ventes': Decimal('0'),
+                'stock_final': Decimal('0'),
+            },
+            'ventes_par_semaine': {},
+            'stock_final_calcule': Decimal('0'),
+            'stock_final_qte': 0,
+        }
+
+    @classmethod
+    def calculer_pour_postes(cls, postes, date_debut, date_fin):
+        """
+        Calcule le compte d'emploi de chaque poste sur la période
+
+        Le nombre de requêtes ne dépend pas du nombre de postes.
+
+        Args:
+            postes: itérable de Poste
+            date_debut, date_fin: bornes incluses (date)
+
+        Returns:
+            dict {poste_id: donnees} (même structure que calculer_donnees_compte_emploi_v2)
+        """
+        postes = list(postes)
+        resultats = {poste.id: cls.donnees_initiales() for poste in postes}
+        if not postes:
+            return resultats
+
+        postes_ids = list(resultats)
+        couleurs = ResolveurCouleurs()
+
+        logger.info(
+            f"CALCUL COMPTE D'EMPLOI - {len(postes)} poste(s) - "
+            f"Période: {date_debut} → {date_fin}"
+        )
+
+        # ========== 1. STOCKS DE DÉBUT ET DE FIN ==========
+        stocks = cls._stocks_event_sourcing(postes_ids, date_debut - timedelta(days=1), date_fin)
+        for poste_id, donnees in resultats.items():
+            valeur, quantite = stocks[poste_id]['debut']
+            donnees['stock_debut']['stocks'] = valeur
+            donnees['stock_debut']['stocks_qte'] = quantite
+
+        # ========== 2 à 5. MOUVEMENTS DE LA PÉRIODE ==========
+        ventes = {poste_id: {'valeur': Decimal('0'), 'qte': 0} for poste_id in postes_ids}
+        cls._repartir_historiques(resultats, ventes, couleurs, postes_ids, date_debut, date_fin)
+
+        # ========== FALLBACK: StockEvent ==========
+        sans_ventes = [poste_id for poste_id in postes_ids if ventes[poste_id]['valeur'] == 0]
+        if sans_ventes:
+            cls._ventes_depuis_events(resultats, ventes, sans_ventes, date_debut, date_fin)
+
+        # ========== Enrichir les semaines sans séries ==========
+        cls._enrichir_semaines(resultats, date_debut, date_fin)
+
+        # ========== 6 à 8. RÉPARTITION, STOCKS FINAUX ET TOTAUX ==========
+        for poste in postes:
+            donnees = resultats[poste.id]
+            cls._finaliser(
+                donnees,
+                ventes[poste.id]['valeur'],
+                ventes[poste.id]['qte'],
+                stocks[poste.id]['fin'],
+            )
+
+            ecart = abs(donnees['total']['stock_final'] - donnees['stock_final_calcule'])
+            if ecart > Decimal('1000'):
+                logger.warning(
+                    f"Écart détecté ({poste.nom}): Calcul tableau={donnees['total']['stock_final']}, "
+                    f"Event Sourcing={donnees['stock_final_calcule']}, Écart={ecart}"
+                )
+
+            logger.info(
+                f"Compte d'emploi {poste.nom}: début={donnees['stock_debut']['stocks']} "
+                f"IMP={donnees['approv_imprimerie']['stocks']} reçu={donnees['reapprov_recu']['stocks']} "
+                f"cédé={donnees['reapprov_cede']['stocks']} ventes={donnees['total']['ventes']} "
+                f"final={donnees['total']['stock_final']}"
+            )
+
+        return resultats
+
+    @staticmethod
+    def sources(poste, date_debut, date_fin):
+        """
+        Lignes lues par le compte d'emploi d'un poste sur la période
+        (empreinte du cache PDF, voir RapportCacheService)
+        """
+        from inventaire.models import CouleurTicket, HistoriqueStock, SerieTicket, StockEvent
+
+        periode = plage_journees('date_mouvement', date_debut, date_fin)
+        return [
+            StockEvent.objects.filter(poste=poste, event_datetime__lte=_fin_journee(date_fin)),
+            HistoriqueStock.objects.filter(poste=poste, **periode),
+            SerieTicket.objects.filter(
+                Q(poste=poste, date_utilisation__gte=date_debut, date_utilisation__lte=date_fin) |
+                Q(historiques__poste=poste, **{f"historiques__{cle}": valeur for cle, valeur in periode.items()})
+            ).distinct(),
+            CouleurTicket.objects.all(),
+        ]
+
+    @staticmethod
+    def _stocks_event_sourcing(postes_ids, veille_debut, date_fin):
+        """
+        Stocks (valeur, tickets) au soir de la veille du début et au soir de la fin
+        Une seule agrégation conditionnelle groupée par poste
+        """
+        from inventaire.models import StockEvent
+
+        fin_veille = _fin_journee(veille_debut)
+        fin_periode = _fin_journee(date_fin)
+
+        lignes = StockEvent.objects.filter(
+            poste_id__in=postes_ids,
+            event_datetime__lte=fin_periode,
+            is_cancelled=False
+        ).order_by().values('poste_id').annotate(
+            valeur_debut=Sum('montant_variation', filter=Q(event_datetime__lte=fin_veille)),
+            tickets_debut=Sum('nombre_tickets_variation', filter=Q(event_datetime__lte=fin_veille)),
+            valeur_fin=Sum('montant_variation'),
+            tickets_fin=Sum('nombre_tickets_variation'),
+        )
+
+        def borner(valeur, tickets):
+            return max(Decimal('0'), valeur or Decimal('0')), max(0, tickets or 0)
+
+        stocks = {
+            poste_id: {'debut': (Decimal('0'), 0), 'fin': (Decimal('0'), 0)}
+            for poste_id in postes_ids
+        }
+        for ligne in lignes:
+            stocks[ligne['poste_id']] = {
+                'debut': borner(ligne['valeur_debut'], ligne['tickets_debut']),
+                'fin': borner(ligne['valeur_fin'], ligne['tickets_fin']),
+            }
+        return stocks
+
+    @staticmethod
+    def _repartir_historiques(resultats, ventes, couleurs, postes_ids, date_debut, date_fin):
+        """Charge tous les HistoriqueStock de la période et les répartit par poste et rubrique"""
+        from inventaire.models import HistoriqueStock
+
+        credit = Q(type_mouvement='CREDIT')
+        debit = Q(type_mouvement='DEBIT')
+        historiques = HistoriqueStock.objects.filter(
+            poste_id__in=postes_ids,
+            **plage_journees('date_mouvement', date_debut, date_fin)
+        ).filter(
+            (credit & Q(type_stock__in=['imprimerie_nationale', 'imprimerie'])) |
+            (credit & Q(poste_origine__isnull=False)) |
+            (debit & Q(poste_destination__isnull=False)) |
+            (debit & Q(reference_recette__isnull=False, poste_destination__isnull=True))
+        ).select_related(
+            'poste_origine', 'poste_destination', 'reference_recette__poste',
+            'couleur_principale', 'effectue_par'
+        ).prefetch_related(
+            'series_tickets_associees__couleur'
+        ).order_by('date_mouvement', 'id')
+
+        for hist in historiques:
+            donnees = resultats[hist.poste_id]
+            montant = hist.montant or Decimal('0')
+            nb_tickets = hist.nombre_tickets or 0
+
+            # ===== Approvisionnements Imprimerie Nationale =====
+            if hist.type_mouvement == 'CREDIT' and hist.type_stock in ('imprimerie_nationale', 'imprimerie'):
+                donnees['approv_imprimerie']['stocks'] += montant
+                donnees['approv_imprimerie']['stocks_qte'] += nb_tickets
+
+                series = extraire_series_depuis_historique(hist, couleurs)
+                observation = (
+                    _observation_series(series) if series
+                    else hist.commentaire or f"{nb_tickets} tickets"
+                )
+                donnees['approv_imprimerie']['details'].append({
+                    'date': hist.date_mouvement,
+                    'observation': observation,
+                    'montant': montant,
+                    'nombre_tickets': nb_tickets,
+                    'series': series,
+                    'historique_id': hist.id
+                })
+
+            # ===== Transferts reçus =====
+            if hist.type_mouvement == 'CREDIT' and hist.poste_origine_id is not None:
+                donnees['reapprov_recu']['stocks'] += montant
+                donnees['reapprov_recu']['stocks_qte'] += nb_tickets
+
+                series = extraire_series_depuis_historique(hist, couleurs)
+                if series:
+                    observation = f"Reçu de {hist.poste_origine.nom}: " + _observation_series(series)
+                else:
+                    observation = f"Reçu de {hist.poste_origine.nom}: {hist.commentaire or f'{nb_tickets} tickets'}"
+                donnees['reapprov_recu']['details'].append({
+                    'date': hist.date_mouvement,
+                    'observation': observation,
+                    'montant': montant,
+                    'nombre_tickets': nb_tickets,
+                    'poste_origine': hist.poste_origine,
+                    'numero_bordereau': hist.numero_bordereau,
+                    'series': series,
+                    'historique_id': hist.id
+                })
+
+            # ===== Transferts cédés =====
+            if hist.type_mouvement == 'DEBIT' and hist.poste_destination_id is not None:
+                donnees['reapprov_cede']['stocks'] -= montant
+                donnees['reapprov_cede']['stocks_qte'] -= nb_tickets
+
+                series = extraire_series_depuis_historique(hist, couleurs)
+                if series:
+                    observation = f"Cédé à {hist.poste_destination.nom}: " + _observation_series(series)
+                else:
+                    observation = f"Cédé à {hist.poste_destination.nom}: {hist.commentaire or f'{nb_tickets} tickets'}"
+                donnees['reapprov_cede']['details'].append({
+                    'date': hist.date_mouvement,
+                    'observation': observation,
+                    'montant': -montant,
+                    'nombre_tickets': -nb_tickets,
+                    'poste_destination': hist.poste_destination,
+                    'numero_bordereau': hist.numero_bordereau,
+                    'series': series,
+                    'historique_id': hist.id
+                })
+
+            # ===== Ventes =====
+            if (hist.type_mouvement == 'DEBIT' and hist.reference_recette_id is not None
+                    and hist.poste_destination_id is None):
+                ventes[hist.poste_id]['valeur'] += montant
+                ventes[hist.poste_id]['qte'] += nb_tickets
+
+                if hist.date_mouvement:
+                    if hasattr(hist.date_mouvement, 'date'):
+                        event_date = hist.date_mouvement.date()
+                    else:
+                        event_date = hist.date_mouvement
+                elif hist.reference_recette:
+                    event_date = hist.reference_recette.date
+                else:
+                    event_date = date_debut
+
+                semaine_key, semaine_debut, semaine_fin = _semaine_vente(event_date, date_debut, date_fin)
+                ventes_par_semaine = donnees['ventes_par_semaine']
+                if semaine_key not in ventes_par_semaine:
+                    ventes_par_semaine[semaine_key] = {
+                        'date_debut': semaine_debut,
+                        'date_fin': semaine_fin,
+                        'total_valeur': Decimal('0'),
+                        'total_tickets': 0,
+                        'series_vendues': [],
+                        'historiques': []
+                    }
+
+                semaine = ventes_par_semaine[semaine_key]
+                semaine['total_valeur'] += montant
+                semaine['total_tickets'] += nb_tickets
+                semaine['historiques'].append(hist)
+
+                for s in extraire_series_depuis_historique(hist, couleurs):
+                    s['date_vente'] = event_date
+                    s['historique_id'] = hist.id
+                    if hist.reference_recette:
+                        s['reference_recette'] = str(hist.reference_recette)
+                    semaine['series_vendues'].append(s)
+
+    @staticmethod
+    def _ventes_depuis_events(resultats, ventes, postes_ids, date_debut, date_fin):
+        """Fallback : ventes lues dans StockEvent pour les postes sans historique de vente"""
+        from inventaire.models import StockEvent
+
+        events_ventes = StockEvent.objects.filter(
+            poste_id__in=postes_ids,
+            event_type='VENTE',
+            is_cancelled=False,
+            **plage_journees('event_datetime', date_debut, date_fin)
+        ).order_by('event_datetime', 'id')
+
+        for event in events_ventes:
+            montant = abs(event.montant_variation)
+            nb_tickets = abs(event.nombre_tickets_variation)
+
+            ventes[event.poste_id]['valeur'] += montant
+            ventes[event.poste_id]['qte'] += nb_tickets
+
+            event_date = event.event_datetime.date()
+            semaine_key, semaine_debut, semaine_fin = _semaine_vente(event_date, date_debut, date_fin)
+            ventes_par_semaine = resultats[event.poste_id]['ventes_par_semaine']
+            if semaine_key not in ventes_par_semaine:
+                ventes_par_semaine[semaine_key] = {
+                    'date_debut': semaine_debut,
+                    'date_fin': semaine_fin,
+                    'total_valeur': Decimal('0'),
+                    'total_tickets': 0,
+                    'series_vendues': [],
+                    'events': []
+                }
+
+            ventes_par_semaine[semaine_key]['total_valeur'] += montant
+            ventes_par_semaine[semaine_key]['total_tickets'] += nb_tickets
+
+    @staticmethod
+    def _enrichir_semaines(resultats, date_debut, date_fin):
+        """Complète les semaines sans séries avec les SerieTicket vendues (une requête)"""
+        from inventaire.models import SerieTicket
+
+        a_enrichir = {
+            poste_id: [s for s in donnees['ventes_par_semaine'].values() if not s['series_vendues']]
+            for poste_id, donnees in resultats.items()
+        }
+        a_enrichir = {poste_id: semaines for poste_id, semaines in a_enrichir.items() if semaines}
+
+        series_par_poste = defaultdict(list)
+        if a_enrichir:
+            # Les semaines sont toutes comprises dans [date_debut, date_fin]
+            series_vendues = SerieTicket.objects.filter(
+                poste_id__in=list(a_enrichir),
+                statut__in=['vendu', 'epuise'],
+                date_utilisation__gte=date_debut,
+                date_utilisation__lte=date_fin
+            ).select_related('couleur').order_by('date_utilisation', 'couleur__code_normalise', 'numero_premier')
+
+            for serie in series_vendues:
+                series_par_poste[serie.poste_id].append(serie)
+
+        for poste_id, semaines in a_enrichir.items():
+            for semaine_data in semaines:
+                for serie in series_par_poste[poste_id]:
+                    if semaine_data['date_debut'] <= serie.date_utilisation <= semaine_data['date_fin']:
+                        semaine_data['series_vendues'].append({
+                            'couleur': serie.couleur,
+                            'couleur_nom': serie.couleur.libelle_affichage if serie.couleur else 'Inconnu',
+                            'numero_premier': serie.numero_premier,
+                            'numero_dernier': serie.numero_dernier,
+                            'nombre_tickets': serie.nombre_tickets,
+                            'valeur': serie.valeur_monetaire,
+                            'date_vente': serie.date_utilisation,
+                        })
+
+        for donnees in resultats.values():
+            for semaine_data in donnees['ventes_par_semaine'].values():
+                semaine_data['series_vendues'].sort(
+                    key=lambda x: (x.get('date_vente') or date_debut, x.get('couleur_nom', ''))
+                )
+
+    @staticmethod
+    def _finaliser(donnees, total_ventes_valeur, total_ventes_qte, stock_fin):
+        """Répartition des ventes, stocks finaux et totaux d'un poste"""
+        # ========== RÉPARTITION DES VENTES ==========
+        total_entrees = (
+            donnees['stock_debut']['stocks'] +
+            donnees['approv_imprimerie']['stocks'] +
+            donnees['reapprov_recu']['stocks']
+        )
+
+        if total_entrees > 0:
+            for rubrique in ('stock_debut', 'approv_imprimerie', 'reapprov_recu'):
+                ratio = donnees[rubrique]['stocks'] / total_entrees
+                donnees[rubrique]['ventes'] = total_ventes_valeur * ratio
+                donnees[rubrique]['ventes_qte'] = int(total_ventes_qte * float(ratio))
+
+        donnees['reapprov_cede']['ventes'] = Decimal('0')
+        donnees['reapprov_cede']['ventes_qte'] = 0
+
+        # ========== STOCKS FINAUX ==========
+        for rubrique in ('stock_debut', 'approv_imprimerie', 'reapprov_recu'):
+            donnees[rubrique]['stock_final'] = donnees[rubrique]['stocks'] - donnees[rubrique]['ventes']
+        donnees['reapprov_cede']['stock_final'] = donnees['reapprov_cede']['stocks']
+
+        # ========== TOTAUX ==========
+        rubriques = ('stock_debut', 'approv_imprimerie', 'reapprov_recu', 'reapprov_cede')
+        donnees['total']['stocks'] = sum((donnees[r]['stocks'] for r in rubriques), Decimal('0'))
+        donnees['total']['ventes'] = total_ventes_valeur
+        donnees['total']['stock_final'] = sum((donnees[r]['stock_final'] for r in rubriques), Decimal('0'))
+
+        # Stock final via Event Sourcing
+        donnees['stock_final_calcule'], donnees['stock_final_qte'] = stock_fin
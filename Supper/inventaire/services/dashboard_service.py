@@ -0,0 +1,909 @@
+# inventaire/services/dashboard_service.py
+"""
+Service d'agrégation du tableau de bord
+
+Les blocs de statistiques du dashboard (index_dashboard) et des API
+graphiques (api_stats_dashboard, api_graphique_*, api_statistiques_postes_ordonnes)
+sont calculés par portée - 'national', 'region:<id>', 'poste:<id>' - et
+stockés dans InstantaneDashboard, avec un cache court devant la table.
+
+Cycle de vie d'un instantané :
+- la commande precalculer_dashboard (planifiée) recalcule tous les blocs ;
+- une écriture sur les données sources (recettes, inventaires, amendes...)
+  marque périmés les instantanés des portées concernées ;
+- un instantané périmé est recalculé à la lecture suivante, au plus une fois
+  par DELAI_MIN_RECALCUL secondes, et jamais conservé plus de DUREE_VALIDITE.
+
+Les données stockées sont des structures JSON (nombres, chaînes, listes) ;
+les filtres liés aux permissions de l'utilisateur restent appliqués par les vues.
+"""
+
+import calendar
+import json
+import logging
+import time as chrono
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+
+PORTEE_NATIONALE = 'national'
+
+DASHBOARD_CACHE_TIMEOUT = 60      # secondes, cache devant la table d'instantanés
+DUREE_VALIDITE = 15 * 60          # un instantané n'est jamais servi au-delà
+DELAI_MIN_RECALCUL = 60           # un instantané périmé plus jeune est encore servi
+VERROU_CALCUL_TIMEOUT = 30
+
+
+def portee_poste(poste_id):
+    return f"poste:{poste_id}"
+
+
+def portee_region(region_id):
+    return f"region:{region_id}"
+
+
+def portee_utilisateur(user):
+    """
+    Portée des statistiques visibles par un utilisateur :
+    nationale (accès tous postes), son poste, ou None
+    """
+    from common.permissions import user_has_acces_tous_postes
+
+    if user_has_acces_tous_postes(user):
+        return PORTEE_NATIONALE
+    if user.poste_affectation_id:
+        return portee_poste(user.poste_affectation_id)
+    return None
+
+
+def _decoder_portee(portee):
+    """'poste:12' -> ('poste', 12) ; 'national' -> ('national', None)"""
+    if portee == PORTEE_NATIONALE:
+        return PORTEE_NATIONALE, None
+    niveau, _, identifiant = portee.partition(':')
+    return niveau, int(identifiant)
+
+
+def _serialiser_parametres(parametres):
+    return '&'.join(f"{cle}={parametres[cle]}" for cle in sorted(parametres))
+
+
+def _nombre(valeur):
+    """Decimal / None -> float pour le stockage JSON"""
+    return float(valeur or 0)
+
+
+def _arrondi(valeur):
+    """Taux arrondi à une décimale (float), même arrondi que sur un Decimal"""
+    if isinstance(valeur, Decimal):
+        return float(round(valeur, 1))
+    return round(float(valeur or 0), 1)
+
+
+class DashboardService:
+    """Calcul, stockage et lecture des blocs du tableau de bord"""
+
+    # ===============================================================
+    # LECTURE
+    # ===============================================================
+
+    @classmethod
+    def obtenir(cls, bloc, portee=PORTEE_NATIONALE, **parametres):
+        """
+        Retourne les données d'un bloc pour une portée
+
+        Ordre de lecture : cache, instantané en base s'il est frais,
+        sinon recalcul (un seul processus à la fois par bloc/portée).
+        """
+        from inventaire.models import InstantaneDashboard
+
+        params = _serialiser_parametres(parametres)
+        cle = cls._cle_cache(bloc, portee, params)
+        donnees = cache.get(cle)
+        if donnees is not None:
+            return donnees
+
+        instantane = InstantaneDashboard.objects.filter(
+            bloc=bloc, portee=portee, parametres=params
+        ).first()
+
+        if instantane is not None:
+            age = (timezone.now() - instantane.date_calcul).total_seconds()
+            frais = age < DUREE_VALIDITE and (
+                not instantane.perime or age < DELAI_MIN_RECALCUL
+            )
+            # Un autre processus recalcule déjà ce bloc : servir l'ancien instantané
+            if frais or not cache.add(f"{cle}:calcul", 1, VERROU_CALCUL_TIMEOUT):
+                cache.set(cle, instantane.donnees, DASHBOARD_CACHE_TIMEOUT)
+                return instantane.donnees
+        else:
+            cache.add(f"{cle}:calcul", 1, VERROU_CALCUL_TIMEOUT)
+
+        try:
+            return cls.recalculer(bloc, portee, **parametres)
+        finally:
+            cache.delete(f"{cle}:calcul")
+
+    @classmethod
+    def recalculer(cls, bloc, portee=PORTEE_NATIONALE, **parametres):
+        """Calcule un bloc et enregistre l'instantané"""
+        from inventaire.models import InstantaneDashboard
+
+        calcul = getattr(cls, f"_bloc_{bloc}")
+        debut = chrono.monotonic()
+        donnees = calcul(portee, **parametres)
+        duree_ms = int((chrono.monotonic() - debut) * 1000)
+
+        params = _serialiser_parametres(parametres)
+        try:
+            InstantaneDashboard.objects.update_or_create(
+                bloc=bloc, portee=portee, parametres=params,
+                defaults={
+                    'donnees': donnees,
+                    'perime': False,
+                    'date_calcul': timezone.now(),
+                    'duree_calcul_ms': duree_ms,
+                }
+            )
+        except IntegrityError:
+            # Calcul concurrent du même bloc : l'autre enregistrement suffit
+            pass
+
+        # Relire les données telles que stockées (types JSON) pour que le
+        # recalcul et la lecture retournent exactement la même structure
+        donnees = json.loads(json.dumps(donnees, cls=DjangoJSONEncoder))
+        cache.set(cls._cle_cache(bloc, portee, params), donnees, DASHBOARD_CACHE_TIMEOUT)
+        logger.debug(f"[DASHBOARD] Bloc {bloc} [{portee}] {params} recalculé en {duree_ms} ms")
+        return donnees
+
+    # ===============================================================
+    # INVALIDATION
+    # ===============================================================
+
+    @classmethod
+    def marquer_perime(cls, portees):
+        """Marque périmés les instantanés des portées données"""
+        from inventaire.models import InstantaneDashboard
+
+        portees = list(portees)
+        InstantaneDashboard.objects.filter(
+            portee__in=portees, perime=False
+        ).update(perime=True)
+
+        for portee in portees:
+            try:
+                cache.incr(cls._cle_version(portee))
+            except ValueError:
+                cache.set(cls._cle_version(portee), 2, None)
+
+    @staticmethod
+    def portees_pour_poste(poste_id):
+        """Portées touchées par une écriture sur un poste : poste, région, national"""
+        from accounts.models import Poste
+
+        portees = [PORTEE_NATIONALE]
+        if poste_id:
+            portees.append(portee_poste(poste_id))
+            region_id = Poste.objects.filter(pk=poste_id).values_list('region_id', flat=True).first()
+            if region_id:
+                portees.append(portee_region(region_id))
+        return portees
+
+    @classmethod
+    def _cle_version(cls, portee):
+        return f"dashboard_version:{portee}"
+
+    @classmethod
+    def _cle_cache(cls, bloc, portee, params):
+        version = cache.get(cls._cle_version(portee), 1)
+        return f"dashboard:{bloc}:{portee}:v{version}:{params}"
+
+    # ===============================================================
+    # PORTÉES
+    # ===============================================================
+
+    @staticmethod
+    def _filtre_recettes(portee, prefixe='poste'):
+        """Filtre Q des lignes rattachées à un poste selon la portée"""
+        niveau, identifiant = _decoder_portee(portee)
+        if niveau == 'poste':
+            return Q(**{f"{prefixe}_id": identifiant})
+        if niveau == 'region':
+            return Q(**{f"{prefixe}__region_id": identifiant, f"{prefixe}__is_active": True})
+        return Q(**{f"{prefixe}__is_active": True})
+
+    # ===============================================================
+    # BLOCS DU TABLEAU DE BORD
+    # ===============================================================
+
+    @staticmethod
+    def _bloc_globales(portee):
+        from accounts.models import UtilisateurSUPPER, Poste
+
+        utilisateurs = UtilisateurSUPPER.objects.aggregate(
+            total=Count('id'),
+            actifs=Count('id', filter=Q(is_active=True)),
+        )
+        postes = Poste.objects.filter(is_active=True).aggregate(
+            total=Count('id'),
+            peage=Count('id', filter=Q(type='peage')),
+            pesage=Count('id', filter=Q(type='pesage')),
+        )
+        return {
+            'total_utilisateurs': utilisateurs['total'],
+            'utilisateurs_actifs': utilisateurs['actifs'],
+            'total_postes': postes['total'],
+            'postes_peage': postes['peage'],
+            'postes_pesage': postes['pesage'],
+        }
+
+    @classmethod
+    def _bloc_inventaires(cls, portee, jour):
+        from inventaire.models import InventaireJournalier
+
+        jour = date.fromisoformat(jour)
+        stats = InventaireJournalier.objects.filter(
+            cls._filtre_recettes(portee)
+        ).aggregate(
+            total=Count('id'),
+            today=Count('id', filter=Q(date=jour)),
+            semaine=Count('id', filter=Q(date__gte=jour - timedelta(days=7))),
+            mois=Count('id', filter=Q(date__gte=jour - timedelta(days=30))),
+        )
+        return {
+            'total_inventaires': stats['total'],
+            'inventaires_today': stats['today'],
+            'inventaires_semaine': stats['semaine'],
+            'inventaires_mois': stats['mois'],
+        }
+
+    @classmethod
+    def _bloc_recettes(cls, portee, jour):
+        from inventaire.models import RecetteJournaliere
+
+        jour = date.fromisoformat(jour)
+        debut_mois = jour.replace(day=1)
+        fin_mois = date(jour.year, jour.month, calendar.monthrange(jour.year, jour.month)[1])
+        du_mois = Q(date__gte=debut_mois, date__lte=fin_mois)
+
+        stats = RecetteJournaliere.objects.filter(
+            cls._filtre_recettes(portee)
+        ).aggregate(
+            total_recettes=Count('id'),
+            recettes_today=Count('id', filter=Q(date=jour)),
+            total_montant=Sum('montant_declare', filter=du_mois),
+            total_potentiel=Sum('recette_potentielle', filter=du_mois),
+            taux_moyen=Avg('taux_deperdition', filter=du_mois),
+            nombre_recettes=Count('id', filter=du_mois),
+        )
+        return {
+            'total_recettes': stats['total_recettes'],
+            'recettes_today': stats['recettes_today'],
+            'montant_mois': _nombre(stats['total_montant']),
+            'montant_potentiel_mois': _nombre(stats['total_potentiel']),
+            'taux_moyen_mois': _nombre(stats['taux_moyen']),
+            'nombre_recettes_mois': stats['nombre_recettes'],
+        }
+
+    @classmethod
+    def _bloc_evolution_7j(cls, portee, jour, inclure_inactifs=''):
+        """
+        Recettes et taux moyen des 7 derniers jours (None si aucune recette)
+        inclure_inactifs='1' : toutes les recettes, y compris des postes désactivés
+        """
+        from inventaire.models import RecetteJournaliere
+
+        jour = date.fromisoformat(jour)
+        jours = [jour - timedelta(days=i) for i in range(6, -1, -1)]
+
+        recettes = RecetteJournaliere.objects.filter(date__gte=jours[0], date__lte=jours[-1])
+        if not inclure_inactifs:
+            recettes = recettes.filter(cls._filtre_recettes(portee))
+
+        par_jour = {
+            ligne['date']: ligne
+            for ligne in recettes.values('date').annotate(
+                total=Sum('montant_declare'),
+                taux_moyen=Avg('taux_deperdition'),
+                nombre=Count('id'),
+            )
+        }
+
+        return {
+            'jours': [j.isoformat() for j in jours],
+            'recettes': [_nombre(par_jour.get(j, {}).get('total')) for j in jours],
+            'taux': [
+                float(par_jour[j]['taux_moyen']) if j in par_jour and par_jour[j]['taux_moyen'] is not None else None
+                for j in jours
+            ],
+            'nombre': [par_jour[j]['nombre'] if j in par_jour else 0 for j in jours],
+        }
+
+    @staticmethod
+    def _bloc_objectifs(portee, annee):
+        from inventaire.services.objectifs_service import ObjectifsService
+
+        stats = ObjectifsService.calculer_objectifs_annuels(
+            annee=int(annee),
+            inclure_postes_inactifs=False
+        )
+        return {
+            cle: float(valeur) if isinstance(valeur, Decimal) else valeur
+            for cle, valeur in stats.items()
+        }
+
+    @staticmethod
+    def _bloc_top_postes_30j(portee, jour):
+        from inventaire.models import RecetteJournaliere
+
+        jour = date.fromisoformat(jour)
+        top = RecetteJournaliere.objects.filter(
+            date__gte=jour - timedelta(days=30)
+        ).values(
+            'poste__nom', 'poste__code'
+        ).annotate(
+            total_recettes=Sum('montant_declare')
+        ).order_by('-total_recettes')[:5]
+
+        return [
+            {
+                'rang': idx + 1,
+                'nom': item['poste__nom'],
+                'code': item['poste__code'],
+                'total': float(item['total_recettes']),
+            }
+            for idx, item in enumerate(top)
+        ]
+
+    @staticmethod
+    def _bloc_classement_peage(portee, annee, jour):
+        """Classement cumul à date des postes de péage actifs (une requête)"""
+        from accounts.models import Poste
+        from inventaire.models import RecetteJournaliere
+
+        annee = int(annee)
+        totaux = dict(
+            RecetteJournaliere.objects.filter(
+                poste__type='peage', poste__is_active=True,
+                date__gte=date(annee, 1, 1), date__lte=date.fromisoformat(jour)
+            ).values('poste_id').annotate(
+                total=Sum('montant_declare')
+            ).values_list('poste_id', 'total')
+        )
+
+        classement = [
+            {
+                'poste_id': p['id'],
+                'nom': p['nom'],
+                'code': p['code'],
+                'total': _nombre(totaux.get(p['id'])),
+            }
+            for p in Poste.objects.filter(type='peage', is_active=True).values('id', 'nom', 'code')
+        ]
+        classement.sort(key=lambda x: x['total'], reverse=True)
+        for i, item in enumerate(classement, 1):
+            item['rang'] = i
+        return classement
+
+    @staticmethod
+    def _bloc_classement_pesage(portee, annee, jour):
+        from inventaire.views_classement_pesage import calculer_classement_pesage
+
+        classement = calculer_classement_pesage(
+            date(int(annee), 1, 1), date.fromisoformat(jour)
+        )
+        resultat = []
+        for item in classement:
+            station = item.pop('station')
+            item['station_id'] = station.id
+            item['station_nom'] = station.nom
+            item['station_code'] = station.code
+            item['region'] = str(item['region'])
+            resultat.append(item)
+        return resultat
+
+    @classmethod
+    def _bloc_pesage(cls, portee, jour_travail, jour):
+        """Statistiques pesage (logique de journée 9h-9h) pour une station ou national"""
+        from inventaire.models_pesage import AmendeEmise, PeseesJournalieres, QuittancementPesage
+        import pytz
+
+        cameroun_tz = pytz.timezone('Africa/Douala')
+        jour_travail = date.fromisoformat(jour_travail)
+        today = date.fromisoformat(jour)
+
+        niveau, station_id = _decoder_portee(portee)
+        if niveau == 'poste':
+            filtre = Q(station_id=station_id)
+        else:
+            filtre = Q(station__type='pesage', station__is_active=True)
+
+        debut_jour = cameroun_tz.localize(datetime.combine(jour_travail, time(9, 0, 0)))
+        fin_jour = cameroun_tz.localize(datetime.combine(jour_travail + timedelta(days=1), time(8, 59, 59)))
+        debut_mois = cameroun_tz.localize(datetime.combine(today.replace(day=1), time.min))
+        fin_mois = cameroun_tz.localize(datetime.combine(today + timedelta(days=1), time.min))
+
+        emis_jour = Q(date_heure_emission__gte=debut_jour, date_heure_emission__lte=fin_jour)
+        payees_jour = Q(statut='paye', date_paiement__gte=debut_jour, date_paiement__lte=fin_jour)
+        du_mois = Q(date_heure_emission__gte=debut_mois, date_heure_emission__lt=fin_mois)
+
+        amendes = AmendeEmise.objects.filter(filtre).aggregate(
+            emissions_jour=Count('id', filter=emis_jour),
+            hors_gabarit_jour=Count('id', filter=emis_jour & Q(est_hors_gabarit=True)),
+            montant_emis_jour=Sum('montant_amende', filter=emis_jour),
+            paiements_jour=Count('id', filter=payees_jour),
+            montant_recouvre_jour=Sum('montant_amende', filter=payees_jour),
+            amendes_non_payees=Count('id', filter=Q(statut='non_paye')),
+            montant_non_paye_total=Sum('montant_amende', filter=Q(statut='non_paye')),
+            emissions_mois=Count('id', filter=du_mois),
+            montant_emis_mois=Sum('montant_amende', filter=du_mois),
+            montant_recouvre_mois=Sum('montant_amende', filter=du_mois & Q(statut='paye')),
+        )
+
+        pesees_jour = PeseesJournalieres.objects.filter(
+            filtre, date=jour_travail
+        ).aggregate(total=Sum('nombre_pesees'))['total'] or 0
+
+        quittancements = QuittancementPesage.objects.filter(
+            filtre,
+            date_quittancement__gte=today.replace(day=1),
+            date_quittancement__lte=date(today.year, today.month, calendar.monthrange(today.year, today.month)[1]),
+        ).aggregate(count=Count('id'), montant=Sum('montant_quittance'))
+
+        demandes_attente = 0
+        try:
+            from inventaire.models_confirmation import DemandeConfirmationPaiement, StatutDemandeConfirmation
+            demandes = DemandeConfirmationPaiement.objects.filter(statut=StatutDemandeConfirmation.EN_ATTENTE)
+            if niveau == 'poste':
+                demandes = demandes.filter(station_concernee_id=station_id)
+            demandes_attente = demandes.count()
+        except ImportError:
+            pass
+
+        montant_emis_jour = _nombre(amendes['montant_emis_jour'])
+        montant_recouvre_jour = _nombre(amendes['montant_recouvre_jour'])
+        montant_emis_mois = _nombre(amendes['montant_emis_mois'])
+        montant_recouvre_mois = _nombre(amendes['montant_recouvre_mois'])
+        taux_recouvrement_mois = (montant_recouvre_mois / montant_emis_mois * 100) if montant_emis_mois > 0 else 0
+
+        return {
+            'emissions_jour': amendes['emissions_jour'] or 0,
+            'hors_gabarit_jour': amendes['hors_gabarit_jour'] or 0,
+            'montant_emis_jour': montant_emis_jour,
+            'paiements_jour': amendes['paiements_jour'] or 0,
+            'montant_recouvre_jour': montant_recouvre_jour,
+            'pesees_jour': pesees_jour,
+            'reste_a_recouvrer_jour': montant_emis_jour - montant_recouvre_jour,
+            'amendes_non_payees': amendes['amendes_non_payees'] or 0,
+            'montant_non_paye_total': _nombre(amendes['montant_non_paye_total']),
+            'emissions_mois': amendes['emissions_mois'] or 0,
+            'montant_emis_mois': montant_emis_mois,
+            'montant_recouvre_mois': montant_recouvre_mois,
+            'taux_recouvrement_mois': round(taux_recouvrement_mois, 1),
+            'quittancements_mois': quittancements['count'] or 0,
+            'montant_quittance_mois': _nombre(quittancements['montant']),
+            'demandes_confirmation_attente': demandes_attente,
+        }
+
+    # ===============================================================
+    # BLOCS DES API GRAPHIQUES
+    # ===============================================================
+
+    @classmethod
+    def _bloc_api_stats(cls, portee, jour):
+        from accounts.models import Poste
+        from inventaire.models import InventaireJournalier, RecetteJournaliere
+
+        jour = date.fromisoformat(jour)
+        recettes = RecetteJournaliere.objects.aggregate(
+            recettes_today=Count('id', filter=Q(date=jour)),
+            taux_moyen_today=Avg('taux_deperdition', filter=Q(date=jour)),
+            deperdition_critique=Count('id', filter=Q(
+                date__gte=jour - timedelta(days=7), taux_deperdition__lt=-30
+            )),
+        )
+        return {
+            'inventaires_today': InventaireJournalier.objects.filter(date=jour).count(),
+            'recettes_today': recettes['recettes_today'],
+            'taux_moyen_today': _nombre(recettes['taux_moyen_today']),
+            'postes_actifs': Poste.objects.filter(is_active=True).count(),
+            'deperdition_critique': recettes['deperdition_critique'],
+        }
+
+    @staticmethod
+    def _bloc_hebdomadaire(portee, debut_semaine):
+        from inventaire.models import RecetteJournaliere
+
+        debut_semaine = date.fromisoformat(debut_semaine)
+        fin_semaine = debut_semaine + timedelta(days=6)
+
+        par_jour = {
+            ligne['date']: ligne
+            for ligne in RecetteJournaliere.objects.filter(
+                date__gte=debut_semaine, date__lte=fin_semaine
+            ).values('date').annotate(
+                taux_moyen=Avg('taux_deperdition'),
+                recettes_total=Sum('montant_declare'),
+                nb_postes=Count('poste', distinct=True),
+            )
+        }
+
+        jours_semaine, taux_moyens, recettes_totales, postes_actifs = [], [], [], []
+        for i in range(7):
+            jour = debut_semaine + timedelta(days=i)
+            stats_jour = par_jour.get(jour, {})
+            jours_semaine.append(jour.strftime('%A %d/%m'))
+            taux_moyens.append(_arrondi(stats_jour.get('taux_moyen') or 0))
+            recettes_totales.append(_nombre(stats_jour.get('recettes_total')))
+            postes_actifs.append(stats_jour.get('nb_postes') or 0)
+
+        classement_postes = RecetteJournaliere.objects.filter(
+            date__gte=debut_semaine,
+            date__lte=fin_semaine
+        ).values(
+            'poste__nom',
+            'poste__region'
+        ).annotate(
+            taux_moyen=Avg('taux_deperdition'),
+            recettes_total=Sum('montant_declare'),
+            nb_jours=Count('date', distinct=True)
+        ).order_by('taux_moyen')[:20]
+
+        return {
+            'periode': f"Semaine du {debut_semaine.strftime('%d/%m/%Y')} au {fin_semaine.strftime('%d/%m/%Y')}",
+            'graphique_journalier': {
+                'jours': jours_semaine,
+                'taux_moyens': taux_moyens,
+                'recettes_totales': recettes_totales,
+                'postes_actifs': postes_actifs
+            },
+            'classement_postes': [
+                {
+                    'rang': idx + 1,
+                    'poste': item['poste__nom'],
+                    'region': item['poste__region'],
+                    'taux_moyen': _arrondi(item['taux_moyen'] or 0),
+                    'recettes_total': _nombre(item['recettes_total']),
+                    'nb_jours_actifs': item['nb_jours'],
+                    'performance': 'Excellent' if (item['taux_moyen'] or 0) >= -5
+                                  else 'Bon' if (item['taux_moyen'] or 0) >= -15
+                                  else 'Moyen' if (item['taux_moyen'] or 0) >= -25
+                                  else 'Critique'
+                }
+                for idx, item in enumerate(classement_postes)
+            ],
+            'resume_semaine': {
+                'taux_global': round(sum(taux_moyens) / len([t for t in taux_moyens if t != 0]) if any(taux_moyens) else 0, 1),
+                'recettes_totales': sum(recettes_totales),
+                'postes_actifs_total': len(set(item['poste__nom'] for item in classement_postes)),
+                'meilleur_jour': jours_semaine[taux_moyens.index(max(taux_moyens))] if taux_moyens else None,
+                'pire_jour': jours_semaine[taux_moyens.index(min(taux_moyens))] if taux_moyens else None
+            }
+        }
+
+    @staticmethod
+    def _bloc_mensuel(portee, jour):
+        from accounts.models import Poste
+        from inventaire.models import RecetteJournaliere
+
+        today = date.fromisoformat(jour)
+        debut_mois = today.replace(day=1)
+        fin_mois = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+
+        # Semaines calendaires du mois (lundi-dimanche, tronquées au mois)
+        bornes_semaines = []
+        date_courante = debut_mois
+        while date_courante <= fin_mois:
+            fin_semaine = min(date_courante + timedelta(days=6 - date_courante.weekday()), fin_mois)
+            bornes_semaines.append((date_courante, fin_semaine))
+            date_courante = fin_semaine + timedelta(days=1)
+            if date_courante.weekday() != 0:
+                date_courante += timedelta(days=7 - date_courante.weekday())
+
+        # Une seule requête par jour et par région pour tous les découpages
+        par_jour = {}
+        par_region_jour = {}
+        for ligne in RecetteJournaliere.objects.filter(
+            date__gte=debut_mois, date__lte=fin_mois
+        ).values('date', 'poste__region').annotate(
+            somme_taux=Sum('taux_deperdition'),
+            nb_taux=Count('taux_deperdition'),
+            recettes=Sum('montant_declare'),
+        ):
+            cumul = par_jour.setdefault(ligne['date'], [Decimal('0'), 0, Decimal('0')])
+            cumul[0] += ligne['somme_taux'] or 0
+            cumul[1] += ligne['nb_taux']
+            cumul[2] += ligne['recettes'] or 0
+            par_region_jour[(ligne['poste__region'], ligne['date'])] = (
+                ligne['somme_taux'] or 0, ligne['nb_taux']
+            )
+
+        def _moyenne(debut, fin, region=None):
+            somme, nombre = Decimal('0'), 0
+            jour_courant = debut
+            while jour_courant <= fin:
+                if region is None:
+                    cumul = par_jour.get(jour_courant)
+                else:
+                    cumul = par_region_jour.get((region, jour_courant))
+                if cumul:
+                    somme += cumul[0]
+                    nombre += cumul[1]
+                jour_courant += timedelta(days=1)
+            return float(somme / nombre) if nombre else None
+
+        semaines, taux_semaines, recettes_semaines = [], [], []
+        for num, (debut, fin) in enumerate(bornes_semaines, 1):
+            semaines.append(f"S{num} ({debut.strftime('%d/%m')} - {fin.strftime('%d/%m')})")
+            taux_semaines.append(round(_moyenne(debut, fin) or 0, 1))
+            recettes_semaines.append(float(sum(
+                (par_jour[j][2] for j in par_jour if debut <= j <= fin), Decimal('0')
+            )))
+
+        classement_mensuel = list(RecetteJournaliere.objects.filter(
+            date__gte=debut_mois,
+            date__lte=fin_mois
+        ).values(
+            'poste__nom',
+            'poste__region',
+            'poste__type'
+        ).annotate(
+            taux_moyen=Avg('taux_deperdition'),
+            recettes_total=Sum('montant_declare'),
+            nb_jours=Count('date', distinct=True),
+        ).order_by('taux_moyen'))
+
+        meilleurs_postes = [p for p in classement_mensuel if p['taux_moyen'] is not None and p['taux_moyen'] >= -10][:10]
+        pires_postes = [p for p in classement_mensuel if p['taux_moyen'] is not None and p['taux_moyen'] < -30][:10]
+
+        # Évolution par région : fenêtres de 7 jours à partir du 1er du mois
+        evolution_regions = {}
+        for region in Poste.objects.values_list('region', flat=True).distinct():
+            if not region:
+                continue
+            taux_region = []
+            for i in range(len(semaines)):
+                date_debut_sem = debut_mois + timedelta(weeks=i)
+                date_fin_sem = min(date_debut_sem + timedelta(days=6), fin_mois)
+                taux_region.append(round(_moyenne(date_debut_sem, date_fin_sem, region) or 0, 1))
+            evolution_regions[region] = taux_region
+
+        mois_precedent_debut = (debut_mois - timedelta(days=1)).replace(day=1)
+        mois_precedent_fin = debut_mois - timedelta(days=1)
+        stats_mois_precedent = RecetteJournaliere.objects.filter(
+            date__gte=mois_precedent_debut,
+            date__lte=mois_precedent_fin
+        ).aggregate(
+            taux_moyen=Avg('taux_deperdition'),
+            recettes_total=Sum('montant_declare')
+        )
+        stats_mois_actuel = RecetteJournaliere.objects.filter(
+            date__gte=debut_mois,
+            date__lte=today
+        ).aggregate(
+            taux_moyen=Avg('taux_deperdition'),
+            recettes_total=Sum('montant_declare')
+        )
+
+        evolution_taux = 0
+        evolution_recettes = 0
+        if stats_mois_precedent['taux_moyen'] and stats_mois_actuel['taux_moyen']:
+            evolution_taux = stats_mois_actuel['taux_moyen'] - stats_mois_precedent['taux_moyen']
+        if stats_mois_precedent['recettes_total'] and stats_mois_actuel['recettes_total']:
+            evolution_recettes = ((stats_mois_actuel['recettes_total'] - stats_mois_precedent['recettes_total']) / stats_mois_precedent['recettes_total']) * 100
+
+        def _resume(item):
+            return {
+                'poste': item['poste__nom'],
+                'region': item['poste__region'],
+                'taux': _arrondi(item['taux_moyen']),
+                'recettes': _nombre(item['recettes_total'])
+            }
+
+        return {
+            'periode': f"Mois de {debut_mois.strftime('%B %Y')}",
+            'graphique_hebdomadaire': {
+                'semaines': semaines,
+                'taux_moyens': taux_semaines,
+                'recettes_totales': recettes_semaines
+            },
+            'evolution_regions': evolution_regions,
+            'classement_complet': [
+                {
+                    'rang': idx + 1,
+                    'poste': item['poste__nom'],
+                    'region': item['poste__region'],
+                    'type': item['poste__type'],
+                    'taux_moyen': _arrondi(item['taux_moyen'] or 0),
+                    'recettes_total': _nombre(item['recettes_total']),
+                    'nb_jours_actifs': item['nb_jours'],
+                    'performance_color': (
+                        '#28a745' if (item['taux_moyen'] or 0) >= -10 else
+                        '#ffc107' if (item['taux_moyen'] or 0) >= -25 else
+                        '#dc3545'
+                    )
+                }
+                for idx, item in enumerate(classement_mensuel)
+            ],
+            'top_performers': {
+                'meilleurs': [dict(_resume(item), rang=idx + 1) for idx, item in enumerate(meilleurs_postes)],
+                'a_ameliorer': [dict(_resume(item), rang=idx + 1) for idx, item in enumerate(pires_postes)],
+            },
+            'comparaison_mensuelle': {
+                'mois_actuel': {
+                    'taux_moyen': _arrondi(stats_mois_actuel['taux_moyen'] or 0),
+                    'recettes_total': _nombre(stats_mois_actuel['recettes_total'])
+                },
+                'mois_precedent': {
+                    'taux_moyen': _arrondi(stats_mois_precedent['taux_moyen'] or 0),
+                    'recettes_total': _nombre(stats_mois_precedent['recettes_total'])
+                },
+                'evolution': {
+                    'taux': _arrondi(evolution_taux),
+                    'recettes_pourcent': _arrondi(evolution_recettes),
+                    'tendance_taux': 'amélioration' if evolution_taux > 0 else 'dégradation' if evolution_taux < 0 else 'stable',
+                    'tendance_recettes': 'hausse' if evolution_recettes > 0 else 'baisse' if evolution_recettes < 0 else 'stable'
+                }
+            },
+            'resume_mensuel': {
+                'nb_postes_total': len(classement_mensuel),
+                'nb_postes_bons': len([p for p in classement_mensuel if (p['taux_moyen'] or 0) >= -10]),
+                'nb_postes_critiques': len([p for p in classement_mensuel if (p['taux_moyen'] or 0) < -30]),
+                'recettes_totales': sum(recettes_semaines),
+                'taux_global': round(sum(taux_semaines) / len([t for t in taux_semaines if t != 0]) if any(taux_semaines) else 0, 1)
+            }
+        }
+
+    @staticmethod
+    def _bloc_postes_ordonnes(portee, periode, jour):
+        """Statistiques par poste sur la période (le tri est appliqué par la vue)"""
+        from inventaire.models import RecetteJournaliere
+
+        today = date.fromisoformat(jour)
+        if periode == 'semaine':
+            debut_periode = today - timedelta(days=today.weekday())
+            fin_periode = debut_periode + timedelta(days=6)
+        elif periode == 'trimestre':
+            trimestre = ((today.month - 1) // 3) + 1
+            debut_periode = date(today.year, (trimestre - 1) * 3 + 1, 1)
+            if trimestre == 4:
+                fin_periode = date(today.year, 12, 31)
+            else:
+                fin_periode = date(today.year, trimestre * 3 + 1, 1) - timedelta(days=1)
+        else:
+            debut_periode = today.replace(day=1)
+            fin_periode = today
+
+        queryset = RecetteJournaliere.objects.filter(
+            date__gte=debut_periode,
+            date__lte=fin_periode
+        )
+        niveau, region_id = _decoder_portee(portee)
+        if niveau == 'region':
+            queryset = queryset.filter(poste__region_id=region_id)
+
+        postes = []
+        for poste in queryset.values(
+            'poste__id', 'poste__nom', 'poste__code', 'poste__region', 'poste__type'
+        ).annotate(
+            taux_moyen=Avg('taux_deperdition'),
+            taux_min=Min('taux_deperdition'),
+            taux_max=Max('taux_deperdition'),
+            recettes_total=Sum('montant_declare'),
+            recettes_moyenne=Avg('montant_declare'),
+            nb_jours=Count('date', distinct=True),
+        ):
+            postes.append({
+                'poste_id': poste['poste__id'],
+                'nom': poste['poste__nom'],
+                'code': poste['poste__code'],
+                'region': poste['poste__region'],
+                'type': poste['poste__type'],
+                'taux_moyen': float(poste['taux_moyen']) if poste['taux_moyen'] is not None else None,
+                'taux_min': _arrondi(poste['taux_min']),
+                'taux_max': _arrondi(poste['taux_max']),
+                'recettes_total': _nombre(poste['recettes_total']),
+                'recettes_moyenne': _nombre(poste['recettes_moyenne']),
+                'nb_jours': poste['nb_jours'],
+            })
+
+        return {
+            'debut_periode': debut_periode.isoformat(),
+            'fin_periode': fin_periode.isoformat(),
+            'postes': postes,
+        }
+
+    # ===============================================================
+    # PRÉCALCUL PLANIFIÉ
+    # ===============================================================
+
+    @classmethod
+    def precalculer(cls, jour=None, portees=None):
+        """
+        Recalcule les blocs servis par le tableau de bord et les API
+
+        Args:
+            jour: date de référence (défaut: aujourd'hui)
+            portees: None pour tout recalculer, sinon liste de portées
+
+        Returns:
+            int: nombre de blocs recalculés
+        """
+        from accounts.models import Poste
+
+        jour = jour or timezone.now().date()
+        iso = jour.isoformat()
+        annee = str(jour.year)
+        jour_travail = cls.jour_travail_pesage().isoformat()
+        taches = []
+
+        def ajouter(bloc, portee, **parametres):
+            if portees is None or portee in portees:
+                taches.append((bloc, portee, parametres))
+
+        ajouter('globales', PORTEE_NATIONALE)
+        ajouter('objectifs', PORTEE_NATIONALE, annee=annee)
+        ajouter('top_postes_30j', PORTEE_NATIONALE, jour=iso)
+        ajouter('evolution_7j', PORTEE_NATIONALE, jour=iso, inclure_inactifs='1')
+        ajouter('classement_peage', PORTEE_NATIONALE, annee=annee, jour=iso)
+        ajouter('classement_pesage', PORTEE_NATIONALE, annee=annee, jour=iso)
+        ajouter('api_stats', PORTEE_NATIONALE, jour=iso)
+        ajouter('hebdomadaire', PORTEE_NATIONALE,
+                debut_semaine=(jour - timedelta(days=jour.weekday())).isoformat())
+        ajouter('mensuel', PORTEE_NATIONALE, jour=iso)
+        ajouter('pesage', PORTEE_NATIONALE, jour_travail=jour_travail, jour=iso)
+        for periode in ('semaine', 'mois', 'trimestre'):
+            ajouter('postes_ordonnes', PORTEE_NATIONALE, periode=periode, jour=iso)
+
+        portees_postes = [PORTEE_NATIONALE]
+        portees_postes += [portee_region(r) for r in Poste.objects.filter(
+            is_active=True
+        ).order_by().values_list('region_id', flat=True).distinct() if r]
+        for poste_id, type_poste in Poste.objects.filter(is_active=True).values_list('id', 'type'):
+            portees_postes.append(portee_poste(poste_id))
+            if type_poste == 'pesage':
+                ajouter('pesage', portee_poste(poste_id), jour_travail=jour_travail, jour=iso)
+
+        for portee in portees_postes:
+            for bloc in ('inventaires', 'recettes', 'evolution_7j'):
+                ajouter(bloc, portee, jour=iso)
+
+        recalcules = 0
+        for bloc, portee, parametres in taches:
+            try:
+                cls.recalculer(bloc, portee, **parametres)
+                recalcules += 1
+            except Exception as e:
+                logger.error(f"[DASHBOARD] Erreur précalcul {bloc} [{portee}]: {str(e)}")
+        return recalcules
+
+    @staticmethod
+    def purger(jours=7):
+        """
+        Supprime les instantanés non recalculés depuis N jours (les blocs
+        paramétrés par date en produisent un nouveau chaque jour)
+        """
+        from inventaire.models import InstantaneDashboard
+
+        supprimes, _ = InstantaneDashboard.objects.filter(
+            date_calcul__lt=timezone.now() - timedelta(days=jours)
+        ).delete()
+        return supprimes
+
+    @staticmethod
+    def jour_travail_pesage(maintenant=None):
+        """Journée de travail pesage (9h-9h, heure du Cameroun)"""
+        import pytz
+
+        maintenant = (maintenant or timezone.now()).astimezone(pytz.timezone('Africa/Douala'))
+        if maintenant.time() < time(9, 0, 0):
+            return (maintenant - timedelta(days=1)).date()
+        return maintenant.date()
@@ -1,45 +1,66 @@
 # inventaire/services/evolution_service.py
 from decimal import Decimal
 from datetime import date, timedelta
+import pandas as pd
 from django.db.models import Sum, Count
-from inventaire.models import RecetteJournaliere
+from inventaire.models import AgregatRecettes, RecetteJournaliere
+from inventaire.services.agregats_recettes_service import AgregatsRecettesService
 from accounts.models import Poste
 import calendar
 
+
+def _fin_mois(annee, mois):
+    return date(annee, mois, calendar.monthrange(annee, mois)[1])
+
+
+def _montants_mensuels(annees, postes=None):
+    """
+    Montants mensuels déclarés (poste_id, annee, mois, montant) des années
+    demandées, en une requête sur les agrégats mensuels
+    """
+    agregats = AgregatRecettes.objects.filter(
+        granularite=AgregatRecettes.Granularite.MOIS,
+        debut_periode__range=(date(min(annees), 1, 1), date(max(annees), 12, 31)),
+    )
+    if postes is not None:
+        agregats = agregats.filter(poste__in=postes)
+
+    df = pd.DataFrame.from_records(
+        list(agregats.values_list('poste_id', 'debut_periode', 'montant_total')),
+        columns=['poste_id', 'debut_periode', 'montant'],
+    )
+    df['annee'] = pd.to_datetime(df['debut_periode']).dt.year
+    df['mois'] = pd.to_datetime(df['debut_periode']).dt.month
+    df['montant'] = df['montant'].astype(float)
+    return df
+
+
+def _cumul(df, annee, mois_max, postes_ids):
+    """Cumul par poste de janvier à mois_max inclus (0 pour les postes sans recette)"""
+    selection = df[(df['annee'] == annee) & (df['mois'] <= mois_max)]
+    return selection.groupby('poste_id')['montant'].sum().reindex(postes_ids, fill_value=0.0)
+
+
+def _taux_evolution(actuel, reference):
+    """Évolution en % par poste (NaN si pas de référence positive)"""
+    reference = reference.where(reference > 0)
+    return (actuel - reference) / reference * 100
+
 class EvolutionService:
     
     @staticmethod
     def calculer_vente_moyenne_journaliere(poste, date_debut, date_fin):
         """Calcule la vente moyenne journalière sur une période"""
-        recettes = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__gte=date_debut,
-            date__lte=date_fin
-        ).aggregate(
-            total=Sum('montant_declare'),
-            count=Count('id')
-        )
-        
-        if recettes['count'] > 0:
-            return Decimal(str(recettes['total'] or 0)) / recettes['count']
-        return Decimal('0')
+        return AgregatsRecettesService.totaux(date_debut, date_fin, poste).moyenne_journaliere
     
     @staticmethod
     def calculer_taux_evolution_mensuel(poste, mois, annee, annee_ref):
         """Calcule l'évolution pour UN SEUL mois spécifique"""
         # Recettes du mois actuel
-        recettes_actuel = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee,
-            date__month=mois
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        recettes_actuel = AgregatsRecettesService.montant(date(annee, mois, 1), _fin_mois(annee, mois), poste)
         
         # Recettes du même mois de référence
-        recettes_ref = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee_ref,
-            date__month=mois
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        recettes_ref = AgregatsRecettesService.montant(date(annee_ref, mois, 1), _fin_mois(annee_ref, mois), poste)
         
         if recettes_ref > 0:
             taux = ((recettes_actuel - recettes_ref) / recettes_ref * 100)
@@ -50,18 +71,10 @@ class EvolutionService:
     def calculer_evolution_annuelle_cumulee(poste, mois, annee, annee_ref):
         """Calcule l'évolution CUMULÉE du 1er janvier au mois spécifié"""
         # Du 1er janvier au dernier jour du mois pour l'année actuelle
-        recettes_cumul_actuel = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee,
-            date__month__lte=mois
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        recettes_cumul_actuel = AgregatsRecettesService.montant(date(annee, 1, 1), _fin_mois(annee, mois), poste)
         
         # Du 1er janvier au dernier jour du mois pour l'année de référence
-        recettes_cumul_ref = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee_ref,
-            date__month__lte=mois
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        recettes_cumul_ref = AgregatsRecettesService.montant(date(annee_ref, 1, 1), _fin_mois(annee_ref, mois), poste)
         
         if recettes_cumul_ref > 0:
             taux = ((recettes_cumul_actuel - recettes_cumul_ref) / recettes_cumul_ref * 100)
@@ -86,11 +99,7 @@ class EvolutionService:
         # Si mois en cours non terminé
         if annee == aujourd_hui.year and mois == aujourd_hui.month and aujourd_hui < fin_mois:
             # Recettes réalisées
-            recettes_realisees = RecetteJournaliere.objects.filter(
-                poste=poste,
-                date__gte=debut_mois,
-                date__lte=aujourd_hui
-            ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+            recettes_realisees = AgregatsRecettesService.montant(debut_mois, aujourd_hui, poste)
             
             # Estimation pour jours restants
             if recettes_realisees > 0:
@@ -103,18 +112,10 @@ class EvolutionService:
                 total_estime = Decimal('0')
         else:
             # Mois complet
-            total_estime = RecetteJournaliere.objects.filter(
-                poste=poste,
-                date__year=annee,
-                date__month=mois
-            ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+            total_estime = AgregatsRecettesService.montant(debut_mois, fin_mois, poste)
         
         # Comparaison avec N-1
-        total_n1 = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee - 1,
-            date__month=mois
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        total_n1 = AgregatsRecettesService.montant(date(annee - 1, mois, 1), _fin_mois(annee - 1, mois), poste)
         
         taux = None
         if total_n1 > 0:
@@ -132,149 +133,128 @@ class EvolutionService:
         """
         Calcule le risque de baisse annuel du 1er janvier à la date d'analyse
         """
+        return EvolutionService.calculer_risques_baisse_annuels([poste], date_analyse)[0]
+    
+    @staticmethod
+    def calculer_risques_baisse_annuels(postes=None, date_analyse=None):
+        """
+        Risque de baisse annuel de plusieurs postes à la fois (tous les postes
+        actifs par défaut) : une requête sur les agrégats mensuels N et N-1,
+        une requête sur les recettes du mois en cours, calculs vectorisés
+        
+        Returns:
+            Liste de dicts (poste, total_estime, total_n1, taux, en_baisse)
+            dans l'ordre des postes
+        """
         if date_analyse is None:
             date_analyse = date.today()
+        if postes is None:
+            postes = Poste.objects.filter(is_active=True)
+        postes = list(postes)
+        postes_ids = pd.Index([poste.id for poste in postes])
             
         annee = date_analyse.year
-        debut_annee = date(annee, 1, 1)
+        mois = date_analyse.month
+        debut_mois = date(annee, mois, 1)
         
         # Fin de période = fin du mois en cours
-        dernier_jour = calendar.monthrange(annee, date_analyse.month)[1]
-        fin_periode = date(annee, date_analyse.month, dernier_jour)
+        fin_periode = _fin_mois(annee, mois)
+        mois_clos = fin_periode == date_analyse
         
-        # Recettes réalisées
-        recettes_realisees = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__gte=debut_annee,
-            date__lte=date_analyse
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+        df = _montants_mensuels([annee - 1, annee], postes)
         
-        # Estimation si mois non clos
-        if date_analyse < fin_periode:
-            debut_mois = date(annee, date_analyse.month, 1)
-            if recettes_realisees > 0:
-                # Moyenne du mois en cours
-                recettes_mois = RecetteJournaliere.objects.filter(
-                    poste=poste,
-                    date__gte=debut_mois,
-                    date__lte=date_analyse
-                ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
-                
-                if recettes_mois > 0:
-                    jours_ecoules = (date_analyse - debut_mois).days + 1
-                    moyenne_jour = recettes_mois / jours_ecoules
-                    jours_restants = (fin_periode - date_analyse).days
-                    estimation_reste = moyenne_jour * jours_restants
-                else:
-                    estimation_reste = Decimal('0')
-            else:
-                estimation_reste = Decimal('0')
-                
-            total_estime = recettes_realisees + estimation_reste
+        if mois_clos:
+            total_estime = _cumul(df, annee, mois, postes_ids)
         else:
-            total_estime = recettes_realisees
-        
-        # Comparaison avec même période N-1
-        total_n1 = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee - 1,
-            date__month__lte=date_analyse.month
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+            # Mois en cours lu dans les recettes, extrapolé sur les jours restants
+            recettes_mois = pd.Series({
+                ligne['poste_id']: float(ligne['total'] or 0)
+                for ligne in RecetteJournaliere.objects.filter(
+                    poste__in=postes, date__range=(debut_mois, date_analyse)
+                ).values('poste_id').annotate(total=Sum('montant_declare')).order_by()
+            }, dtype=float).reindex(postes_ids, fill_value=0.0)
+            
+            jours_ecoules = (date_analyse - debut_mois).days + 1
+            jours_restants = (fin_periode - date_analyse).days
+            estimation_reste = (recettes_mois / jours_ecoules * jours_restants).where(recettes_mois > 0, 0.0)
+            
+            total_estime = _cumul(df, annee, mois - 1, postes_ids) + recettes_mois + estimation_reste
         
-        taux = None
-        if total_n1 > 0:
-            taux = float(((total_estime - total_n1) / total_n1) * 100)
+        # Comparaison avec même période N-1 (mois entiers)
+        total_n1 = _cumul(df, annee - 1, mois, postes_ids)
+        taux = _taux_evolution(total_estime, total_n1)
         
-        return {
-            'poste': poste,
-            'total_estime': float(total_estime),
-            'total_n1': float(total_n1),
-            'taux': taux,
-            'en_baisse': taux < -5 if taux is not None else False
-        }
+        return [
+            {
+                'poste': poste,
+                'total_estime': float(total_estime[poste.id]),
+                'total_n1': float(total_n1[poste.id]),
+                'taux': None if pd.isna(taux[poste.id]) else float(taux[poste.id]),
+                'en_baisse': bool(taux[poste.id] < -5),
+            }
+            for poste in postes
+        ]
     
     @staticmethod
     def identifier_postes_en_baisse(type_analyse='annuel', seuil_baisse=-5):
-        """Version corrigée pour calculer le risque de baisse cumulé de janvier au mois actuel-1"""
-        from datetime import date
-        from django.db.models import Sum
-        
+        """
+        Postes dont le cumul de janvier au mois précédent baisse de plus de
+        seuil_baisse % par rapport à la même période N-1
+        Tous les postes en une requête (agrégats mensuels N et N-1), calculs vectorisés
+        """
         postes_en_baisse = []
-        postes = Poste.objects.filter(is_active=True)
         
         # Déterminer la période d'analyse
         today = date.today()
         mois_actuel = today.month
         annee = today.year
         
-        # Calculer du 1er janvier au dernier jour du mois précédent
-        date_debut = date(annee, 1, 1)
-        
         # Si on est en janvier, on ne peut pas calculer
         if mois_actuel == 1:
             return postes_en_baisse
         
-        # Sinon, on calcule jusqu'au dernier jour du mois précédent
-        import calendar
+        # Du 1er janvier au dernier jour du mois précédent, N et N-1
         mois_precedent = mois_actuel - 1
-        dernier_jour = calendar.monthrange(annee, mois_precedent)[1]
-        date_fin = date(annee, mois_precedent, dernier_jour)
+        postes = {poste.id: poste for poste in Poste.objects.filter(is_active=True)}
+        postes_ids = pd.Index(list(postes))
         
-        # Même période l'année dernière
-        date_debut_n1 = date(annee - 1, 1, 1)
-        date_fin_n1 = date(annee - 1, mois_precedent, dernier_jour)
+        df = _montants_mensuels([annee - 1, annee], list(postes))
+        recettes_n = _cumul(df, annee, mois_precedent, postes_ids)
+        recettes_n1 = _cumul(df, annee - 1, mois_precedent, postes_ids)
         
-        for poste in postes:
-            # Recettes cumulées année N (janvier à mois-1)
-            recettes_n = RecetteJournaliere.objects.filter(
-                poste=poste,
-                date__range=[date_debut, date_fin]
-            ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
-            
-            # Recettes cumulées année N-1 (janvier à mois-1)
-            recettes_n1 = RecetteJournaliere.objects.filter(
-                poste=poste,
-                date__range=[date_debut_n1, date_fin_n1]
-            ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
-            
-            if recettes_n1 > 0:
-                taux_evolution = ((recettes_n - recettes_n1) / recettes_n1) * 100
-                
-                if taux_evolution < seuil_baisse:
-                    # Estimer les recettes annuelles en extrapolant
-                    nb_mois_ecoules = mois_precedent
-                    recettes_estimees = (recettes_n / nb_mois_ecoules) * 12 if nb_mois_ecoules > 0 else recettes_n
-                    
-                    postes_en_baisse.append({
-                        'poste': poste,
-                        'taux_evolution': float(taux_evolution),
-                        'recettes_actuelles': float(recettes_n),
-                        'recettes_precedentes': float(recettes_n1),
-                        'pourcentage_baisse': abs(float(taux_evolution)),
-                        'recettes_estimees': float(recettes_estimees),
-                        'recettes_n1': float(recettes_n1),
-                        'periode_analyse': f"Janvier à {calendar.month_name[mois_precedent]} {annee}"
-                    })
+        taux_evolution = _taux_evolution(recettes_n, recettes_n1)
+        # Estimer les recettes annuelles en extrapolant
+        recettes_estimees = recettes_n / mois_precedent * 12
+        
+        en_baisse = taux_evolution[taux_evolution < seuil_baisse].sort_values(kind='stable')
+        periode_analyse = f"Janvier à {calendar.month_name[mois_precedent]} {annee}"
         
-        return sorted(postes_en_baisse, key=lambda x: x['taux_evolution'])
+        for poste_id, taux in en_baisse.items():
+            postes_en_baisse.append({
+                'poste': postes[poste_id],
+                'taux_evolution': float(taux),
+                'recettes_actuelles': float(recettes_n[poste_id]),
+                'recettes_precedentes': float(recettes_n1[poste_id]),
+                'pourcentage_baisse': abs(float(taux)),
+                'recettes_estimees': float(recettes_estimees[poste_id]),
+                'recettes_n1': float(recettes_n1[poste_id]),
+                'periode_analyse': periode_analyse
+            })
+        
+        return postes_en_baisse
+
     @classmethod
     def estimer_recettes_periode(cls, poste, type_periode, annee=None):
         """Estime les recettes pour une période donnée"""
         if annee is None:
             annee = date.today().year
         
-        recettes = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee
-        ).aggregate(
-            total=Sum('montant_declare'),
-            count=Count('id')
-        )
+        recettes = AgregatsRecettesService.totaux(date(annee, 1, 1), date(annee, 12, 31), poste)
         
-        if not recettes['count']:
+        if not recettes.nombre_recettes:
             return Decimal('0')
         
-        moyenne_jour = Decimal(str(recettes['total'] or 0)) / recettes['count']
+        moyenne_jour = recettes.moyenne_journaliere
         
         multipliers = {
             'mensuel': 30,
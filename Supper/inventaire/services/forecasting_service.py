@@ -82,6 +82,9 @@ class ForecastingService:
         """
         Prévoit les recettes futures en utilisant Holt-Winters Exponential Smoothing
         
+        Le résultat est conservé 6 h dans le cache partagé et recalculé dès
+        qu'une recette ou un stock du poste change (étiquette du poste)
+        
         Args:
             poste: Instance du poste
             nb_jours_future: Nombre de jours à prévoir
@@ -90,9 +93,22 @@ class ForecastingService:
         Returns:
             dict avec prévisions détaillées
         """
+        from common.cache_partage import cached_computation, etiquette_poste
+        
         if date_reference is None:
             date_reference = date.today()
         
+        return cached_computation(
+            'prevision_recettes',
+            lambda: ForecastingService._prevoir_recettes(poste, nb_jours_future, date_reference),
+            parametres=[poste.id, nb_jours_future, date_reference],
+            etiquettes=[etiquette_poste(poste.id)],
+            duree=6 * 3600,
+        )
+    
+    @staticmethod
+    def _prevoir_recettes(poste, nb_jours_future, date_reference):
+        """Calcul Holt-Winters de prevoir_recettes, sans cache"""
         # Préparer les données
         df, erreur = ForecastingService.preparer_donnees_historiques(poste, date_reference)
         
@@ -384,7 +384,8 @@ class NotationAgentService:
         Returns:
             DonneesJournalieres avec toutes les informations du jour
         """
-        from inventaire.models import RecetteJournaliere, GestionStock, ConfigurationJour
+        from inventaire.models import RecetteJournaliere, GestionStock
+        from inventaire.services.calendrier_service import ResolveurJours
         
         donnees = DonneesJournalieres(
             date=inventaire.date,
@@ -434,10 +435,10 @@ class NotationAgentService:
             )
         
         # Vérifier si journée impertinente
-        try:
-            config = ConfigurationJour.objects.get(date=inventaire.date)
-            donnees.est_impertinent = (config.statut == 'impertinent')
-        except ConfigurationJour.DoesNotExist:
+        resolveur = ResolveurJours.pour_mois(inventaire.date)
+        if resolveur.configuration(inventaire.date) is not None:
+            donnees.est_impertinent = resolveur.est_impertinent(inventaire.date)
+        else:
             # Vérifier via le taux de déperdition
             if donnees.taux_deperdition and donnees.taux_deperdition > -5:
                 # Taux > -5% suggère une journée impertinente
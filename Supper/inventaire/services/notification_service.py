@@ -0,0 +1,261 @@
+# inventaire/services/notification_service.py
+"""
+Envoi et lecture des notifications internes (NotificationUtilisateur)
+
+- Envoi groupé : les notifications d'une opération (transfert, chargement
+  de stock...) sont insérées par un seul bulk_create, quel que soit le
+  nombre de destinataires retenus par poste et habilitation.
+- Compteurs : CompteurNotifications (non lues / total par utilisateur) est
+  ajusté par UPDATE F() à chaque écriture — ici pour les écritures groupées,
+  par les receveurs de accounts/signals.py pour les enregistrements unitaires
+  (administration, autres modules). Le badge de notifications interrogé par
+  chaque onglet ouvert coûte une lecture par clé primaire au lieu d'un
+  comptage des notifications.
+- Lecture : « tout marquer comme lu » est une seule UPDATE, compteurs
+  ajustés dans la même transaction.
+
+Un compteur absent est calculé depuis les notifications à la première
+lecture ; la commande recalculer_compteurs_notifications le reconstruit.
+"""
+
+from collections import Counter, defaultdict
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+HABILITATIONS_CHEFS_POSTE = ['chef_peage', 'chef_pesage']
+
+
+class NotificationService:
+    """Envoi groupé, compteurs et lecture des notifications"""
+
+    # ===============================================================
+    # ENVOI
+    # ===============================================================
+
+    @staticmethod
+    def destinataires(postes=None, habilitations=None):
+        """
+        Utilisateurs actifs affectés aux postes donnés et/ou titulaires des
+        habilitations données (identifiants, pour l'envoi groupé)
+        """
+        from accounts.models import UtilisateurSUPPER
+
+        utilisateurs = UtilisateurSUPPER.objects.filter(is_active=True)
+        if postes is not None:
+            utilisateurs = utilisateurs.filter(poste_affectation__in=postes)
+        if habilitations is not None:
+            utilisateurs = utilisateurs.filter(habilitation__in=habilitations)
+        return utilisateurs.values_list('pk', flat=True)
+
+    @staticmethod
+    @transaction.atomic
+    def envoyer(envois, cree_par=None):
+        """
+        Crée des notifications en une insertion groupée et ajuste les
+        compteurs des destinataires
+
+        Args:
+            envois: itérable de tuples (destinataire_id, titre, message, type_notification)
+            cree_par: utilisateur à l'origine des notifications
+
+        Returns:
+            Nombre de notifications créées
+        """
+        from accounts.models import NotificationUtilisateur
+
+        notifications = [
+            NotificationUtilisateur(
+                destinataire_id=destinataire_id,
+                cree_par=cree_par,
+                titre=titre,
+                message=message,
+                type_notification=type_notification,
+            )
+            for destinataire_id, titre, message, type_notification in envois
+        ]
+        if not notifications:
+            return 0
+
+        NotificationUtilisateur.objects.bulk_create(notifications, batch_size=500)
+        NotificationService.ajuster_compteurs(Counter(n.destinataire_id for n in notifications), non_lues=1, total=1)
+
+        logger.info(
+            f"📨 NOTIFICATIONS - {len(notifications)} envoyée(s): "
+            f"{', '.join(sorted({n.titre for n in notifications}))}"
+        )
+        return len(notifications)
+
+    @staticmethod
+    def notifier(destinataires, titre, message, type_notification='info', cree_par=None):
+        """
+        Envoie la même notification à chaque destinataire (identifiants,
+        utilisateurs ou queryset)
+
+        Returns:
+            Nombre de notifications créées
+        """
+        return NotificationService.envoyer(
+            [
+                (getattr(destinataire, 'pk', destinataire), titre, message, type_notification)
+                for destinataire in destinataires
+            ],
+            cree_par=cree_par,
+        )
+
+    @staticmethod
+    def notifier_chefs_postes(messages_par_poste, cree_par=None):
+        """
+        Notifie les chefs (péage et pesage) de plusieurs postes : une requête
+        pour les destinataires, une insertion groupée
+
+        Args:
+            messages_par_poste: liste de tuples (poste, titre, message, type_notification)
+
+        Returns:
+            Nombre de notifications créées
+        """
+        from accounts.models import UtilisateurSUPPER
+
+        postes = {poste.pk for poste, _, _, _ in messages_par_poste}
+        chefs = defaultdict(list)
+        for chef_id, poste_id in UtilisateurSUPPER.objects.filter(
+            poste_affectation__in=postes,
+            habilitation__in=HABILITATIONS_CHEFS_POSTE,
+            is_active=True
+        ).values_list('pk', 'poste_affectation_id'):
+            chefs[poste_id].append(chef_id)
+
+        return NotificationService.envoyer(
+            [
+                (chef_id, titre, message, type_notification)
+                for poste, titre, message, type_notification in messages_par_poste
+                for chef_id in chefs[poste.pk]
+            ],
+            cree_par=cree_par,
+        )
+
+    # ===============================================================
+    # COMPTEURS
+    # ===============================================================
+
+    @staticmethod
+    def compteurs(utilisateur):
+        """
+        Compteurs de notifications de l'utilisateur
+
+        Returns:
+            dict {'non_lues': int, 'total': int}
+        """
+        from accounts.models import CompteurNotifications
+
+        utilisateur_id = getattr(utilisateur, 'pk', utilisateur)
+        compteur = CompteurNotifications.objects.filter(pk=utilisateur_id).values('non_lues', 'total').first()
+        if compteur is None:
+            compteur = NotificationService.recalculer([utilisateur_id]).get(
+                utilisateur_id, {'non_lues': 0, 'total': 0}
+            )
+        return compteur
+
+    @staticmethod
+    def recalculer(utilisateurs=None):
+        """
+        Recalcule les compteurs depuis les notifications (tous les
+        utilisateurs ou ceux donnés) : une requête groupée, une écriture groupée
+
+        Returns:
+            dict {utilisateur_id: {'non_lues': int, 'total': int}}
+        """
+        from accounts.models import CompteurNotifications, NotificationUtilisateur, UtilisateurSUPPER
+
+        ids = (
+            list(UtilisateurSUPPER.objects.values_list('pk', flat=True))
+            if utilisateurs is None
+            else [getattr(utilisateur, 'pk', utilisateur) for utilisateur in utilisateurs]
+        )
+        compteurs = {utilisateur_id: {'non_lues': 0, 'total': 0} for utilisateur_id in ids}
+        for ligne in (
+            NotificationUtilisateur.objects.filter(destinataire_id__in=ids)
+            .values('destinataire_id')
+            .annotate(non_lues=Count('id', filter=Q(lu=False)), total=Count('id'))
+            .order_by()
+        ):
+            compteurs[ligne['destinataire_id']] = {'non_lues': ligne['non_lues'], 'total': ligne['total']}
+
+        CompteurNotifications.objects.bulk_create(
+            [CompteurNotifications(utilisateur_id=utilisateur_id, **valeurs) for utilisateur_id, valeurs in compteurs.items()],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['utilisateur'],
+            update_fields=['non_lues', 'total'],
+        )
+        return compteurs
+
+    @staticmethod
+    def ajuster_compteurs(variations, non_lues=0, total=0):
+        """
+        Ajoute variation × (non_lues, total) aux compteurs existants : une
+        UPDATE par valeur de variation distincte (le plus souvent une seule) ;
+        les compteurs absents seront calculés à leur première lecture
+
+        Args:
+            variations: dict {utilisateur_id: variation}
+        """
+        from accounts.models import CompteurNotifications
+
+        par_variation = defaultdict(list)
+        for utilisateur_id, variation in variations.items():
+            if variation:
+                par_variation[variation].append(utilisateur_id)
+
+        for variation, ids in par_variation.items():
+            CompteurNotifications.objects.filter(pk__in=ids).update(
+                non_lues=F('non_lues') + variation * non_lues,
+                total=F('total') + variation * total,
+            )
+
+    # ===============================================================
+    # LECTURE
+    # ===============================================================
+
+    @staticmethod
+    @transaction.atomic
+    def marquer_lues(notifications, lu=True):
+        """
+        Marque des notifications lues (ou non lues) en une UPDATE et ajuste
+        les compteurs de leurs destinataires
+
+        Args:
+            notifications: queryset de NotificationUtilisateur
+            lu: False pour marquer comme non lues
+
+        Returns:
+            Nombre de notifications modifiées
+        """
+        from accounts.models import NotificationUtilisateur
+
+        cibles = dict(
+            notifications.filter(lu=not lu).select_for_update().values_list('pk', 'destinataire_id')
+        )
+        if not cibles:
+            return 0
+
+        NotificationUtilisateur.objects.filter(pk__in=list(cibles)).update(
+            lu=lu,
+            date_lecture=timezone.now() if lu else None,
+        )
+        NotificationService.ajuster_compteurs(Counter(cibles.values()), non_lues=-1 if lu else 1)
+        return len(cibles)
+
+    @staticmethod
+    def marquer_toutes_lues(utilisateur):
+        """Marque comme lues toutes les notifications de l'utilisateur"""
+        from accounts.models import NotificationUtilisateur
+
+        return NotificationService.marquer_lues(
+            NotificationUtilisateur.objects.filter(destinataire=utilisateur)
+        )
@@ -0,0 +1,73 @@
+# inventaire/services/numerotation_service.py
+"""
+Numérotation des bordereaux de transfert et des références de demandes de
+confirmation
+
+Chaque numéro provient d'un compteur (CompteurNumerotation) par préfixe et
+par période, verrouillé (SELECT ... FOR UPDATE) puis incrémenté : une
+requête indexée quel que soit le volume d'historique, au lieu d'un COUNT des
+mouvements du jour, et deux transferts simultanés ne peuvent plus recevoir
+le même numéro.
+
+Le verrou est conservé jusqu'à la fin de la transaction appelante : un
+numéro n'est consommé que si l'opération qui l'utilise est validée, la
+numérotation du jour reste donc sans trou.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+PREFIXE_BORDEREAU_TRANSFERT = 'TR'
+PREFIXE_DEMANDE_CONFIRMATION = 'CONF'
+
+
+class NumerotationService:
+    """Attribution de numéros séquentiels par préfixe et période"""
+
+    @staticmethod
+    @transaction.atomic
+    def suivant(prefixe, periode=''):
+        """
+        Réserve et retourne le numéro suivant du compteur (prefixe, periode)
+
+        Args:
+            prefixe: famille de numéros ('TR', 'CONF'...)
+            periode: 'AAAAMMJJ', 'AAAA' ou '' pour un compteur continu
+
+        Returns:
+            int, à partir de 1 pour chaque nouvelle période
+        """
+        from inventaire.models import CompteurNumerotation
+
+        compteurs = CompteurNumerotation.objects.select_for_update().filter(prefixe=prefixe, periode=periode)
+        compteur = compteurs.first()
+        if compteur is None:
+            # Première demande de la période : création concurrente tolérée
+            CompteurNumerotation.objects.bulk_create(
+                [CompteurNumerotation(prefixe=prefixe, periode=periode)],
+                ignore_conflicts=True,
+            )
+            compteur = compteurs.get()
+
+        compteurs.update(valeur=F('valeur') + 1, date_mise_a_jour=timezone.now())
+        return compteur.valeur + 1
+
+    @staticmethod
+    def numero_bordereau_transfert():
+        """Numéro de bordereau de transfert : TR-AAAAMMJJ-HHMMSS-NNN"""
+        maintenant = timezone.localtime()
+        jour = maintenant.strftime('%Y%m%d')
+        rang = NumerotationService.suivant(PREFIXE_BORDEREAU_TRANSFERT, jour)
+        return f"{PREFIXE_BORDEREAU_TRANSFERT}-{jour}-{maintenant.strftime('%H%M%S')}-{rang:03d}"
+
+    @staticmethod
+    def reference_demande_confirmation(station_id=None):
+        """Référence de demande de confirmation : CONF-AAAAMMJJHHMMSS-station-NNN"""
+        maintenant = timezone.localtime()
+        rang = NumerotationService.suivant(PREFIXE_DEMANDE_CONFIRMATION, maintenant.strftime('%Y%m%d'))
+        return f"{PREFIXE_DEMANDE_CONFIRMATION}-{maintenant.strftime('%Y%m%d%H%M%S')}-{station_id or 0}-{rang:03d}"
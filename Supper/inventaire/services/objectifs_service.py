@@ -4,8 +4,10 @@ Service centralisé pour les calculs d'objectifs annuels
 Garantit la cohérence entre toutes les vues
 """
 
+from datetime import date
 from decimal import Decimal
-from django.db.models import Sum
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.db import transaction
 import logging
@@ -16,10 +18,88 @@ logger = logging.getLogger('supper')
 class ObjectifsService:
     """Service pour gérer les objectifs annuels"""
     
+    @staticmethod
+    def annoter_realisations(postes, annee, repli_annee_precedente=False):
+        """
+        Annote un queryset de postes avec, pour l'année, objectif_annee
+        (None sans objectif) et realise_annee (agrégat annuel des recettes),
+        en une seule requête (sous-requêtes corrélées)
+        
+        Args:
+            repli_annee_precedente: sans objectif pour l'année, reprendre
+                celui de l'année précédente
+        """
+        from inventaire.models import AgregatRecettes, ObjectifAnnuel
+        
+        objectif = Subquery(
+            ObjectifAnnuel.objects.filter(poste=OuterRef('pk'), annee=annee).values('montant_objectif')[:1]
+        )
+        if repli_annee_precedente:
+            objectif = Coalesce(objectif, Subquery(
+                ObjectifAnnuel.objects.filter(poste=OuterRef('pk'), annee=annee - 1).values('montant_objectif')[:1]
+            ))
+        
+        realise = Subquery(
+            AgregatRecettes.objects.filter(
+                poste=OuterRef('pk'),
+                granularite=AgregatRecettes.Granularite.ANNEE,
+                debut_periode=date(annee, 1, 1),
+            ).values('montant_total')[:1]
+        )
+        
+        return postes.annotate(
+            annee_objectif=Value(annee, output_field=IntegerField()),
+            objectif_annee=objectif,
+            realise_annee=Coalesce(realise, Value(Decimal('0')), output_field=DecimalField(max_digits=15, decimal_places=2)),
+        )
+    
+    @staticmethod
+    def annoter_realisations_pesage(stations, annee):
+        """
+        Annote un queryset de stations de pesage avec objectif_annee et
+        realise_annee (amendes payées dans l'année) en une seule requête
+        """
+        from common.utils import plage_journees
+        from inventaire.models_pesage import AmendeEmise, ObjectifAnnuelPesage, StatutAmende
+        
+        return stations.annotate(
+            annee_objectif=Value(annee, output_field=IntegerField()),
+            objectif_annee=Subquery(
+                ObjectifAnnuelPesage.objects.filter(station=OuterRef('pk'), annee=annee).values('montant_objectif')[:1]
+            ),
+            realise_annee=Coalesce(
+                Subquery(
+                    AmendeEmise.objects.filter(
+                        station=OuterRef('pk'),
+                        statut=StatutAmende.PAYE,
+                        **plage_journees('date_paiement', date(annee, 1, 1), date(annee, 12, 31))
+                    ).values('station').annotate(total=Sum('montant_amende')).values('total')
+                ),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+        )
+    
+    @staticmethod
+    def ligne_realisation(poste):
+        """Objectif, réalisé, reste et taux d'un poste annoté par annoter_realisations"""
+        montant_objectif = poste.objectif_annee or Decimal('0')
+        realise = poste.realise_annee
+        taux = (realise / montant_objectif * 100) if montant_objectif > 0 else 0
+        
+        return {
+            'poste': poste,
+            'montant_objectif': montant_objectif,
+            'realise': realise,
+            'reste': montant_objectif - realise,
+            'taux': float(taux)
+        }
+    
     @staticmethod
     def calculer_objectifs_annuels(annee=None, inclure_postes_inactifs=False):
         """
         Calcule les objectifs et réalisations pour une année donnée
+        (une requête : objectifs joints à l'agrégat annuel de leur poste)
         
         Args:
             annee: Année cible (défaut: année actuelle)
@@ -28,7 +108,7 @@ class ObjectifsService:
         Returns:
             dict avec total_objectif, total_realise, reste_a_realiser, taux_realisation
         """
-        from inventaire.models import ObjectifAnnuel, RecetteJournaliere
+        from inventaire.models import AgregatRecettes, ObjectifAnnuel
         
         if annee is None:
             annee = timezone.now().year
@@ -42,24 +122,23 @@ class ObjectifsService:
                 poste__is_active=True
             )
         
-        # Calculer le total des objectifs
-        total_objectif = objectifs.aggregate(
-            total=Sum('montant_objectif')
-        )['total'] or Decimal('0')
-        
-        # Récupérer les IDs des postes concernés
-        postes_ids = list(objectifs.values_list('poste_id', flat=True))
-        
-        # Calculer le total réalisé pour ces postes uniquement
-        if postes_ids:
-            total_realise = RecetteJournaliere.objects.filter(
-                poste_id__in=postes_ids,
-                date__year=annee
-            ).aggregate(
-                total=Sum('montant_declare')
-            )['total'] or Decimal('0')
-        else:
-            total_realise = Decimal('0')
+        # Réalisé des postes ayant un objectif uniquement
+        totaux = objectifs.annotate(
+            realise=Subquery(
+                AgregatRecettes.objects.filter(
+                    poste=OuterRef('poste'),
+                    granularite=AgregatRecettes.Granularite.ANNEE,
+                    debut_periode=date(annee, 1, 1),
+                ).values('montant_total')[:1]
+            )
+        ).aggregate(
+            total_objectif=Sum('montant_objectif'),
+            total_realise=Sum('realise'),
+            nombre_postes=Count('id'),
+        )
+        
+        total_objectif = totaux['total_objectif'] or Decimal('0')
+        total_realise = totaux['total_realise'] or Decimal('0')
         
         # Calcul du reste à réaliser
         reste_a_realiser = total_objectif - total_realise
@@ -75,7 +154,7 @@ class ObjectifsService:
             'total_realise': total_realise,
             'reste_a_realiser': reste_a_realiser,
             'taux_realisation': round(taux_realisation, 2),
-            'nombre_postes': len(postes_ids),
+            'nombre_postes': totaux['nombre_postes'],
             'annee': annee
         }
     
@@ -83,14 +162,14 @@ class ObjectifsService:
     def get_postes_avec_objectifs(annee=None, tous_postes=True):
         """
         Retourne la liste des postes avec leurs objectifs et réalisations
+        (une requête pour tous les postes)
         
         Args:
             annee: Année cible
             tous_postes: Si True, retourne TOUS les postes (même sans objectif)
         """
-        from inventaire.models import ObjectifAnnuel, RecetteJournaliere
+        from inventaire.models import ObjectifAnnuel
         from accounts.models import Poste
-        from django.db.models import Sum
         
         if annee is None:
             annee = timezone.now().year
@@ -103,58 +182,143 @@ class ObjectifsService:
             ).values_list('poste_id', flat=True)
             postes = Poste.objects.filter(id__in=postes_ids).order_by('region', 'nom')
         
-        resultats = []
+        return [
+            ObjectifsService.ligne_realisation(poste)
+            for poste in ObjectifsService.annoter_realisations(postes, annee)
+        ]
+    
+    # ===================================================================
+    # ÉCRITURE GROUPÉE DES OBJECTIFS (PÉAGE ET PESAGE)
+    # ===================================================================
+    
+    @staticmethod
+    def _champ_entite(modele):
+        """Champ désignant l'entité d'un modèle d'objectif : poste ou station"""
+        return 'station' if modele._meta.model_name == 'objectifannuelpesage' else 'poste'
+    
+    @staticmethod
+    def comparer_objectifs(modele, annee, montants):
+        """
+        Aperçu des écarts entre des montants proposés et les objectifs
+        déjà enregistrés pour l'année (une requête)
         
-        for poste in postes:
-            # Chercher l'objectif
-            try:
-                objectif = ObjectifAnnuel.objects.get(poste=poste, annee=annee)
-                montant_objectif = objectif.montant_objectif
-            except ObjectifAnnuel.DoesNotExist:
-                montant_objectif = Decimal('0')
+        Args:
+            modele: ObjectifAnnuel ou ObjectifAnnuelPesage
+            montants: dict {id de l'entité: nouveau montant}
             
-            # Calculer le réalisé
-            realise = RecetteJournaliere.objects.filter(
-                poste=poste,
-                date__year=annee
-            ).aggregate(Sum('montant_declare'))['montant_declare__sum'] or Decimal('0')
+        Returns:
+            dict {id de l'entité: (montant actuel ou None, action)} où action
+            vaut 'creation', 'modification' ou 'inchange'
+        """
+        champ = ObjectifsService._champ_entite(modele)
+        actuels = dict(
+            modele.objects.filter(annee=annee, **{f'{champ}_id__in': list(montants)})
+            .values_list(f'{champ}_id', 'montant_objectif')
+        )
+        
+        ecarts = {}
+        for entite_id, montant in montants.items():
+            actuel = actuels.get(entite_id)
+            if actuel is None:
+                action = 'creation'
+            elif actuel != montant:
+                action = 'modification'
+            else:
+                action = 'inchange'
+            ecarts[entite_id] = (actuel, action)
+        return ecarts
+    
+    @staticmethod
+    def enregistrer_objectifs(modele, annee, montants, utilisateur, ecraser=True):
+        """
+        Enregistre les objectifs d'une année en une seule écriture groupée
+        (bulk_create avec update_conflicts sur (entité, annee))
+        
+        bulk_create n'émettant pas post_save, le signal est émis ensuite pour
+        chaque objectif écrit (invalidation du tableau de bord, groupée par
+        l'unité de travail)
+        
+        Args:
+            modele: ObjectifAnnuel ou ObjectifAnnuelPesage
+            montants: dict {id de l'entité: montant}
+            ecraser: False pour ne créer que les objectifs absents
             
-            # Calcul du taux
-            taux = (realise / montant_objectif * 100) if montant_objectif > 0 else 0
+        Returns:
+            dict avec objectifs_crees, objectifs_modifies, objectifs_inchanges,
+            objectifs_ignores et ecarts (voir comparer_objectifs)
+        """
+        from inventaire.services.saisie_inventaire_service import emettre_post_save
+        
+        champ = ObjectifsService._champ_entite(modele)
+        
+        with transaction.atomic():
+            ecarts = ObjectifsService.comparer_objectifs(modele, annee, montants)
             
-            resultats.append({
-                'poste': poste,
-                'montant_objectif': montant_objectif,
-                'realise': realise,
-                'reste': montant_objectif - realise,
-                'taux': float(taux)
-            })
+            a_ecrire = [
+                entite_id for entite_id, (actuel, action) in ecarts.items()
+                if action == 'creation' or (ecraser and action == 'modification')
+            ]
+            objets = modele.objects.bulk_create(
+                [
+                    modele(**{f'{champ}_id': entite_id}, annee=annee,
+                           montant_objectif=montants[entite_id], cree_par=utilisateur)
+                    for entite_id in a_ecrire
+                ],
+                update_conflicts=True,
+                unique_fields=[champ, 'annee'],
+                update_fields=['montant_objectif', 'cree_par', 'date_modification'],
+            )
+            for objet in objets:
+                emettre_post_save(objet, ['montant_objectif', 'cree_par', 'date_modification'])
+        
+        actions = [action for actuel, action in ecarts.values()]
+        return {
+            'objectifs_crees': actions.count('creation'),
+            'objectifs_modifies': actions.count('modification') if ecraser else 0,
+            'objectifs_inchanges': actions.count('inchange'),
+            'objectifs_ignores': 0 if ecraser else actions.count('modification'),
+            'ecarts': ecarts,
+        }
+    
+    @staticmethod
+    def objectifs_annee(modele, annee, actifs_seulement=True):
+        """Objectifs d'une année avec leur entité, en une requête"""
+        champ = ObjectifsService._champ_entite(modele)
         
-        return resultats
+        objectifs = modele.objects.filter(annee=annee).select_related(champ)
+        if actifs_seulement:
+            objectifs = objectifs.filter(**{f'{champ}__is_active': True})
+        return list(objectifs)
     
     @staticmethod
-    def calculer_objectifs_avec_pourcentage(annee_source, annee_cible, pourcentage_augmentation):
+    def calculer_objectifs_avec_pourcentage(annee_source, annee_cible, pourcentage_augmentation,
+                                            modele=None, actifs_seulement=True):
         """
         Calcule automatiquement les objectifs pour une année cible
-        en appliquant un pourcentage d'augmentation sur l'année source
+        en appliquant un pourcentage d'augmentation sur l'année source,
+        avec l'aperçu des écarts par rapport aux objectifs déjà saisis
+        pour l'année cible (deux requêtes)
         
         Args:
             annee_source: Année de référence
             annee_cible: Année pour laquelle calculer les nouveaux objectifs
             pourcentage_augmentation: Pourcentage d'augmentation (ex: 13 pour +13%)
+            modele: ObjectifAnnuel (défaut) ou ObjectifAnnuelPesage
+            actifs_seulement: ignorer les postes inactifs
             
         Returns:
             dict avec nombre_postes, total_objectif_source, total_objectif_cible
+            et, par poste, montant_actuel et action
         """
         from inventaire.models import ObjectifAnnuel
         
+        modele = modele or ObjectifAnnuel
+        champ = ObjectifsService._champ_entite(modele)
+        
         # Récupérer les objectifs de l'année source
-        objectifs_source = ObjectifAnnuel.objects.filter(
-            annee=annee_source,
-            poste__is_active=True
-        ).select_related('poste')
+        objectifs_source = ObjectifsService.objectifs_annee(modele, annee_source, actifs_seulement)
         
-        if not objectifs_source.exists():
+        if not objectifs_source:
             return {
                 'success': False,
                 'message': f"Aucun objectif trouvé pour l'année {annee_source}",
@@ -164,39 +328,53 @@ class ObjectifsService:
         # Calculer le coefficient multiplicateur
         coefficient = Decimal('1') + (Decimal(str(pourcentage_augmentation)) / Decimal('100'))
         
+        montants = {
+            getattr(obj_source, f'{champ}_id'): (obj_source.montant_objectif * coefficient).quantize(Decimal('1'))  # Arrondir à l'entier
+            for obj_source in objectifs_source
+        }
+        ecarts = ObjectifsService.comparer_objectifs(modele, annee_cible, montants)
+        
         nouveaux_objectifs = []
         total_source = Decimal('0')
         total_cible = Decimal('0')
         
         for obj_source in objectifs_source:
-            # Calculer le nouvel objectif
-            nouveau_montant = obj_source.montant_objectif * coefficient
-            nouveau_montant = nouveau_montant.quantize(Decimal('1'))  # Arrondir à l'entier
+            entite_id = getattr(obj_source, f'{champ}_id')
+            montant_actuel, action = ecarts[entite_id]
             
             nouveaux_objectifs.append({
-                'poste': obj_source.poste,
+                'poste': getattr(obj_source, champ),
                 'montant_source': obj_source.montant_objectif,
-                'montant_cible': nouveau_montant
+                'montant_cible': montants[entite_id],
+                'montant_actuel': montant_actuel,
+                'action': action
             })
             
             total_source += obj_source.montant_objectif
-            total_cible += nouveau_montant
+            total_cible += montants[entite_id]
         
+        actions = [ligne['action'] for ligne in nouveaux_objectifs]
         return {
             'success': True,
             'nombre_postes': len(nouveaux_objectifs),
             'objectifs': nouveaux_objectifs,
+            'montants': montants,
             'total_objectif_source': total_source,
             'total_objectif_cible': total_cible,
+            'nombre_creations': actions.count('creation'),
+            'nombre_modifications': actions.count('modification'),
+            'nombre_inchanges': actions.count('inchange'),
             'pourcentage_applique': float(pourcentage_augmentation),
             'annee_source': annee_source,
             'annee_cible': annee_cible
         }
     
     @staticmethod
-    def appliquer_objectifs_calcules(annee_source, annee_cible, pourcentage_augmentation, utilisateur):
+    def appliquer_objectifs_calcules(annee_source, annee_cible, pourcentage_augmentation, utilisateur,
+                                     modele=None, actifs_seulement=True):
         """
         Applique et enregistre les objectifs calculés dans la base de données
+        (une écriture groupée, voir enregistrer_objectifs)
         
         Args:
             annee_source: Année de référence
@@ -209,45 +387,36 @@ class ObjectifsService:
         """
         from inventaire.models import ObjectifAnnuel
         
+        modele = modele or ObjectifAnnuel
+        
         # Calculer d'abord les objectifs
         resultats_calcul = ObjectifsService.calculer_objectifs_avec_pourcentage(
-            annee_source, annee_cible, pourcentage_augmentation
+            annee_source, annee_cible, pourcentage_augmentation, modele, actifs_seulement
         )
         
         if not resultats_calcul['success']:
             return resultats_calcul
         
-        # Appliquer les objectifs en transaction atomique
-        objectifs_crees = 0
-        objectifs_modifies = 0
-        
         try:
-            with transaction.atomic():
-                for obj_data in resultats_calcul['objectifs']:
-                    objectif, created = ObjectifAnnuel.objects.update_or_create(
-                        poste=obj_data['poste'],
-                        annee=annee_cible,
-                        defaults={
-                            'montant_objectif': obj_data['montant_cible'],
-                            'cree_par': utilisateur
-                        }
-                    )
-                    
-                    if created:
-                        objectifs_crees += 1
-                    else:
-                        objectifs_modifies += 1
+            resultats = ObjectifsService.enregistrer_objectifs(
+                modele, annee_cible, resultats_calcul['montants'], utilisateur
+            )
             
             # Journalisation
             logger.info(
-                f"Objectifs {annee_cible} calculés : {objectifs_crees} créés, "
-                f"{objectifs_modifies} modifiés (base: {annee_source}, {pourcentage_augmentation}%)"
+                f"Objectifs {annee_cible} calculés : {resultats['objectifs_crees']} créés, "
+                f"{resultats['objectifs_modifies']} modifiés, {resultats['objectifs_inchanges']} inchangés "
+                f"(base: {annee_source}, {pourcentage_augmentation}%)"
             )
             
             return {
                 'success': True,
-                'objectifs_crees': objectifs_crees,
-                'objectifs_modifies': objectifs_modifies,
+                'objectifs_crees': resultats['objectifs_crees'],
+                'objectifs_modifies': resultats['objectifs_modifies'],
+                'objectifs_inchanges': resultats['objectifs_inchanges'],
+                'nombre_postes': resultats_calcul['nombre_postes'],
+                'objectifs': resultats_calcul['objectifs'],
+                'total_objectif_source': resultats_calcul['total_objectif_source'],
                 'total_objectif_cible': resultats_calcul['total_objectif_cible'],
                 'annee_source': annee_source,
                 'annee_cible': annee_cible,
@@ -259,4 +428,4 @@ class ObjectifsService:
             return {
                 'success': False,
                 'message': f"Erreur lors de l'enregistrement : {str(e)}"
-            }
\ No newline at end of file
+            }
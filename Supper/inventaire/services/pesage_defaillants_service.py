@@ -13,6 +13,7 @@ import logging
 
 # Imports des modèles - ADAPTER SELON VOTRE STRUCTURE
 from accounts.models import Poste
+from common.utils import plage_journees
 from inventaire.models_pesage import *
 
 logger = logging.getLogger('supper')
@@ -41,8 +42,7 @@ class PesageDefaillantsService:
         total = AmendeEmise.objects.filter(
             station=station,
             statut=StatutAmende.PAYE,
-            date_paiement__date__gte=date_debut,
-            date_paiement__date__lte=date_fin
+            **plage_journees('date_paiement', date_debut, date_fin)
         ).aggregate(total=Sum('montant_amende'))['total']
         
         return total or Decimal('0')
@@ -62,8 +62,7 @@ class PesageDefaillantsService:
         try:
             emissions = AmendeEmise.objects.filter(
                 station=station,
-                date_heure_emission__date__gte=date_debut,
-                date_heure_emission__date__lte=date_fin
+                **plage_journees('date_heure_emission', date_debut, date_fin)
             ).annotate(
                 jour=TruncDate('date_heure_emission')
             ).values_list('jour', flat=True).distinct()
@@ -76,8 +75,7 @@ class PesageDefaillantsService:
             paiements = AmendeEmise.objects.filter(
                 station=station,
                 statut=StatutAmende.PAYE,
-                date_paiement__date__gte=date_debut,
-                date_paiement__date__lte=date_fin
+                **plage_journees('date_paiement', date_debut, date_fin)
             ).annotate(
                 jour=TruncDate('date_paiement')
             ).values_list('jour', flat=True).distinct()
@@ -226,8 +224,7 @@ class PesageDefaillantsService:
         total_mois_n2 = AmendeEmise.objects.filter(
             station__in=stations,
             statut=StatutAmende.PAYE,
-            date_paiement__date__gte=debut_mois_n2,
-            date_paiement__date__lte=fin_mois_n2
+            **plage_journees('date_paiement', debut_mois_n2, fin_mois_n2)
         ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
         
         # ========== PROGRESSION VS N-1 ==========
@@ -248,22 +245,19 @@ class PesageDefaillantsService:
         cumul_annuel = AmendeEmise.objects.filter(
             station__in=stations,
             statut=StatutAmende.PAYE,
-            date_paiement__date__gte=debut_annee,
-            date_paiement__date__lte=date_fin
+            **plage_journees('date_paiement', debut_annee, date_fin)
         ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
         
         cumul_n1_meme_date = AmendeEmise.objects.filter(
             station__in=stations,
             statut=StatutAmende.PAYE,
-            date_paiement__date__gte=debut_annee_n1,
-            date_paiement__date__lte=fin_meme_date_n1
+            **plage_journees('date_paiement', debut_annee_n1, fin_meme_date_n1)
         ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
         
         cumul_n2_meme_date = AmendeEmise.objects.filter(
             station__in=stations,
             statut=StatutAmende.PAYE,
-            date_paiement__date__gte=debut_annee_n2,
-            date_paiement__date__lte=fin_meme_date_n2
+            **plage_journees('date_paiement', debut_annee_n2, fin_meme_date_n2)
         ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
         
         # Écarts et indices cumul
@@ -315,8 +309,7 @@ class PesageDefaillantsService:
             contrib_annee = AmendeEmise.objects.filter(
                 station=station,
                 statut=StatutAmende.PAYE,
-                date_paiement__date__gte=debut_annee,
-                date_paiement__date__lte=date_fin
+                **plage_journees('date_paiement', debut_annee, date_fin)
             ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
             
             nouveaux_postes_details.append({
@@ -352,15 +345,13 @@ class PesageDefaillantsService:
             cumul_station = AmendeEmise.objects.filter(
                 station=station,
                 statut=StatutAmende.PAYE,
-                date_paiement__date__gte=debut_annee,
-                date_paiement__date__lte=date_fin
+                **plage_journees('date_paiement', debut_annee, date_fin)
             ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
             
             cumul_station_n1 = AmendeEmise.objects.filter(
                 station=station,
                 statut=StatutAmende.PAYE,
-                date_paiement__date__gte=debut_annee_n1,
-                date_paiement__date__lte=fin_meme_date_n1
+                **plage_journees('date_paiement', debut_annee_n1, fin_meme_date_n1)
             ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
             
             if cumul_station_n1 > 0:
@@ -482,14 +473,14 @@ class PesageDefaillantsService:
         total_30j = AmendeEmise.objects.filter(
             station=station,
             statut=StatutAmende.PAYE,
-            date_paiement__date__range=[date_debut_historique, date_fin_historique]
+            **plage_journees('date_paiement', date_debut_historique, date_fin_historique)
         ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
         
         # Compter les jours avec activité dans cette période
         jours_actifs = AmendeEmise.objects.filter(
             station=station,
             statut=StatutAmende.PAYE,
-            date_paiement__date__range=[date_debut_historique, date_fin_historique]
+            **plage_journees('date_paiement', date_debut_historique, date_fin_historique)
         ).annotate(
             jour=TruncDate('date_paiement')
         ).values('jour').distinct().count()
@@ -0,0 +1,276 @@
+# inventaire/services/rapport_cache_service.py
+"""
+Cache disque des rapports PDF (PV de confrontation, compte d'emploi,
+rapports défaillants et inventaires, bordereaux de transfert)
+
+Un rapport déjà produit est servi tel quel tant que ses données sources
+n'ont pas changé :
+- clé = type de rapport + paramètres (poste, période, signataires,
+  utilisateur imprimé sur le document...) → un répertoire sous
+  MEDIA_ROOT/rapports_cache/<type>/ ;
+- version = empreinte des querysets sources de la période → nom du
+  fichier PDF. L'empreinte porte sur le contenu complet des lignes (toutes
+  les colonnes, dans l'ordre des clés) : sous PostgreSQL, un md5 calculé
+  par la base sans transférer les lignes ; ailleurs, un sha256 des lignes
+  lues par lots. Toute insertion, suppression ou modification d'une ligne,
+  y compris par UPDATE groupé sans signal, produit une autre version.
+
+Les fichiers non servis depuis CONSERVATION_JOURS sont supprimés (au plus
+une purge par heure, lors d'une écriture).
+
+Une période close (mois passé) est donc générée une fois puis servie depuis
+le disque ; une période en cours est régénérée dès qu'une ligne change, la
+version précédente étant supprimée.
+
+La date d'édition imprimée est celle de la génération de la version servie.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import FileResponse, HttpResponse
+
+logger = logging.getLogger('supper')
+
+# À incrémenter quand la mise en page d'un rapport change
+VERSION_GABARITS = 1
+
+CONFIG_DEFAUT = {
+    'ACTIF': True,
+    'REPERTOIRE': os.path.join(settings.MEDIA_ROOT, 'rapports_cache'),
+    'CONSERVATION_JOURS': 30,
+}
+
+CLE_PURGE = 'rapports_cache:purge'
+INTERVALLE_PURGE = 3600
+TAILLE_LOT = 2000
+
+
+def _config():
+    return {**CONFIG_DEFAUT, **getattr(settings, 'SUPPER_RAPPORTS_CACHE', {})}
+
+
+def _hash(valeur):
+    return hashlib.sha256(
+        json.dumps(valeur, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+class RapportEnCache:
+    """
+    Un rapport (type + paramètres) et la version correspondant à l'état
+    actuel de ses sources
+
+    Usage dans une vue, après les contrôles d'accès :
+        rapport = RapportCacheService.rapport('pv_confrontation', parametres, sources)
+        if rapport.disponible():
+            return rapport.reponse(filename)
+        buffer = BytesIO()
+        ... doc = SimpleDocTemplate(buffer, ...) ; doc.build(elements)
+        return rapport.enregistrer(buffer, filename)
+    """
+
+    def __init__(self, type_rapport, parametres, sources):
+        self.type_rapport = type_rapport
+        self.parametres = parametres
+        self.sources = sources
+        self.actif = _config()['ACTIF']
+        self._chemin = None
+
+    @property
+    def repertoire(self):
+        return os.path.join(
+            _config()['REPERTOIRE'],
+            self.type_rapport,
+            _hash([VERSION_GABARITS, self.type_rapport, self.parametres])[:32],
+        )
+
+    @property
+    def chemin(self):
+        """Fichier de la version courante (empreinte calculée au premier accès)"""
+        if self._chemin is None:
+            empreinte = RapportCacheService.empreinte(*self.sources)
+            self._chemin = os.path.join(self.repertoire, f"{empreinte[:32]}.pdf")
+        return self._chemin
+
+    def recalculer_empreinte(self):
+        """
+        À appeler après la génération d'un rapport qui crée lui-même des
+        lignes de ses sources (snapshots d'inventaire créés à la demande) :
+        la version enregistrée correspond alors à l'état après génération
+        """
+        self._chemin = None
+
+    def disponible(self):
+        """La version courante est-elle déjà sur disque ?"""
+        if not self.actif:
+            return False
+        if os.path.exists(self.chemin):
+            logger.info(f"[RAPPORTS_CACHE] {self.type_rapport} servi depuis le cache: {self.chemin}")
+            return True
+        return False
+
+    def reponse(self, nom_fichier, disposition='inline'):
+        """Réponse lisant le PDF en cache"""
+        try:
+            # Date de dernier service : la purge ne retire que les rapports délaissés
+            os.utime(self.chemin)
+        except OSError:
+            pass
+        return FileResponse(
+            open(self.chemin, 'rb'),
+            content_type='application/pdf',
+            as_attachment=disposition == 'attachment',
+            filename=nom_fichier,
+        )
+
+    def enregistrer(self, contenu, nom_fichier, disposition='inline'):
+        """
+        Enregistre le PDF produit comme version courante (en remplaçant les
+        versions précédentes) et retourne la réponse
+
+        Args:
+            contenu: bytes ou BytesIO contenant le PDF
+        """
+        if isinstance(contenu, BytesIO):
+            contenu = contenu.getvalue()
+
+        if self.actif:
+            try:
+                self._ecrire(contenu)
+            except OSError as e:
+                # Le cache ne doit jamais empêcher le téléchargement
+                logger.warning(f"[RAPPORTS_CACHE] Écriture impossible pour {self.type_rapport}: {e}")
+
+        response = HttpResponse(contenu, content_type='application/pdf')
+        response['Content-Disposition'] = f'{disposition}; filename="{nom_fichier}"'
+        return response
+
+    def _ecrire(self, contenu):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        repertoire = self.repertoire
+        os.makedirs(repertoire, exist_ok=True)
+
+        descripteur, temporaire = tempfile.mkstemp(dir=repertoire, suffix='.tmp')
+        try:
+            with os.fdopen(descripteur, 'wb') as fichier:
+                fichier.write(contenu)
+            os.replace(temporaire, self.chemin)
+        except OSError:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+            raise
+
+        # Une seule version par rapport : les précédentes sont périmées
+        for nom in os.listdir(repertoire):
+            chemin = os.path.join(repertoire, nom)
+            if chemin != self.chemin and nom.endswith('.pdf'):
+                try:
+                    os.remove(chemin)
+                except OSError:
+                    pass
+
+        logger.info(f"[RAPPORTS_CACHE] {self.type_rapport} mis en cache: {self.chemin}")
+
+        if cache.add(CLE_PURGE, 1, INTERVALLE_PURGE):
+            RapportCacheService.purger()
+
+
+class RapportCacheService:
+    """Empreinte des données sources et accès au cache des rapports"""
+
+    @staticmethod
+    def rapport(type_rapport, parametres, sources):
+        """
+        Args:
+            type_rapport: identifiant du rapport ('pv_confrontation'...)
+            parametres: dict JSON-sérialisable de tout ce qui, hors sources,
+                figure sur le document
+            sources: querysets des lignes lues par le rapport
+
+        Returns:
+            RapportEnCache
+        """
+        return RapportEnCache(type_rapport, parametres, sources)
+
+    @staticmethod
+    def empreinte(*querysets):
+        """Empreinte du contenu des lignes de chaque queryset"""
+        return _hash([
+            [queryset.model._meta.label, RapportCacheService._empreinte_lignes(queryset)]
+            for queryset in querysets
+        ])
+
+    @staticmethod
+    def _empreinte_lignes(queryset):
+        """
+        Empreinte de toutes les colonnes de toutes les lignes, dans l'ordre
+        des clés primaires
+        """
+        meta = queryset.model._meta
+        colonnes = [field.attname for field in meta.concrete_fields]
+        lignes = queryset.order_by('pk').values_list(*colonnes)
+        connexion = connections[queryset.db]
+
+        if connexion.vendor == 'postgresql':
+            sql, params = lignes.order_by().query.sql_with_params()
+            cle = connexion.ops.quote_name(meta.pk.column)
+            with connexion.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*), md5(COALESCE(string_agg(md5(t::text), '' ORDER BY t.{cle}), '')) "
+                    f"FROM ({sql}) t",
+                    params,
+                )
+                nombre, empreinte = cursor.fetchone()
+            return [nombre, empreinte]
+
+        empreinte = hashlib.sha256()
+        nombre = 0
+        for ligne in lignes.iterator(chunk_size=TAILLE_LOT):
+            empreinte.update(json.dumps(ligne, sort_keys=True, default=str).encode('utf-8'))
+            empreinte.update(b'\n')
+            nombre += 1
+        return [nombre, empreinte.hexdigest()]
+
+    @staticmethod
+    def purger(conservation_jours=None):
+        """
+        Supprime les rapports non servis depuis conservation_jours (réglage
+        CONSERVATION_JOURS par défaut) et les répertoires devenus vides
+
+        Returns:
+            Nombre de fichiers supprimés
+        """
+        config = _config()
+        if conservation_jours is None:
+            conservation_jours = config['CONSERVATION_JOURS']
+        limite = time.time() - conservation_jours * 86400
+        racine = str(config['REPERTOIRE'])
+        supprimes = 0
+
+        for repertoire, sous_repertoires, fichiers in os.walk(racine, topdown=False):
+            for nom in fichiers:
+                chemin = os.path.join(repertoire, nom)
+                try:
+                    if os.path.getmtime(chemin) < limite:
+                        os.remove(chemin)
+                        supprimes += 1
+                except OSError:
+                    pass
+            if repertoire != racine:
+                try:
+                    os.rmdir(repertoire)  # uniquement s'il est vide
+                except OSError:
+                    pass
+
+        if supprimes:
+            logger.info(f"[RAPPORTS_CACHE] Purge: {supprimes} rapport(s) de plus de {conservation_jours} jours supprimé(s)")
+        return supprimes
@@ -0,0 +1,174 @@
+# inventaire/services/saisie_inventaire_service.py
+"""
+Saisie groupée des périodes d'un inventaire journalier
+
+Enregistrer les périodes une à une déclenche, pour chacune, le recalcul des
+totaux de l'inventaire, la sauvegarde de l'inventaire, le recalcul et la
+sauvegarde de la recette liée, puis les signaux associés (plus de 100
+requêtes pour une journée complète).
+
+Ici toutes les périodes sont écrites en bloc (bulk_create / bulk_update),
+les totaux et la recette potentielle sont calculés une seule fois depuis
+les valeurs saisies, la recette et l'état d'impertinence sont mis à jour en
+une étape, et les signaux post_save de l'inventaire et de la recette sont
+émis une seule fois après validation de la transaction.
+"""
+
+from contextlib import contextmanager
+import logging
+import threading
+
+from django.db import router, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+_etat = threading.local()
+
+
+@contextmanager
+def saisie_groupee():
+    """
+    Signale aux receveurs de inventaire/signals.py que les recalculs en
+    cascade (totaux, recette liée) sont pris en charge par l'appelant
+    """
+    precedent = getattr(_etat, 'actif', False)
+    _etat.actif = True
+    try:
+        yield
+    finally:
+        _etat.actif = precedent
+
+
+def en_saisie_groupee():
+    """True pendant une saisie groupée (dans le thread courant)"""
+    return getattr(_etat, 'actif', False)
+
+
+class SaisieInventaireService:
+    """Enregistrement en bloc des périodes d'un inventaire et de ses indicateurs"""
+
+    @staticmethod
+    def enregistrer_periodes(inventaire, valeurs, user=None, observations_periodes=None, observations=None):
+        """
+        Remplace les périodes de l'inventaire par celles de valeurs
+
+        Args:
+            inventaire: InventaireJournalier (déjà enregistré)
+            valeurs: dict {code_periode: nombre_vehicules} ; les périodes
+                absentes sont supprimées
+            user: auteur de la modification (derniere_modification_par)
+            observations_periodes: dict {code_periode: texte} ; None conserve
+                les observations des périodes existantes
+            observations: observations générales de l'inventaire (None = inchangées)
+
+        Returns:
+            total_vehicules de l'inventaire
+        """
+        from inventaire.models import DetailInventairePeriode, InventaireJournalier, RecetteJournaliere
+
+        maintenant = timezone.now()
+
+        with transaction.atomic(), saisie_groupee():
+            # ========== PÉRIODES ==========
+            existants = {detail.periode: detail for detail in inventaire.details_periodes.all()}
+            a_creer, a_modifier = [], []
+
+            for periode, nombre in valeurs.items():
+                detail = existants.pop(periode, None)
+                if observations_periodes is not None:
+                    observation = observations_periodes.get(periode, '')
+                else:
+                    observation = detail.observations_periode if detail else ''
+
+                if detail is None:
+                    a_creer.append(DetailInventairePeriode(
+                        inventaire=inventaire,
+                        periode=periode,
+                        nombre_vehicules=nombre,
+                        observations_periode=observation,
+                    ))
+                elif detail.nombre_vehicules != nombre or detail.observations_periode != observation:
+                    detail.nombre_vehicules = nombre
+                    detail.observations_periode = observation
+                    detail.modifie_le = maintenant
+                    a_modifier.append(detail)
+
+            if existants:
+                DetailInventairePeriode.objects.filter(
+                    pk__in=[detail.pk for detail in existants.values()]
+                ).delete()
+            if a_creer:
+                DetailInventairePeriode.objects.bulk_create(a_creer)
+            if a_modifier:
+                DetailInventairePeriode.objects.bulk_update(
+                    a_modifier, ['nombre_vehicules', 'observations_periode', 'modifie_le']
+                )
+
+            # ========== TOTAUX DE L'INVENTAIRE ==========
+            inventaire.total_vehicules = sum(valeurs.values())
+            inventaire.nombre_periodes_saisies = len(valeurs)
+            inventaire.date_modification = maintenant
+            champs_inventaire = ['total_vehicules', 'nombre_periodes_saisies', 'date_modification']
+            if user is not None:
+                inventaire.derniere_modification_par = user
+                champs_inventaire.append('derniere_modification_par')
+            if observations is not None:
+                inventaire.observations = observations
+                champs_inventaire.append('observations')
+
+            InventaireJournalier.objects.filter(pk=inventaire.pk).update(
+                **{champ: getattr(inventaire, champ) for champ in champs_inventaire}
+            )
+
+            # ========== RECETTE LIÉE ==========
+            recette = RecetteJournaliere.objects.filter(
+                poste_id=inventaire.poste_id, date=inventaire.date
+            ).select_related('poste').first()
+            champs_recette = ['inventaire_associe', 'recette_potentielle', 'ecart', 'taux_deperdition', 'date_modification']
+
+            if recette is not None:
+                recette.inventaire_associe = inventaire
+                # Calcul depuis les totaux en mémoire ; marque la journée impertinente si besoin
+                recette.calculer_indicateurs(
+                    totaux=(inventaire.total_vehicules, inventaire.nombre_periodes_saisies)
+                )
+                recette.date_modification = maintenant
+                RecetteJournaliere.objects.filter(pk=recette.pk).update(
+                    **{champ: getattr(recette, champ) for champ in champs_recette}
+                )
+
+            transaction.on_commit(lambda: SaisieInventaireService._notifier(
+                inventaire, champs_inventaire, recette, champs_recette
+            ))
+
+        logger.debug(
+            f"[SAISIE_INVENTAIRE] {inventaire.poste_id} {inventaire.date}: "
+            f"{len(a_creer)} créée(s), {len(a_modifier)} modifiée(s), {len(existants)} supprimée(s)"
+        )
+        return inventaire.total_vehicules
+
+    @staticmethod
+    def _notifier(inventaire, champs_inventaire, recette, champs_recette):
+        """
+        Émet une fois les post_save différés (journalisation, invalidation
+        des caches et du tableau de bord) ; les recalculs en cascade sont
+        ignorés par les receveurs puisqu'ils sont déjà faits
+        """
+        with transaction.atomic(), saisie_groupee():
+            emettre_post_save(inventaire, champs_inventaire)
+            if recette is not None:
+                emettre_post_save(recette, champs_recette)
+
+
+def emettre_post_save(instance, champs):
+    """Émet post_save pour une instance écrite par update() / bulk_update()"""
+    post_save.send(
+        sender=instance.__class__,
+        instance=instance,
+        created=False,
+        update_fields=frozenset(champs),
+        raw=False,
+        using=router.db_for_write(instance.__class__),
+    )
@@ -0,0 +1,159 @@
+# inventaire/services/statistiques_service.py
+"""
+Agrégation des recettes journalières par période (semaine, mois,
+trimestre, semestre, année) en une seule requête groupée
+
+Les tranches sont calculées en SQL (TruncWeek / TruncMonth / TruncQuarter /
+TruncYear) ; les semestres sont obtenus en regroupant deux trimestres.
+Les moyennes sont recomposées à partir des sommes et effectifs pour que le
+regroupement reste exact.
+"""
+
+from datetime import date, timedelta
+import logging
+
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+logger = logging.getLogger('supper')
+
+MOIS_NOMS = {
+    1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
+    5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
+    9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
+}
+
+TRONCATURES = {
+    'hebdomadaire': TruncWeek,
+    'mensuel': TruncMonth,
+    'trimestriel': TruncQuarter,
+    'semestriel': TruncQuarter,
+    'annuel': TruncYear,
+}
+
+
+def exclure_jours_impertinents():
+    """
+    Condition d'anti-jointure excluant les recettes des jours marqués
+    impertinents (configuration globale ou d'un poste)
+    """
+    from inventaire.models import ConfigurationJour, StatutJour
+
+    return ~Exists(ConfigurationJour.objects.filter(
+        date=OuterRef('date'),
+        statut=StatutJour.IMPERTINENT
+    ))
+
+
+class StatistiquesPeriodeService:
+    """Tranches de statistiques de recettes calculées en une requête"""
+
+    @staticmethod
+    def plage(periode, annee):
+        """Plage de dates couverte : l'année, ou les trois dernières années en annuel"""
+        if periode == 'annuel':
+            return date(annee - 2, 1, 1), date(annee, 12, 31)
+        return date(annee, 1, 1), date(annee, 12, 31)
+
+    @staticmethod
+    def agreger(queryset, periode, date_debut, date_fin):
+        """
+        Agrège queryset (RecetteJournaliere) par tranche de la période
+
+        Returns:
+            Liste ordonnée de dicts : debut, fin (bornés à la plage),
+            nombre_jours, montant_total, montant_potentiel, taux_moyen
+            Les tranches sans recette sont omises.
+        """
+        troncature = TRONCATURES.get(periode)
+        if troncature is None:
+            return []
+
+        lignes = (
+            queryset
+            .filter(date__range=(date_debut, date_fin))
+            .annotate(tranche=troncature('date'))
+            .values('tranche')
+            .annotate(
+                nombre_jours=Count('id'),
+                montant_total=Sum('montant_declare'),
+                montant_potentiel=Sum('recette_potentielle'),
+                somme_taux=Sum('taux_deperdition'),
+                nombre_taux=Count('taux_deperdition'),
+            )
+            .order_by('tranche')
+        )
+
+        tranches = {}
+        for ligne in lignes:
+            debut = ligne['tranche']
+            if periode == 'semestriel':
+                debut = date(debut.year, 1 if debut.month <= 6 else 7, 1)
+
+            tranche = tranches.setdefault(debut, {
+                'nombre_jours': 0,
+                'montant_total': 0.0,
+                'montant_potentiel': 0.0,
+                'somme_taux': 0.0,
+                'nombre_taux': 0,
+            })
+            tranche['nombre_jours'] += ligne['nombre_jours']
+            tranche['montant_total'] += float(ligne['montant_total'] or 0)
+            tranche['montant_potentiel'] += float(ligne['montant_potentiel'] or 0)
+            tranche['somme_taux'] += float(ligne['somme_taux'] or 0)
+            tranche['nombre_taux'] += ligne['nombre_taux']
+
+        resultats = []
+        for debut in sorted(tranches):
+            tranche = tranches[debut]
+            fin = StatistiquesPeriodeService._fin_tranche(periode, debut)
+            resultats.append({
+                'debut': max(debut, date_debut),
+                'fin': min(fin, date_fin),
+                'nombre_jours': tranche['nombre_jours'],
+                'montant_total': tranche['montant_total'],
+                'montant_potentiel': tranche['montant_potentiel'],
+                'taux_moyen': (
+                    tranche['somme_taux'] / tranche['nombre_taux']
+                    if tranche['nombre_taux'] else None
+                ),
+            })
+        return resultats
+
+    @staticmethod
+    def totaux_par_plages(queryset, plages, champ='montant_declare'):
+        """
+        Somme de champ sur plusieurs plages de dates en une requête
+        (agrégation conditionnelle)
+
+        Args:
+            plages: dict {cle: (date_debut, date_fin)}
+
+        Returns:
+            dict {cle: float}
+        """
+        if not plages:
+            return {}
+
+        condition = Q()
+        for debut, fin in plages.values():
+            condition |= Q(date__range=(debut, fin))
+
+        totaux = queryset.filter(condition).aggregate(**{
+            str(cle): Sum(champ, filter=Q(date__range=(debut, fin)))
+            for cle, (debut, fin) in plages.items()
+        })
+        return {cle: float(totaux[str(cle)] or 0) for cle in plages}
+
+    @staticmethod
+    def _fin_tranche(periode, debut):
+        """Dernier jour de la tranche commençant à debut"""
+        if periode == 'hebdomadaire':
+            return debut + timedelta(days=6)
+        if periode == 'annuel':
+            return date(debut.year, 12, 31)
+
+        nombre_mois = {'mensuel': 1, 'trimestriel': 3, 'semestriel': 6}[periode]
+        mois_suivant = debut.month - 1 + nombre_mois
+        annee_suivante = debut.year + mois_suivant // 12
+        return date(annee_suivante, mois_suivant % 12 + 1, 1) - timedelta(days=1)
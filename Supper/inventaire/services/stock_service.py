@@ -0,0 +1,191 @@
+# inventaire/services/stock_service.py
+"""
+Mutations du stock global des postes (GestionStock)
+
+Les ventes, chargements et transferts modifient le stock par ce service :
+- les lignes GestionStock concernées sont verrouillées (SELECT ... FOR
+  UPDATE) par identifiant de poste croissant : deux transferts croisés
+  A → B et B → A s'attendent au lieu de s'interbloquer ;
+- chaque variation est appliquée par UPDATE valeur_monetaire =
+  valeur_monetaire + delta (F()), jamais en réenregistrant une instance lue
+  plus tôt ;
+- l'historique (HistoriqueStock) et l'événement (StockEvent) de chaque
+  mouvement sont créés dans la même transaction, avec les stocks avant et
+  après lus sous verrou.
+
+Le stock reste donc exact sous écritures concurrentes, sans recalcul
+périodique depuis les événements.
+"""
+
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger('supper')
+
+PRIX_TICKET = Decimal('500')
+
+# Contrôle d'un débit supérieur au stock disponible
+REFUSER = 'refuser'  # StockInsuffisant levée, transaction annulée
+BORNER = 'borner'    # stock ramené à 0
+
+
+class StockInsuffisant(ValueError):
+    """Débit supérieur au stock disponible du poste"""
+
+
+class MouvementStock:
+    """
+    Variation du stock d'un poste, avec les champs propres à son historique
+    et à son événement
+
+    Args:
+        poste: Poste concerné
+        montant: variation signée (positive = entrée, négative = sortie)
+        event_type: type de StockEvent (VENTE, CHARGEMENT, TRANSFERT_IN...)
+        historique: champs complémentaires de HistoriqueStock (type_stock,
+            numero_bordereau, commentaire...) ; None = pas d'historique
+        evenement: champs complémentaires ou remplaçants de StockEvent
+            (metadata, commentaire, event_datetime, reference_id...) ; les
+            métadonnées reçoivent l'identifiant de l'historique créé
+        series: séries à associer à l'historique
+        controle: REFUSER, BORNER ou None (stock négatif accepté)
+    """
+
+    def __init__(self, poste, montant, event_type, historique=None, evenement=None,
+                 series=None, controle=None):
+        self.poste = poste
+        self.montant = montant
+        self.event_type = event_type
+        self.historique = historique
+        self.evenement = evenement or {}
+        self.series = series or []
+        self.controle = controle
+
+        # Renseignés par StockService.appliquer
+        self.stock_avant = None
+        self.stock_apres = None
+        self.historique_cree = None
+        self.evenement_cree = None
+
+    @property
+    def nombre_tickets(self):
+        """Variation signée du nombre de tickets"""
+        return int(self.montant / PRIX_TICKET)
+
+
+class StockService:
+    """Verrouillage et mise à jour atomique des stocks"""
+
+    @staticmethod
+    def verrouiller(postes):
+        """
+        Verrouille, dans l'ordre des identifiants, les stocks des postes
+        (créés à zéro s'ils n'existent pas) jusqu'à la fin de la transaction
+
+        À appeler en tête d'une opération qui lit ou découpe des séries avant
+        de modifier le stock ; appliquer() reverrouille sans coût les mêmes
+        lignes.
+
+        Returns:
+            dict {poste_id: GestionStock}
+        """
+        from inventaire.models import GestionStock
+
+        ids = sorted({getattr(poste, 'pk', poste) for poste in postes})
+        GestionStock.objects.bulk_create(
+            [GestionStock(poste_id=poste_id) for poste_id in ids],
+            ignore_conflicts=True,
+        )
+        return {
+            stock.poste_id: stock
+            for stock in GestionStock.objects.select_for_update().filter(poste_id__in=ids).order_by('poste_id')
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def appliquer(mouvements, user=None):
+        """
+        Applique des mouvements (éventuellement sur plusieurs postes) en une
+        transaction : verrouillage ordonné, une UPDATE F() par poste, puis
+        historiques et événements
+
+        Returns:
+            la liste des mouvements, complétés (stock_avant, stock_apres,
+            historique_cree, evenement_cree)
+
+        Raises:
+            StockInsuffisant: débit refusé (contrôle REFUSER)
+        """
+        from inventaire.models import GestionStock, HistoriqueStock, StockEvent
+
+        stocks = StockService.verrouiller(mouvement.poste for mouvement in mouvements)
+        valeurs = {poste_id: stock.valeur_monetaire for poste_id, stock in stocks.items()}
+
+        # ========== STOCKS AVANT / APRÈS, SOUS VERROU ==========
+        for mouvement in mouvements:
+            avant = valeurs[mouvement.poste.pk]
+            apres = avant + mouvement.montant
+            if apres < 0 and mouvement.controle == REFUSER:
+                raise StockInsuffisant(
+                    f"Stock insuffisant à {mouvement.poste.nom}. "
+                    f"Disponible: {avant}, Demandé: {-mouvement.montant}"
+                )
+            if apres < 0 and mouvement.controle == BORNER:
+                apres = Decimal('0')
+            mouvement.stock_avant, mouvement.stock_apres = avant, apres
+            valeurs[mouvement.poste.pk] = apres
+
+        # ========== UNE MISE À JOUR PAR POSTE ==========
+        maintenant = timezone.now()
+        for poste_id, valeur in valeurs.items():
+            delta = valeur - stocks[poste_id].valeur_monetaire
+            GestionStock.objects.filter(poste_id=poste_id).update(
+                valeur_monetaire=F('valeur_monetaire') + delta,
+                nombre_tickets=int(valeur / PRIX_TICKET),
+                derniere_mise_a_jour=maintenant,
+            )
+            logger.info(
+                f"Stock poste {poste_id}: {stocks[poste_id].valeur_monetaire} → {valeur}"
+            )
+
+        # ========== HISTORIQUES ET ÉVÉNEMENTS ==========
+        for mouvement in mouvements:
+            if mouvement.historique is not None:
+                mouvement.historique_cree = HistoriqueStock.objects.create(
+                    poste=mouvement.poste,
+                    type_mouvement='CREDIT' if mouvement.montant > 0 else 'DEBIT',
+                    montant=abs(mouvement.montant),
+                    nombre_tickets=abs(mouvement.nombre_tickets),
+                    stock_avant=mouvement.stock_avant,
+                    stock_apres=mouvement.stock_apres,
+                    effectue_par=user,
+                    **mouvement.historique
+                )
+                if mouvement.series:
+                    mouvement.historique_cree.series_tickets_associees.add(*mouvement.series)
+
+            champs = {
+                'event_datetime': maintenant,
+                'montant_variation': mouvement.montant,
+                'nombre_tickets_variation': mouvement.nombre_tickets,
+                'stock_resultant': mouvement.stock_apres,
+                'tickets_resultants': int(mouvement.stock_apres / PRIX_TICKET),
+                'effectue_par': user,
+            }
+            champs.update(mouvement.evenement)
+            if mouvement.historique_cree is not None:
+                champs.setdefault('reference_id', str(mouvement.historique_cree.id))
+                champs.setdefault('reference_type', 'HistoriqueStock')
+                if 'metadata' in champs:
+                    champs['metadata'] = dict(champs['metadata'], historique_id=mouvement.historique_cree.id)
+            mouvement.evenement_cree = StockEvent.objects.create(
+                poste=mouvement.poste,
+                event_type=mouvement.event_type,
+                **champs
+            )
+
+        return mouvements
@@ -17,6 +17,10 @@ import logging
 logger = logging.getLogger('supper')
 
 
+class SerieIntrouvable(Exception):
+    """Aucune série en stock au poste origine ne couvre la plage demandée"""
+
+
 class TransfertTicketsService:
     """
     Service pour gérer les transferts de tickets entre postes
@@ -55,297 +59,282 @@ class TransfertTicketsService:
         }
     
     @staticmethod
-    @transaction.atomic
     def executer_transfert(poste_origine, poste_destination, couleur, numero_premier, numero_dernier, user, commentaire=''):
         """
-        Exécute le transfert après validation
+        Exécute le transfert d'une série après validation
+        
+        Returns:
+            tuple (success, message, serie_origine, serie_destination)
+        """
+        success, message, series_transferees, series_destination = TransfertTicketsService.executer_transferts(
+            poste_origine, poste_destination, [(couleur, numero_premier, numero_dernier)], user, commentaire
+        )
+        if not success:
+            return False, message, None, None
+        return True, message, series_transferees[0], series_destination[0]
+    
+    @staticmethod
+    def executer_transferts(poste_origine, poste_destination, series, user, commentaire=''):
+        """
+        Exécute en une transaction le transfert de plusieurs séries, sous un
+        seul bordereau
         
-        VERSION CORRIGÉE:
-        - Remplit les champs structurés de HistoriqueStock
+        - Remplit les champs structurés de HistoriqueStock (première série)
+          et details_approvisionnement (toutes les séries)
         - Associe les séries via series_tickets_associees
-        - Remplit le JSONField details_approvisionnement
+        - Met à jour les deux stocks par StockService (verrous ordonnés,
+          UPDATE F()) : un transfert croisé ou une vente simultanée sur l'un
+          des postes ne peut ni perdre une variation ni s'interbloquer
+        
+        Args:
+            series: liste de tuples (couleur, numero_premier, numero_dernier)
         
         Returns:
-            tuple (success, message, serie_origine, serie_destination)
+            tuple (success, message, series_transferees, series_destination)
         """
-        from inventaire.models import SerieTicket, GestionStock, HistoriqueStock, StockEvent
-        from accounts.models import NotificationUtilisateur, UtilisateurSUPPER
+        from inventaire.services.stock_service import BORNER, MouvementStock, StockService
         
         try:
-            timestamp = timezone.now()
-            nombre_tickets = numero_dernier - numero_premier + 1
-            montant = Decimal(nombre_tickets) * Decimal('500')
-            
-            logger.info(f"=== EXÉCUTION TRANSFERT ===")
-            logger.info(f"De: {poste_origine.nom} vers: {poste_destination.nom}")
-            logger.info(f"Série: {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}")
-            
-            # ============================================================
-            # ÉTAPE 1 : Trouver et traiter la série au poste origine
-            # ============================================================
-            serie_source = SerieTicket.objects.filter(
-                poste=poste_origine,
-                couleur=couleur,
-                statut='stock',
-                numero_premier__lte=numero_premier,
-                numero_dernier__gte=numero_dernier
-            ).first()
-            
-            if not serie_source:
-                return False, "Série source introuvable", None, None
-            
-            serie_transferee = None
-            
-            # CAS A: Transfert de la série complète
-            if (serie_source.numero_premier == numero_premier and 
-                serie_source.numero_dernier == numero_dernier):
+            with transaction.atomic():
+                timestamp = timezone.now()
                 
-                logger.info("→ Transfert complet de la série")
-                serie_source.statut = 'transfere'
-                serie_source.date_utilisation = timestamp.date()
-                serie_source.poste_destination_transfert = poste_destination
-                serie_source.commentaire = f"Transféré vers {poste_destination.nom} - {commentaire}"
-                serie_source.save()
-                serie_transferee = serie_source
-            
-            # CAS B: Transfert partiel - découpage
-            else:
-                logger.info("→ Transfert partiel - découpage")
+                logger.info(f"=== EXÉCUTION TRANSFERT ===")
+                logger.info(f"De: {poste_origine.nom} vers: {poste_destination.nom}")
                 
-                original_premier = serie_source.numero_premier
-                original_dernier = serie_source.numero_dernier
-                type_entree_original = serie_source.type_entree
-                responsable_original = serie_source.responsable_reception
+                # Verrou des deux stocks avant de toucher aux séries
+                StockService.verrouiller([poste_origine, poste_destination])
                 
-                # Créer partie AVANT si nécessaire
-                if original_premier < numero_premier:
-                    SerieTicket.objects.create(
-                        poste=poste_origine,
-                        couleur=couleur,
-                        numero_premier=original_premier,
-                        numero_dernier=numero_premier - 1,
-                        statut='stock',
-                        type_entree=type_entree_original,
-                        responsable_reception=responsable_original,
-                        commentaire="Reste après transfert partiel"
+                series_transferees = []
+                series_destination = []
+                infos_series = []
+                for couleur, numero_premier, numero_dernier in series:
+                    logger.info(f"Série: {couleur.libelle_affichage} #{numero_premier}-{numero_dernier}")
+                    
+                    # ====================================================
+                    # ÉTAPE 1 : Traiter la série au poste origine
+                    # ====================================================
+                    serie_transferee = TransfertTicketsService._ceder_serie_origine(
+                        poste_origine, poste_destination, couleur,
+                        numero_premier, numero_dernier, commentaire, timestamp
                     )
-                    logger.info(f"  Partie avant: #{original_premier}-{numero_premier - 1}")
+                    if not serie_transferee:
+                        raise SerieIntrouvable(
+                            f"Série source introuvable: {couleur.libelle_affichage} "
+                            f"#{numero_premier}-{numero_dernier}"
+                        )
+                    
+                    # ====================================================
+                    # ÉTAPE 2 : Créer/fusionner série au poste destination
+                    # ====================================================
+                    serie_destination = TransfertTicketsService._creer_serie_destination(
+                        poste_destination, couleur, numero_premier, numero_dernier,
+                        user, poste_origine, commentaire, timestamp
+                    )
+                    
+                    nombre_tickets = numero_dernier - numero_premier + 1
+                    series_transferees.append(serie_transferee)
+                    series_destination.append(serie_destination)
+                    infos_series.append({
+                        'couleur_id': couleur.id,
+                        'couleur_nom': couleur.libelle_affichage,
+                        'couleur_code': couleur.code_normalise,
+                        'numero_premier': numero_premier,
+                        'numero_dernier': numero_dernier,
+                        'nombre_tickets': nombre_tickets,
+                        'valeur': str(Decimal(nombre_tickets) * Decimal('500'))
+                    })
+                
+                nombre_tickets = sum(info['nombre_tickets'] for info in infos_series)
+                montant = Decimal(nombre_tickets) * Decimal('500')
+                numero_bordereau = TransfertTicketsService._generer_bordereau()
                 
-                # Créer partie APRÈS si nécessaire
-                if original_dernier > numero_dernier:
-                    SerieTicket.objects.create(
-                        poste=poste_origine,
-                        couleur=couleur,
-                        numero_premier=numero_dernier + 1,
-                        numero_dernier=original_dernier,
-                        statut='stock',
-                        type_entree=type_entree_original,
-                        responsable_reception=responsable_original,
-                        commentaire="Reste après transfert partiel"
+                # ========================================================
+                # ÉTAPE 3 : Stocks, historiques structurés et événements
+                # ========================================================
+                premiere = infos_series[0]
+                couleur = series[0][0]
+                libelle_series = ", ".join(
+                    f"{info['couleur_nom']} #{info['numero_premier']}-{info['numero_dernier']}"
+                    for info in infos_series
+                )
+                details_series = {
+                    'series': infos_series,
+                    'type_operation': 'transfert',
+                    'numero_bordereau': numero_bordereau,
+                    'poste_origine_id': poste_origine.id,
+                    'poste_origine_nom': poste_origine.nom,
+                    'poste_destination_id': poste_destination.id,
+                    'poste_destination_nom': poste_destination.nom
+                }
+                champs_historique = {
+                    'type_stock': 'reapprovisionnement',
+                    'poste_origine': poste_origine,
+                    'poste_destination': poste_destination,
+                    'numero_bordereau': numero_bordereau,
+                    'numero_premier_ticket': premiere['numero_premier'],
+                    'numero_dernier_ticket': premiere['numero_dernier'],
+                    'couleur_principale': couleur,
+                    'details_approvisionnement': details_series,
+                }
+                metadata_series = [
+                    dict(
+                        info,
+                        couleur=info['couleur_nom'],
+                        numero_bordereau=numero_bordereau,
+                        serie_transferee_id=serie_transferee.id,
+                        serie_destination_id=serie_destination.id if serie_destination else None
                     )
-                    logger.info(f"  Partie après: #{numero_dernier + 1}-{original_dernier}")
+                    for info, serie_transferee, serie_destination
+                    in zip(infos_series, series_transferees, series_destination)
+                ]
+                metadata = {'series': metadata_series}
+                if len(metadata_series) == 1:
+                    metadata['serie'] = metadata_series[0]
                 
-                # Transformer la série originale en série transférée
-                serie_source.numero_premier = numero_premier
-                serie_source.numero_dernier = numero_dernier
-                serie_source.nombre_tickets = nombre_tickets
-                serie_source.valeur_monetaire = montant
-                serie_source.statut = 'transfere'
-                serie_source.date_utilisation = timestamp.date()
-                serie_source.poste_destination_transfert = poste_destination
-                serie_source.commentaire = f"Transféré vers {poste_destination.nom} - {commentaire}"
-                serie_source.save()
+                sortie, entree = StockService.appliquer([
+                    MouvementStock(
+                        poste_origine, -montant, 'TRANSFERT_OUT',
+                        historique=dict(
+                            champs_historique,
+                            commentaire=f"Cession {libelle_series} vers {poste_destination.nom}"
+                        ),
+                        evenement={
+                            'event_datetime': timestamp,
+                            'metadata': dict(metadata, poste_destination={
+                                'id': poste_destination.id,
+                                'nom': poste_destination.nom,
+                                'code': poste_destination.code
+                            }),
+                            'commentaire': f"Transfert vers {poste_destination.nom}",
+                        },
+                        series=series_transferees,
+                        controle=BORNER,
+                    ),
+                    MouvementStock(
+                        poste_destination, montant, 'TRANSFERT_IN',
+                        historique=dict(
+                            champs_historique,
+                            commentaire=f"Réception {libelle_series} de {poste_origine.nom}"
+                        ),
+                        evenement={
+                            'event_datetime': timestamp,
+                            'metadata': dict(metadata, poste_origine={
+                                'id': poste_origine.id,
+                                'nom': poste_origine.nom,
+                                'code': poste_origine.code
+                            }),
+                            'commentaire': f"Réception depuis {poste_origine.nom}",
+                        },
+                        series=[serie for serie in series_destination if serie],
+                    ),
+                ], user)
                 
-                serie_transferee = serie_source
+                # ========================================================
+                # ÉTAPE 4 : Notifications
+                # ========================================================
+                TransfertTicketsService._envoyer_notifications(
+                    poste_origine, poste_destination, libelle_series,
+                    montant, nombre_tickets, numero_bordereau, user
+                )
             
-            # ============================================================
-            # ÉTAPE 2 : Créer/fusionner série au poste destination
-            # ============================================================
-            serie_destination = TransfertTicketsService._creer_serie_destination(
-                poste_destination, couleur, numero_premier, numero_dernier,
-                user, poste_origine, commentaire, timestamp
-            )
-            
-            # ============================================================
-            # ÉTAPE 3 : Mettre à jour les stocks globaux
-            # ============================================================
-            stock_origine, _ = GestionStock.objects.get_or_create(
-                poste=poste_origine,
-                defaults={'valeur_monetaire': Decimal('0')}
-            )
-            stock_origine_avant = stock_origine.valeur_monetaire
-            stock_origine.valeur_monetaire = max(Decimal('0'), stock_origine.valeur_monetaire - montant)
-            stock_origine.save()
-            
-            stock_destination, _ = GestionStock.objects.get_or_create(
-                poste=poste_destination,
-                defaults={'valeur_monetaire': Decimal('0')}
-            )
-            stock_destination_avant = stock_destination.valeur_monetaire
-            stock_destination.valeur_monetaire += montant
-            stock_destination.save()
-            
-            logger.info(f"Stock {poste_origine.nom}: {stock_origine_avant} → {stock_origine.valeur_monetaire}")
-            logger.info(f"Stock {poste_destination.nom}: {stock_destination_avant} → {stock_destination.valeur_monetaire}")
+            logger.info(f"=== ✅ TRANSFERT RÉUSSI - Bordereau {numero_bordereau} ===")
+            logger.info(f"  Historique origine ID: {sortie.historique_cree.id}")
+            logger.info(f"  Historique destination ID: {entree.historique_cree.id}")
+            logger.info(f"  Séries: {libelle_series}")
             
-            # ============================================================
-            # ÉTAPE 4 : Créer historiques avec CHAMPS STRUCTURÉS (CORRECTION)
-            # ============================================================
-            numero_bordereau = TransfertTicketsService._generer_bordereau()
+            return True, f"Transfert réussi - Bordereau {numero_bordereau}", series_transferees, series_destination
             
-            # Préparer les détails structurés pour le JSONField
-            details_serie = {
-                'series': [{
-                    'couleur_id': couleur.id,
-                    'couleur_nom': couleur.libelle_affichage,
-                    'couleur_code': couleur.code_normalise,
-                    'numero_premier': numero_premier,
-                    'numero_dernier': numero_dernier,
-                    'nombre_tickets': nombre_tickets,
-                    'valeur': str(montant)
-                }],
-                'type_operation': 'transfert',
-                'numero_bordereau': numero_bordereau,
-                'poste_origine_id': poste_origine.id,
-                'poste_origine_nom': poste_origine.nom,
-                'poste_destination_id': poste_destination.id,
-                'poste_destination_nom': poste_destination.nom
-            }
+        except SerieIntrouvable as e:
+            return False, str(e), None, None
+        except Exception as e:
+            logger.error(f"❌ ERREUR TRANSFERT: {str(e)}", exc_info=True)
+            return False, f"Erreur: {str(e)}", None, None
+    
+    @staticmethod
+    def _ceder_serie_origine(poste_origine, poste_destination, couleur, numero_premier, numero_dernier,
+                             commentaire, timestamp):
+        """
+        Marque transférée la plage demandée de la série en stock au poste
+        origine (découpée si partielle)
+        
+        Returns:
+            la série transférée, ou None si aucune série ne couvre la plage
+        """
+        from inventaire.models import SerieTicket
+        
+        nombre_tickets = numero_dernier - numero_premier + 1
+        montant = Decimal(nombre_tickets) * Decimal('500')
+        
+        serie_source = SerieTicket.objects.select_for_update().filter(
+            poste=poste_origine,
+            couleur=couleur,
+            statut='stock',
+            numero_premier__lte=numero_premier,
+            numero_dernier__gte=numero_dernier
+        ).first()
+        
+        if not serie_source:
+            return None
+        
+        # CAS A: Transfert de la série complète
+        if (serie_source.numero_premier == numero_premier and 
+            serie_source.numero_dernier == numero_dernier):
             
-            # Historique origine (DEBIT) - AVEC CHAMPS STRUCTURÉS
-            historique_origine = HistoriqueStock.objects.create(
+            logger.info("→ Transfert complet de la série")
+            serie_source.statut = 'transfere'
+            serie_source.date_utilisation = timestamp.date()
+            serie_source.poste_destination_transfert = poste_destination
+            serie_source.commentaire = f"Transféré vers {poste_destination.nom} - {commentaire}"
+            serie_source.save()
+            return serie_source
+        
+        # CAS B: Transfert partiel - découpage
+        logger.info("→ Transfert partiel - découpage")
+        
+        original_premier = serie_source.numero_premier
+        original_dernier = serie_source.numero_dernier
+        type_entree_original = serie_source.type_entree
+        responsable_original = serie_source.responsable_reception
+        
+        # Créer partie AVANT si nécessaire
+        if original_premier < numero_premier:
+            SerieTicket.objects.create(
                 poste=poste_origine,
-                type_mouvement='DEBIT',
-                type_stock='reapprovisionnement',
-                montant=montant,
-                nombre_tickets=nombre_tickets,
-                stock_avant=stock_origine_avant,
-                stock_apres=stock_origine.valeur_monetaire,
-                effectue_par=user,
-                poste_origine=poste_origine,
-                poste_destination=poste_destination,
-                numero_bordereau=numero_bordereau,
-                # ===== NOUVEAUX CHAMPS STRUCTURÉS =====
-                numero_premier_ticket=numero_premier,
-                numero_dernier_ticket=numero_dernier,
-                couleur_principale=couleur,
-                details_approvisionnement=details_serie,
-                # =====================================
-                commentaire=f"Cession {couleur.libelle_affichage} #{numero_premier}-{numero_dernier} vers {poste_destination.nom}"
-            )
-            
-            # Associer la série transférée à l'historique origine
-            if serie_transferee:
-                historique_origine.series_tickets_associees.add(serie_transferee)
-            
-            # Historique destination (CREDIT) - AVEC CHAMPS STRUCTURÉS
-            historique_destination = HistoriqueStock.objects.create(
-                poste=poste_destination,
-                type_mouvement='CREDIT',
-                type_stock='reapprovisionnement',
-                montant=montant,
-                nombre_tickets=nombre_tickets,
-                stock_avant=stock_destination_avant,
-                stock_apres=stock_destination.valeur_monetaire,
-                effectue_par=user,
-                poste_origine=poste_origine,
-                poste_destination=poste_destination,
-                numero_bordereau=numero_bordereau,
-                # ===== NOUVEAUX CHAMPS STRUCTURÉS =====
-                numero_premier_ticket=numero_premier,
-                numero_dernier_ticket=numero_dernier,
-                couleur_principale=couleur,
-                details_approvisionnement=details_serie,
-                # =====================================
-                commentaire=f"Réception {couleur.libelle_affichage} #{numero_premier}-{numero_dernier} de {poste_origine.nom}"
+                couleur=couleur,
+                numero_premier=original_premier,
+                numero_dernier=numero_premier - 1,
+                statut='stock',
+                type_entree=type_entree_original,
+                responsable_reception=responsable_original,
+                commentaire="Reste après transfert partiel"
             )
-            
-            # Associer la série destination à l'historique destination
-            if serie_destination:
-                historique_destination.series_tickets_associees.add(serie_destination)
-            
-            # ============================================================
-            # ÉTAPE 5 : Events sourcing avec métadonnées complètes
-            # ============================================================
-            metadata = {
-                'couleur': couleur.libelle_affichage,
-                'couleur_id': couleur.id,
-                'couleur_code': couleur.code_normalise,
-                'numero_premier': numero_premier,
-                'numero_dernier': numero_dernier,
-                'nombre_tickets': nombre_tickets,
-                'valeur': str(montant),
-                'numero_bordereau': numero_bordereau,
-                'serie_transferee_id': serie_transferee.id if serie_transferee else None,
-                'serie_destination_id': serie_destination.id if serie_destination else None
-            }
-            
-            StockEvent.objects.create(
+            logger.info(f"  Partie avant: #{original_premier}-{numero_premier - 1}")
+        
+        # Créer partie APRÈS si nécessaire
+        if original_dernier > numero_dernier:
+            SerieTicket.objects.create(
                 poste=poste_origine,
-                event_type='TRANSFERT_OUT',
-                event_datetime=timestamp,
-                montant_variation=-montant,
-                nombre_tickets_variation=-nombre_tickets,
-                stock_resultant=stock_origine.valeur_monetaire,
-                tickets_resultants=int(stock_origine.valeur_monetaire / 500),
-                effectue_par=user,
-                reference_id=str(historique_origine.id),
-                reference_type='HistoriqueStock',
-                metadata={
-                    'serie': metadata, 
-                    'poste_destination': {
-                        'id': poste_destination.id,
-                        'nom': poste_destination.nom,
-                        'code': poste_destination.code
-                    },
-                    'historique_id': historique_origine.id
-                },
-                commentaire=f"Transfert vers {poste_destination.nom}"
-            )
-            
-            StockEvent.objects.create(
-                poste=poste_destination,
-                event_type='TRANSFERT_IN',
-                event_datetime=timestamp,
-                montant_variation=montant,
-                nombre_tickets_variation=nombre_tickets,
-                stock_resultant=stock_destination.valeur_monetaire,
-                tickets_resultants=int(stock_destination.valeur_monetaire / 500),
-                effectue_par=user,
-                reference_id=str(historique_destination.id),
-                reference_type='HistoriqueStock',
-                metadata={
-                    'serie': metadata, 
-                    'poste_origine': {
-                        'id': poste_origine.id,
-                        'nom': poste_origine.nom,
-                        'code': poste_origine.code
-                    },
-                    'historique_id': historique_destination.id
-                },
-                commentaire=f"Réception depuis {poste_origine.nom}"
-            )
-            
-            # ============================================================
-            # ÉTAPE 6 : Notifications
-            # ============================================================
-            TransfertTicketsService._envoyer_notifications(
-                poste_origine, poste_destination, couleur,
-                numero_premier, numero_dernier, montant, nombre_tickets,
-                numero_bordereau, user
+                couleur=couleur,
+                numero_premier=numero_dernier + 1,
+                numero_dernier=original_dernier,
+                statut='stock',
+                type_entree=type_entree_original,
+                responsable_reception=responsable_original,
+                commentaire="Reste après transfert partiel"
             )
-            
-            logger.info(f"=== ✅ TRANSFERT RÉUSSI - Bordereau {numero_bordereau} ===")
-            logger.info(f"  Historique origine ID: {historique_origine.id}")
-            logger.info(f"  Historique destination ID: {historique_destination.id}")
-            logger.info(f"  Champs structurés remplis: couleur={couleur.libelle_affichage}, "
-                       f"tickets=#{numero_premier}-{numero_dernier}")
-            
-            return True, f"Transfert réussi - Bordereau {numero_bordereau}", serie_transferee, serie_destination
-            
-        except Exception as e:
-            logger.error(f"❌ ERREUR TRANSFERT: {str(e)}", exc_info=True)
-            return False, f"Erreur: {str(e)}", None, None
+            logger.info(f"  Partie après: #{numero_dernier + 1}-{original_dernier}")
+        
+        # Transformer la série originale en série transférée
+        serie_source.numero_premier = numero_premier
+        serie_source.numero_dernier = numero_dernier
+        serie_source.nombre_tickets = nombre_tickets
+        serie_source.valeur_monetaire = montant
+        serie_source.statut = 'transfere'
+        serie_source.date_utilisation = timestamp.date()
+        serie_source.poste_destination_transfert = poste_destination
+        serie_source.commentaire = f"Transféré vers {poste_destination.nom} - {commentaire}"
+        serie_source.save()
+        return serie_source
     
     @staticmethod
     def _creer_serie_destination(poste_destination, couleur, numero_premier, numero_dernier,
@@ -433,65 +422,35 @@ class TransfertTicketsService:
     
     @staticmethod
     def _generer_bordereau():
-        """Génère un numéro de bordereau unique"""
-        from datetime import datetime
-        from inventaire.models import HistoriqueStock
+        """Génère un numéro de bordereau unique (compteur journalier verrouillé)"""
+        from inventaire.services.numerotation_service import NumerotationService
         
-        now = datetime.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        count_today = HistoriqueStock.objects.filter(
-            type_stock='reapprovisionnement',
-            date_mouvement__gte=today_start
-        ).count()
-        
-        return f"TR-{now.strftime('%Y%m%d')}-{now.strftime('%H%M%S')}-{count_today+1:03d}"
+        return NumerotationService.numero_bordereau_transfert()
     
     @staticmethod
-    def _envoyer_notifications(poste_origine, poste_destination, couleur,
-                               numero_premier, numero_dernier, montant, nombre_tickets,
-                               numero_bordereau, user):
-        """Envoie les notifications aux chefs de poste"""
-        from accounts.models import NotificationUtilisateur, UtilisateurSUPPER
-        
-        # Chefs du poste origine
-        chefs_origine = UtilisateurSUPPER.objects.filter(
-            poste_affectation=poste_origine,
-            habilitation__in=['chef_peage', 'chef_pesage'],
-            is_active=True
-        )
-        
-        for chef in chefs_origine:
-            NotificationUtilisateur.objects.create(
-                destinataire=chef,
-                titre="Tickets cédés",
-                message=(
-                    f"Transfert de {nombre_tickets} tickets "
-                    f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
-                    f"vers {poste_destination.nom}.\n"
-                    f"Montant: {montant:,.0f} FCFA | Bordereau: {numero_bordereau}\n"
-                    f"Effectué par: {user.get_full_name() or user.username}"
-                ),
-                type_notification='warning'
-            )
-        
-        # Chefs du poste destination
-        chefs_destination = UtilisateurSUPPER.objects.filter(
-            poste_affectation=poste_destination,
-            habilitation__in=['chef_peage', 'chef_pesage'],
-            is_active=True
-        )
+    def _envoyer_notifications(poste_origine, poste_destination, libelle_series,
+                               montant, nombre_tickets, numero_bordereau, user):
+        """Envoie les notifications aux chefs des deux postes (une insertion groupée)"""
+        from inventaire.services.notification_service import NotificationService
         
-        for chef in chefs_destination:
-            NotificationUtilisateur.objects.create(
-                destinataire=chef,
-                titre="Tickets reçus",
-                message=(
-                    f"Réception de {nombre_tickets} tickets "
-                    f"{couleur.libelle_affichage} #{numero_premier}-{numero_dernier} "
-                    f"de {poste_origine.nom}.\n"
-                    f"Montant: {montant:,.0f} FCFA | Bordereau: {numero_bordereau}\n"
-                    f"Effectué par: {user.get_full_name() or user.username}"
-                ),
-                type_notification='success'
-            )
\ No newline at end of file
+        auteur = user.get_full_name() or user.username
+        NotificationService.notifier_chefs_postes([
+            (
+                poste_origine,
+                "Tickets cédés",
+                f"Transfert de {nombre_tickets} tickets {libelle_series} "
+                f"vers {poste_destination.nom}.\n"
+                f"Montant: {montant:,.0f} FCFA | Bordereau: {numero_bordereau}\n"
+                f"Effectué par: {auteur}",
+                'warning'
+            ),
+            (
+                poste_destination,
+                "Tickets reçus",
+                f"Réception de {nombre_tickets} tickets {libelle_series} "
+                f"de {poste_origine.nom}.\n"
+                f"Montant: {montant:,.0f} FCFA | Bordereau: {numero_bordereau}\n"
+                f"Effectué par: {auteur}",
+                'success'
+            ),
+        ], cree_par=user)
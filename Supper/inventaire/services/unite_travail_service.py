@@ -0,0 +1,271 @@
+# inventaire/services/unite_travail_service.py
+"""
+Unité de travail des recalculs déclenchés par les signaux
+
+Les receveurs de inventaire/signals.py ne recalculent plus rien eux-mêmes :
+ils marquent une clé « sale » (ex. (poste_id, date) pour une recette) et
+l'unité de travail traite chaque clé une seule fois, en lot, après
+validation de la transaction (transaction.on_commit). Hors transaction
+(autocommit), le traitement est immédiat, comme auparavant.
+
+Une importation ou une validation en masse dans une transaction ne déclenche
+donc plus un recalcul par ligne, mais un recalcul par clé distincte.
+
+Les compteurs (clés marquées, doublons évités, clés traitées, erreurs, lots)
+sont cumulés dans le cache partagé pour la supervision.
+"""
+
+from collections import defaultdict
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger('supper')
+
+# Types de recalcul
+RECALCUL_RECETTE = 'recette'         # clé : (poste_id, date)
+INVALIDATION_DASHBOARD = 'dashboard'  # clé : poste_id
+INVALIDATION_CALCULS = 'calculs'      # clé : poste_id
+SNAPSHOTS_STOCK = 'snapshots'         # clé : date
+MAJ_AGREGATS = 'agregats'             # clé : (poste_id, date)
+MAJ_AGREGATS_AMENDES = 'agregats_amendes'  # clé : (station_id, jour)
+
+COMPTEURS = ('marques', 'doublons', 'traites', 'erreurs', 'lots')
+CLE_COMPTEUR = 'unite_travail:{}'
+
+_etat = threading.local()
+
+
+class _Lot:
+    """Clés sales d'une transaction, traitées par un unique on_commit"""
+
+    def __init__(self):
+        self.cles = defaultdict(set)
+        self.file_commit = None
+        self.doublons = 0
+
+    def ajouter(self, type_recalcul, cle):
+        if cle in self.cles[type_recalcul]:
+            self.doublons += 1
+            return False
+        self.cles[type_recalcul].add(cle)
+        return True
+
+    def est_programme(self):
+        """
+        Toujours rattaché à la transaction en cours : Django remplace la file
+        on_commit à chaque validation ou annulation (y compris de savepoint)
+        """
+        return self.file_commit is transaction.get_connection().run_on_commit
+
+    def traiter(self):
+        if getattr(_etat, 'lot', None) is self:
+            _etat.lot = None
+        UniteDeTravail.traiter_lot(self)
+
+
+class UniteDeTravail:
+    """Collecte des clés sales et traitement groupé après validation"""
+
+    _traitements = {}
+
+    @classmethod
+    def traitement(cls, type_recalcul):
+        """Décorateur : enregistre la fonction qui traite un ensemble de clés"""
+        def decorateur(fonction):
+            cls._traitements[type_recalcul] = fonction
+            return fonction
+        return decorateur
+
+    @classmethod
+    def marquer(cls, type_recalcul, cle):
+        """Marque une clé à recalculer après validation de la transaction"""
+        lot = getattr(_etat, 'lot', None)
+        if lot is not None and lot.est_programme():
+            lot.ajouter(type_recalcul, cle)
+            return
+
+        # Nouveau lot (ou lot d'une transaction annulée, abandonné)
+        lot = _Lot()
+        lot.ajouter(type_recalcul, cle)
+        _etat.lot = lot
+        transaction.on_commit(lot.traiter)
+        lot.file_commit = transaction.get_connection().run_on_commit
+
+    @classmethod
+    def traiter_lot(cls, lot):
+        """Exécute les traitements d'un lot, chacun dans sa propre transaction"""
+        compteurs = {
+            'marques': sum(len(cles) for cles in lot.cles.values()) + lot.doublons,
+            'doublons': lot.doublons,
+            'traites': 0,
+            'erreurs': 0,
+            'lots': 1,
+        }
+
+        for type_recalcul, cles in lot.cles.items():
+            traitement = cls._traitements.get(type_recalcul)
+            if traitement is None:
+                logger.error(f"[UNITE_TRAVAIL] Aucun traitement pour '{type_recalcul}'")
+                compteurs['erreurs'] += 1
+                continue
+            try:
+                with transaction.atomic():
+                    traitement(cles)
+                compteurs['traites'] += len(cles)
+            except Exception as e:
+                compteurs['erreurs'] += 1
+                logger.error(f"[UNITE_TRAVAIL] Erreur traitement {type_recalcul} ({len(cles)} clé(s)): {str(e)}")
+
+        for nom, valeur in compteurs.items():
+            if valeur:
+                try:
+                    cache.incr(CLE_COMPTEUR.format(nom), valeur)
+                except ValueError:
+                    cache.set(CLE_COMPTEUR.format(nom), valeur, None)
+
+        if lot.doublons:
+            logger.debug(
+                f"[UNITE_TRAVAIL] Lot traité: {compteurs['traites']} clé(s), "
+                f"{lot.doublons} recalcul(s) en double évité(s)"
+            )
+
+    @staticmethod
+    def statistiques():
+        """Compteurs cumulés (supervision)"""
+        valeurs = cache.get_many([CLE_COMPTEUR.format(nom) for nom in COMPTEURS])
+        statistiques = {nom: valeurs.get(CLE_COMPTEUR.format(nom), 0) for nom in COMPTEURS}
+
+        lot = getattr(_etat, 'lot', None)
+        statistiques['en_attente'] = (
+            sum(len(cles) for cles in lot.cles.values())
+            if lot is not None and lot.est_programme() else 0
+        )
+        return statistiques
+
+    @staticmethod
+    def reinitialiser():
+        """Remet les compteurs à zéro et abandonne le lot du thread courant"""
+        cache.delete_many([CLE_COMPTEUR.format(nom) for nom in COMPTEURS])
+        _etat.lot = None
+
+
+# ===================================================================
+# TRAITEMENTS
+# ===================================================================
+
+@UniteDeTravail.traitement(RECALCUL_RECETTE)
+def recalculer_inventaires_et_recettes(cles):
+    """
+    Recalcule, pour chaque (poste_id, date), les totaux de l'inventaire
+    journalier puis les indicateurs de la recette (liaison incluse)
+    Lectures et écritures groupées ; les post_save sont émis une fois par objet
+    """
+    from inventaire.models import InventaireJournalier, RecetteJournaliere
+    from inventaire.services.saisie_inventaire_service import saisie_groupee, emettre_post_save
+
+    filtre = Q()
+    for poste_id, jour in cles:
+        filtre |= Q(poste_id=poste_id, date=jour)
+
+    # ========== TOTAUX DES INVENTAIRES ==========
+    inventaires = {
+        (inventaire.poste_id, inventaire.date): inventaire
+        for inventaire in InventaireJournalier.objects.filter(filtre).select_related('poste').annotate(
+            somme_vehicules=Sum('details_periodes__nombre_vehicules'),
+            nombre_details=Count('details_periodes'),
+        )
+    }
+
+    inventaires_modifies = []
+    for inventaire in inventaires.values():
+        total = inventaire.somme_vehicules or 0
+        if (inventaire.total_vehicules, inventaire.nombre_periodes_saisies) != (total, inventaire.nombre_details):
+            inventaire.total_vehicules = total
+            inventaire.nombre_periodes_saisies = inventaire.nombre_details
+            inventaires_modifies.append(inventaire)
+
+    if inventaires_modifies:
+        InventaireJournalier.objects.bulk_update(
+            inventaires_modifies, ['total_vehicules', 'nombre_periodes_saisies']
+        )
+
+    # ========== INDICATEURS DES RECETTES ==========
+    champs_recette = ['inventaire_associe', 'recette_potentielle', 'ecart', 'taux_deperdition']
+    recettes = list(RecetteJournaliere.objects.filter(filtre).select_related('poste', 'chef_poste'))
+
+    with saisie_groupee():
+        for recette in recettes:
+            inventaire = inventaires.get((recette.poste_id, recette.date))
+            if inventaire is not None and recette.inventaire_associe_id in (None, inventaire.pk):
+                # Liaison automatique à l'inventaire du jour, totaux déjà connus
+                recette.inventaire_associe = inventaire
+                recette.calculer_indicateurs(
+                    totaux=(inventaire.total_vehicules, inventaire.nombre_periodes_saisies)
+                )
+            else:
+                recette.calculer_indicateurs()
+
+        if recettes:
+            RecetteJournaliere.objects.bulk_update(recettes, champs_recette)
+
+    def _notifier():
+        # Transaction : les invalidations marquées par les receveurs forment un seul lot
+        with transaction.atomic(), saisie_groupee():
+            for inventaire in inventaires_modifies:
+                emettre_post_save(inventaire, ['total_vehicules', 'nombre_periodes_saisies'])
+            for recette in recettes:
+                emettre_post_save(recette, champs_recette)
+
+    transaction.on_commit(_notifier)
+
+    logger.debug(
+        f"[UNITE_TRAVAIL] {len(cles)} journée(s): {len(inventaires_modifies)} inventaire(s), "
+        f"{len(recettes)} recette(s) recalculé(s)"
+    )
+
+
+@UniteDeTravail.traitement(INVALIDATION_DASHBOARD)
+def invalider_dashboard_postes(cles):
+    """Marque périmées, en une fois, les portées de tous les postes touchés"""
+    from inventaire.services.dashboard_service import DashboardService
+
+    portees = set()
+    for poste_id in cles:
+        portees.update(DashboardService.portees_pour_poste(poste_id))
+    DashboardService.marquer_perime(portees)
+
+
+@UniteDeTravail.traitement(INVALIDATION_CALCULS)
+def invalider_calculs_postes(cles):
+    """Calculs en cache partagé (prévisions, classements) des postes touchés"""
+    from common.cache_partage import invalider_postes
+
+    invalider_postes(cles)
+
+
+@UniteDeTravail.traitement(SNAPSHOTS_STOCK)
+def creer_snapshots_stock(cles):
+    """Snapshots quotidiens de stock (au plus une fois par jour)"""
+    from inventaire.signals import creer_snapshots_quotidiens
+
+    creer_snapshots_quotidiens()
+
+
+@UniteDeTravail.traitement(MAJ_AGREGATS)
+def mettre_a_jour_agregats_recettes(cles):
+    """Agrégats continus des recettes (semaine, mois, année) des journées touchées"""
+    from inventaire.services.agregats_recettes_service import AgregatsRecettesService
+
+    AgregatsRecettesService.mettre_a_jour(cles)
+
+
+@UniteDeTravail.traitement(MAJ_AGREGATS_AMENDES)
+def mettre_a_jour_agregats_amendes(cles):
+    """Agrégats journaliers des amendes des journées touchées"""
+    from inventaire.services.agregats_amendes_service import AgregatsAmendesService
+
+    AgregatsAmendesService.mettre_a_jour(cles)
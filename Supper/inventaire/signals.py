@@ -6,6 +6,16 @@ from django.dispatch import receiver
 from django.utils import timezone
 import logging
 from .models import *
+from .services.saisie_inventaire_service import en_saisie_groupee
+from .services.unite_travail_service import (
+    INVALIDATION_CALCULS,
+    INVALIDATION_DASHBOARD,
+    MAJ_AGREGATS,
+    MAJ_AGREGATS_AMENDES,
+    RECALCUL_RECETTE,
+    SNAPSHOTS_STOCK,
+    UniteDeTravail,
+)
 
 logger = logging.getLogger('supper')
 
@@ -36,22 +46,22 @@ def log_inventaire_creation_modification(sender, instance, created, **kwargs):
                 succes=True
             )
         
-        # NOUVEAU: Recalculer les recettes associées
-        _recalculer_recettes_associees(instance)
+        # Recalcul des recettes associées, différé au commit (déjà fait en saisie groupée)
+        if not en_saisie_groupee():
+            UniteDeTravail.marquer(RECALCUL_RECETTE, (instance.poste_id, instance.date))
             
     except Exception as e:
         logger.error(f"Erreur signal inventaire: {str(e)}")
 
 @receiver(post_save, sender='inventaire.DetailInventairePeriode')
 def recalculate_totals_on_detail_save(sender, instance, created, **kwargs):
-    """Recalcule automatiquement les totaux quand un détail est sauvegardé"""
+    """Marque les totaux de l'inventaire parent et sa recette à recalculer"""
+    if en_saisie_groupee():
+        return
+    
     try:
-        # Recalculer les totaux de l'inventaire parent
         inventaire = instance.inventaire
-        inventaire.recalculer_totaux()
-        
-        # NOUVEAU: Recalculer les recettes liées
-        _recalculer_recettes_associees(inventaire)
+        UniteDeTravail.marquer(RECALCUL_RECETTE, (inventaire.poste_id, inventaire.date))
         
         if created:
             logger.debug(f"Détail ajouté: {instance.periode} - {instance.nombre_vehicules} véhicules")
@@ -61,54 +71,20 @@ def recalculate_totals_on_detail_save(sender, instance, created, **kwargs):
 
 
 @receiver(post_delete, sender='inventaire.DetailInventairePeriode')
-def recalculate_totals_on_detail_delete(sender, instance, **kwargs):
-    """Recalcule automatiquement les totaux quand un détail est supprimé"""
-    try:
-        # Recalculer les totaux de l'inventaire parent
-        inventaire = instance.inventaire
-        inventaire.recalculer_totaux()
-        
-        # NOUVEAU: Recalculer les recettes liées
-        _recalculer_recettes_associees(inventaire)
-        
-        logger.debug(f"Détail supprimé: {instance.periode}")
-        
-    except Exception as e:
-        logger.error(f"Erreur recalcul totaux après suppression: {str(e)}")
-
-
-@receiver(post_delete, sender='inventaire.DetailInventairePeriode')
-def recalculate_totals_on_detail_delete(sender, instance, **kwargs):
-    """Recalcule automatiquement les totaux quand un détail est supprimé"""
-    # Éviter la récursion
-    signal_key = f"detail_delete_{instance.pk}"
-    if signal_key in _signal_processing:
+def recalculate_totals_on_detail_delete(sender, instance, origin=None, **kwargs):
+    """Marque les totaux de l'inventaire parent et sa recette à recalculer"""
+    # Suppression de l'inventaire lui-même (cascade) : rien à recalculer
+    if en_saisie_groupee() or isinstance(origin, InventaireJournalier):
         return
-        
+    
     try:
-        _signal_processing.add(signal_key)
-        
-        # Recalculer les totaux de l'inventaire parent
         inventaire = instance.inventaire
-        
-        # CORRECTION: Recalcul direct sans sauvegarder l'inventaire pour éviter la récursion
-        details = inventaire.details_periodes.all()
-        total_vehicules = sum(detail.nombre_vehicules for detail in details)
-        nombre_periodes = details.count()
-        
-        # Mise à jour directe en base sans déclencher les signaux
-        InventaireJournalier = inventaire.__class__
-        InventaireJournalier.objects.filter(pk=inventaire.pk).update(
-            total_vehicules=total_vehicules,
-            nombre_periodes_saisies=nombre_periodes
-        )
+        UniteDeTravail.marquer(RECALCUL_RECETTE, (inventaire.poste_id, inventaire.date))
         
         logger.debug(f"Détail supprimé: {instance.periode}")
         
     except Exception as e:
         logger.error(f"Erreur recalcul totaux après suppression: {str(e)}")
-    finally:
-        _signal_processing.discard(signal_key)
 
 
 @receiver(post_save, sender='inventaire.RecetteJournaliere')
@@ -144,37 +120,6 @@ def log_recette_creation_modification(sender, instance, created, **kwargs):
     except Exception as e:
         logger.error(f"Erreur signal recette: {str(e)}")
 
-def _recalculer_recettes_associees(inventaire):
-    """
-    Fonction utilitaire pour recalculer les recettes associées à un inventaire
-    """
-    try:
-        from .models import RecetteJournaliere
-        
-        # Chercher les recettes pour ce poste et cette date
-        recettes = RecetteJournaliere.objects.filter(
-            poste=inventaire.poste,
-            date=inventaire.date
-        )
-        
-        for recette in recettes:
-            # Associer l'inventaire si pas déjà fait
-            if not recette.inventaire_associe:
-                recette.inventaire_associe = inventaire
-            
-            # Recalculer les indicateurs
-            recette.calculer_indicateurs()
-            recette.save(update_fields=[
-                'inventaire_associe', 'recette_potentielle', 
-                'ecart', 'taux_deperdition'
-            ])
-            
-            logger.info(f"Recette recalculée: {recette.poste.nom} du {recette.date} - TD: {recette.taux_deperdition:.2f}%")
-    
-    except Exception as e:
-        logger.error(f"Erreur recalcul recettes associées: {str(e)}")
-
-
 # @receiver(pre_save, sender='inventaire.InventaireJournalier')
 # def log_inventaire_lock(sender, instance, **kwargs):
 #     """Journalise le verrouillage d'inventaires"""
@@ -295,15 +240,18 @@ def log_inventaire_deletion(sender, instance, **kwargs):
 def log_recette_deletion(sender, instance, **kwargs):
     """Journalise la suppression de recettes"""
     try:
+        from django.db import transaction
         from accounts.models import JournalAudit
         
         # Créer une entrée de journal pour la suppression
-        JournalAudit.objects.create(
-            utilisateur=None,  # Impossible de récupérer l'utilisateur après suppression
-            action="Suppression recette",
-            details=f"Recette supprimée: {instance.poste.nom} du {instance.date} | Montant: {instance.montant_declare} FCFA",
-            succes=True
-        )
+        # Savepoint : un échec de journalisation ne doit pas annuler la suppression
+        with transaction.atomic():
+            JournalAudit.objects.create(
+                utilisateur=None,  # Impossible de récupérer l'utilisateur après suppression
+                action="Suppression recette",
+                details=f"Recette supprimée: {instance.poste.nom} du {instance.date} | Montant: {instance.montant_declare} FCFA",
+                succes=True
+            )
         
         logger.warning(f"Recette supprimée: {instance.poste.nom} du {instance.date} - {instance.montant_declare} FCFA")
         
@@ -316,9 +264,10 @@ def log_recette_deletion(sender, instance, **kwargs):
 # ===================================================================
 
 def clear_signal_processing_cache():
-    """Nettoie le cache des signaux en cours de traitement"""
+    """Nettoie le cache des signaux en cours de traitement et les compteurs de recalcul"""
     global _signal_processing
     _signal_processing.clear()
+    UniteDeTravail.reinitialiser()
     logger.debug("Cache des signaux nettoyé")
 
 
@@ -326,31 +275,15 @@ def get_signal_processing_status():
     """Retourne le statut actuel des signaux en cours de traitement"""
     return dict(
         active_signals=list(_signal_processing),
-        count=len(_signal_processing)
+        count=len(_signal_processing),
+        recalculs_differes=UniteDeTravail.statistiques(),
     )
 
 @receiver(post_save, sender='inventaire.RecetteJournaliere')
 def auto_link_inventaire_recette(sender, instance, created, **kwargs):
-    """Lie automatiquement une recette à son inventaire correspondant"""
-    if not instance.inventaire_associe:
-        try:
-            from .models import InventaireJournalier
-            
-            inventaire = InventaireJournalier.objects.get(
-                poste=instance.poste,
-                date=instance.date
-            )
-            
-            instance.inventaire_associe = inventaire
-            # Éviter la récursion en utilisant update_fields
-            instance.save(update_fields=['inventaire_associe'])
-            
-            logger.info(f"Inventaire automatiquement lié à la recette: {instance.poste.nom} du {instance.date}")
-            
-        except InventaireJournalier.DoesNotExist:
-            logger.warning(f"Aucun inventaire trouvé pour la recette: {instance.poste.nom} du {instance.date}")
-        except Exception as e:
-            logger.error(f"Erreur liaison auto inventaire-recette: {str(e)}")
+    """Lie automatiquement une recette à son inventaire correspondant (au commit)"""
+    if not instance.inventaire_associe_id and not en_saisie_groupee():
+        UniteDeTravail.marquer(RECALCUL_RECETTE, (instance.poste_id, instance.date))
 
 
 
@@ -411,7 +344,153 @@ def verifier_creation_snapshot_apres_mouvement(sender, instance, created, **kwar
     
     # Si c'est un nouveau jour ET qu'on n'a pas encore créé le snapshot
     if _derniere_date_snapshot != date_aujourdhui:
-        # Créer les snapshots à partir de 00:05 (laisser 5 min de marge)
+        # Créer les snapshots à partir de 00:05 (laisser 5 min de marge), une fois par lot
         if heure_actuelle.hour == 0 and heure_actuelle.minute >= 5:
-            creer_snapshots_quotidiens()
+            UniteDeTravail.marquer(SNAPSHOTS_STOCK, date_aujourdhui)
+
+
+
+@receiver(post_save, sender='inventaire.HistoriqueStock')
+def indexer_mouvements_tickets(sender, instance, created, **kwargs):
+    """
+    Alimente l'index MouvementTicket (traçabilité des tickets) à chaque
+    nouveau mouvement de stock : chargement, cession, réception ou vente
+    """
+    if not created:
+        return
+    
+    try:
+        from django.db import transaction
+        from .models import MouvementTicket
+        
+        # Savepoint : une erreur d'indexation ne doit pas annuler le mouvement
+        with transaction.atomic():
+            nb = MouvementTicket.indexer_historique(instance)
+        if nb:
+            logger.debug(f"Traçabilité: {nb} plage(s) indexée(s) pour l'historique {instance.id}")
+    except Exception as e:
+        logger.error(f"Erreur indexation mouvements tickets: {str(e)}")
+
+
+# ===================================================================
+# INVALIDATION DES INSTANTANÉS DU TABLEAU DE BORD
+# ===================================================================
+
+def _invalider_dashboard(poste_id):
+    """
+    Marque périmés les blocs du tableau de bord touchés par une écriture
+    sur un poste (poste, sa région, national), ainsi que les calculs en
+    cache partagé du poste, une fois par poste et par transaction, après
+    validation
+    """
+    UniteDeTravail.marquer(INVALIDATION_DASHBOARD, poste_id)
+    UniteDeTravail.marquer(INVALIDATION_CALCULS, poste_id)
+
+
+@receiver(post_save, sender='inventaire.RecetteJournaliere')
+@receiver(post_delete, sender='inventaire.RecetteJournaliere')
+@receiver(post_save, sender='inventaire.InventaireJournalier')
+@receiver(post_delete, sender='inventaire.InventaireJournalier')
+@receiver(post_save, sender='inventaire.ObjectifAnnuel')
+@receiver(post_delete, sender='inventaire.ObjectifAnnuel')
+def invalider_dashboard_poste(sender, instance, **kwargs):
+    """Recettes, inventaires et objectifs : portées du poste concerné"""
+    _invalider_dashboard(instance.poste_id)
+
+
+@receiver(post_save, sender='inventaire.AmendeEmise')
+@receiver(post_delete, sender='inventaire.AmendeEmise')
+@receiver(post_save, sender='inventaire.PeseesJournalieres')
+@receiver(post_delete, sender='inventaire.PeseesJournalieres')
+@receiver(post_save, sender='inventaire.QuittancementPesage')
+@receiver(post_delete, sender='inventaire.QuittancementPesage')
+def invalider_dashboard_station(sender, instance, **kwargs):
+    """Amendes, pesées et quittancements : portées de la station concernée"""
+    _invalider_dashboard(instance.station_id)
+
+
+@receiver(post_save, sender='inventaire.DemandeConfirmationPaiement')
+@receiver(post_delete, sender='inventaire.DemandeConfirmationPaiement')
+def invalider_dashboard_demande_confirmation(sender, instance, **kwargs):
+    """Demandes de confirmation : portées de la station concernée"""
+    _invalider_dashboard(instance.station_concernee_id)
+
+
+@receiver(post_save, sender='inventaire.HistoriqueStock')
+@receiver(post_delete, sender='inventaire.HistoriqueStock')
+def invalider_calculs_stock(sender, instance, **kwargs):
+    """Mouvements de stock : calculs en cache du poste (notes de stock)"""
+    UniteDeTravail.marquer(INVALIDATION_CALCULS, instance.poste_id)
+
+
+# ===================================================================
+# AGRÉGATS CONTINUS DES RECETTES
+# ===================================================================
+
+@receiver(pre_save, sender='inventaire.RecetteJournaliere')
+def memoriser_journee_recette(sender, instance, raw=False, **kwargs):
+    """Journée d'origine d'une recette modifiée (changement de poste ou de date)"""
+    if raw or instance.pk is None:
+        return
+    instance._journee_agregats = sender.objects.filter(pk=instance.pk).values_list('poste_id', 'date').first()
+
+
+@receiver(post_save, sender='inventaire.RecetteJournaliere')
+@receiver(post_delete, sender='inventaire.RecetteJournaliere')
+def marquer_agregats_recettes(sender, instance, **kwargs):
+    """Tranches semaine / mois / année de la journée (et de l'ancienne) recalculées au commit"""
+    journee = (instance.poste_id, instance.date)
+    ancienne = instance.__dict__.pop('_journee_agregats', None)
+    if ancienne is not None and ancienne != journee:
+        UniteDeTravail.marquer(MAJ_AGREGATS, ancienne)
+    UniteDeTravail.marquer(MAJ_AGREGATS, journee)
+
+
+# ===================================================================
+# AGRÉGATS JOURNALIERS DES AMENDES
+# ===================================================================
+
+@receiver(pre_save, sender='inventaire.AmendeEmise')
+def memoriser_journee_amende(sender, instance, raw=False, **kwargs):
+    """Journée d'origine d'une amende modifiée (changement de station ou de date)"""
+    if raw or instance.pk is None:
+        return
+    instance._journee_agregats = sender.objects.filter(pk=instance.pk).values_list(
+        'station_id', 'date_heure_emission'
+    ).first()
+
+
+@receiver(post_save, sender='inventaire.AmendeEmise')
+@receiver(post_delete, sender='inventaire.AmendeEmise')
+def marquer_agregats_amendes(sender, instance, **kwargs):
+    """Agrégats du jour d'émission (et de l'ancien) recalculés au commit"""
+    from .services.agregats_amendes_service import journee_amende
+
+    journee = (instance.station_id, journee_amende(instance.date_heure_emission))
+    ancienne = instance.__dict__.pop('_journee_agregats', None)
+    if ancienne is not None:
+        ancienne = (ancienne[0], journee_amende(ancienne[1]))
+        if ancienne != journee:
+            UniteDeTravail.marquer(MAJ_AGREGATS_AMENDES, ancienne)
+    UniteDeTravail.marquer(MAJ_AGREGATS_AMENDES, journee)
+
+
+# ===================================================================
+# INVALIDATION DU RÉSOLVEUR DE CONFIGURATIONS DE JOURS
+# ===================================================================
+
+@receiver(post_save, sender='inventaire.ConfigurationJour')
+@receiver(post_delete, sender='inventaire.ConfigurationJour')
+def invalider_resolveur_jours(sender, instance, **kwargs):
+    """
+    Invalide les configurations de jours en cache : immédiatement pour la
+    requête courante, puis à nouveau après validation de la transaction
+    """
+    from django.db import transaction
+    from inventaire.services.calendrier_service import ResolveurJours
+
+    from common.cache_partage import ETIQUETTE_CALENDRIER, invalider_etiquettes
 
+    ResolveurJours.invalider()
+    transaction.on_commit(ResolveurJours.invalider)
+    transaction.on_commit(lambda: invalider_etiquettes(ETIQUETTE_CALENDRIER))
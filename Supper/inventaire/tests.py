@@ -1,3 +1,616 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+import threading
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+
+def creer_postes_stock(nombre=2):
+    """Postes de péage avec un stock initial de 10 000 FCFA chacun"""
+    from accounts.models import Poste, Region
+    from inventaire.models import GestionStock
+
+    region = Region.objects.create(nom='Centre')
+    postes = []
+    for indice in range(1, nombre + 1):
+        poste = Poste.objects.create(
+            code=f'TST-P{indice:02d}', nom=f'Péage Test {indice}', type='peage', region=region,
+        )
+        GestionStock.objects.create(poste=poste, valeur_monetaire=Decimal('10000'), nombre_tickets=20)
+        postes.append(poste)
+    return postes
+
+
+def valeur_stock(poste):
+    from inventaire.models import GestionStock
+
+    return GestionStock.objects.get(poste=poste).valeur_monetaire
+
+
+# ===================================================================
+# PLANS D'EXÉCUTION DES REQUÊTES DE RAPPORTS
+# ===================================================================
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "EXPLAIN vérifié sous PostgreSQL uniquement")
+class PlansRequetesRapportsTest(TestCase):
+    """
+    Les requêtes clés des rapports (voir la commande verifier_plans_requetes)
+    doivent pouvoir être servies par leurs index : parcours séquentiels
+    désactivés, un Seq Scan ou une plage de dates reléguée en Filter
+    signale un index supprimé ou un prédicat devenu non exploitable
+    """
+
+    def test_requetes_rapports_utilisent_leurs_index(self):
+        from inventaire.management.commands.verifier_plans_requetes import (
+            expliquer, problemes_plan, requetes_cles,
+        )
+
+        requetes = requetes_cles(
+            date(2025, 1, 1), date(2025, 1, 31),
+            poste_id=1, station_id=1, numero='TR-00000000-000000-001',
+        )
+        for libelle, queryset, table, index_attendus, colonne_plage in requetes:
+            with self.subTest(libelle):
+                plan = expliquer(queryset)
+                self.assertEqual(problemes_plan(plan, table, index_attendus, colonne_plage), [], plan)
+
+
+# ===================================================================
+# MUTATIONS DU STOCK (StockService, transferts)
+# ===================================================================
+
+class StockServiceTest(TestCase):
+
+    def setUp(self):
+        self.poste_a, self.poste_b = creer_postes_stock()
+
+    def test_appliquer_met_a_jour_stock_historique_et_evenement(self):
+        from inventaire.models import HistoriqueStock, StockEvent
+        from inventaire.services.stock_service import MouvementStock, StockService
+
+        mouvement, = StockService.appliquer([
+            MouvementStock(self.poste_a, Decimal('-2500'), 'VENTE', historique={'type_stock': 'regularisation'}),
+        ])
+
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('7500'))
+        self.assertEqual((mouvement.stock_avant, mouvement.stock_apres), (Decimal('10000'), Decimal('7500')))
+        historique = HistoriqueStock.objects.get(poste=self.poste_a)
+        self.assertEqual((historique.type_mouvement, historique.montant, historique.nombre_tickets), ('DEBIT', Decimal('2500'), 5))
+        evenement = StockEvent.objects.get(poste=self.poste_a)
+        self.assertEqual(evenement.reference_id, str(historique.id))
+        self.assertEqual(evenement.montant_variation, Decimal('-2500'))
+
+    def test_verrous_pris_par_poste_croissant(self):
+        from inventaire.models import GestionStock
+        from inventaire.services.stock_service import StockService
+
+        with CaptureQueriesContext(connection) as requetes:
+            stocks = StockService.verrouiller([self.poste_b, self.poste_a, self.poste_b])
+
+        self.assertEqual(list(stocks), sorted([self.poste_a.pk, self.poste_b.pk]))
+        verrou = [
+            requete['sql'] for requete in requetes.captured_queries
+            if GestionStock._meta.db_table in requete['sql'] and 'SELECT' in requete['sql']
+        ][-1]
+        self.assertIn('ORDER BY', verrou)
+        self.assertIn('"poste_id" ASC', verrou)
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', verrou)
+
+    def test_stock_cree_a_zero_si_absent(self):
+        from inventaire.models import GestionStock
+        from inventaire.services.stock_service import MouvementStock, StockService
+
+        GestionStock.objects.filter(poste=self.poste_b).delete()
+        StockService.appliquer([MouvementStock(self.poste_b, Decimal('1000'), 'CHARGEMENT')])
+
+        self.assertEqual(valeur_stock(self.poste_b), Decimal('1000'))
+
+    def test_debit_refuse_annule_tous_les_mouvements(self):
+        from inventaire.models import HistoriqueStock
+        from inventaire.services.stock_service import REFUSER, MouvementStock, StockInsuffisant, StockService
+
+        with self.assertRaises(StockInsuffisant):
+            StockService.appliquer([
+                MouvementStock(self.poste_b, Decimal('5000'), 'TRANSFERT_IN', historique={}),
+                MouvementStock(self.poste_a, Decimal('-15000'), 'TRANSFERT_OUT', historique={}, controle=REFUSER),
+            ])
+
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('10000'))
+        self.assertEqual(valeur_stock(self.poste_b), Decimal('10000'))
+        self.assertFalse(HistoriqueStock.objects.exists())
+
+    def test_debit_borne_a_zero(self):
+        from inventaire.services.stock_service import BORNER, MouvementStock, StockService
+
+        mouvement, = StockService.appliquer([
+            MouvementStock(self.poste_a, Decimal('-15000'), 'VENTE', controle=BORNER),
+        ])
+
+        self.assertEqual(mouvement.stock_apres, Decimal('0'))
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('0'))
+
+
+class TransfertTicketsServiceTest(TestCase):
+
+    def setUp(self):
+        from accounts.models import UtilisateurSUPPER
+        from inventaire.models import CouleurTicket, SerieTicket
+
+        self.poste_a, self.poste_b = creer_postes_stock()
+        self.user = UtilisateurSUPPER.objects.create(
+            username='TSTADMIN', nom_complet='Admin Test', telephone='+237600000001',
+            habilitation='admin_principal',
+        )
+        self.couleur = CouleurTicket.obtenir_ou_creer('Bleu')
+        self.serie = SerieTicket.objects.create(
+            poste=self.poste_a, couleur=self.couleur, numero_premier=1, numero_dernier=20,
+            nombre_tickets=20, valeur_monetaire=Decimal('10000'), statut='stock',
+            type_entree='imprimerie_nationale',
+        )
+
+    def test_transfert_partiel_decoupe_la_serie_et_deplace_le_stock(self):
+        from inventaire.models import HistoriqueStock, SerieTicket
+        from inventaire.services.transfert_service import TransfertTicketsService
+
+        succes, message, _, _ = TransfertTicketsService.executer_transferts(
+            self.poste_a, self.poste_b, [(self.couleur, 1, 8)], self.user
+        )
+
+        self.assertTrue(succes, message)
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('6000'))
+        self.assertEqual(valeur_stock(self.poste_b), Decimal('14000'))
+        self.assertTrue(SerieTicket.objects.filter(
+            poste=self.poste_a, statut='stock', numero_premier=9, numero_dernier=20
+        ).exists())
+        self.assertTrue(SerieTicket.objects.filter(
+            poste=self.poste_b, statut='stock', numero_premier=1, numero_dernier=8
+        ).exists())
+        self.assertEqual(HistoriqueStock.objects.filter(numero_bordereau__isnull=False).count(), 2)
+
+    def test_transfert_de_plusieurs_series_indexe_chaque_plage(self):
+        from inventaire.models import CouleurTicket, MouvementTicket, SerieTicket
+        from inventaire.services.transfert_service import TransfertTicketsService
+
+        rouge = CouleurTicket.obtenir_ou_creer('Rouge')
+        SerieTicket.objects.create(
+            poste=self.poste_a, couleur=rouge, numero_premier=500, numero_dernier=600,
+            nombre_tickets=101, valeur_monetaire=Decimal('50500'), statut='stock',
+            type_entree='imprimerie_nationale',
+        )
+
+        succes, message, _, _ = TransfertTicketsService.executer_transferts(
+            self.poste_a, self.poste_b, [(self.couleur, 1, 8), (rouge, 500, 600)], self.user
+        )
+
+        self.assertTrue(succes, message)
+        plages = lambda type_mouvement, poste: sorted(
+            MouvementTicket.objects.filter(type_mouvement=type_mouvement, poste=poste)
+            .values_list('couleur_id', 'numero_premier', 'numero_dernier')
+        )
+        attendues = sorted([(self.couleur.id, 1, 8), (rouge.id, 500, 600)])
+        self.assertEqual(plages('transfert_sortant', self.poste_a), attendues)
+        self.assertEqual(plages('transfert_entrant', self.poste_b), attendues)
+        self.assertEqual(MouvementTicket.rechercher(550, rouge).count(), 2)
+
+    def test_serie_introuvable_annule_tout_le_transfert(self):
+        from inventaire.models import HistoriqueStock, SerieTicket, StockEvent
+        from inventaire.services.transfert_service import TransfertTicketsService
+
+        succes, message, _, _ = TransfertTicketsService.executer_transferts(
+            self.poste_a, self.poste_b, [(self.couleur, 1, 8), (self.couleur, 500, 510)], self.user
+        )
+
+        self.assertFalse(succes)
+        self.assertIn('introuvable', message)
+        self.serie.refresh_from_db()
+        self.assertEqual((self.serie.statut, self.serie.numero_premier, self.serie.numero_dernier), ('stock', 1, 20))
+        self.assertEqual(SerieTicket.objects.count(), 1)
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('10000'))
+        self.assertEqual(valeur_stock(self.poste_b), Decimal('10000'))
+        self.assertFalse(HistoriqueStock.objects.exists())
+        self.assertFalse(StockEvent.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Verrous de lignes vérifiés sous PostgreSQL uniquement")
+class StockServiceConcurrenceTest(TransactionTestCase):
+    """Écritures simultanées réelles : ni variation perdue, ni interblocage"""
+
+    def setUp(self):
+        self.poste_a, self.poste_b = creer_postes_stock()
+
+    def _executer_en_parallele(self, fonctions):
+        erreurs = []
+        depart = threading.Barrier(len(fonctions))
+
+        def executer(fonction):
+            try:
+                depart.wait()
+                fonction()
+            except Exception as e:
+                erreurs.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=executer, args=(fonction,)) for fonction in fonctions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        return erreurs
+
+    def test_transferts_croises_simultanes(self):
+        from inventaire.services.stock_service import MouvementStock, StockService
+
+        def transfert(origine, destination):
+            def executer():
+                for _ in range(5):
+                    StockService.appliquer([
+                        MouvementStock(origine, Decimal('-500'), 'TRANSFERT_OUT'),
+                        MouvementStock(destination, Decimal('500'), 'TRANSFERT_IN'),
+                    ])
+            return executer
+
+        erreurs = self._executer_en_parallele([
+            transfert(self.poste_a, self.poste_b),
+            transfert(self.poste_b, self.poste_a),
+            transfert(self.poste_a, self.poste_b),
+            transfert(self.poste_b, self.poste_a),
+        ])
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('10000'))
+        self.assertEqual(valeur_stock(self.poste_b), Decimal('10000'))
+
+    def test_ventes_simultanees_sans_variation_perdue(self):
+        from inventaire.services.stock_service import MouvementStock, StockService
+
+        def vendre():
+            for _ in range(3):
+                StockService.appliquer([MouvementStock(self.poste_a, Decimal('-500'), 'VENTE')])
+
+        erreurs = self._executer_en_parallele([vendre] * 4)
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(valeur_stock(self.poste_a), Decimal('4000'))
+
+
+# ===================================================================
+# CONFIGURATIONS DE JOURS (services/calendrier_service.py)
+# ===================================================================
+
+class ResolveurJoursTest(TestCase):
+
+    databases = {'default', 'cache'}
+
+    def _resolveur(self, *configurations):
+        from inventaire.services.calendrier_service import ResolveurJours
+
+        return ResolveurJours(date(2025, 3, 1), date(2025, 3, 31), configurations)
+
+    def _config(self, jour, statut, poste_id=None):
+        from inventaire.models import ConfigurationJour
+
+        return ConfigurationJour(date=date(2025, 3, jour), statut=statut, poste_id=poste_id)
+
+    def test_jour_impertinent_global_apres_une_configuration_de_poste(self):
+        resolveur = self._resolveur(
+            self._config(10, 'normal', poste_id=5),
+            self._config(10, 'impertinent'),
+        )
+
+        self.assertTrue(resolveur.est_impertinent(date(2025, 3, 10)))
+        self.assertEqual(resolveur.jours_impertinents(), {date(2025, 3, 10)})
+
+    def test_une_configuration_impertinente_suffit(self):
+        resolveur = self._resolveur(
+            self._config(11, 'impertinent', poste_id=5),
+            self._config(11, 'normal'),
+            self._config(12, 'normal'),
+        )
+
+        self.assertTrue(resolveur.est_impertinent(date(2025, 3, 11)))
+        self.assertFalse(resolveur.est_impertinent(date(2025, 3, 12)))
+        self.assertFalse(resolveur.est_impertinent(date(2025, 3, 13)))
+        self.assertEqual(resolveur.jours_impertinents(), {date(2025, 3, 11)})
+
+    @unittest.skipUnless(
+        connection.vendor == 'postgresql',
+        "Écritures simultanées des connexions default et cache : base SQLite verrouillée",
+    )
+    def test_meme_regle_que_les_statistiques(self):
+        from accounts.models import UtilisateurSUPPER
+        from inventaire.models import ConfigurationJour, RecetteJournaliere
+        from inventaire.services.calendrier_service import ResolveurJours
+        from inventaire.services.statistiques_service import exclure_jours_impertinents
+
+        poste, = creer_postes_stock(1)
+        admin = UtilisateurSUPPER.objects.create(
+            username='TSTADMIN', nom_complet='Admin Test', telephone='+237600000001',
+            habilitation='admin_principal',
+        )
+        jours = [date(2025, 3, jour) for jour in (10, 11, 12, 13)]
+        ConfigurationJour.objects.create(date=jours[0], statut='impertinent', cree_par=admin)
+        ConfigurationJour.objects.create(date=jours[1], statut='impertinent', poste=poste, cree_par=admin)
+        ConfigurationJour.objects.create(date=jours[2], statut='normal', cree_par=admin)
+        for jour in jours:
+            RecetteJournaliere.objects.create(poste=poste, date=jour, montant_declare=100000)
+
+        conservees = set(
+            RecetteJournaliere.objects.filter(exclure_jours_impertinents()).values_list('date', flat=True)
+        )
+        resolveur = ResolveurJours.pour_mois(date(2025, 3, 1))
+        self.assertEqual(resolveur.jours_impertinents(), set(jours[:2]))
+        self.assertEqual(conservees, {jour for jour in jours if not resolveur.est_impertinent(jour)})
+
+
+# ===================================================================
+# AGRÉGATS DE RECETTES (services/agregats_recettes_service.py)
+# ===================================================================
+
+class DecompositionPlageTest(TestCase):
+
+    def _decomposer(self, date_debut, date_fin):
+        from inventaire.services.agregats_recettes_service import AgregatsRecettesService
+
+        tranches, bords = AgregatsRecettesService.decomposer(date_debut, date_fin)
+        self._verifier_couverture(date_debut, date_fin, tranches, bords)
+        return tranches, bords
+
+    def _verifier_couverture(self, date_debut, date_fin, tranches, bords):
+        """Chaque jour de la plage couvert exactement une fois"""
+        from inventaire.services.agregats_recettes_service import _fin_mois
+
+        jours = []
+        for granularite, debut in tranches:
+            fin = {
+                'semaine': debut + timedelta(days=6),
+                'mois': _fin_mois(debut.year, debut.month),
+                'annee': date(debut.year, 12, 31),
+            }[granularite]
+            jours += [debut + timedelta(days=n) for n in range((fin - debut).days + 1)]
+        for debut, fin in bords:
+            jours += [debut + timedelta(days=n) for n in range((fin - debut).days + 1)]
+        self.assertEqual(sorted(jours), [date_debut + timedelta(days=n) for n in range((date_fin - date_debut).days + 1)])
+
+    def test_plage_a_cheval_sur_une_semaine(self):
+        tranches, bords = self._decomposer(date(2025, 3, 5), date(2025, 3, 18))
+
+        self.assertEqual(tranches, [('semaine', date(2025, 3, 10))])
+        self.assertEqual(bords, [(date(2025, 3, 5), date(2025, 3, 9)), (date(2025, 3, 17), date(2025, 3, 18))])
+
+    def test_plage_a_cheval_sur_des_mois(self):
+        tranches, bords = self._decomposer(date(2025, 1, 20), date(2025, 3, 10))
+
+        self.assertEqual(tranches, [
+            ('semaine', date(2025, 1, 20)), ('mois', date(2025, 2, 1)), ('semaine', date(2025, 3, 3)),
+        ])
+        # La semaine du 27 janvier déborde sur février : jours de bord
+        self.assertEqual(bords, [
+            (date(2025, 1, 27), date(2025, 1, 31)),
+            (date(2025, 3, 1), date(2025, 3, 2)),
+            (date(2025, 3, 10), date(2025, 3, 10)),
+        ])
+
+    def test_plage_a_cheval_sur_des_annees(self):
+        tranches, bords = self._decomposer(date(2024, 12, 30), date(2026, 1, 2))
+
+        self.assertEqual(tranches, [('annee', date(2025, 1, 1))])
+        self.assertEqual(bords, [(date(2024, 12, 30), date(2024, 12, 31)), (date(2026, 1, 1), date(2026, 1, 2))])
+
+    def test_29_fevrier(self):
+        from inventaire.services.agregats_recettes_service import _meme_jour_annee
+
+        self.assertEqual(self._decomposer(date(2024, 2, 1), date(2024, 2, 29)), ([('mois', date(2024, 2, 1))], []))
+        tranches, bords = self._decomposer(date(2024, 2, 26), date(2024, 3, 3))
+        self.assertEqual((tranches, bords), ([], [(date(2024, 2, 26), date(2024, 3, 3))]))
+        self.assertEqual(_meme_jour_annee(date(2024, 2, 29), 2023), date(2023, 2, 28))
+
+    def test_plage_vide(self):
+        self.assertEqual(self._decomposer(date(2025, 3, 5), date(2025, 3, 4)), ([], []))
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    "Écritures simultanées des connexions default et cache : base SQLite verrouillée",
+)
+class AgregatsRecettesMiseAJourTest(TestCase):
+    """Agrégats maintenus par les receveurs de signaux et l'unité de travail"""
+
+    databases = {'default', 'cache'}
+
+    PLAGES = (
+        (date(2024, 12, 1), date(2026, 1, 31)),
+        (date(2025, 1, 1), date(2025, 12, 31)),
+        (date(2025, 2, 1), date(2025, 2, 28)),
+        (date(2025, 2, 10), date(2025, 3, 20)),
+        (date(2025, 3, 3), date(2025, 3, 9)),
+    )
+
+    def setUp(self):
+        self.poste_a, self.poste_b = creer_postes_stock()
+
+    def _creer(self, poste, jour, montant):
+        from inventaire.models import RecetteJournaliere
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return RecetteJournaliere.objects.create(poste=poste, date=jour, montant_declare=Decimal(montant))
+
+    def _verifier_totaux(self):
+        from inventaire.models import AgregatRecettes, RecetteJournaliere
+        from inventaire.services.agregats_recettes_service import AgregatsRecettesService
+
+        for date_debut, date_fin in self.PLAGES:
+            attendus = {
+                ligne['poste_id']: (ligne['total'], ligne['nombre'])
+                for ligne in RecetteJournaliere.objects.filter(date__range=(date_debut, date_fin))
+                .values('poste_id').annotate(total=Sum('montant_declare'), nombre=Count('id')).order_by()
+            }
+            totaux = AgregatsRecettesService.totaux_par_poste(date_debut, date_fin)
+            self.assertEqual(
+                {poste_id: (t.montant_total, t.nombre_recettes) for poste_id, t in totaux.items()},
+                attendus,
+                f"{date_debut} - {date_fin}",
+            )
+
+        # Table identique à une reconstruction complète
+        champs = ('poste_id', 'granularite', 'debut_periode', 'montant_total', 'nombre_recettes')
+        maintenues = sorted(AgregatRecettes.objects.values_list(*champs))
+        AgregatsRecettesService.reconstruire()
+        self.assertEqual(maintenues, sorted(AgregatRecettes.objects.values_list(*champs)))
+
+    def test_creation(self):
+        for jour, montant in ((date(2025, 1, 31), 1000), (date(2025, 2, 1), 2000), (date(2025, 3, 5), 4000)):
+            self._creer(self.poste_a, jour, montant)
+        self._creer(self.poste_b, date(2025, 3, 5), 8000)
+
+        self._verifier_totaux()
+
+    def test_modification_de_la_date_et_du_poste(self):
+        recette = self._creer(self.poste_a, date(2025, 2, 27), 1000)
+        self._creer(self.poste_a, date(2025, 2, 3), 2000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recette.date = date(2025, 3, 4)
+            recette.save()
+        self._verifier_totaux()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recette.poste = self.poste_b
+            recette.save()
+        self._verifier_totaux()
+
+    def test_suppression_et_tranches_devenues_vides(self):
+        from inventaire.models import AgregatRecettes
+
+        recette = self._creer(self.poste_a, date(2025, 3, 5), 1000)
+        self._creer(self.poste_b, date(2025, 3, 5), 2000)
+        self.assertEqual(AgregatRecettes.objects.filter(poste=self.poste_a).count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recette.delete()
+
+        self.assertFalse(AgregatRecettes.objects.filter(poste=self.poste_a).exists())
+        self.assertEqual(AgregatRecettes.objects.filter(poste=self.poste_b).count(), 3)
+        self._verifier_totaux()
+
+
+# ===================================================================
+# UNITÉ DE TRAVAIL (services/unite_travail_service.py)
+# ===================================================================
+
+class UniteDeTravailTest(TestCase):
+
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        from inventaire.services.unite_travail_service import UniteDeTravail
+
+        cache.clear()
+        self.traitement = mock.Mock()
+        patcher = mock.patch.dict(UniteDeTravail._traitements, {'test': self.traitement})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_chaque_cle_traitee_une_fois_par_transaction(self):
+        from inventaire.services.unite_travail_service import UniteDeTravail
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for cle in (1, 2, 1, 1):
+                    UniteDeTravail.marquer('test', cle)
+                with transaction.atomic():
+                    UniteDeTravail.marquer('test', 2)
+
+        self.assertEqual(len(callbacks), 1)
+        self.traitement.assert_called_once_with({1, 2})
+        statistiques = UniteDeTravail.statistiques()
+        self.assertEqual((statistiques['traites'], statistiques['doublons'], statistiques['lots']), (2, 3, 1))
+
+    def test_rien_apres_une_annulation(self):
+        from inventaire.services.unite_travail_service import UniteDeTravail
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                UniteDeTravail.marquer('test', 1)
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        self.traitement.assert_not_called()
+
+        # Le lot de la transaction annulée est abandonné
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                UniteDeTravail.marquer('test', 2)
+        self.traitement.assert_called_once_with({2})
+
+    def test_savepoint_annule_dans_une_transaction(self):
+        from inventaire.services.unite_travail_service import UniteDeTravail
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with transaction.atomic():
+                    UniteDeTravail.marquer('test', 1)
+                    transaction.set_rollback(True)
+                UniteDeTravail.marquer('test', 2)
+
+        self.traitement.assert_called_once_with({2})
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    "Écritures simultanées des connexions default et cache : base SQLite verrouillée",
+)
+class RecalculJourneeTest(TestCase):
+    """Saisie d'inventaire : totaux et indicateurs de la recette recalculés après validation"""
+
+    databases = {'default', 'cache'}
+
+    def setUp(self):
+        from inventaire.models import InventaireJournalier, RecetteJournaliere
+
+        self.poste, = creer_postes_stock(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inventaire = InventaireJournalier.objects.create(poste=self.poste, date=date(2025, 3, 5))
+            self.recette = RecetteJournaliere.objects.create(
+                poste=self.poste, date=date(2025, 3, 5), montant_declare=Decimal('300000')
+            )
+
+    def _saisir(self, **vehicules_par_periode):
+        from inventaire.models import DetailInventairePeriode
+        from inventaire.services.unite_travail_service import RECALCUL_RECETTE, UniteDeTravail
+
+        espion = mock.Mock(wraps=UniteDeTravail._traitements[RECALCUL_RECETTE])
+        with mock.patch.dict(UniteDeTravail._traitements, {RECALCUL_RECETTE: espion}):
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for periode, nombre in vehicules_par_periode.items():
+                        DetailInventairePeriode.objects.update_or_create(
+                            inventaire=self.inventaire, periode=periode,
+                            defaults={'nombre_vehicules': nombre},
+                        )
+        self.inventaire.refresh_from_db()
+        self.recette.refresh_from_db()
+        return espion
+
+    def test_saisie_puis_modification_d_une_periode(self):
+        espion = self._saisir(**{'08h-09h': 100, '09h-10h': 140})
+
+        espion.assert_called_once_with({(self.poste.id, date(2025, 3, 5))})
+        self.assertEqual((self.inventaire.total_vehicules, self.inventaire.nombre_periodes_saisies), (240, 2))
+        self.assertEqual(self.recette.inventaire_associe_id, self.inventaire.id)
+        # 120 véhicules/heure × 24 × 75 % × 500 FCFA
+        self.assertEqual(self.recette.recette_potentielle, Decimal('1080000'))
+        self.assertAlmostEqual(self.recette.taux_deperdition, Decimal('-72.22'), places=2)
+
+        self._saisir(**{'09h-10h': 20})
+
+        self.assertEqual(self.inventaire.total_vehicules, 120)
+        self.assertEqual(self.recette.recette_potentielle, Decimal('540000'))
+        self.assertAlmostEqual(self.recette.taux_deperdition, Decimal('-44.44'), places=2)
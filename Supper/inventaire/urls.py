@@ -171,6 +171,12 @@ urlpatterns = [
         views_rapports.generer_compte_emploi_pdf,
         name='generer_compte_emploi'
     ),
+    
+    path(
+        'compte-emploi/lot/',
+        views_rapports.generer_comptes_emploi_lot,
+        name='generer_comptes_emploi_lot'
+    ),
      path('parametrage-global/', views_rapports.parametrage_global, name='parametrage_global'),
      path('classement-rendement/', views_classement.classement_postes_rendement, name='classement_rendement'),
      path('stocks/transfert/selection/', 
@@ -418,7 +424,7 @@ pesage_patterns = [
     
     # Export Excel quittancements pesage
     path(
-        'quittancements/export/',
+        'pesage/quittancements/export/',
         views_pesage.export_quittancements_pesage,
         name='export_quittancements_pesage'
     ),
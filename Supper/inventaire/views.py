@@ -42,6 +42,9 @@ from common.permissions import *
 # Import de la fonction de logging depuis common/utils.py
 from common.utils import log_user_action, require_permission
 
+from inventaire.services.saisie_inventaire_service import SaisieInventaireService
+from inventaire.services.stock_service import MouvementStock, StockService
+
 
 # ===================================================================
 # FONCTIONS UTILITAIRES MISES À JOUR
@@ -484,9 +487,8 @@ class InventaireDetailView(InventaireMixin, DetailView):
         
         # Vérifier si jour impertinent
         try:
-            from inventaire.models import ConfigurationJour, StatutJour
-            config = ConfigurationJour.objects.filter(date=inventaire.date).first()
-            context['jour_impertinent'] = config and config.statut == StatutJour.IMPERTINENT
+            from inventaire.models import ConfigurationJour
+            context['jour_impertinent'] = ConfigurationJour.est_jour_impertinent(inventaire.date)
         except:
             context['jour_impertinent'] = False
         
@@ -744,11 +746,8 @@ class SaisieInventaireView(LoginRequiredMixin, View):
                     "Cet inventaire a déjà été saisi et ne peut être modifié que par un administrateur.")
                 return redirect('inventaire:inventaire_detail', pk=inventaire.pk)
             
-            # Supprimer les anciens détails
-            inventaire.details_periodes.all().delete()
-            
-            # Traiter les données de période
-            details_saved = 0
+            # Collecter les données de période (enregistrées ensuite en bloc)
+            valeurs = {}
             
             # ✓ ESSAYER PLUSIEURS FORMATS DE NOMS DE CHAMPS
             for periode_choice in PeriodeHoraire.choices:
@@ -777,23 +776,15 @@ class SaisieInventaireView(LoginRequiredMixin, View):
                     try:
                         nombre = int(value)
                         if nombre >= 0:
-                            DetailInventairePeriode.objects.create(
-                                inventaire=inventaire,
-                                periode=periode_code,
-                                nombre_vehicules=nombre
-                            )
-                            details_saved += 1
-                            logger.info(f"✓ Sauvegardé: {periode_code} = {nombre}")
+                            valeurs[periode_code] = nombre
+                            logger.info(f"✓ Retenu: {periode_code} = {nombre}")
                     except ValueError as e:
                         logger.error(f"✗ Erreur conversion: {periode_code} = '{value}' - {e}")
                         continue
             
-            # Recalculer les totaux
-            total_vehicules = inventaire.recalculer_totaux()
-            
-            # Mettre à jour les métadonnées
-            inventaire.derniere_modification_par = user
-            inventaire.save(update_fields=['derniere_modification_par'])
+            # Remplacer les périodes, recalculer les totaux et la recette en une étape
+            total_vehicules = SaisieInventaireService.enregistrer_periodes(inventaire, valeurs, user=user)
+            details_saved = len(valeurs)
             
             # Log détaillé
             log_user_action(
@@ -863,28 +854,9 @@ def modifier_inventaire(request, pk):
                     if value and value.isdigit():
                         periodes_data[periode] = int(value)
             
-            # Mettre à jour ou créer les détails
-            for periode, nombre in periodes_data.items():
-                DetailInventairePeriode.objects.update_or_create(
-                    inventaire=inventaire,
-                    periode=periode,
-                    defaults={'nombre_vehicules': nombre}
-                )
-            
-            # Supprimer les périodes non soumises
-            periodes_soumises = list(periodes_data.keys())
-            inventaire.details_periodes.exclude(periode__in=periodes_soumises).delete()
-            
-            # Recalculer les totaux
-            inventaire.recalculer_totaux()
-            
-            # Recalculer la recette associée si elle existe
-            try:
-                if hasattr(inventaire, 'recette'):
-                    inventaire.recette.calculer_indicateurs()
-                    inventaire.recette.save()
-            except:
-                pass
+            # Mettre à jour, créer ou supprimer les détails, puis recalculer
+            # les totaux et la recette associée en une étape
+            SaisieInventaireService.enregistrer_periodes(inventaire, periodes_data)
             
             # Journaliser l'action
             # log_user_action(
@@ -1382,7 +1354,10 @@ def traiter_confirmation_recette_tickets(request):
             # ===== NOUVELLE LOGIQUE : Tracking des séries =====
             series_vendues = []  # Pour liaison à l'historique
             
-            # 2. Créer les détails de vente et consommer les séries
+            # 2. Créer les détails de vente et consommer les séries, stock
+            #    du poste verrouillé (ventes et transferts concurrents
+            #    attendent la fin de la transaction)
+            StockService.verrouiller([poste])
             for detail_data in data['details_ventes']:
                 couleur = CouleurTicket.objects.get(id=detail_data['couleur_id'])
                 
@@ -1410,55 +1385,39 @@ def traiter_confirmation_recette_tickets(request):
                 # ===== NOUVEAU : Collecter les séries vendues =====
                 series_vendues.extend(series)
             
-            # 3. Mettre à jour le stock global (code existant conservé)
-            stock, _ = GestionStock.objects.get_or_create(
-                poste=poste,
-                defaults={'valeur_monetaire': Decimal('0')}
-            )
-            
-            stock_avant = stock.valeur_monetaire
-            stock.valeur_monetaire -= montant_total
-            stock.save()
-            
-            # 4. Créer l'historique
-            historique = HistoriqueStock.objects.create(
-                poste=poste,
-                type_mouvement='DEBIT',
-                montant=montant_total,
-                nombre_tickets=int(montant_total / 500),
-                stock_avant=stock_avant,
-                stock_apres=stock.valeur_monetaire,
-                effectue_par=request.user,
-                reference_recette=recette,
-                commentaire=f"Vente du {date_recette.strftime('%d/%m/%Y')} - {len(data['details_ventes'])} série(s)"
-            )
-            StockEvent.objects.create(
-                    poste=poste,
-                    event_type='VENTE',
-                    event_datetime=datetime.combine(date_recette, datetime.now().time()),
-                    montant_variation=-montant_total,  # NÉGATIF car c'est une sortie
-                    nombre_tickets_variation=-int(montant_total / 500),  # NÉGATIF
-                    stock_resultant=stock.valeur_monetaire,  # Stock APRÈS la vente
-                    tickets_resultants=int(stock.valeur_monetaire / 500),
-                    effectue_par=request.user,
-                    reference_id=str(recette.id),
-                    reference_type='RecetteJournaliere',
-                    metadata={
-                        'date_recette': str(date_recette),
-                        'montant_declare': str(montant_total),
-                        'series_vendues': [
-                            {
-                                'couleur': detail_data['couleur_libelle'],
-                                'numero_premier': detail_data['numero_premier'],
-                                'numero_dernier': detail_data['numero_dernier'],
-                                'nombre_tickets': detail_data['nombre_tickets'],
-                                'montant': detail_data['montant']
-                            }
-                            for detail_data in data['details_ventes']
-                        ]
+            # 3. Mettre à jour le stock global (verrou, UPDATE F()), créer
+            #    l'historique et l'événement VENTE
+            libelle_vente = f"Vente du {date_recette.strftime('%d/%m/%Y')} - {len(data['details_ventes'])} série(s)"
+            vente, = StockService.appliquer([
+                MouvementStock(
+                    poste, -montant_total, 'VENTE',
+                    historique={
+                        'reference_recette': recette,
+                        'commentaire': libelle_vente,
+                    },
+                    evenement={
+                        'event_datetime': datetime.combine(date_recette, datetime.now().time()),
+                        'reference_id': str(recette.id),
+                        'reference_type': 'RecetteJournaliere',
+                        'metadata': {
+                            'date_recette': str(date_recette),
+                            'montant_declare': str(montant_total),
+                            'series_vendues': [
+                                {
+                                    'couleur': detail_data['couleur_libelle'],
+                                    'numero_premier': detail_data['numero_premier'],
+                                    'numero_dernier': detail_data['numero_dernier'],
+                                    'nombre_tickets': detail_data['nombre_tickets'],
+                                    'montant': detail_data['montant']
+                                }
+                                for detail_data in data['details_ventes']
+                            ]
+                        },
+                        'commentaire': libelle_vente,
                     },
-                    commentaire=f"Vente du {date_recette.strftime('%d/%m/%Y')} - {len(data['details_ventes'])} série(s)"
                 )
+            ], request.user)
+            historique = vente.historique_cree
 
             # ===== NOUVEAU : Associer les séries à l'historique =====
             if series_vendues:
@@ -1506,7 +1465,7 @@ def traiter_confirmation_recette_tickets(request):
                 request,
                 f"✅ Recette enregistrée avec succès : {montant_total:,.0f} FCFA "
                 f"({len(data['details_ventes'])} série(s) de tickets). "
-                f"Stock restant: {stock.valeur_monetaire:,.0f} FCFA"
+                f"Stock restant: {vente.stock_apres:,.0f} FCFA"
             )
             
             # Redirection selon le type d'utilisateur
@@ -2333,8 +2292,12 @@ def detail_inventaire_mensuel(request, pk):
         stats['taux_deperdition_moyen'] = None
     
     # Créer un calendrier du mois avec les données
+    # (inventaires, recettes et configurations du mois chargés une fois)
     cal = calendar.monthcalendar(annee, mois)
     calendrier_data = []
+    inventaires_par_date = {inventaire.date: inventaire for inventaire in inventaires_journaliers}
+    recettes_par_date = {recette.date: recette for recette in recettes}
+    resolveur_jours = ConfigurationJour.resolveur(date_debut, date_fin)
     
     for semaine in cal:
         semaine_data = []
@@ -2343,15 +2306,13 @@ def detail_inventaire_mensuel(request, pk):
                 semaine_data.append(None)
             else:
                 date_jour = date(annee, mois, jour)
-                inventaire = inventaires_journaliers.filter(date=date_jour).first()
-                recette = recettes.filter(date=date_jour).first()
-                config = ConfigurationJour.objects.filter(date=date_jour).first()
+                config = resolveur_jours.configuration(date_jour)
                 
                 semaine_data.append({
                     'jour': jour,
                     'date': date_jour,
-                    'inventaire': inventaire,
-                    'recette': recette,
+                    'inventaire': inventaires_par_date.get(date_jour),
+                    'recette': recettes_par_date.get(date_jour),
                     'config': config,
                     'is_impertinent': config and config.statut == 'impertinent'
                 })
@@ -3993,15 +3954,17 @@ def programmer_inventaire(request):
                     seuil_baisse=-5
                 )
                 
-                # Enrichir avec vérification des programmations existantes
+                # Enrichir avec vérification des programmations existantes (une requête)
+                postes_programmes_ids = set(ProgrammationInventaire.objects.filter(
+                    poste__in=[item['poste'] for item in postes_data],
+                    mois=mois,
+                    motif=motif,
+                    actif=True
+                ).values_list('poste_id', flat=True))
+
                 for item in postes_data:
-                    item['deja_programme'] = ProgrammationInventaire.objects.filter(
-                        poste=item['poste'],
-                        mois=mois,
-                        motif=motif,
-                        actif=True
-                    ).exists()
-                    
+                    item['deja_programme'] = item['poste'].id in postes_programmes_ids
+
                     # IMPORTANT : Utiliser les mêmes clés que calculer_risque_baisse_annuel
                     item['pourcentage_baisse'] = abs(item['taux_evolution'])
                     item['recettes_estimees'] = item.get('recettes_estimees', 0)
@@ -4972,8 +4935,7 @@ def gestion_objectifs_annuels(request):
         
         # Traitement du formulaire (admin uniquement)
         with transaction.atomic():
-            objectifs_crees = 0
-            objectifs_modifies = 0
+            montants = {}
             details_modifications = []
             
             for poste in postes:
@@ -4985,25 +4947,17 @@ def gestion_objectifs_annuels(request):
                         montant = Decimal(montant_str) if montant_str else Decimal('0')
                         
                         if montant > 0:
-                            objectif, was_created = ObjectifAnnuel.objects.update_or_create(
-                                poste=poste,
-                                annee=annee,
-                                defaults={
-                                    'montant_objectif': montant,
-                                    'cree_par': request.user
-                                }
-                            )
-                            
-                            if was_created:
-                                objectifs_crees += 1
-                            else:
-                                objectifs_modifies += 1
-                            
+                            montants[poste.id] = montant
                             details_modifications.append(f"{poste.nom}: {montant:,.0f} FCFA")
                     
-                    except (ValueError, TypeError):
+                    except (ValueError, TypeError, InvalidOperation):
                         continue
             
+            # Une seule écriture groupée pour tous les postes
+            resultats = ObjectifsService.enregistrer_objectifs(ObjectifAnnuel, annee, montants, request.user)
+            objectifs_crees = resultats['objectifs_crees']
+            objectifs_modifies = resultats['objectifs_modifies']
+            
             # Log détaillé de la modification
             log_user_action(
                 user,
@@ -5020,41 +4974,12 @@ def gestion_objectifs_annuels(request):
             )
             return redirect(f"{request.path}?annee={annee}")
     
-    # Construire les données pour TOUS les postes
-    objectifs_data = []
-    
-    for poste in postes:
-        # Récupérer l'objectif existant pour cette année
-        try:
-            objectif = ObjectifAnnuel.objects.get(poste=poste, annee=annee)
-            montant_objectif = objectif.montant_objectif
-        except ObjectifAnnuel.DoesNotExist:
-            # Pas d'objectif : essayer de copier depuis l'année précédente
-            try:
-                objectif_precedent = ObjectifAnnuel.objects.get(
-                    poste=poste, 
-                    annee=annee-1
-                )
-                montant_objectif = objectif_precedent.montant_objectif
-            except ObjectifAnnuel.DoesNotExist:
-                montant_objectif = Decimal('0')
-        
-        # Calculer le réalisé pour cette année
-        realise = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee
-        ).aggregate(Sum('montant_declare'))['montant_declare__sum'] or Decimal('0')
-        
-        # Calculer le taux
-        taux = (realise / montant_objectif * 100) if montant_objectif > 0 else 0
-        
-        objectifs_data.append({
-            'poste': poste,
-            'montant_objectif': montant_objectif,
-            'realise': realise,
-            'reste': montant_objectif - realise,
-            'taux': float(taux)
-        })
+    # Construire les données pour TOUS les postes (une requête) ; sans objectif
+    # pour l'année, celui de l'année précédente est proposé
+    objectifs_data = [
+        ObjectifsService.ligne_realisation(poste)
+        for poste in ObjectifsService.annoter_realisations(postes, annee, repli_annee_precedente=True)
+    ]
     
     # UTILISER LE SERVICE pour les totaux globaux
     stats_globales = ObjectifsService.calculer_objectifs_annuels(
@@ -5117,27 +5042,26 @@ def dupliquer_objectifs_annee(request):
             )
             return redirect('inventaire:gestion_objectifs_annuels')
         
-        objectifs_source = ObjectifAnnuel.objects.filter(annee=annee_source)
-        count = 0
+        # Une requête pour la source, une écriture groupée ; les objectifs
+        # déjà saisis pour l'année cible sont conservés
+        from inventaire.services.objectifs_service import ObjectifsService
         
-        for obj in objectifs_source:
-            _, created = ObjectifAnnuel.objects.get_or_create(
-                poste=obj.poste,
-                annee=annee_cible,
-                defaults={
-                    'montant_objectif': obj.montant_objectif,
-                    'cree_par': request.user
-                }
-            )
-            if created:
-                count += 1
+        objectifs_source = ObjectifsService.objectifs_annee(ObjectifAnnuel, annee_source, actifs_seulement=False)
+        resultats = ObjectifsService.enregistrer_objectifs(
+            ObjectifAnnuel,
+            annee_cible,
+            {obj.poste_id: obj.montant_objectif for obj in objectifs_source},
+            request.user,
+            ecraser=False
+        )
+        count = resultats['objectifs_crees']
         
         # Log détaillé de la duplication
         log_user_action(
             user,
             "Duplication objectifs annuels",
             f"Année source: {annee_source} | Année cible: {annee_cible} | "
-            f"Objectifs source: {objectifs_source.count()} | "
+            f"Objectifs source: {len(objectifs_source)} | "
             f"Objectifs dupliqués: {count}",
             request
         )
@@ -5217,31 +5141,17 @@ def simulateur_commandes(request):
 @login_required
 def api_graphique_evolution(request):
     """API pour graphique d'évolution (7 derniers jours)"""
-    from datetime import date, timedelta
-    from django.db.models import Avg, Sum
-    
-    today = date.today()
-    jours = [(today - timedelta(days=i)) for i in range(6, -1, -1)]
+    from datetime import date
+    from inventaire.services.dashboard_service import DashboardService
     
-    dates = []
-    taux_deperdition = []
-    recettes = []
-    
-    for jour in jours:
-        dates.append(jour.strftime('%d/%m'))
-        
-        stats = RecetteJournaliere.objects.filter(date=jour).aggregate(
-            taux_moyen=Avg('taux_deperdition'),
-            recettes_total=Sum('montant_declare')
-        )
-        
-        taux_deperdition.append(round(float(stats['taux_moyen'] or 0), 1))
-        recettes.append(float(stats['recettes_total'] or 0))
+    evolution = DashboardService.obtenir(
+        'evolution_7j', jour=date.today().isoformat(), inclure_inactifs='1'
+    )
     
     return JsonResponse({
-        'dates': dates,
-        'taux_deperdition': taux_deperdition,
-        'recettes': recettes
+        'dates': [date.fromisoformat(jour).strftime('%d/%m') for jour in evolution['jours']],
+        'taux_deperdition': [round(taux or 0, 1) for taux in evolution['taux']],
+        'recettes': evolution['recettes']
     })
 
 
@@ -5396,7 +5306,26 @@ def calculer_objectifs_automatique(request):
             )
             return redirect('inventaire:gestion_objectifs')
         
-        # Appliquer le calcul
+        # Aperçu : écarts avec les objectifs déjà saisis, sans rien écrire
+        if request.POST.get('action') == 'apercu':
+            apercu = ObjectifsService.calculer_objectifs_avec_pourcentage(
+                annee_source, annee_cible, pourcentage
+            )
+            if not apercu['success']:
+                messages.warning(request, apercu['message'])
+            
+            annee_actuelle = date.today().year
+            context = {
+                'annees': list(range(annee_actuelle - 5, annee_actuelle + 6)),
+                'annee_defaut_source': annee_source,
+                'annee_defaut_cible': annee_cible,
+                'pourcentage_defaut': pourcentage,
+                'apercu': apercu if apercu['success'] else None,
+                'title': 'Calculer Objectifs Automatiquement'
+            }
+            return render(request, 'inventaire/calculer_objectifs.html', context)
+        
+        # Appliquer le calcul (une écriture groupée)
         resultats = ObjectifsService.appliquer_objectifs_calcules(
             annee_source, annee_cible, pourcentage, request.user
         )
@@ -5410,6 +5339,7 @@ def calculer_objectifs_automatique(request):
                 f"Pourcentage: {pourcentage:+.1f}% | "
                 f"Objectifs créés: {resultats['objectifs_crees']} | "
                 f"Objectifs modifiés: {resultats['objectifs_modifies']} | "
+                f"Objectifs inchangés: {resultats['objectifs_inchanges']} | "
                 f"Total: {resultats['total_objectif_cible']:,.0f} FCFA",
                 request
             )
@@ -5450,6 +5380,7 @@ def calculer_objectifs_automatique(request):
         'annees': annees,
         'annee_defaut_source': annee_actuelle - 1,
         'annee_defaut_cible': annee_actuelle,
+        'pourcentage_defaut': 13,
         'title': 'Calculer Objectifs Automatiquement'
     }
     
@@ -6951,37 +6882,33 @@ def export_quittancements(request):
         if request.user.poste_affectation:
             quittancements = quittancements.filter(poste=request.user.poste_affectation)
     
-    if format_export == 'excel':
-        import openpyxl
-        from django.http import HttpResponse
+    if format_export in ('excel', 'csv'):
+        from common.exports import parcourir, reponse_csv, reponse_xlsx
         
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        )
-        response['Content-Disposition'] = f'attachment; filename=quittancements_{date_debut}_{date_fin}.xlsx'
-        
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Quittancements'
+        quittancements = quittancements.select_related('poste', 'saisi_par').order_by('date_quittancement', 'id')
         
         # En-têtes
         headers = ['Numéro', 'Poste', 'Date', 'Montant', 'Type', 'Période', 'Saisi par', 'Date saisie']
-        for col, header in enumerate(headers, 1):
-            ws.cell(row=1, column=col, value=header)
-        
-        # Données
-        for row, q in enumerate(quittancements, 2):
-            ws.cell(row=row, column=1, value=q.numero_quittance)
-            ws.cell(row=row, column=2, value=q.poste.nom)
-            ws.cell(row=row, column=3, value=q.date_quittancement)
-            ws.cell(row=row, column=4, value=float(q.montant))
-            ws.cell(row=row, column=5, value=q.get_type_declaration_display())
-            ws.cell(row=row, column=6, value=q.get_periode_display())
-            ws.cell(row=row, column=7, value=q.saisi_par.nom_complet if q.saisi_par else '')
-            ws.cell(row=row, column=8, value=q.date_saisie)
-        
-        wb.save(response)
-        return response
+        
+        # Données, lues par lots
+        lignes = (
+            [
+                q.numero_quittance,
+                q.poste.nom,
+                q.date_quittancement.strftime('%d/%m/%Y'),
+                float(q.montant),
+                q.get_type_declaration_display(),
+                q.get_periode_display(),
+                q.saisi_par.nom_complet if q.saisi_par else '',
+                timezone.localtime(q.date_saisie).strftime('%d/%m/%Y %H:%M') if q.date_saisie else '',
+            ]
+            for q in parcourir(quittancements)
+        )
+        
+        nom_fichier = f'quittancements_{date_debut}_{date_fin}'
+        if format_export == 'csv':
+            return reponse_csv(headers, lignes, f'{nom_fichier}.csv')
+        return reponse_xlsx(headers, lignes, f'{nom_fichier}.xlsx', titre='Quittancements', largeurs=18)
     
     else:  # PDF
         messages.info(request, "Export PDF en cours de développement")
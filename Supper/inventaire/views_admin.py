@@ -32,6 +32,7 @@ from .models import (
     ConfigurationJour, PeriodeHoraire, SerieTicket, CouleurTicket
 )
 from accounts.models import Poste, UtilisateurSUPPER
+from .services.saisie_inventaire_service import SaisieInventaireService
 
 # Import du système de permissions granulaires
 from common.permissions import (
@@ -187,9 +188,8 @@ def inventaire_admin_saisie(request, poste_id, date_str):
     # Traitement POST: Sauvegarde de l'inventaire
     if request.method == 'POST' and 'save_inventaire' in request.POST:
         periodes_saisies = []
-        
-        # ✓ CORRECTION : Supprimer les anciens détails avant de créer les nouveaux
-        inventaire.details_periodes.all().delete()
+        valeurs = {}
+        observations_periodes = {}
         
         # Traiter toutes les périodes
         for periode_choice in PeriodeHoraire.choices:
@@ -202,24 +202,20 @@ def inventaire_admin_saisie(request, poste_id, date_str):
                     try:
                         nombre = int(nombre_str)
                         if nombre >= 0:
-                            # Créer le détail
-                            DetailInventairePeriode.objects.create(
-                                inventaire=inventaire,
-                                periode=periode_code,
-                                nombre_vehicules=nombre,
-                                observations_periode=request.POST.get(f'obs_{periode_code}', '')
-                            )
+                            valeurs[periode_code] = nombre
+                            observations_periodes[periode_code] = request.POST.get(f'obs_{periode_code}', '')
                             periodes_saisies.append(f"{periode_label}: {nombre}")
                     except ValueError:
                         pass
         
-        # ✓ CRITIQUE : RECALCULER LES TOTAUX APRÈS avoir créé tous les détails
-        total_vehicules = inventaire.recalculer_totaux()
-        
-        # Mettre à jour les autres informations
-        inventaire.observations = request.POST.get('observations', '')
-        inventaire.derniere_modification_par = user
-        inventaire.save(update_fields=['observations', 'derniere_modification_par'])
+        # ✓ Remplacer les détails, recalculer les totaux et la recette en une étape
+        total_vehicules = SaisieInventaireService.enregistrer_periodes(
+            inventaire,
+            valeurs,
+            user=user,
+            observations_periodes=observations_periodes,
+            observations=request.POST.get('observations', ''),
+        )
         
         # ✓ IMPORTANT : Calculer la recette potentielle APRÈS le recalcul des totaux
         recette_potentielle = inventaire.calculer_recette_potentielle()
@@ -1,5 +1,4 @@
 # inventaire/views_bordereaux_pdf.py
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from reportlab.lib.pagesizes import A4
@@ -9,9 +8,12 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.enums import TA_CENTER
 from datetime import datetime
+from io import BytesIO
 
+from accounts.models import Poste, UtilisateurSUPPER
 from inventaire.models import HistoriqueStock
 from inventaire.models_config import ConfigurationGlobale
+from inventaire.services.rapport_cache_service import RapportCacheService
 
 @login_required
 def bordereau_transfert_pdf(request, numero_bordereau, type_bordereau):
@@ -41,13 +43,29 @@ def bordereau_transfert_pdf(request, numero_bordereau, type_bordereau):
             from django.http import HttpResponseForbidden
             return HttpResponseForbidden("Accès non autorisé")
     
-    # Créer la réponse PDF
-    response = HttpResponse(content_type='application/pdf')
     filename = f'bordereau_{type_bordereau}_{numero_bordereau}.pdf'
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    
+    # Bordereau déjà produit (l'utilisateur est imprimé en pied de page)
+    rapport = RapportCacheService.rapport(
+        'bordereau',
+        {
+            'numero_bordereau': numero_bordereau,
+            'type_bordereau': type_bordereau,
+            'utilisateur': request.user.nom_complet,
+        },
+        [
+            HistoriqueStock.objects.filter(pk=hist.pk),
+            Poste.objects.filter(pk__in=[hist.poste_id, hist.poste_origine_id, hist.poste_destination_id]),
+            UtilisateurSUPPER.objects.filter(pk=hist.effectue_par_id),
+            ConfigurationGlobale.objects.all(),
+        ],
+    )
+    if rapport.disponible():
+        return rapport.reponse(filename)
     
     # Créer le document
-    doc = SimpleDocTemplate(response, pagesize=A4, 
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, 
                            rightMargin=2*cm, leftMargin=2*cm,
                            topMargin=2*cm, bottomMargin=2*cm)
     
@@ -160,4 +178,4 @@ def bordereau_transfert_pdf(request, numero_bordereau, type_bordereau):
     # Générer le PDF
     doc.build(elements)
     
-    return response
\ No newline at end of file
+    return rapport.enregistrer(buffer, filename)
\ No newline at end of file
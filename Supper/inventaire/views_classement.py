@@ -25,6 +25,7 @@ import logging
 from accounts.models import Poste, UtilisateurSUPPER
 from inventaire.models import RecetteJournaliere
 from inventaire.models_performance import PerformanceAgent
+from inventaire.services.agregats_recettes_service import AgregatsRecettesService, TotauxRecettes
 
 # Import des fonctions de permissions et décorateurs
 from common.permissions import (
@@ -242,21 +243,15 @@ def classement_postes_rendement(request):
     
     classement = []
     
+    # Totaux de tous les postes lus dans les agrégats de recettes
+    totaux_postes = AgregatsRecettesService.totaux_par_poste(date_debut, date_fin, postes)
+    
     for poste in postes:
-        # Calculer les statistiques pour ce poste
-        stats = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__gte=date_debut,
-            date__lte=date_fin
-        ).aggregate(
-            total_declare=Sum('montant_declare'),
-            nombre_jours=Count('id'),
-            moyenne_jour=Avg('montant_declare')
-        )
+        stats = totaux_postes.get(poste.id, TotauxRecettes())
         
-        total = stats['total_declare'] or Decimal('0')
-        nb_jours = stats['nombre_jours'] or 0
-        moyenne = stats['moyenne_jour'] or Decimal('0')
+        total = stats.montant_total
+        nb_jours = stats.nombre_recettes
+        moyenne = stats.moyenne_journaliere
         
         # Ajouter au classement seulement si le poste a des recettes
         if total > 0:
@@ -37,7 +37,7 @@ from common.decorators import (
     permission_required_granular,
     classement_pesage_required,
 )
-from common.utils import log_user_action
+from common.utils import log_user_action, plage_journees
 
 logger = logging.getLogger('supper.classement_pesage')
 
@@ -210,8 +210,7 @@ def calculer_classement_pesage(date_debut=None, date_fin=None, user=None):
         stats = AmendeEmise.objects.filter(
             station=station,
             statut='paye',
-            date_paiement__date__gte=date_debut,
-            date_paiement__date__lte=date_fin
+            **plage_journees('date_paiement', date_debut, date_fin)
         ).aggregate(
             total_recouvre=Sum('montant_amende'),
             nombre_paiements=Count('id'),
@@ -221,8 +220,7 @@ def calculer_classement_pesage(date_debut=None, date_fin=None, user=None):
         # Statistiques des émissions
         stats_emissions = AmendeEmise.objects.filter(
             station=station,
-            date_heure_emission__date__gte=date_debut,
-            date_heure_emission__date__lte=date_fin
+            **plage_journees('date_heure_emission', date_debut, date_fin)
         ).aggregate(
             total_emis=Sum('montant_amende'),
             nombre_emissions=Count('id'),
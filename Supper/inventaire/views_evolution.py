@@ -14,6 +14,7 @@ from .models import Poste, RecetteJournaliere
 from inventaire.services.evolution_service import EvolutionService
 from inventaire.models import ObjectifAnnuel
 from inventaire.services.forecasting_service import ForecastingService
+from inventaire.services.objectifs_service import ObjectifsService
 
 # ===================================================================
 # IMPORTS DES PERMISSIONS GRANULAIRES DU PROJET
@@ -204,19 +205,10 @@ def taux_evolution_view(request):
     
     resultats = []
     
-    for poste in postes:
-        # Objectif annuel
-        try:
-            objectif_obj = ObjectifAnnuel.objects.get(poste=poste, annee=annee)
-            objectif_annee = objectif_obj.montant_objectif
-        except ObjectifAnnuel.DoesNotExist:
-            objectif_annee = Decimal('0')
-        
-        # Réalisé de l'année
-        realise_annee = RecetteJournaliere.objects.filter(
-            poste=poste,
-            date__year=annee
-        ).aggregate(total=Sum('montant_declare'))['total'] or Decimal('0')
+    # Objectif et réalisé de l'année annotés sur les postes (une requête)
+    for poste in ObjectifsService.annoter_realisations(postes, annee):
+        objectif_annee = poste.objectif_annee or Decimal('0')
+        realise_annee = poste.realise_annee
         
         # Utiliser les nouvelles estimations
         try:
@@ -72,7 +72,7 @@ from common.decorators import (
     api_permission_required,
 )
 
-from common.utils import log_user_action
+from common.utils import log_user_action, plage_journees
 
 logger = logging.getLogger('supper.pesage')
 
@@ -470,10 +470,10 @@ def detail_historique_vehicule(request, immatriculation):
         amendes_qs = amendes_qs.exclude(statut='paye')
     
     if date_debut:
-        amendes_qs = amendes_qs.filter(date_heure_emission__date__gte=date_debut)
+        amendes_qs = amendes_qs.filter(**plage_journees('date_heure_emission', date_debut))
     
     if date_fin:
-        amendes_qs = amendes_qs.filter(date_heure_emission__date__lte=date_fin)
+        amendes_qs = amendes_qs.filter(**plage_journees('date_heure_emission', date_fin=date_fin))
     
     # Calculer le total des montants
     total_montant = amendes_qs.aggregate(total=Sum('montant_amende'))['total'] or 0
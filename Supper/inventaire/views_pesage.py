@@ -24,7 +24,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import JsonResponse, HttpResponseForbidden
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.paginator import Paginator
@@ -36,6 +36,7 @@ from functools import wraps
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 import json
+from urllib.parse import urlencode
 import logging
 import os
 import pytz
@@ -45,7 +46,9 @@ import pytz
 # ===================================================================
 
 from inventaire.utils_pesage import normalize_immatriculation
-from common.utils import log_user_action
+from inventaire.services.agregats_amendes_service import AgregatsAmendesService, FILTRES_INFRACTION
+from common.pagination import paginer_par_curseur
+from common.utils import log_user_action, plage_journees
 
 # Imports depuis le module de permissions centralisé
 from common.permissions import (
@@ -655,6 +658,10 @@ def liste_amendes(request):
     """
     Liste des amendes avec filtres de recherche.
     Permission: peut_lister_amendes
+    
+    Pagination par curseur sur (date_heure_emission, id) : une page profonde
+    coûte autant que la première. Les statistiques d'en-tête sont lues dans
+    les agrégats journaliers, sauf en recherche textuelle.
     """
     user = request.user
     stations_accessibles = get_stations_pesage_accessibles(user)
@@ -664,18 +671,22 @@ def liste_amendes(request):
         return redirect_response
     
     # Construction du queryset selon les droits
+    station_filter = request.GET.get('station_filter', '')
     if station is None and user_has_acces_tous_postes(user):
         # Utilisateur multi-postes sans station sélectionnée → toutes les amendes
         queryset = AmendeEmise.objects.all()
-        station_filter = request.GET.get('station_filter')
+        stations_stats = None
         if station_filter:
             queryset = queryset.filter(station_id=station_filter)
+            stations_stats = station_filter
             logger.debug(f"[PESAGE] {user.username} filtre les amendes par station ID {station_filter}")
     elif station:
         # Utilisateur avec station spécifique
         queryset = AmendeEmise.objects.filter(station=station)
+        stations_stats = station.pk
     else:
         queryset = AmendeEmise.objects.none()
+        stations_stats = []
     
     # Filtres de recherche
     query = request.GET.get('q', '').strip()
@@ -693,36 +704,52 @@ def liste_amendes(request):
         queryset = queryset.filter(statut=statut_filter)
     
     infraction_filter = request.GET.get('type_infraction')
-    if infraction_filter == 'S':
-        queryset = queryset.filter(est_surcharge=True, est_hors_gabarit=False)
-    elif infraction_filter == 'HG':
-        queryset = queryset.filter(est_hors_gabarit=True, est_surcharge=False)
-    elif infraction_filter == 'S+HG':
-        queryset = queryset.filter(est_surcharge=True, est_hors_gabarit=True)
+    if infraction_filter in FILTRES_INFRACTION:
+        queryset = queryset.filter(**FILTRES_INFRACTION[infraction_filter])
     
     date_debut = request.GET.get('date_debut')
     date_fin = request.GET.get('date_fin')
     if date_debut:
-        queryset = queryset.filter(date_heure_emission__date__gte=date_debut)
+        queryset = queryset.filter(**plage_journees('date_heure_emission', date_debut))
     if date_fin:
-        queryset = queryset.filter(date_heure_emission__date__lte=date_fin)
+        queryset = queryset.filter(**plage_journees('date_heure_emission', date_fin=date_fin))
     
-    queryset = queryset.select_related('station', 'saisi_par').order_by('-date_heure_emission')
+    queryset = queryset.select_related('station', 'saisi_par')
     
-    # Statistiques
-    stats = queryset.aggregate(
-        total_montant=Sum('montant_amende'),
-        total_paye=Sum('montant_amende', filter=Q(statut='paye')),
-        total_non_paye=Sum('montant_amende', filter=Q(statut='non_paye')),
-        count_total=Count('id'),
-        count_paye=Count('id', filter=Q(statut='paye')),
-        count_non_paye=Count('id', filter=Q(statut='non_paye')),
-    )
+    # Statistiques : agrégats journaliers, ou amendes filtrées en recherche textuelle
+    if query:
+        stats = queryset.aggregate(
+            total_montant=Sum('montant_amende'),
+            total_paye=Sum('montant_amende', filter=Q(statut='paye')),
+            total_non_paye=Sum('montant_amende', filter=Q(statut='non_paye')),
+            count_total=Count('id'),
+            count_paye=Count('id', filter=Q(statut='paye')),
+            count_non_paye=Count('id', filter=Q(statut='non_paye')),
+        )
+    else:
+        stats = AgregatsAmendesService.statistiques(
+            stations=stations_stats,
+            statut=statut_filter,
+            type_infraction=infraction_filter,
+            date_debut=date_debut,
+            date_fin=date_fin,
+        )
     
-    # Pagination
-    paginator = Paginator(queryset, 25)
-    page = request.GET.get('page')
-    amendes = paginator.get_page(page)
+    # Pagination par curseur
+    amendes = paginer_par_curseur(
+        queryset, ('-date_heure_emission', '-id'),
+        apres=request.GET.get('apres'),
+        avant=request.GET.get('avant'),
+        par_page=25,
+    )
+    filtres = {
+        'q': query,
+        'statut': statut_filter,
+        'type_infraction': infraction_filter,
+        'date_debut': date_debut,
+        'date_fin': date_fin,
+        'station_filter': station_filter,
+    }
     
     context = {
         'amendes': amendes, 
@@ -735,7 +762,8 @@ def liste_amendes(request):
         'type_infraction': infraction_filter, 
         'date_debut': date_debut, 
         'date_fin': date_fin,
-        'station_filter': request.GET.get('station_filter', ''), 
+        'station_filter': station_filter, 
+        'filtres_query': urlencode({cle: valeur for cle, valeur in filtres.items() if valeur}),
         'title': _('Liste des amendes'),
         'peut_valider_paiement': has_permission(user, 'peut_valider_paiement_amende'),
         'peut_saisir_amende': has_permission(user, 'peut_saisir_amende'),
@@ -2026,8 +2054,7 @@ def comptabilisation_quittancements_pesage(request):
         amendes_payees = AmendeEmise.objects.filter(
             station=station, 
             statut='paye',
-            date_paiement__date__gte=date_debut, 
-            date_paiement__date__lte=date_fin
+            **plage_journees('date_paiement', date_debut, date_fin)
         )
         total_attendu = amendes_payees.aggregate(Sum('montant_amende'))['montant_amende__sum'] or Decimal('0')
         
@@ -2152,8 +2179,7 @@ def justifier_ecart_pesage(request, station_id, date_debut, date_fin):
     total_attendu = AmendeEmise.objects.filter(
         station=station,
         statut='paye',
-        date_paiement__date__gte=date_debut_obj,
-        date_paiement__date__lte=date_fin_obj
+        **plage_journees('date_paiement', date_debut_obj, date_fin_obj)
     ).aggregate(Sum('montant_amende'))['montant_amende__sum'] or Decimal('0')
     
     ecart = total_quittance - total_attendu
@@ -2275,8 +2301,7 @@ def detail_quittancements_periode_pesage(request, station_id, date_debut, date_f
     amendes_payees = AmendeEmise.objects.filter(
         station=station,
         statut='paye',
-        date_paiement__date__gte=date_debut_obj,
-        date_paiement__date__lte=date_fin_obj
+        **plage_journees('date_paiement', date_debut_obj, date_fin_obj)
     ).select_related('saisi_par', 'valide_par').order_by('date_paiement')
     
     # Totaux
@@ -2337,12 +2362,7 @@ def export_quittancements_pesage(request):
         messages.error(request, _("Vous n'avez pas la permission d'exporter les quittancements."))
         return redirect('inventaire:liste_quittancements_pesage')
     
-    try:
-        import openpyxl
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    except ImportError:
-        messages.error(request, _("Module openpyxl non installé."))
-        return redirect('inventaire:liste_quittancements_pesage')
+    from common.exports import parcourir, reponse_xlsx
     
     # Filtres
     station_id = request.GET.get('station')
@@ -2360,72 +2380,60 @@ def export_quittancements_pesage(request):
     
     quittancements = quittancements.select_related('station', 'saisi_par').order_by('-date_quittancement')
     
-    # Créer le workbook Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Quittancements Pesage"
-    
-    # Styles
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="C0392B", end_color="C0392B", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-    
     # En-têtes
     headers = ['N° Quittance', 'Station', 'Exercice', 'Mois', 'Type', 'Date Quittancement',
                'Période', 'Montant Quittancé', 'Saisi par']
     
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-    
-    # Données
-    for row, q in enumerate(quittancements, 2):
-        if q.type_declaration == 'journaliere':
-            periode = q.date_recette.strftime('%d/%m/%Y') if q.date_recette else ''
-        else:
-            if q.date_debut_decade and q.date_fin_decade:
-                periode = f"{q.date_debut_decade.strftime('%d/%m/%Y')} - {q.date_fin_decade.strftime('%d/%m/%Y')}"
+    # Données, lues par lots
+    def lignes():
+        for q in parcourir(quittancements):
+            if q.type_declaration == 'journaliere':
+                periode = q.date_recette.strftime('%d/%m/%Y') if q.date_recette else ''
             else:
-                periode = ''
+                if q.date_debut_decade and q.date_fin_decade:
+                    periode = f"{q.date_debut_decade.strftime('%d/%m/%Y')} - {q.date_fin_decade.strftime('%d/%m/%Y')}"
+                else:
+                    periode = ''
+            
+            yield [
+                q.numero_quittance,
+                q.station.nom,
+                q.exercice,
+                q.mois,
+                q.get_type_declaration_display(),
+                q.date_quittancement.strftime('%d/%m/%Y'),
+                periode,
+                float(q.montant_quittance),
+                q.saisi_par.nom_complet if q.saisi_par else '',
+            ]
+    
+    def journaliser(nombre):
+        log_user_action(
+            user,
+            "Export Excel quittancements pesage",
+            f"Nombre: {nombre}",
+            request
+        )
         
-        ws.cell(row=row, column=1, value=q.numero_quittance).border = thin_border
-        ws.cell(row=row, column=2, value=q.station.nom).border = thin_border
-        ws.cell(row=row, column=3, value=q.exercice).border = thin_border
-        ws.cell(row=row, column=4, value=q.mois).border = thin_border
-        ws.cell(row=row, column=5, value=q.get_type_declaration_display()).border = thin_border
-        ws.cell(row=row, column=6, value=q.date_quittancement.strftime('%d/%m/%Y')).border = thin_border
-        ws.cell(row=row, column=7, value=periode).border = thin_border
-        ws.cell(row=row, column=8, value=float(q.montant_quittance)).border = thin_border
-        ws.cell(row=row, column=9, value=q.saisi_par.nom_complet if q.saisi_par else '').border = thin_border
-    
-    # Ajuster les largeurs de colonnes
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 18
-    
-    # Préparer la réponse HTTP
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=quittancements_pesage_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    wb.save(response)
-    
-    log_user_action(
-        user,
-        "Export Excel quittancements pesage",
-        f"Nombre: {quittancements.count()}",
-        request
-    )
-    
-    logger.info(
-        f"Export quittancements pesage | User: {user.username} | "
-        f"Nombre: {quittancements.count()}"
-    )
+        logger.info(
+            f"Export quittancements pesage | User: {user.username} | "
+            f"Nombre: {nombre}"
+        )
     
-    return response
+    try:
+        return reponse_xlsx(
+            headers,
+            lignes(),
+            f'quittancements_pesage_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
+            titre="Quittancements Pesage",
+            largeurs=18,
+            couleur_entete="C0392B",
+            bordures=True,
+            a_la_fin=journaliser,
+        )
+    except ImportError:
+        messages.error(request, _("Module openpyxl non installé."))
+        return redirect('inventaire:liste_quittancements_pesage')
 
 
 # ===================================================================
@@ -2476,13 +2484,11 @@ def statistiques_pesage(request):
     if station:
         amendes = AmendeEmise.objects.filter(
             station=station, 
-            date_heure_emission__date__gte=date_debut, 
-            date_heure_emission__date__lte=date_fin
+            **plage_journees('date_heure_emission', date_debut, date_fin)
         )
     elif user_has_acces_tous_postes(user):
         amendes = AmendeEmise.objects.filter(
-            date_heure_emission__date__gte=date_debut, 
-            date_heure_emission__date__lte=date_fin
+            **plage_journees('date_heure_emission', date_debut, date_fin)
         )
     else:
         amendes = AmendeEmise.objects.none()
@@ -2695,39 +2701,35 @@ def imprimer_recette_jour(request, date_str):
         date_paiement__lte=datetime_fin
     ).select_related('station', 'valide_par', 'saisi_par').order_by('date_paiement')
     
-    total = paiements.aggregate(total=Sum('montant_amende'))['total'] or 0
-    
-    # Statistiques par type d'infraction
-    stats_types = []
-    
-    surcharge_only = paiements.filter(est_surcharge=True, est_hors_gabarit=False)
-    if surcharge_only.exists():
-        stats_types.append({
-            'type': 'Surcharge (S)',
-            'count': surcharge_only.count(),
-            'montant': surcharge_only.aggregate(m=Sum('montant_amende'))['m'] or 0
-        })
-    
-    hg_only = paiements.filter(est_hors_gabarit=True, est_surcharge=False)
-    if hg_only.exists():
-        stats_types.append({
-            'type': 'Hors Gabarit (HG)',
-            'count': hg_only.count(),
-            'montant': hg_only.aggregate(m=Sum('montant_amende'))['m'] or 0
-        })
-    
-    both = paiements.filter(est_surcharge=True, est_hors_gabarit=True)
-    if both.exists():
-        stats_types.append({
-            'type': 'Surcharge + Hors Gabarit (S+HG)',
-            'count': both.count(),
-            'montant': both.aggregate(m=Sum('montant_amende'))['m'] or 0
-        })
+    # Total et statistiques par type d'infraction en une seule agrégation
+    filtres_types = [
+        ('Surcharge (S)', Q(est_surcharge=True, est_hors_gabarit=False)),
+        ('Hors Gabarit (HG)', Q(est_hors_gabarit=True, est_surcharge=False)),
+        ('Surcharge + Hors Gabarit (S+HG)', Q(est_surcharge=True, est_hors_gabarit=True)),
+    ]
+    agregats = {'count': Count('id'), 'total': Sum('montant_amende')}
+    for index, (_libelle, filtre) in enumerate(filtres_types):
+        agregats[f'count_{index}'] = Count('id', filter=filtre)
+        agregats[f'montant_{index}'] = Sum('montant_amende', filter=filtre)
+    resultats = paiements.order_by().aggregate(**agregats)
+    
+    total = resultats['total'] or 0
+    count = resultats['count']
+    
+    stats_types = [
+        {
+            'type': libelle,
+            'count': resultats[f'count_{index}'],
+            'montant': resultats[f'montant_{index}'] or 0,
+        }
+        for index, (libelle, _filtre) in enumerate(filtres_types)
+        if resultats[f'count_{index}']
+    ]
     
     logger.info(
         f"Impression recette jour | User: {user.username} | "
         f"Date: {date_cible} | Station: {station_obj.nom if station_obj else 'Toutes'} | "
-        f"Paiements: {paiements.count()} | Total: {total} FCFA"
+        f"Paiements: {count} | Total: {total} FCFA"
     )
     
     context = {
@@ -2737,7 +2739,7 @@ def imprimer_recette_jour(request, date_str):
         'datetime_fin': datetime_fin,
         'station': station_obj,
         'total': total,
-        'count': paiements.count(),
+        'count': count,
         'stats_types': stats_types,
         'is_admin': is_admin_user(user),
         'title': f"Recettes du {date_cible.strftime('%d/%m/%Y')} (9h-9h)",
@@ -2826,8 +2828,7 @@ def api_montant_attendu(request):
     paiements = AmendeEmise.objects.filter(
         station=station,
         statut='paye',
-        date_paiement__date__gte=date_debut,
-        date_paiement__date__lte=date_fin
+        **plage_journees('date_paiement', date_debut, date_fin)
     )
     
     agg = paiements.aggregate(total=Sum('montant_amende'), count=Count('id'))
@@ -2878,7 +2879,7 @@ def api_paiements_jour(request):
     else:
         queryset = AmendeEmise.objects.none()
     
-    paiements = queryset.filter(date_paiement__date=date_cible).select_related('valide_par')
+    paiements = queryset.filter(**plage_journees('date_paiement', date_cible, date_cible)).select_related('valide_par')
     
     data = {
         'date': date_cible.strftime('%d/%m/%Y'),
@@ -2933,7 +2934,14 @@ def api_recherche_amende(request):
         Q(numero_ticket__icontains=query) |
         Q(immatriculation__icontains=query) |
         Q(transporteur__icontains=query)
-    ).select_related('station')[:10]
+    ).select_related('station')
+    
+    # Résultats suivants : paramètre 'apres' = jeton 'suivant' de la réponse précédente
+    page = paginer_par_curseur(
+        amendes, ('-date_heure_emission', '-id'),
+        apres=request.GET.get('apres'),
+        par_page=10,
+    )
     
     results = [{
         'id': a.pk,
@@ -2942,9 +2950,9 @@ def api_recherche_amende(request):
         'montant': float(a.montant_amende),
         'statut': a.get_statut_display(),
         'station': a.station.nom,
-    } for a in amendes]
+    } for a in page]
     
-    return JsonResponse({'results': results})
+    return JsonResponse({'results': results, 'suivant': page.curseur_suivant})
 
 
 # ===================================================================
@@ -2987,12 +2995,12 @@ def api_stats_jour(request):
     
     # Construire le queryset selon l'accès
     if station is None and user_has_acces_tous_postes(user):
-        amendes = AmendeEmise.objects.filter(date_heure_emission__date=date_cible)
+        amendes = AmendeEmise.objects.filter(**plage_journees('date_heure_emission', date_cible, date_cible))
         station_filter = request.GET.get('station')
         if station_filter:
             amendes = amendes.filter(station_id=station_filter)
     elif station:
-        amendes = AmendeEmise.objects.filter(station=station, date_heure_emission__date=date_cible)
+        amendes = AmendeEmise.objects.filter(station=station, **plage_journees('date_heure_emission', date_cible, date_cible))
     else:
         amendes = AmendeEmise.objects.none()
     
@@ -3078,8 +3086,7 @@ def api_stats_periode(request):
     
     # Construire le queryset
     amendes = AmendeEmise.objects.filter(
-        date_heure_emission__date__gte=date_debut,
-        date_heure_emission__date__lte=date_fin
+        **plage_journees('date_heure_emission', date_debut, date_fin)
     )
     
     station = None
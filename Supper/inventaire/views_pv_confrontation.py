@@ -7,11 +7,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
 from django.utils import timezone
 from django.db.models import Sum, Count, Q
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
+from io import BytesIO
 import logging
 import os
 import pytz
@@ -30,6 +30,7 @@ from django.conf import settings
 from accounts.models import Poste, UtilisateurSUPPER
 from inventaire.models_pesage import *
 from inventaire.models_config import ConfigurationGlobale
+from inventaire.services.rapport_cache_service import RapportCacheService
 from common.utils import log_user_action
 
 # Import des fonctions de permissions granulaires depuis common.permissions
@@ -315,6 +316,28 @@ def nombre_en_lettres_annee(annee):
     return ' '.join(resultat)
 
 
+def sources_pv_confrontation(station, date_debut, date_fin):
+    """
+    Lignes lues par le PV de confrontation (empreinte du cache PDF) :
+    pesées, amendes émises ou payées et quittancements de la période 9h-9h
+    """
+    datetime_debut, datetime_fin = get_datetime_periode_9h(date_debut, date_fin)
+    
+    return [
+        Poste.objects.filter(pk=station.pk),
+        ConfigurationGlobale.objects.all(),
+        PeseesJournalieres.objects.filter(station=station, date__gte=date_debut, date__lte=date_fin),
+        AmendeEmise.objects.filter(station=station).filter(
+            Q(date_heure_emission__gte=datetime_debut, date_heure_emission__lte=datetime_fin) |
+            Q(date_paiement__gte=datetime_debut, date_paiement__lte=datetime_fin)
+        ),
+        QuittancementPesage.objects.filter(station=station).filter(
+            Q(date_recette__gte=date_debut, date_recette__lte=date_fin) |
+            Q(date_debut_decade__lte=date_fin, date_fin_decade__gte=date_debut)
+        ),
+    ]
+
+
 def calculer_donnees_pv_confrontation(station, date_debut, date_fin):
     """
     Calcule toutes les données nécessaires pour le PV de confrontation
@@ -913,15 +936,36 @@ def generer_pv_confrontation_pdf(request, station_id, date_debut, date_fin):
     config = ConfigurationGlobale.get_config()
     chef_station = get_chef_station(station)
     regisseur = get_regisseur_station(station)
+    filename = f'pv_confrontation_{station.code}_{date_debut}_au_{date_fin}.pdf'
+    
+    # PDF déjà produit pour l'état actuel des données de la période
+    rapport = RapportCacheService.rapport(
+        'pv_confrontation',
+        {
+            'station': station.pk,
+            'periode': [date_debut, date_fin],
+            'chef_station': chef_station.nom_complet if chef_station else None,
+            'regisseur': regisseur.nom_complet if regisseur else None,
+        },
+        sources_pv_confrontation(station, date_debut_obj, date_fin_obj),
+    )
+    if rapport.disponible():
+        log_user_action(
+            user,
+            "Génération PDF PV Confrontation",
+            f"Station: {station.nom} ({station.code}), Période: {date_debut} au {date_fin}, "
+            f"Fichier: {filename} (cache)",
+            request
+        )
+        return rapport.reponse(filename)
+    
     donnees = calculer_donnees_pv_confrontation(station, date_debut_obj, date_fin_obj)
     
     # Créer le PDF
-    response = HttpResponse(content_type='application/pdf')
-    filename = f'pv_confrontation_{station.code}_{date_debut}_au_{date_fin}.pdf'
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    buffer = BytesIO()
     
     doc = SimpleDocTemplate(
-        response,
+        buffer,
         pagesize=landscape(A4),
         rightMargin=1*cm,
         leftMargin=1*cm,
@@ -1036,7 +1080,7 @@ def generer_pv_confrontation_pdf(request, station_id, date_debut, date_fin):
         f"Période: {date_debut} au {date_fin}"
     )
     
-    return response
+    return rapport.enregistrer(buffer, filename)
 
 
 # ===================================================================
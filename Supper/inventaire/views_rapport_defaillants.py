@@ -23,7 +23,6 @@ Habilitations ayant cette permission selon la matrice:
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
 from django.db.models import Sum, Avg, Count, Q
 from django.utils import timezone
 from datetime import date, timedelta, datetime
@@ -33,6 +32,7 @@ import logging
 
 from accounts.models import Poste
 from inventaire.models import RecetteJournaliere
+from inventaire.services.rapport_cache_service import RapportCacheService
 from common.utils import log_user_action
 
 # Import des fonctions de permissions granulaires depuis common.permissions
@@ -242,11 +242,17 @@ def rapport_defaillants_peage(request):
         request
     )
     
+    # PDF déjà produit pour l'état actuel des recettes
+    if action == 'pdf':
+        rapport = rapport_pdf_defaillants(date_debut, date_fin, user)
+        if rapport.disponible():
+            return rapport.reponse(nom_fichier_pdf_defaillants(date_fin), disposition='attachment')
+    
     # Calculer toutes les données nécessaires
     donnees = calculer_donnees_defaillants_complet(date_debut, date_fin)
     
     if action == 'pdf':
-        return generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request)
+        return generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request, rapport)
     
     # Afficher la vue HTML
     # Variables de contexte IDENTIQUES au fichier original
@@ -785,7 +791,27 @@ def estimer_recettes_manquantes(poste, jours_manquants):
 # GÉNÉRATION PDF
 # ===================================================================
 
-def generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request):
+def rapport_pdf_defaillants(date_debut, date_fin, user):
+    """
+    PDF du rapport dans le cache des rapports : recettes lues jusqu'à la
+    date de fin (mois, cumul annuel, N-1, N-2, moyennes d'estimation) et
+    utilisateur imprimé en pied de page
+    """
+    return RapportCacheService.rapport(
+        'defaillants_peage',
+        {'periode': [date_debut, date_fin], 'utilisateur': user.username},
+        [
+            Poste.objects.filter(type='peage'),
+            RecetteJournaliere.objects.filter(date__lte=date_fin),
+        ],
+    )
+
+
+def nom_fichier_pdf_defaillants(date_fin):
+    return f'fiche_synoptique_peage_{date_fin.strftime("%Y%m%d")}.pdf'
+
+
+def generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request, rapport=None):
     """
     Génère le PDF complet du rapport des défaillants avec toutes les statistiques.
     
@@ -795,6 +821,7 @@ def generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request
         date_fin: Date de fin de la période
         user: Utilisateur qui génère le rapport
         request: Requête HTTP (pour le logging)
+        rapport: entrée du cache des rapports (rapport_pdf_defaillants)
         
     Returns:
         HttpResponse: Réponse avec le PDF
@@ -1007,14 +1034,13 @@ def generer_pdf_defaillants_complet(donnees, date_debut, date_fin, user, request
         request
     )
     
-    # Préparer la réponse
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    filename = f'fiche_synoptique_peage_{date_fin.strftime("%Y%m%d")}.pdf'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Préparer la réponse (et la mettre en cache)
+    filename = nom_fichier_pdf_defaillants(date_fin)
     
     logger.info(
         f"[RAPPORT_DEFAILLANTS] PDF généré avec succès: {filename}"
     )
     
-    return response
\ No newline at end of file
+    if rapport is None:
+        rapport = rapport_pdf_defaillants(date_debut, date_fin, user)
+    return rapport.enregistrer(buffer, filename, disposition='attachment')
\ No newline at end of file
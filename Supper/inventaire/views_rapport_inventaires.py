@@ -21,7 +21,6 @@ Variables de contexte IDENTIQUES (aucun changement):
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
 from django.db.models import Q, Avg
 from datetime import date, datetime
 from decimal import Decimal
@@ -29,9 +28,10 @@ from decimal import Decimal
 from accounts.models import Poste
 from inventaire.models import (
     EtatInventaireSnapshot, ProgrammationInventaire, 
-    InventaireJournalier, RecetteJournaliere
+    InventaireJournalier, RecetteJournaliere, JourneeImpertinente
 )
 from inventaire.services.snapshot_service import SnapshotService
+from inventaire.services.rapport_cache_service import RapportCacheService
 
 # Import des permissions granulaires et utilitaires
 from common.decorators import permission_required_granular
@@ -151,6 +151,25 @@ def rapport_inventaires(request):
         date_fin=date_fin.isoformat()
     )
     
+    # PDF déjà produit pour l'état actuel des données de la période
+    if action == 'pdf':
+        rapport = rapport_pdf_inventaires(date_debut, date_fin)
+        if rapport.disponible():
+            log_user_action(
+                user=request.user,
+                action="EXPORT_PDF_RAPPORT_INVENTAIRES",
+                details=(
+                    f"Export PDF du rapport des inventaires (cache) | "
+                    f"Période: {date_debut.strftime('%d/%m/%Y')} au {date_fin.strftime('%d/%m/%Y')}"
+                ),
+                request=request,
+                module="inventaire",
+                sous_module="rapport_inventaires"
+            )
+            return rapport.reponse(
+                nom_fichier_pdf_inventaires(date_debut, date_fin), disposition='attachment'
+            )
+    
     # Générer les données
     donnees = calculer_donnees_rapport_inventaires(date_debut, date_fin)
     
@@ -187,7 +206,7 @@ def rapport_inventaires(request):
             module="inventaire",
             sous_module="rapport_inventaires"
         )
-        return generer_pdf_rapport_inventaires(donnees, date_debut, date_fin)
+        return generer_pdf_rapport_inventaires(donnees, date_debut, date_fin, rapport)
     
     # Afficher la vue HTML
     context = {
@@ -548,10 +567,39 @@ def calculer_donnees_rapport_inventaires(date_debut, date_fin):
     }
 
 
-def generer_pdf_rapport_inventaires(donnees, date_debut, date_fin):
+def rapport_pdf_inventaires(date_debut, date_fin):
+    """
+    PDF du rapport dans le cache des rapports : programmations des mois
+    couverts, inventaires, recettes, snapshots de début et de fin de
+    période et journées impertinentes
+    """
+    return RapportCacheService.rapport(
+        'inventaires',
+        {'periode': [date_debut, date_fin]},
+        [
+            Poste.objects.all(),
+            ProgrammationInventaire.objects.filter(
+                mois__gte=date(date_debut.year, date_debut.month, 1),
+                mois__lte=date(date_fin.year, date_fin.month, 1),
+            ),
+            InventaireJournalier.objects.filter(date__range=[date_debut, date_fin]),
+            RecetteJournaliere.objects.filter(date__range=[date_debut, date_fin]),
+            EtatInventaireSnapshot.objects.filter(date_snapshot__in=[date_debut, date_fin]),
+            JourneeImpertinente.objects.filter(date__range=[date_debut, date_fin]),
+        ],
+    )
+
+
+def nom_fichier_pdf_inventaires(date_debut, date_fin):
+    return f'rapport_inventaires_{date_debut.strftime("%Y%m%d")}_{date_fin.strftime("%Y%m%d")}.pdf'
+
+
+def generer_pdf_rapport_inventaires(donnees, date_debut, date_fin, rapport=None):
     """
     Génère le PDF du rapport des inventaires
     VERSION COMPLÈTE avec inventaires administratifs
+    
+    rapport: entrée du cache des rapports (rapport_pdf_inventaires)
     """
     from reportlab.lib.pagesizes import A4, landscape
     from reportlab.lib import colors
@@ -716,10 +764,11 @@ def generer_pdf_rapport_inventaires(donnees, date_debut, date_fin):
     # Construire le PDF
     doc.build(elements)
     
-    # Préparer la réponse
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    filename = f'rapport_inventaires_{date_debut.strftime("%Y%m%d")}_{date_fin.strftime("%Y%m%d")}.pdf'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
\ No newline at end of file
+    # Préparer la réponse (et la mettre en cache)
+    if rapport is None:
+        rapport = rapport_pdf_inventaires(date_debut, date_fin)
+    # Les snapshots manquants ont été créés pendant le calcul des données
+    rapport.recalculer_empreinte()
+    return rapport.enregistrer(
+        buffer, nom_fichier_pdf_inventaires(date_debut, date_fin), disposition='attachment'
+    )
\ No newline at end of file
@@ -20,7 +20,9 @@ from django.db.models import Sum, Q
 from django.http import HttpResponse
 from datetime import date, timedelta, datetime
 from decimal import Decimal
+from io import BytesIO
 import logging
+import zipfile
 
 from accounts.models import Poste
 from inventaire.models import (
@@ -28,6 +30,8 @@ from inventaire.models import (
     GestionStock
 )
 from inventaire.models_config import ConfigurationGlobale
+from inventaire.services.compte_emploi_service import CompteEmploiService
+from inventaire.services.rapport_cache_service import RapportCacheService
 
 # Import des permissions granulaires
 from common.permissions import (
@@ -39,7 +43,7 @@ from common.permissions import (
 )
 
 # Import de la fonction de log manuelle
-from common.utils import log_user_action
+from common.utils import log_user_action, plage_journees
 
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
@@ -227,579 +231,14 @@ def calculer_stock_event_sourcing(poste, date_reference):
     return max(Decimal('0'), valeur), max(0, tickets)
 
 
-def extraire_series_depuis_historique(hist):
-    """
-    VERSION CORRIGÉE - Extrait les informations des séries depuis un HistoriqueStock
-    
-    ORDRE DE PRIORITÉ (données immuables d'abord):
-    1. Champs structurés (numero_premier_ticket, numero_dernier_ticket, couleur_principale)
-    2. JSONField details_approvisionnement  
-    3. Parser le commentaire 
-    4. ManyToMany series_tickets_associees (DERNIER RECOURS)
-    """
-    import re
-    from decimal import Decimal
-    
-    try:
-        from inventaire.models import CouleurTicket
-    except ImportError:
-        from .models import CouleurTicket
-    
-    series = []
-    
-    logger.debug(f"  Extraction séries pour historique {hist.id}:")
-    logger.debug(f"    - couleur_principale: {getattr(hist, 'couleur_principale', None)}")
-    logger.debug(f"    - numero_premier_ticket: {getattr(hist, 'numero_premier_ticket', None)}")
-    logger.debug(f"    - numero_dernier_ticket: {getattr(hist, 'numero_dernier_ticket', None)}")
-    
-    # SOURCE 1: Champs structurés directs
-    if (hasattr(hist, 'couleur_principale') and hist.couleur_principale and 
-        hasattr(hist, 'numero_premier_ticket') and hist.numero_premier_ticket and 
-        hasattr(hist, 'numero_dernier_ticket') and hist.numero_dernier_ticket):
-        
-        nb_tickets = hist.numero_dernier_ticket - hist.numero_premier_ticket + 1
-        series.append({
-            'couleur': hist.couleur_principale,
-            'couleur_nom': hist.couleur_principale.libelle_affichage,
-            'numero_premier': hist.numero_premier_ticket,
-            'numero_dernier': hist.numero_dernier_ticket,
-            'nombre_tickets': nb_tickets,
-            'valeur': Decimal(nb_tickets) * Decimal('500')
-        })
-        logger.debug(f"    ✓ Source 1 (champs structurés): {hist.couleur_principale.libelle_affichage} "
-                    f"#{hist.numero_premier_ticket}-{hist.numero_dernier_ticket}")
-        return series
-    
-    # SOURCE 2: JSONField details_approvisionnement
-    if (hasattr(hist, 'details_approvisionnement') and 
-        hist.details_approvisionnement and 
-        isinstance(hist.details_approvisionnement, dict)):
-        
-        series_data = hist.details_approvisionnement.get('series', [])
-        
-        for serie_data in series_data:
-            couleur = None
-            couleur_nom = serie_data.get('couleur_nom', 'Inconnu')
-            
-            if 'couleur_id' in serie_data:
-                couleur = CouleurTicket.objects.filter(id=serie_data['couleur_id']).first()
-            
-            if not couleur and couleur_nom:
-                couleur = CouleurTicket.objects.filter(
-                    libelle_affichage__icontains=couleur_nom
-                ).first()
-            
-            num_premier = serie_data.get('numero_premier')
-            num_dernier = serie_data.get('numero_dernier')
-            
-            if num_premier and num_dernier:
-                nb_tickets = num_dernier - num_premier + 1
-                series.append({
-                    'couleur': couleur,
-                    'couleur_nom': couleur.libelle_affichage if couleur else couleur_nom,
-                    'numero_premier': num_premier,
-                    'numero_dernier': num_dernier,
-                    'nombre_tickets': nb_tickets,
-                    'valeur': Decimal(str(serie_data.get('valeur', nb_tickets * 500)))
-                })
-        
-        if series:
-            logger.debug(f"    ✓ Source 2 (JSON): {len(series)} série(s) trouvée(s)")
-            return series
-    
-    # SOURCE 3: Parser le commentaire
-    if hasattr(hist, 'commentaire') and hist.commentaire and '#' in hist.commentaire:
-        patterns = [
-            r"(?:Série\s+)?(\w+(?:\s+\w+)?)\s*#(\d+)[–\-](\d+)",
-            r"(\w+)\s*#(\d+)[–\-](\d+)",
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, hist.commentaire)
-            if matches:
-                for match in matches:
-                    couleur_nom = match[0].strip()
-                    num_premier = int(match[1])
-                    num_dernier = int(match[2])
-                    
-                    couleur = CouleurTicket.objects.filter(
-                        libelle_affichage__icontains=couleur_nom
-                    ).first()
-                    
-                    if not couleur:
-                        couleur = CouleurTicket.objects.filter(
-                            code_normalise__icontains=couleur_nom.lower().replace(' ', '_')
-                        ).first()
-                    
-                    nb_tickets = num_dernier - num_premier + 1
-                    series.append({
-                        'couleur': couleur,
-                        'couleur_nom': couleur.libelle_affichage if couleur else couleur_nom,
-                        'numero_premier': num_premier,
-                        'numero_dernier': num_dernier,
-                        'nombre_tickets': nb_tickets,
-                        'valeur': Decimal(nb_tickets * 500)
-                    })
-                
-                if series:
-                    logger.debug(f"    ✓ Source 3 (commentaire parsé): {len(series)} série(s)")
-                    return series
-    
-    # SOURCE 4: ManyToMany series_tickets_associees
-    if hasattr(hist, 'series_tickets_associees'):
-        series_associees = hist.series_tickets_associees.select_related('couleur').all()
-        if series_associees.exists():
-            for serie in series_associees:
-                series.append({
-                    'couleur': serie.couleur,
-                    'couleur_nom': serie.couleur.libelle_affichage if serie.couleur else 'Inconnu',
-                    'numero_premier': serie.numero_premier,
-                    'numero_dernier': serie.numero_dernier,
-                    'nombre_tickets': serie.nombre_tickets,
-                    'valeur': serie.valeur_monetaire
-                })
-            logger.warning(f"    ⚠ Source 4 (ManyToMany): {len(series)} série(s) - "
-                          f"Attention: données potentiellement modifiées depuis le chargement!")
-            return series
-    
-    logger.warning(f"    ✗ Aucune série trouvée pour historique {hist.id}")
-    return series
-
-
 def calculer_donnees_compte_emploi_v2(poste, date_debut, date_fin):
     """
     VERSION CORRIGÉE - Calcul des données du compte d'emploi
     (Fonction utilitaire - aucune modification liée aux permissions)
-    """
-    from collections import defaultdict
-    from django.db.models import Sum
-    from decimal import Decimal
-    from datetime import timedelta
-    
-    try:
-        from inventaire.models import (
-            SerieTicket, StockEvent, HistoriqueStock, CouleurTicket
-        )
-    except ImportError:
-        from .models import SerieTicket, StockEvent, HistoriqueStock, CouleurTicket
-    
-    logger.info(f"=" * 60)
-    logger.info(f"CALCUL COMPTE D'EMPLOI V2 CORRIGÉ - {poste.nom}")
-    logger.info(f"Période: {date_debut} → {date_fin}")
-    
-    # Initialiser la structure de données
-    donnees = {
-        'stock_debut': {
-            'stocks': Decimal('0'),
-            'ventes': Decimal('0'),
-            'stock_final': Decimal('0'),
-            'stocks_qte': 0,
-            'ventes_qte': 0,
-        },
-        'approv_imprimerie': {
-            'stocks': Decimal('0'),
-            'ventes': Decimal('0'),
-            'stock_final': Decimal('0'),
-            'stocks_qte': 0,
-            'ventes_qte': 0,
-            'details': [],
-        },
-        'reapprov_recu': {
-            'stocks': Decimal('0'),
-            'ventes': Decimal('0'),
-            'stock_final': Decimal('0'),
-            'stocks_qte': 0,
-            'ventes_qte': 0,
-            'details': [],
-        },
-        'reapprov_cede': {
-            'stocks': Decimal('0'),
-            'ventes': Decimal('0'),
-            'stock_final': Decimal('0'),
-            'stocks_qte': 0,
-            'ventes_qte': 0,
-            'details': [],
-        },
-        'total': {
-            'stocks': Decimal('0'),
-            'ventes': Decimal('0'),
-            'stock_final': Decimal('0'),
-        },
-        'ventes_par_semaine': {},
-        'stock_final_calcule': Decimal('0'),
-        'stock_final_qte': 0,
-    }
-    
-    # ========== 1. STOCK DE DÉBUT ==========
-    veille_debut = date_debut - timedelta(days=1)
-    stock_debut_valeur, stock_debut_qte = calculer_stock_event_sourcing(poste, veille_debut)
-    
-    donnees['stock_debut']['stocks'] = stock_debut_valeur
-    donnees['stock_debut']['stocks_qte'] = stock_debut_qte
-    
-    logger.info(f"Stock de début (au {veille_debut}): {stock_debut_valeur} FCFA ({stock_debut_qte} tickets)")
-    
-    # ========== 2. APPROVISIONNEMENTS IMPRIMERIE NATIONALE ==========
-    historiques_imprimerie = HistoriqueStock.objects.filter(
-        poste=poste,
-        type_mouvement='CREDIT',
-        type_stock__in=['imprimerie_nationale', 'imprimerie'],
-        date_mouvement__date__gte=date_debut,
-        date_mouvement__date__lte=date_fin
-    ).select_related(
-        'couleur_principale', 'effectue_par'
-    ).prefetch_related(
-        'series_tickets_associees',
-        'series_tickets_associees__couleur'
-    ).order_by('date_mouvement')
-    
-    for hist in historiques_imprimerie:
-        montant = hist.montant or Decimal('0')
-        nb_tickets = hist.nombre_tickets or 0
-        
-        donnees['approv_imprimerie']['stocks'] += montant
-        donnees['approv_imprimerie']['stocks_qte'] += nb_tickets
-        
-        series = extraire_series_depuis_historique(hist)
-        
-        if series:
-            observation_parts = []
-            for s in series:
-                observation_parts.append(
-                    f"{s['couleur_nom']} #{s['numero_premier']}-{s['numero_dernier']}"
-                )
-            observation = ", ".join(observation_parts)
-        else:
-            observation = hist.commentaire or f"{nb_tickets} tickets"
-        
-        donnees['approv_imprimerie']['details'].append({
-            'date': hist.date_mouvement,
-            'observation': observation,
-            'montant': montant,
-            'nombre_tickets': nb_tickets,
-            'series': series,
-            'historique_id': hist.id
-        })
-    
-    logger.info(f"Approv Imprimerie: {donnees['approv_imprimerie']['stocks']} FCFA")
-    
-    # ========== 3. TRANSFERTS REÇUS ==========
-    historiques_recus = HistoriqueStock.objects.filter(
-        poste=poste,
-        type_mouvement='CREDIT',
-        poste_origine__isnull=False,
-        date_mouvement__date__gte=date_debut,
-        date_mouvement__date__lte=date_fin
-    ).select_related(
-        'poste_origine', 'couleur_principale', 'effectue_par'
-    ).prefetch_related(
-        'series_tickets_associees',
-        'series_tickets_associees__couleur'
-    ).order_by('date_mouvement')
-    
-    for hist in historiques_recus:
-        montant = hist.montant or Decimal('0')
-        nb_tickets = hist.nombre_tickets or 0
-        
-        donnees['reapprov_recu']['stocks'] += montant
-        donnees['reapprov_recu']['stocks_qte'] += nb_tickets
-        
-        series = extraire_series_depuis_historique(hist)
-        
-        if series:
-            observation_parts = []
-            for s in series:
-                observation_parts.append(
-                    f"{s['couleur_nom']} #{s['numero_premier']}-{s['numero_dernier']}"
-                )
-            observation = f"Reçu de {hist.poste_origine.nom}: " + ", ".join(observation_parts)
-        else:
-            observation = f"Reçu de {hist.poste_origine.nom}: {hist.commentaire or f'{nb_tickets} tickets'}"
-        
-        donnees['reapprov_recu']['details'].append({
-            'date': hist.date_mouvement,
-            'observation': observation,
-            'montant': montant,
-            'nombre_tickets': nb_tickets,
-            'poste_origine': hist.poste_origine,
-            'numero_bordereau': hist.numero_bordereau,
-            'series': series,
-            'historique_id': hist.id
-        })
-    
-    logger.info(f"Transferts reçus: {donnees['reapprov_recu']['stocks']} FCFA")
-    
-    # ========== 4. TRANSFERTS CÉDÉS ==========
-    historiques_cedes = HistoriqueStock.objects.filter(
-        poste=poste,
-        type_mouvement='DEBIT',
-        poste_destination__isnull=False,
-        date_mouvement__date__gte=date_debut,
-        date_mouvement__date__lte=date_fin
-    ).select_related(
-        'poste_destination', 'couleur_principale', 'effectue_par'
-    ).prefetch_related(
-        'series_tickets_associees',
-        'series_tickets_associees__couleur'
-    ).order_by('date_mouvement')
-    
-    for hist in historiques_cedes:
-        montant = hist.montant or Decimal('0')
-        nb_tickets = hist.nombre_tickets or 0
-        
-        donnees['reapprov_cede']['stocks'] -= montant
-        donnees['reapprov_cede']['stocks_qte'] -= nb_tickets
-        
-        series = extraire_series_depuis_historique(hist)
-        
-        if series:
-            observation_parts = []
-            for s in series:
-                observation_parts.append(
-                    f"{s['couleur_nom']} #{s['numero_premier']}-{s['numero_dernier']}"
-                )
-            observation = f"Cédé à {hist.poste_destination.nom}: " + ", ".join(observation_parts)
-        else:
-            observation = f"Cédé à {hist.poste_destination.nom}: {hist.commentaire or f'{nb_tickets} tickets'}"
-        
-        donnees['reapprov_cede']['details'].append({
-            'date': hist.date_mouvement,
-            'observation': observation,
-            'montant': -montant,
-            'nombre_tickets': -nb_tickets,
-            'poste_destination': hist.poste_destination,
-            'numero_bordereau': hist.numero_bordereau,
-            'series': series,
-            'historique_id': hist.id
-        })
-    
-    logger.info(f"Transferts cédés: {donnees['reapprov_cede']['stocks']} FCFA")
-    
-    # ========== 5. VENTES - Via HistoriqueStock ==========
-    logger.info(f"=" * 40)
-    logger.info(f"RÉCUPÉRATION DES VENTES (via HistoriqueStock)")
-    
-    historiques_ventes = HistoriqueStock.objects.filter(
-        poste=poste,
-        type_mouvement='DEBIT',
-        reference_recette__isnull=False,
-        poste_destination__isnull=True,
-        date_mouvement__date__gte=date_debut,
-        date_mouvement__date__lte=date_fin
-    ).select_related(
-        'reference_recette', 'couleur_principale', 'effectue_par'
-    ).prefetch_related(
-        'series_tickets_associees',
-        'series_tickets_associees__couleur'
-    ).order_by('date_mouvement')
-    
-    logger.info(f"  Nombre d'historiques de vente trouvés: {historiques_ventes.count()}")
-    
-    total_ventes_valeur = Decimal('0')
-    total_ventes_qte = 0
-    ventes_par_semaine = {}
-    
-    for hist in historiques_ventes:
-        montant = hist.montant or Decimal('0')
-        nb_tickets = hist.nombre_tickets or 0
-        
-        total_ventes_valeur += montant
-        total_ventes_qte += nb_tickets
-        
-        if hist.date_mouvement:
-            if hasattr(hist.date_mouvement, 'date'):
-                event_date = hist.date_mouvement.date()
-            else:
-                event_date = hist.date_mouvement
-        elif hist.reference_recette:
-            event_date = hist.reference_recette.date
-        else:
-            event_date = date_debut
-        
-        jours_depuis_debut = (event_date - date_debut).days
-        numero_semaine = max(0, jours_depuis_debut // 7)
-        
-        semaine_debut = date_debut + timedelta(days=numero_semaine * 7)
-        semaine_fin_theorique = semaine_debut + timedelta(days=6)
-        semaine_fin = min(semaine_fin_theorique, date_fin)
-        
-        semaine_key = f"{semaine_debut.strftime('%d/%m')} au {semaine_fin.strftime('%d/%m/%Y')}"
-        
-        if semaine_key not in ventes_par_semaine:
-            ventes_par_semaine[semaine_key] = {
-                'date_debut': semaine_debut,
-                'date_fin': semaine_fin,
-                'total_valeur': Decimal('0'),
-                'total_tickets': 0,
-                'series_vendues': [],
-                'historiques': []
-            }
-        
-        ventes_par_semaine[semaine_key]['total_valeur'] += montant
-        ventes_par_semaine[semaine_key]['total_tickets'] += nb_tickets
-        ventes_par_semaine[semaine_key]['historiques'].append(hist)
-        
-        series = extraire_series_depuis_historique(hist)
-        for s in series:
-            s['date_vente'] = event_date
-            s['historique_id'] = hist.id
-            if hist.reference_recette:
-                s['reference_recette'] = str(hist.reference_recette)
-            ventes_par_semaine[semaine_key]['series_vendues'].append(s)
-    
-    logger.info(f"  Total ventes via HistoriqueStock: {total_ventes_valeur} FCFA ({total_ventes_qte} tickets)")
-    
-    # ========== FALLBACK: StockEvent ==========
-    if total_ventes_valeur == 0:
-        logger.info(f"  → Tentative fallback via StockEvent...")
-        
-        events_ventes = StockEvent.objects.filter(
-            poste=poste,
-            event_type='VENTE',
-            event_datetime__date__gte=date_debut,
-            event_datetime__date__lte=date_fin,
-            is_cancelled=False
-        ).order_by('event_datetime')
-        
-        for event in events_ventes:
-            montant = abs(event.montant_variation)
-            nb_tickets = abs(event.nombre_tickets_variation)
-            
-            total_ventes_valeur += montant
-            total_ventes_qte += nb_tickets
-            
-            event_date = event.event_datetime.date()
-            jours_depuis_debut = (event_date - date_debut).days
-            numero_semaine = max(0, jours_depuis_debut // 7)
-            
-            semaine_debut = date_debut + timedelta(days=numero_semaine * 7)
-            semaine_fin_theorique = semaine_debut + timedelta(days=6)
-            semaine_fin = min(semaine_fin_theorique, date_fin)
-            
-            semaine_key = f"{semaine_debut.strftime('%d/%m')} au {semaine_fin.strftime('%d/%m/%Y')}"
-            
-            if semaine_key not in ventes_par_semaine:
-                ventes_par_semaine[semaine_key] = {
-                    'date_debut': semaine_debut,
-                    'date_fin': semaine_fin,
-                    'total_valeur': Decimal('0'),
-                    'total_tickets': 0,
-                    'series_vendues': [],
-                    'events': []
-                }
-            
-            ventes_par_semaine[semaine_key]['total_valeur'] += montant
-            ventes_par_semaine[semaine_key]['total_tickets'] += nb_tickets
-    
-    # ========== Enrichir les semaines sans séries ==========
-    for semaine_key, semaine_data in ventes_par_semaine.items():
-        if not semaine_data['series_vendues']:
-            series_vendues = SerieTicket.objects.filter(
-                poste=poste,
-                statut__in=['vendu', 'epuise'],
-                date_utilisation__gte=semaine_data['date_debut'],
-                date_utilisation__lte=semaine_data['date_fin']
-            ).select_related('couleur').order_by('date_utilisation', 'couleur__code_normalise', 'numero_premier')
-            
-            for serie in series_vendues:
-                semaine_data['series_vendues'].append({
-                    'couleur': serie.couleur,
-                    'couleur_nom': serie.couleur.libelle_affichage if serie.couleur else 'Inconnu',
-                    'numero_premier': serie.numero_premier,
-                    'numero_dernier': serie.numero_dernier,
-                    'nombre_tickets': serie.nombre_tickets,
-                    'valeur': serie.valeur_monetaire,
-                    'date_vente': serie.date_utilisation,
-                })
-        
-        semaine_data['series_vendues'].sort(
-            key=lambda x: (x.get('date_vente') or date_debut, x.get('couleur_nom', ''))
-        )
     
-    donnees['ventes_par_semaine'] = ventes_par_semaine
-    
-    logger.info(f"Total ventes FINAL: {total_ventes_valeur} FCFA ({total_ventes_qte} tickets)")
-    
-    # ========== 6. RÉPARTITION DES VENTES ==========
-    total_entrees = (
-        donnees['stock_debut']['stocks'] +
-        donnees['approv_imprimerie']['stocks'] +
-        donnees['reapprov_recu']['stocks']
-    )
-    
-    if total_entrees > 0:
-        ratio_stock_debut = donnees['stock_debut']['stocks'] / total_entrees
-        ratio_approv = donnees['approv_imprimerie']['stocks'] / total_entrees
-        ratio_recu = donnees['reapprov_recu']['stocks'] / total_entrees
-        
-        donnees['stock_debut']['ventes'] = total_ventes_valeur * ratio_stock_debut
-        donnees['stock_debut']['ventes_qte'] = int(total_ventes_qte * float(ratio_stock_debut))
-        
-        donnees['approv_imprimerie']['ventes'] = total_ventes_valeur * ratio_approv
-        donnees['approv_imprimerie']['ventes_qte'] = int(total_ventes_qte * float(ratio_approv))
-        
-        donnees['reapprov_recu']['ventes'] = total_ventes_valeur * ratio_recu
-        donnees['reapprov_recu']['ventes_qte'] = int(total_ventes_qte * float(ratio_recu))
-    
-    donnees['reapprov_cede']['ventes'] = Decimal('0')
-    donnees['reapprov_cede']['ventes_qte'] = 0
-    
-    # ========== 7. CALCUL DES STOCKS FINAUX ==========
-    donnees['stock_debut']['stock_final'] = (
-        donnees['stock_debut']['stocks'] - donnees['stock_debut']['ventes']
-    )
-    
-    donnees['approv_imprimerie']['stock_final'] = (
-        donnees['approv_imprimerie']['stocks'] - donnees['approv_imprimerie']['ventes']
-    )
-    
-    donnees['reapprov_recu']['stock_final'] = (
-        donnees['reapprov_recu']['stocks'] - donnees['reapprov_recu']['ventes']
-    )
-    
-    donnees['reapprov_cede']['stock_final'] = donnees['reapprov_cede']['stocks']
-    
-    # ========== 8. CALCUL DES TOTAUX ==========
-    donnees['total']['stocks'] = (
-        donnees['stock_debut']['stocks'] +
-        donnees['approv_imprimerie']['stocks'] +
-        donnees['reapprov_recu']['stocks'] +
-        donnees['reapprov_cede']['stocks']
-    )
-    
-    donnees['total']['ventes'] = total_ventes_valeur
-    
-    donnees['total']['stock_final'] = (
-        donnees['stock_debut']['stock_final'] +
-        donnees['approv_imprimerie']['stock_final'] +
-        donnees['reapprov_recu']['stock_final'] +
-        donnees['reapprov_cede']['stock_final']
-    )
-    
-    # Stock final via Event Sourcing
-    stock_fin_valeur, stock_fin_qte = calculer_stock_event_sourcing(poste, date_fin)
-    donnees['stock_final_calcule'] = stock_fin_valeur
-    donnees['stock_final_qte'] = stock_fin_qte
-    
-    # Vérification cohérence
-    ecart = abs(donnees['total']['stock_final'] - stock_fin_valeur)
-    if ecart > Decimal('1000'):
-        logger.warning(
-            f"Écart détecté: Calcul tableau={donnees['total']['stock_final']}, "
-            f"Event Sourcing={stock_fin_valeur}, Écart={ecart}"
-        )
-    
-    logger.info(f"=" * 60)
-    logger.info(f"RÉSUMÉ COMPTE D'EMPLOI:")
-    logger.info(f"  Stock début: {donnees['stock_debut']['stocks']}")
-    logger.info(f"  Approv IMP: {donnees['approv_imprimerie']['stocks']}")
-    logger.info(f"  Reçu: {donnees['reapprov_recu']['stocks']}")
-    logger.info(f"  Cédé: {donnees['reapprov_cede']['stocks']}")
-    logger.info(f"  Ventes: {donnees['total']['ventes']}")
-    logger.info(f"  Stock final: {donnees['total']['stock_final']}")
-    logger.info(f"=" * 60)
-    
-    return donnees
+    Délègue à CompteEmploiService, qui calcule aussi plusieurs postes en une passe
+    """
+    return CompteEmploiService.calculer_pour_postes([poste], date_debut, date_fin)[poste.id]
 
 
 # ===================================================================
@@ -1323,7 +762,7 @@ def creer_pied_page(poste, config, user):
         [Paragraph("_________________________", footer_style)],
         [Spacer(1, 0.3*cm)],
         [Paragraph(
-            f"<i>Document généré par SUPPER - Utilisateur: {user.nom_complet}</i>", 
+            f"<i>Document généré par SUPPER - Utilisateur: {user.nom_complet if user else 'génération planifiée'}</i>", 
             ParagraphStyle('FooterItalic', parent=footer_style, fontSize=7, textColor=colors.grey)
         )]
     ]
@@ -1333,6 +772,134 @@ def creer_pied_page(poste, config, user):
     return footer_table
 
 
+def creer_document_compte_emploi(destination):
+    """Gabarit de page du compte d'emploi (A4 paysage, marges 1 cm)"""
+    return SimpleDocTemplate(
+        destination,
+        pagesize=landscape(A4),
+        rightMargin=1*cm,
+        leftMargin=1*cm,
+        topMargin=1*cm,
+        bottomMargin=1*cm
+    )
+
+
+def creer_elements_compte_emploi(poste, donnees, date_debut_obj, date_fin_obj, config, user):
+    """Éléments du compte d'emploi d'un poste, de l'en-tête au pied de page"""
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # En-tête bilingue
+    elements.append(creer_entete_bilingue(config, poste))
+    elements.append(Spacer(1, 0.5*cm))
+    
+    # Titre
+    titre_style = ParagraphStyle(
+        'TitreCompte',
+        parent=styles['Heading1'],
+        fontSize=14,
+        textColor=colors.HexColor('#1a1a1a'),
+        alignment=TA_CENTER,
+        spaceAfter=20
+    )
+    
+    titre = Paragraph(
+        f"COMPTE D'EMPLOI DES TICKETS<br/>"
+        f"Période du {date_debut_obj.strftime('%d/%m/%Y')} au {date_fin_obj.strftime('%d/%m/%Y')}",
+        titre_style
+    )
+    elements.append(titre)
+    elements.append(Spacer(1, 0.5*cm))
+    
+    # Tableau principal
+    elements.append(creer_tableau_principal(donnees, date_debut_obj, date_fin_obj, styles))
+    elements.append(Spacer(1, 0.5*cm))
+    
+    # Section Approvisionnements Imprimerie
+    elements.extend(creer_section_details_approvisionnement(donnees, styles))
+    
+    # Section Transferts reçus
+    elements.extend(creer_section_transferts_recus(donnees, styles))
+    
+    # Section Transferts cédés
+    elements.extend(creer_section_transferts_cedes(donnees, styles))
+    
+    # Saut de page
+    elements.append(PageBreak())
+    
+    # Section Ventes par semaine
+    elements.extend(creer_section_ventes_par_semaine(donnees, styles))
+    
+    # Note de vérification
+    elements.append(Spacer(1, 0.5*cm))
+    
+    note_style = ParagraphStyle(
+        'Note',
+        parent=styles['Normal'],
+        fontSize=7,
+        textColor=colors.HexColor('#4b5563'),
+        alignment=TA_CENTER
+    )
+    
+    ecart = abs(donnees['total']['stock_final'] - donnees['stock_final_calcule'])
+    
+    if ecart < Decimal('1000'):
+        note_text = "✓ Cohérence vérifiée : Stock final tableau = Stock calculé par Event Sourcing"
+        note_color = '#10b981'
+    else:
+        note_text = f"⚠ Écart détecté : {ecart:,.0f} FCFA".replace(',', ' ')
+        note_color = '#ef4444'
+    
+    elements.append(Paragraph(f"<font color='{note_color}'>{note_text}</font>", note_style))
+    
+    # Pied de page
+    elements.append(Spacer(1, 0.5*cm))
+    elements.append(creer_pied_page(poste, config, user))
+    
+    return elements
+
+
+def generer_pdf_comptes_emploi_lot(postes, date_debut, date_fin, user=None, format_sortie='pdf'):
+    """
+    Compte d'emploi de plusieurs postes sur une même période
+    
+    Les données de tous les postes sont calculées en une passe
+    (CompteEmploiService), puis rendues :
+    - format_sortie='pdf' : un seul document, un poste après l'autre
+    - format_sortie='zip' : une archive contenant un PDF par poste
+    
+    Returns:
+        tuple (contenu, nom_fichier, content_type)
+    """
+    config = ConfigurationGlobale.get_config()
+    postes = list(postes)
+    donnees_par_poste = CompteEmploiService.calculer_pour_postes(postes, date_debut, date_fin)
+    periode = f"{date_debut.strftime('%Y-%m-%d')}_au_{date_fin.strftime('%Y-%m-%d')}"
+    
+    tampon = BytesIO()
+    
+    if format_sortie == 'zip':
+        with zipfile.ZipFile(tampon, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for poste in postes:
+                pdf = BytesIO()
+                creer_document_compte_emploi(pdf).build(creer_elements_compte_emploi(
+                    poste, donnees_par_poste[poste.id], date_debut, date_fin, config, user
+                ))
+                archive.writestr(f'compte_emploi_{poste.code}_{periode}.pdf', pdf.getvalue())
+        return tampon.getvalue(), f'comptes_emploi_{periode}.zip', 'application/zip'
+    
+    elements = []
+    for poste in postes:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(creer_elements_compte_emploi(
+            poste, donnees_par_poste[poste.id], date_debut, date_fin, config, user
+        ))
+    
+    creer_document_compte_emploi(tampon).build(elements)
+    return tampon.getvalue(), f'comptes_emploi_{periode}.pdf', 'application/pdf'
+
+
 # ===================================================================
 # GÉNÉRATION PDF DU COMPTE D'EMPLOI
 # ===================================================================
@@ -1399,97 +966,108 @@ def generer_compte_emploi_pdf(request, poste_id, date_debut, date_fin):
     
     # Récupérer config
     config = ConfigurationGlobale.get_config()
-    
-    # Calcul des données
-    donnees = calculer_donnees_compte_emploi_v2(poste, date_debut_obj, date_fin_obj)
-    
-    # Générer PDF
-    response = HttpResponse(content_type='application/pdf')
     filename = f'compte_emploi_{poste.code}_{date_debut}_au_{date_fin}.pdf'
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
     
-    doc = SimpleDocTemplate(
-        response,
-        pagesize=landscape(A4),
-        rightMargin=1*cm,
-        leftMargin=1*cm,
-        topMargin=1*cm,
-        bottomMargin=1*cm
+    # PDF déjà produit pour l'état actuel des données de la période
+    # (l'utilisateur figure au pied de page)
+    rapport = RapportCacheService.rapport(
+        'compte_emploi',
+        {'poste': poste.pk, 'periode': [date_debut, date_fin], 'utilisateur': user.nom_complet},
+        [
+            Poste.objects.filter(pk=poste.pk),
+            ConfigurationGlobale.objects.all(),
+            *CompteEmploiService.sources(poste, date_debut_obj, date_fin_obj),
+        ],
     )
+    if rapport.disponible():
+        return rapport.reponse(filename)
     
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # En-tête bilingue
-    elements.append(creer_entete_bilingue(config, poste))
-    elements.append(Spacer(1, 0.5*cm))
+    # Calcul des données
+    donnees = calculer_donnees_compte_emploi_v2(poste, date_debut_obj, date_fin_obj)
     
-    # Titre
-    titre_style = ParagraphStyle(
-        'TitreCompte',
-        parent=styles['Heading1'],
-        fontSize=14,
-        textColor=colors.HexColor('#1a1a1a'),
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
+    # Générer PDF
+    buffer = BytesIO()
+    doc = creer_document_compte_emploi(buffer)
+    doc.build(creer_elements_compte_emploi(poste, donnees, date_debut_obj, date_fin_obj, config, user))
     
-    titre = Paragraph(
-        f"COMPTE D'EMPLOI DES TICKETS<br/>"
-        f"Période du {date_debut_obj.strftime('%d/%m/%Y')} au {date_fin_obj.strftime('%d/%m/%Y')}",
-        titre_style
-    )
-    elements.append(titre)
-    elements.append(Spacer(1, 0.5*cm))
+    return rapport.enregistrer(buffer, filename)
+
+
+# ===================================================================
+# GÉNÉRATION GROUPÉE DES COMPTES D'EMPLOI
+# ===================================================================
+# Tous les postes de péage accessibles, une seule passe de calcul,
+# rendus en un PDF fusionné ou en une archive ZIP (un PDF par poste)
+# ===================================================================
+
+@login_required
+def generer_comptes_emploi_lot(request):
+    """
+    Génère le compte d'emploi de tous les postes accessibles sur une période
     
-    # Tableau principal
-    elements.append(creer_tableau_principal(donnees, date_debut_obj, date_fin_obj, styles))
-    elements.append(Spacer(1, 0.5*cm))
+    PERMISSIONS:
+    - peut_voir_compte_emploi: Requis pour accéder à cette vue
+    - Postes limités à get_postes_peage_accessibles
+    """
+    user = request.user
     
-    # Section Approvisionnements Imprimerie
-    elements.extend(creer_section_details_approvisionnement(donnees, styles))
+    if not has_permission(user, 'peut_voir_compte_emploi'):
+        log_user_action(
+            user=user,
+            action="ACCES_REFUSE",
+            description="Tentative de génération groupée des comptes d'emploi",
+            details="Permission peut_voir_compte_emploi manquante",
+            niveau="WARNING"
+        )
+        log_acces_refuse(user, "generer_comptes_emploi_lot", "Permission peut_voir_compte_emploi manquante")
+        messages.error(request, "Vous n'avez pas la permission de générer ce document.")
+        return redirect('common:dashboard')
     
-    # Section Transferts reçus
-    elements.extend(creer_section_transferts_recus(donnees, styles))
+    if request.method != 'POST':
+        return redirect('inventaire:selection_compte_emploi')
     
-    # Section Transferts cédés
-    elements.extend(creer_section_transferts_cedes(donnees, styles))
+    format_sortie = 'zip' if request.POST.get('format') == 'zip' else 'pdf'
     
-    # Saut de page
-    elements.append(PageBreak())
+    try:
+        date_debut = date.fromisoformat(request.POST.get('date_debut', ''))
+        date_fin = date.fromisoformat(request.POST.get('date_fin', ''))
+    except ValueError:
+        messages.error(request, "Format de date invalide")
+        return redirect('inventaire:selection_compte_emploi')
     
-    # Section Ventes par semaine
-    elements.extend(creer_section_ventes_par_semaine(donnees, styles))
+    if date_debut > date_fin:
+        messages.error(request, "La date de début doit être antérieure à la date de fin")
+        return redirect('inventaire:selection_compte_emploi')
+    if date_fin > date.today():
+        messages.error(request, "La date de fin ne peut pas être dans le futur")
+        return redirect('inventaire:selection_compte_emploi')
+    if (date_fin - date_debut).days > 365:
+        messages.error(request, "La période ne peut pas dépasser 1 an")
+        return redirect('inventaire:selection_compte_emploi')
     
-    # Note de vérification
-    elements.append(Spacer(1, 0.5*cm))
+    postes = list(get_postes_peage_accessibles(user))
+    if not postes:
+        messages.error(request, "Aucun poste de péage accessible")
+        return redirect('inventaire:selection_compte_emploi')
     
-    note_style = ParagraphStyle(
-        'Note',
-        parent=styles['Normal'],
-        fontSize=7,
-        textColor=colors.HexColor('#4b5563'),
-        alignment=TA_CENTER
+    log_user_action(
+        user=user,
+        action="GENERATION_PDF_COMPTE_EMPLOI",
+        description=f"Génération groupée des comptes d'emploi - {len(postes)} poste(s)",
+        details=f"Période: {date_debut} au {date_fin}, Format: {format_sortie}",
+        niveau="INFO"
+    )
+    logger.info(
+        f"[COMPTE_EMPLOI] {user.username} génère les comptes d'emploi de {len(postes)} poste(s) "
+        f"({date_debut} - {date_fin}, {format_sortie})"
     )
     
-    ecart = abs(donnees['total']['stock_final'] - donnees['stock_final_calcule'])
-    
-    if ecart < Decimal('1000'):
-        note_text = "✓ Cohérence vérifiée : Stock final tableau = Stock calculé par Event Sourcing"
-        note_color = '#10b981'
-    else:
-        note_text = f"⚠ Écart détecté : {ecart:,.0f} FCFA".replace(',', ' ')
-        note_color = '#ef4444'
-    
-    elements.append(Paragraph(f"<font color='{note_color}'>{note_text}</font>", note_style))
-    
-    # Pied de page
-    elements.append(Spacer(1, 0.5*cm))
-    elements.append(creer_pied_page(poste, config, user))
-    
-    # Générer le PDF
-    doc.build(elements)
+    contenu, filename, content_type = generer_pdf_comptes_emploi_lot(
+        postes, date_debut, date_fin, user=user, format_sortie=format_sortie
+    )
     
+    response = HttpResponse(contenu, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
@@ -35,6 +35,7 @@ from django.db.models import Sum
 
 from accounts.models import Poste
 from inventaire.models_pesage import ObjectifAnnuelPesage, AmendeEmise, StatutAmende
+from .services.objectifs_service import ObjectifsService
 from .services.pesage_defaillants_service import PesageDefaillantsService
 
 # Import des permissions granulaires et utilitaires
@@ -460,8 +461,8 @@ def gestion_objectifs_annuels_pesage(request):
             
             return redirect(f"{request.path}?annee={annee}")
         
-        # Sauvegarder les objectifs
-        nb_modifies = 0
+        # Sauvegarder les objectifs (une seule écriture groupée)
+        montants = {}
         details_modifications = []
         
         for station in stations:
@@ -472,17 +473,12 @@ def gestion_objectifs_annuels_pesage(request):
                 montant = Decimal('0')
             
             if montant > 0:
-                ObjectifAnnuelPesage.objects.update_or_create(
-                    station=station,
-                    annee=annee,
-                    defaults={
-                        'montant_objectif': montant,
-                        'cree_par': request.user
-                    }
-                )
-                nb_modifies += 1
+                montants[station.id] = montant
                 details_modifications.append(f"{station.nom}: {montant:,.0f} FCFA")
         
+        ObjectifsService.enregistrer_objectifs(ObjectifAnnuelPesage, annee, montants, request.user)
+        nb_modifies = len(montants)
+        
         # Log de la modification
         log_user_action(
             user=request.user,
@@ -502,27 +498,15 @@ def gestion_objectifs_annuels_pesage(request):
         messages.success(request, f"{nb_modifies} objectifs enregistrés pour {annee}")
         return redirect(f"{request.path}?annee={annee}")
     
-    # Récupérer les objectifs existants
-    objectifs_dict = {
-        obj.station_id: obj 
-        for obj in ObjectifAnnuelPesage.objects.filter(annee=annee)
-    }
-    
     # Construire les données pour le template
     stations_data = []
     total_objectif = Decimal('0')
     total_realise = Decimal('0')
     
-    for station in stations:
-        objectif = objectifs_dict.get(station.id)
-        montant_objectif = objectif.montant_objectif if objectif else Decimal('0')
-        
-        # Calculer la réalisation
-        realise = AmendeEmise.objects.filter(
-            station=station,
-            statut=StatutAmende.PAYE,
-            date_paiement__year=annee
-        ).aggregate(total=Sum('montant_amende'))['total'] or Decimal('0')
+    # Objectif et réalisation de toutes les stations en une requête
+    for station in ObjectifsService.annoter_realisations_pesage(stations, annee):
+        montant_objectif = station.objectif_annee or Decimal('0')
+        realise = station.realise_annee
         
         reste = montant_objectif - realise
         taux = (realise / montant_objectif * 100) if montant_objectif > 0 else Decimal('0')
@@ -624,10 +608,12 @@ def calculer_objectifs_pesage_automatique(request):
                 
                 return redirect('inventaire:calculer_objectifs_pesage')
             
-            # Récupérer les OBJECTIFS de l'année source
-            objectifs_source = ObjectifAnnuelPesage.objects.filter(annee=annee_source)
+            # Récupérer les OBJECTIFS de l'année source (une requête)
+            objectifs_source = ObjectifsService.objectifs_annee(
+                ObjectifAnnuelPesage, annee_source, actifs_seulement=False
+            )
             
-            if not objectifs_source.exists():
+            if not objectifs_source:
                 messages.error(request, f"Aucun objectif trouvé pour l'année {annee_source}. Veuillez d'abord définir les objectifs de cette année.")
                 
                 log_user_action(
@@ -645,27 +631,19 @@ def calculer_objectifs_pesage_automatique(request):
             # Calculer le multiplicateur
             multiplicateur = Decimal(str(1 + (pourcentage / 100)))
             
-            nb_crees = 0
-            nb_modifies = 0
-            
-            for objectif_source in objectifs_source:
-                # Calculer le nouvel objectif à partir de l'OBJECTIF source
-                nouvel_objectif = (objectif_source.montant_objectif * multiplicateur).quantize(Decimal('1'))
-                
-                # Créer ou mettre à jour l'objectif cible
-                objectif_cible, created = ObjectifAnnuelPesage.objects.update_or_create(
-                    station=objectif_source.station,
-                    annee=annee_cible,
-                    defaults={
-                        'montant_objectif': nouvel_objectif,
-                        'cree_par': request.user
-                    }
-                )
-                
-                if created:
-                    nb_crees += 1
-                else:
-                    nb_modifies += 1
+            # Nouveaux objectifs calculés à partir des OBJECTIFS source,
+            # créés ou mis à jour en une seule écriture groupée
+            resultats = ObjectifsService.enregistrer_objectifs(
+                ObjectifAnnuelPesage,
+                annee_cible,
+                {
+                    objectif_source.station_id: (objectif_source.montant_objectif * multiplicateur).quantize(Decimal('1'))
+                    for objectif_source in objectifs_source
+                },
+                request.user
+            )
+            nb_crees = resultats['objectifs_crees']
+            nb_modifies = resultats['objectifs_modifies'] + resultats['objectifs_inchanges']
             
             # Log du succès
             log_user_action(
@@ -765,9 +743,11 @@ def dupliquer_objectifs_annee_pesage(request):
             
             return redirect('inventaire:gestion_objectifs_annuels_pesage')
         
-        objectifs_source = ObjectifAnnuelPesage.objects.filter(annee=annee_source)
+        objectifs_source = ObjectifsService.objectifs_annee(
+            ObjectifAnnuelPesage, annee_source, actifs_seulement=False
+        )
         
-        if not objectifs_source.exists():
+        if not objectifs_source:
             messages.error(request, f"Aucun objectif trouvé pour {annee_source}")
             
             log_user_action(
@@ -782,17 +762,13 @@ def dupliquer_objectifs_annee_pesage(request):
             
             return redirect('inventaire:gestion_objectifs_annuels_pesage')
         
-        nb_dupliques = 0
-        for obj in objectifs_source:
-            ObjectifAnnuelPesage.objects.update_or_create(
-                station=obj.station,
-                annee=annee_cible,
-                defaults={
-                    'montant_objectif': obj.montant_objectif,
-                    'cree_par': request.user
-                }
-            )
-            nb_dupliques += 1
+        ObjectifsService.enregistrer_objectifs(
+            ObjectifAnnuelPesage,
+            annee_cible,
+            {obj.station_id: obj.montant_objectif for obj in objectifs_source},
+            request.user
+        )
+        nb_dupliques = len(objectifs_source)
         
         # Log de la duplication
         log_user_action(
@@ -41,6 +41,11 @@ from common.permissions import (
 from common.utils import log_user_action
 
 from inventaire.services.evolution_service import EvolutionService
+from inventaire.services.statistiques_service import (
+    MOIS_NOMS,
+    StatistiquesPeriodeService,
+    exclure_jours_impertinents,
+)
 
 import logging
 logger = logging.getLogger('supper')
@@ -116,10 +121,7 @@ def statistiques_taux_deperdition(request):
     filters = Q(taux_deperdition__isnull=False)
     
     # Exclure les jours impertinents
-    jours_impertinents = ConfigurationJour.objects.filter(
-        statut='impertinent'
-    ).values_list('date', flat=True)
-    filters &= ~Q(date__in=jours_impertinents)
+    filters &= exclure_jours_impertinents()
     filters &= Q(date__year=annee)
     
     # ========== FILTRAGE PAR POSTE ==========
@@ -202,154 +204,70 @@ def statistiques_taux_deperdition(request):
 def calculer_stats_par_periode(periode, annee, filters):
     """
     Calcule les statistiques selon la période demandée
-    (Fonction utilitaire - aucune modification)
+    Une seule requête groupée pour toutes les tranches de la période
     """
     filters &= Q(inventaire_associe__isnull=False)
     filters &= Q(taux_deperdition__lte=-5)
+    filters &= exclure_jours_impertinents()
     
-    jours_impertinents = ConfigurationJour.objects.filter(
-        statut='impertinent'
-    ).values_list('date', flat=True)
-    filters &= ~Q(date__in=jours_impertinents)
+    date_debut, date_fin = StatistiquesPeriodeService.plage(periode, annee)
+    tranches = StatistiquesPeriodeService.agreger(
+        RecetteJournaliere.objects.filter(filters), periode, date_debut, date_fin
+    )
     
     stats = []
+    for tranche in tranches:
+        stat = {
+            'taux_moyen': float(tranche['taux_moyen'] or 0),
+            'nombre_jours': tranche['nombre_jours'],
+            'montant_total': tranche['montant_total'],
+            'couleur': get_couleur_taux(tranche['taux_moyen']),
+        }
+        stat.update(_identification_tranche(periode, tranche, annee))
+        stats.append(stat)
+    
+    return stats
+
+
+def _identification_tranche(periode, tranche, annee):
+    """Libellé et clés d'identification d'une tranche de statistiques"""
+    debut, fin = tranche['debut'], tranche['fin']
     
     if periode == 'hebdomadaire':
-        date_debut = date(annee, 1, 1)
-        date_fin = date(annee, 12, 31)
-        current = date_debut
-        semaine_num = 1
-        
-        while current <= date_fin:
-            fin_semaine = current + timedelta(days=6)
-            
-            week_stats = RecetteJournaliere.objects.filter(
-                filters,
-                date__gte=current,
-                date__lte=fin_semaine
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                nombre_jours=Count('id'),
-                montant_total=Sum('montant_declare')
-            )
-            
-            if week_stats['nombre_jours'] > 0:
-                stats.append({
-                    'periode': f'Semaine {semaine_num} ({current.strftime("%d/%m")} - {fin_semaine.strftime("%d/%m")})',
-                    'date_debut': current,
-                    'date_fin': fin_semaine,
-                    'taux_moyen': float(week_stats['taux_moyen'] or 0),
-                    'nombre_jours': week_stats['nombre_jours'],
-                    'montant_total': float(week_stats['montant_total'] or 0),
-                    'couleur': get_couleur_taux(week_stats['taux_moyen'])
-                })
-            
-            current = fin_semaine + timedelta(days=1)
-            semaine_num += 1
-    
-    elif periode == 'mensuel':
-        mois_noms = {
-            1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
-            5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
-            9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
+        # Semaines du lundi au dimanche, numérotées depuis celle du 1er janvier
+        premier_lundi = date(annee, 1, 1) - timedelta(days=date(annee, 1, 1).weekday())
+        semaine_num = (debut - premier_lundi).days // 7 + 1
+        return {
+            'periode': f'Semaine {semaine_num} ({debut.strftime("%d/%m")} - {fin.strftime("%d/%m")})',
+            'semaine': semaine_num,
+            'date_debut': debut,
+            'date_fin': fin,
         }
-        
-        for mois in range(1, 13):
-            month_stats = RecetteJournaliere.objects.filter(
-                filters,
-                date__month=mois
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                nombre_jours=Count('id'),
-                montant_total=Sum('montant_declare')
-            )
-            
-            if month_stats['nombre_jours'] > 0:
-                stats.append({
-                    'periode': f'{mois_noms[mois]} {annee}',
-                    'mois': mois,
-                    'taux_moyen': float(month_stats['taux_moyen'] or 0),
-                    'nombre_jours': month_stats['nombre_jours'],
-                    'montant_total': float(month_stats['montant_total'] or 0),
-                    'couleur': get_couleur_taux(month_stats['taux_moyen'])
-                })
-    
-    elif periode == 'trimestriel':
-        trimestres = [
-            (1, 'T1 (Janvier-Mars)', [1, 2, 3]),
-            (2, 'T2 (Avril-Juin)', [4, 5, 6]),
-            (3, 'T3 (Juillet-Septembre)', [7, 8, 9]),
-            (4, 'T4 (Octobre-Décembre)', [10, 11, 12])
-        ]
-        
-        for num, nom, mois_list in trimestres:
-            trim_stats = RecetteJournaliere.objects.filter(
-                filters,
-                date__month__in=mois_list
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                nombre_jours=Count('id'),
-                montant_total=Sum('montant_declare')
-            )
-            
-            if trim_stats['nombre_jours'] > 0:
-                stats.append({
-                    'periode': f'{nom} {annee}',
-                    'trimestre': num,
-                    'taux_moyen': float(trim_stats['taux_moyen'] or 0),
-                    'nombre_jours': trim_stats['nombre_jours'],
-                    'montant_total': float(trim_stats['montant_total'] or 0),
-                    'couleur': get_couleur_taux(trim_stats['taux_moyen'])
-                })
-    
-    elif periode == 'semestriel':
-        semestres = [
-            (1, 'S1 (Janvier-Juin)', [1, 2, 3, 4, 5, 6]),
-            (2, 'S2 (Juillet-Décembre)', [7, 8, 9, 10, 11, 12])
-        ]
-        
-        for num, nom, mois_list in semestres:
-            sem_stats = RecetteJournaliere.objects.filter(
-                filters,
-                date__month__in=mois_list
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                nombre_jours=Count('id'),
-                montant_total=Sum('montant_declare')
-            )
-            
-            if sem_stats['nombre_jours'] > 0:
-                stats.append({
-                    'periode': f'{nom} {annee}',
-                    'semestre': num,
-                    'taux_moyen': float(sem_stats['taux_moyen'] or 0),
-                    'nombre_jours': sem_stats['nombre_jours'],
-                    'montant_total': float(sem_stats['montant_total'] or 0),
-                    'couleur': get_couleur_taux(sem_stats['taux_moyen'])
-                })
-    
-    elif periode == 'annuel':
-        for year in range(annee - 2, annee + 1):
-            year_stats = RecetteJournaliere.objects.filter(
-                filters,
-                date__year=year
-            ).aggregate(
-                taux_moyen=Avg('taux_deperdition'),
-                nombre_jours=Count('id'),
-                montant_total=Sum('montant_declare')
-            )
-            
-            if year_stats['nombre_jours'] > 0:
-                stats.append({
-                    'periode': f'Année {year}',
-                    'annee': year,
-                    'taux_moyen': float(year_stats['taux_moyen'] or 0),
-                    'nombre_jours': year_stats['nombre_jours'],
-                    'montant_total': float(year_stats['montant_total'] or 0),
-                    'couleur': get_couleur_taux(year_stats['taux_moyen'])
-                })
     
-    return stats
+    if periode == 'mensuel':
+        return {
+            'periode': f'{MOIS_NOMS[debut.month]} {annee}',
+            'mois': debut.month,
+        }
+    
+    if periode == 'trimestriel':
+        trimestre = (debut.month - 1) // 3 + 1
+        return {
+            'periode': f'T{trimestre} ({MOIS_NOMS[debut.month]}-{MOIS_NOMS[fin.month]}) {annee}',
+            'trimestre': trimestre,
+        }
+    
+    if periode == 'semestriel':
+        semestre = 1 if debut.month <= 6 else 2
+        return {
+            'periode': f'S{semestre} ({MOIS_NOMS[debut.month]}-{MOIS_NOMS[fin.month]}) {annee}',
+            'semestre': semestre,
+        }
+    
+    return {
+        'periode': f'Année {debut.year}',
+        'annee': debut.year,
+    }
 
 
 def get_couleur_taux(taux):
@@ -467,7 +385,8 @@ def statistiques_recettes(request):
         logger.debug(f"[STATS_RECETTES] {user.username}: type_stat forcé à 'montants' (pas de permission taux)")
     
     # ========== FILTRES DE BASE ==========
-    filters = Q(date__year=annee)
+    # L'année est appliquée par calculer_stats_recettes selon la période
+    filters = Q()
     
     # ========== FILTRAGE PAR POSTE ==========
     if poste_id != 'tous':
@@ -502,7 +421,7 @@ def statistiques_recettes(request):
     # Statistiques de comparaison (année précédente)
     stats_comparaison = None
     if type_stat == 'comparaison':
-        filters_precedent = Q(date__year=annee-1)
+        filters_precedent = Q()
         if poste_id != 'tous':
             filters_precedent &= Q(poste_id=poste_id)
         elif not user_has_acces_tous_postes(user) and user.poste_affectation:
@@ -559,169 +478,54 @@ def statistiques_recettes(request):
 def calculer_stats_recettes(periode, annee, filters, type_stat):
     """
     Calcule les statistiques de recettes par période avec identification claire
-    (Fonction utilitaire - aucune modification)
+    Une seule requête groupée ; filters ne doit pas restreindre l'année
+    (la plage est déduite de la période : l'année, ou trois ans en annuel)
     """
-    stats = []
-    
-    mois_noms = {
-        1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
-        5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
-        9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
-    }
+    date_debut, date_fin = StatistiquesPeriodeService.plage(periode, annee)
+    tranches = StatistiquesPeriodeService.agreger(
+        RecetteJournaliere.objects.filter(filters), periode, date_debut, date_fin
+    )
     
-    if periode == 'hebdomadaire':
-        date_debut = date(annee, 1, 1)
-        date_fin = date(annee, 12, 31)
-        current = date_debut
-        semaine_num = 1
-        
-        while current <= date_fin:
-            fin_semaine = current + timedelta(days=6)
-            if fin_semaine > date_fin:
-                fin_semaine = date_fin
-                
-            week_data = RecetteJournaliere.objects.filter(
-                filters,
-                date__gte=current,
-                date__lte=fin_semaine
-            ).aggregate(
-                montant_total=Sum('montant_declare'),
-                montant_potentiel=Sum('recette_potentielle'),
-                nombre_jours=Count('id'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            if week_data['nombre_jours'] > 0:
-                moyenne_jour = float(week_data['montant_total'] or 0) / week_data['nombre_jours']
-                
-                stats.append({
-                    'periode': f'Semaine {semaine_num} ({current.strftime("%d/%m")} - {fin_semaine.strftime("%d/%m")})',
-                    'semaine': semaine_num,
-                    'date_debut': current,
-                    'date_fin': fin_semaine,
-                    'montant_total': float(week_data['montant_total'] or 0),
-                    'montant_potentiel': float(week_data['montant_potentiel'] or 0),
-                    'taux_moyen': float(week_data['taux_moyen'] or 0),
-                    'nombre_jours': week_data['nombre_jours'],
-                    'moyenne_journaliere': moyenne_jour
-                })
-            
-            current = fin_semaine + timedelta(days=1)
-            semaine_num += 1
-    
-    elif periode == 'mensuel':
-        for mois in range(1, 13):
-            month_data = RecetteJournaliere.objects.filter(
-                filters,
-                date__month=mois
-            ).aggregate(
-                montant_total=Sum('montant_declare'),
-                montant_potentiel=Sum('recette_potentielle'),
-                nombre_jours=Count('id'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            if month_data['nombre_jours'] > 0:
-                moyenne_jour = float(month_data['montant_total'] or 0) / month_data['nombre_jours']
-                
-                stats.append({
-                    'periode': f'{mois_noms[mois]} {annee}',
-                    'mois': mois,
-                    'mois_num': mois,
-                    'montant_total': float(month_data['montant_total'] or 0),
-                    'montant_potentiel': float(month_data['montant_potentiel'] or 0),
-                    'taux_moyen': float(month_data['taux_moyen'] or 0),
-                    'nombre_jours': month_data['nombre_jours'],
-                    'moyenne_journaliere': moyenne_jour,
-                    'date_debut': date(annee, mois, 1),
-                    'date_fin': date(annee, mois, calendar.monthrange(annee, mois)[1])
-                })
-    
-    elif periode == 'trimestriel':
-        trimestres = [
-            ('T1', 'Janvier-Mars', [1, 2, 3]),
-            ('T2', 'Avril-Juin', [4, 5, 6]),
-            ('T3', 'Juillet-Septembre', [7, 8, 9]),
-            ('T4', 'Octobre-Décembre', [10, 11, 12])
-        ]
+    stats = []
+    for tranche in tranches:
+        debut, fin = tranche['debut'], tranche['fin']
+        stat = {
+            'montant_total': tranche['montant_total'],
+            'montant_potentiel': tranche['montant_potentiel'],
+            'taux_moyen': float(tranche['taux_moyen'] or 0),
+            'nombre_jours': tranche['nombre_jours'],
+            'moyenne_journaliere': tranche['montant_total'] / tranche['nombre_jours'],
+        }
         
-        for code, nom_periode, mois_list in trimestres:
-            trim_data = RecetteJournaliere.objects.filter(
-                filters,
-                date__month__in=mois_list
-            ).aggregate(
-                montant_total=Sum('montant_declare'),
-                montant_potentiel=Sum('recette_potentielle'),
-                nombre_jours=Count('id'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            if trim_data['nombre_jours'] > 0:
-                moyenne_jour = float(trim_data['montant_total'] or 0) / trim_data['nombre_jours']
-                
-                stats.append({
-                    'periode': f'{code} {annee}',
-                    'trimestre': f'{nom_periode} {annee}',
-                    'montant_total': float(trim_data['montant_total'] or 0),
-                    'montant_potentiel': float(trim_data['montant_potentiel'] or 0),
-                    'taux_moyen': float(trim_data['taux_moyen'] or 0),
-                    'nombre_jours': trim_data['nombre_jours'],
-                    'moyenne_journaliere': moyenne_jour
-                })
-    
-    elif periode == 'semestriel':
-        semestres = [
-            ('S1', 'Janvier-Juin', [1, 2, 3, 4, 5, 6]),
-            ('S2', 'Juillet-Décembre', [7, 8, 9, 10, 11, 12])
-        ]
+        if periode == 'hebdomadaire':
+            stat.update(_identification_tranche(periode, tranche, annee))
+        elif periode == 'mensuel':
+            stat.update({
+                'periode': f'{MOIS_NOMS[debut.month]} {annee}',
+                'mois': debut.month,
+                'mois_num': debut.month,
+                'date_debut': debut,
+                'date_fin': fin,
+            })
+        elif periode == 'trimestriel':
+            trimestre = (debut.month - 1) // 3 + 1
+            stat.update({
+                'periode': f'T{trimestre} {annee}',
+                'trimestre': f'{MOIS_NOMS[debut.month]}-{MOIS_NOMS[fin.month]} {annee}',
+            })
+        elif periode == 'semestriel':
+            semestre = 1 if debut.month <= 6 else 2
+            stat.update({
+                'periode': f'S{semestre} {annee}',
+                'semestre': f'{MOIS_NOMS[debut.month]}-{MOIS_NOMS[fin.month]} {annee}',
+            })
+        else:
+            stat.update({
+                'periode': f'Année {debut.year}',
+                'annee': debut.year,
+            })
         
-        for code, nom_periode, mois_list in semestres:
-            sem_data = RecetteJournaliere.objects.filter(
-                filters,
-                date__month__in=mois_list
-            ).aggregate(
-                montant_total=Sum('montant_declare'),
-                montant_potentiel=Sum('recette_potentielle'),
-                nombre_jours=Count('id'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            if sem_data['nombre_jours'] > 0:
-                moyenne_jour = float(sem_data['montant_total'] or 0) / sem_data['nombre_jours']
-                
-                stats.append({
-                    'periode': f'{code} {annee}',
-                    'semestre': f'{nom_periode} {annee}',
-                    'montant_total': float(sem_data['montant_total'] or 0),
-                    'montant_potentiel': float(sem_data['montant_potentiel'] or 0),
-                    'taux_moyen': float(sem_data['taux_moyen'] or 0),
-                    'nombre_jours': sem_data['nombre_jours'],
-                    'moyenne_journaliere': moyenne_jour
-                })
-    
-    elif periode == 'annuel':
-        for year in range(annee - 2, annee + 1):
-            year_data = RecetteJournaliere.objects.filter(
-                date__year=year
-            ).aggregate(
-                montant_total=Sum('montant_declare'),
-                montant_potentiel=Sum('recette_potentielle'),
-                nombre_jours=Count('id'),
-                taux_moyen=Avg('taux_deperdition')
-            )
-            
-            if year_data['nombre_jours'] > 0:
-                moyenne_jour = float(year_data['montant_total'] or 0) / year_data['nombre_jours']
-                
-                stats.append({
-                    'periode': f'Année {year}',
-                    'annee': year,
-                    'montant_total': float(year_data['montant_total'] or 0),
-                    'montant_potentiel': float(year_data['montant_potentiel'] or 0),
-                    'taux_moyen': float(year_data['taux_moyen'] or 0),
-                    'nombre_jours': year_data['nombre_jours'],
-                    'moyenne_journaliere': moyenne_jour
-                })
+        stats.append(stat)
     
     return stats
 
@@ -760,7 +564,7 @@ def preparer_donnees_recettes_graph(stats, stats_comparaison=None):
 def calculer_evolution_recettes(periode, date_reference, poste_id=None):
     """
     Calcule l'évolution des recettes par rapport aux années précédentes
-    (Fonction utilitaire - aucune modification)
+    (années N, N-1 et N-2 totalisées en une requête)
     """
     evolution = {
         'annee_n': 0,
@@ -774,69 +578,38 @@ def calculer_evolution_recettes(periode, date_reference, poste_id=None):
     if poste_id and poste_id != 'tous':
         base_filter &= Q(poste_id=poste_id)
     
-    if periode == 'jour':
-        for year_offset in [0, 1, 2]:
+    # Plage comparée pour chaque année (N, N-1, N-2), totalisées en une requête
+    plages = {}
+    for year_offset in [0, 1, 2]:
+        year = date_reference.year - year_offset
+        
+        if periode == 'jour':
             try:
-                date_calc = date_reference.replace(year=date_reference.year - year_offset)
+                date_calc = date_reference.replace(year=year)
             except ValueError:
                 continue
-                
-            result = RecetteJournaliere.objects.filter(
-                base_filter,
-                date=date_calc
-            ).aggregate(total=Sum('montant_declare'))
-            
-            total = float(result['total'] or 0)
-            
-            if year_offset == 0:
-                evolution['annee_n'] = total
-            elif year_offset == 1:
-                evolution['annee_n1'] = total
-            elif year_offset == 2:
-                evolution['annee_n2'] = total
-    
-    elif periode == 'cumul_annuel':
-        for year_offset in [0, 1, 2]:
-            year = date_reference.year - year_offset
-            date_debut = date(year, 1, 1)
+            plages[year_offset] = (date_calc, date_calc)
+        
+        elif periode == 'cumul_annuel':
             try:
                 date_fin = date_reference.replace(year=year)
             except ValueError:
                 date_fin = date(year, date_reference.month, 
                               calendar.monthrange(year, date_reference.month)[1])
-            
-            result = RecetteJournaliere.objects.filter(
-                base_filter,
-                date__gte=date_debut,
-                date__lte=date_fin
-            ).aggregate(total=Sum('montant_declare'))
-            
-            total = float(result['total'] or 0)
-            
-            if year_offset == 0:
-                evolution['annee_n'] = total
-            elif year_offset == 1:
-                evolution['annee_n1'] = total
-            elif year_offset == 2:
-                evolution['annee_n2'] = total
-    
-    elif periode == 'mois':
-        for year_offset in [0, 1, 2]:
-            year = date_reference.year - year_offset
-            result = RecetteJournaliere.objects.filter(
-                base_filter,
-                date__year=year,
-                date__month=date_reference.month
-            ).aggregate(total=Sum('montant_declare'))
-            
-            total = float(result['total'] or 0)
-            
-            if year_offset == 0:
-                evolution['annee_n'] = total
-            elif year_offset == 1:
-                evolution['annee_n1'] = total
-            elif year_offset == 2:
-                evolution['annee_n2'] = total
+            plages[year_offset] = (date(year, 1, 1), date_fin)
+        
+        elif periode == 'mois':
+            plages[year_offset] = (
+                date(year, date_reference.month, 1),
+                date(year, date_reference.month, calendar.monthrange(year, date_reference.month)[1])
+            )
+    
+    totaux = StatistiquesPeriodeService.totaux_par_plages(
+        RecetteJournaliere.objects.filter(base_filter), plages
+    )
+    evolution['annee_n'] = totaux.get(0, 0)
+    evolution['annee_n1'] = totaux.get(1, 0)
+    evolution['annee_n2'] = totaux.get(2, 0)
     
     if evolution['annee_n1'] > 0:
         evolution['evolution_n1'] = ((evolution['annee_n'] - evolution['annee_n1']) / evolution['annee_n1']) * 100
@@ -4,15 +4,15 @@
 
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponseForbidden
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib import messages
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-import csv
 
 from accounts.models import Poste
+from common.exports import parcourir, reponse_csv
 from inventaire.models import StockEvent, StockSnapshot
 import logging
 
@@ -307,23 +307,18 @@ def export_stock_history_csv(request, poste_id):
         if not request.user.peut_acceder_poste(poste):
             return HttpResponseForbidden("Accès non autorisé")
     
-    # Récupérer tous les événements
+    # Récupérer tous les événements (colonnes utiles seulement, lues par lots)
     events = StockEvent.objects.filter(
         poste=poste,
         is_cancelled=False
-    ).order_by('event_datetime')
-    
-    # Créer la réponse CSV
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="stock_history_{poste.code}_{date.today()}.csv"'
-    
-    # Ajouter le BOM UTF-8 pour Excel
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
+    ).order_by('event_datetime').values_list(
+        'event_datetime', 'event_type', 'montant_variation', 'stock_resultant',
+        'tickets_resultants', 'effectue_par__nom_complet', 'commentaire'
+    )
+    libelles_types = dict(StockEvent.EVENT_TYPES)
     
     # En-tête
-    writer.writerow([
+    entetes = [
         'Date/Heure',
         'Type',
         'Variation',
@@ -332,25 +327,26 @@ def export_stock_history_csv(request, poste_id):
         'Nombre Tickets',
         'Effectué Par',
         'Commentaire'
-    ])
-    
-    stock_precedent = Decimal('0')
+    ]
     
     # Lignes de données
-    for event in events:
-        writer.writerow([
-            event.event_datetime.strftime('%d/%m/%Y %H:%M'),
-            event.get_event_type_display(),
-            f"{'+' if event.montant_variation >= 0 else ''}{event.montant_variation}",
-            stock_precedent,
-            event.stock_resultant,
-            event.tickets_resultants,
-            event.effectue_par.nom_complet if event.effectue_par else '-',
-            event.commentaire[:100] if event.commentaire else ''
-        ])
-        stock_precedent = event.stock_resultant
-    
-    return response
+    def lignes():
+        stock_precedent = Decimal('0')
+        for (event_datetime, event_type, montant_variation, stock_resultant,
+             tickets_resultants, effectue_par, commentaire) in parcourir(events):
+            yield [
+                timezone.localtime(event_datetime).strftime('%d/%m/%Y %H:%M'),
+                libelles_types.get(event_type, event_type),
+                f"{'+' if montant_variation >= 0 else ''}{montant_variation}",
+                stock_precedent,
+                stock_resultant,
+                tickets_resultants,
+                effectue_par or '-',
+                commentaire[:100] if commentaire else ''
+            ]
+            stock_precedent = stock_resultant
+    
+    return reponse_csv(entetes, lignes(), f"stock_history_{poste.code}_{date.today()}.csv")
 
 
 @login_required
@@ -51,7 +51,8 @@ from .models import (
     CouleurTicket, RecetteJournaliere, StockEvent
 )
 from .forms import ChargementStockTicketsForm
-from accounts.models import UtilisateurSUPPER, NotificationUtilisateur
+from .services.notification_service import NotificationService
+from .services.stock_service import MouvementStock, StockService
 
 # ===================================================================
 # IMPORTS DES FONCTIONS DE PERMISSIONS DU PROJET
@@ -1127,17 +1128,6 @@ def executer_chargement_stock_avec_series(poste, couleur, numero_premier, numero
                 responsable_reception=user
             )
             
-            # 2. Mettre à jour le stock global
-            stock, created = GestionStock.objects.get_or_create(
-                poste=poste,
-                defaults={'valeur_monetaire': Decimal('0'), 'nombre_tickets': 0}
-            )
-            
-            stock_avant = stock.valeur_monetaire
-            stock.valeur_monetaire += montant
-            stock.nombre_tickets += nombre_tickets
-            stock.save()
-            
             # 3. Préparer les labels
             type_stock_label = (
                 "Régularisation" if type_stock == 'regularisation' 
@@ -1172,28 +1162,8 @@ def executer_chargement_stock_avec_series(poste, couleur, numero_premier, numero
                 'date_operation': now.isoformat()
             }
             
-            # 4. Créer l'historique
-            historique = HistoriqueStock.objects.create(
-                poste=poste,
-                type_mouvement='CREDIT',
-                type_stock=type_stock_historique,
-                montant=montant,
-                nombre_tickets=nombre_tickets,
-                stock_avant=stock_avant,
-                stock_apres=stock.valeur_monetaire,
-                effectue_par=user,
-                commentaire=commentaire_historique,
-                date_mouvement=now,
-                numero_premier_ticket=numero_premier,
-                numero_dernier_ticket=numero_dernier,
-                couleur_principale=couleur,
-                details_approvisionnement=details_approvisionnement
-            )
-            
-            # 5. Associer la série
-            historique.series_tickets_associees.add(serie)
-            
-            # 6. Créer l'événement Event Sourcing
+            # 4. Mettre à jour le stock global, créer l'historique (série
+            #    associée) et l'événement Event Sourcing
             event_type = 'REGULARISATION' if type_stock == 'regularisation' else 'CHARGEMENT'
             
             metadata = {
@@ -1209,46 +1179,43 @@ def executer_chargement_stock_avec_series(poste, couleur, numero_premier, numero
                     'nombre_tickets': nombre_tickets,
                     'valeur': str(montant)
                 },
-                'historique_id': historique.id,
                 'operation': 'chargement_stock_avec_series'
             }
             
-            StockEvent.objects.create(
-                poste=poste,
-                event_type=event_type,
-                event_datetime=now,
-                montant_variation=montant,
-                nombre_tickets_variation=nombre_tickets,
-                stock_resultant=stock.valeur_monetaire,
-                tickets_resultants=stock.nombre_tickets,
-                effectue_par=user,
-                reference_id=str(historique.id),
-                reference_type='HistoriqueStock',
-                metadata=metadata,
-                commentaire=commentaire or f"Chargement série {couleur.libelle_affichage}"
-            )
-            
-            # 7. Notifications aux chefs de poste
-            chefs = UtilisateurSUPPER.objects.filter(
-                poste_affectation=poste,
-                habilitation__in=['chef_peage', 'chef_pesage'],
-                is_active=True
-            )
+            mouvement, = StockService.appliquer([
+                MouvementStock(
+                    poste, montant, event_type,
+                    historique={
+                        'type_stock': type_stock_historique,
+                        'commentaire': commentaire_historique,
+                        'numero_premier_ticket': numero_premier,
+                        'numero_dernier_ticket': numero_dernier,
+                        'couleur_principale': couleur,
+                        'details_approvisionnement': details_approvisionnement,
+                    },
+                    evenement={
+                        'event_datetime': now,
+                        'metadata': metadata,
+                        'commentaire': commentaire or f"Chargement série {couleur.libelle_affichage}",
+                    },
+                    series=[serie],
+                )
+            ], user)
+            historique = mouvement.historique_cree
             
-            for chef in chefs:
-                NotificationUtilisateur.objects.create(
-                    destinataire=chef,
-                    expediteur=user,
-                    titre=f"Nouveau stock de tickets - {type_stock_label}",
-                    message=(
-                        f"Stock {type_stock_label} crédité : "
-                        f"Série {couleur.libelle_affichage} "
-                        f"#{numero_premier}-{numero_dernier} "
-                        f"({nombre_tickets:,} tickets = {montant:,.0f} FCFA) "
-                        f"pour {poste.nom}"
-                    ),
-                    type_notification='info'
+            # 7. Notifications aux chefs de poste (une insertion groupée)
+            NotificationService.notifier_chefs_postes([
+                (
+                    poste,
+                    f"Nouveau stock de tickets - {type_stock_label}",
+                    f"Stock {type_stock_label} crédité : "
+                    f"Série {couleur.libelle_affichage} "
+                    f"#{numero_premier}-{numero_dernier} "
+                    f"({nombre_tickets:,} tickets = {montant:,.0f} FCFA) "
+                    f"pour {poste.nom}",
+                    'info'
                 )
+            ], cree_par=user)
             
             # 8. Log
             logger.info(
@@ -12,10 +12,9 @@ from django.db import transaction
 from django.db.models import Sum, Avg, Count, Q
 from django.core.paginator import Paginator
 from decimal import Decimal
-from datetime import datetime
 from django.utils import timezone
 
-from accounts.models import Poste, NotificationUtilisateur, UtilisateurSUPPER
+from accounts.models import Poste
 from inventaire.models import *
 from common.utils import log_user_action
 import logging
@@ -553,154 +552,88 @@ def executer_transfert_stock(poste_origine, poste_destination, montant,
     VERSION MODIFIÉE avec Event Sourcing
     Exécute le transfert de stock entre deux postes
     """
-    
-    # CORRECTION : Utiliser get_or_create au lieu de get
-    stock_origine, created_origine = GestionStock.objects.select_for_update().get_or_create(
-        poste=poste_origine,
-        defaults={'valeur_monetaire': Decimal('0')}
-    )
-    
-    stock_destination, created_dest = GestionStock.objects.select_for_update().get_or_create(
-        poste=poste_destination,
-        defaults={'valeur_monetaire': Decimal('0')}
-    )
-    
-    # Vérification finale du stock disponible
-    if stock_origine.valeur_monetaire < montant:
-        raise ValueError(f"Stock insuffisant à l'origine. Disponible: {stock_origine.valeur_monetaire}, Demandé: {montant}")
+    from inventaire.services.notification_service import NotificationService
+    from inventaire.services.stock_service import REFUSER, MouvementStock, StockService
     
     nombre_tickets = int(montant / 500)
-    
-    # Sauvegarder les états avant
-    stock_origine_avant = stock_origine.valeur_monetaire
-    stock_destination_avant = stock_destination.valeur_monetaire
-    
-    # Mettre à jour les stocks
-    stock_origine.valeur_monetaire -= montant
-    stock_origine.save()
-    
-    stock_destination.valeur_monetaire += montant
-    stock_destination.save()
-    
-    # LOG pour débogage
-    logger.info(f"TRANSFERT STOCK - Origine {poste_origine.code}: {stock_origine_avant} -> {stock_origine.valeur_monetaire}")
-    logger.info(f"TRANSFERT STOCK - Destination {poste_destination.code}: {stock_destination_avant} -> {stock_destination.valeur_monetaire}")
-    
-    # ===== EVENT SOURCING =====
     timestamp = timezone.now()
     
-    # Créer l'événement de SORTIE pour le poste origine
-    StockEvent.objects.create(
-        poste=poste_origine,
-        event_type='TRANSFERT_OUT',
-        event_datetime=timestamp,
-        montant_variation=-montant,  # NÉGATIF car sortie
-        nombre_tickets_variation=-nombre_tickets,
-        stock_resultant=stock_origine.valeur_monetaire,
-        tickets_resultants=int(stock_origine.valeur_monetaire / 500),
-        effectue_par=user,
-        metadata={
-            'poste_destination': {
-                'id': poste_destination.id,
-                'nom': poste_destination.nom,
-                'code': poste_destination.code
+    # Stocks (verrous ordonnés, UPDATE F()), historiques et événements
+    # liés, dans la transaction de l'appelant ; StockInsuffisant (ValueError)
+    # si le stock d'origine ne couvre plus le montant
+    cession, reception = StockService.appliquer([
+        MouvementStock(
+            poste_origine, -montant, 'TRANSFERT_OUT',
+            historique={
+                'type_stock': 'reapprovisionnement',
+                'poste_origine': poste_origine,
+                'poste_destination': poste_destination,
+                'numero_bordereau': numero_bordereau,
+                'commentaire': f"{commentaire}",
             },
-            'numero_bordereau': numero_bordereau,
-            'type_operation': 'cession'
-        },
-        commentaire=f"Transfert vers {poste_destination.nom} - {commentaire}"
-    )
-    
-    # Créer l'événement d'ENTRÉE pour le poste destination
-    StockEvent.objects.create(
-        poste=poste_destination,
-        event_type='TRANSFERT_IN',
-        event_datetime=timestamp,
-        montant_variation=montant,  # POSITIF car entrée
-        nombre_tickets_variation=nombre_tickets,
-        stock_resultant=stock_destination.valeur_monetaire,
-        tickets_resultants=int(stock_destination.valeur_monetaire / 500),
-        effectue_par=user,
-        metadata={
-            'poste_origine': {
-                'id': poste_origine.id,
-                'nom': poste_origine.nom,
-                'code': poste_origine.code
+            evenement={
+                'event_datetime': timestamp,
+                'metadata': {
+                    'poste_destination': {
+                        'id': poste_destination.id,
+                        'nom': poste_destination.nom,
+                        'code': poste_destination.code
+                    },
+                    'numero_bordereau': numero_bordereau,
+                    'type_operation': 'cession'
+                },
+                'commentaire': f"Transfert vers {poste_destination.nom} - {commentaire}",
             },
-            'numero_bordereau': numero_bordereau,
-            'type_operation': 'reception'
-        },
-        commentaire=f"Transfert depuis {poste_origine.nom} - {commentaire}"
-    )
+            controle=REFUSER,
+        ),
+        MouvementStock(
+            poste_destination, montant, 'TRANSFERT_IN',
+            historique={
+                'type_stock': 'reapprovisionnement',
+                'poste_origine': poste_origine,
+                'poste_destination': poste_destination,
+                'numero_bordereau': numero_bordereau,
+                'commentaire': f"{commentaire}",
+            },
+            evenement={
+                'event_datetime': timestamp,
+                'metadata': {
+                    'poste_origine': {
+                        'id': poste_origine.id,
+                        'nom': poste_origine.nom,
+                        'code': poste_origine.code
+                    },
+                    'numero_bordereau': numero_bordereau,
+                    'type_operation': 'reception'
+                },
+                'commentaire': f"Transfert depuis {poste_origine.nom} - {commentaire}",
+            },
+        ),
+    ], user)
     
-    # Créer l'historique pour le poste ORIGINE
-    hist_origine = HistoriqueStock.objects.create(
-        poste=poste_origine,
-        type_mouvement='DEBIT',
-        type_stock='reapprovisionnement',
-        montant=montant,
-        nombre_tickets=nombre_tickets,
-        stock_avant=stock_origine_avant,
-        stock_apres=stock_origine.valeur_monetaire,
-        effectue_par=user,
-        poste_origine=poste_origine,
-        poste_destination=poste_destination,
-        numero_bordereau=numero_bordereau,
-        commentaire=f"{commentaire}"
-    )
+    hist_origine = cession.historique_cree
+    hist_destination = reception.historique_cree
     
+    logger.info(f"TRANSFERT STOCK - Origine {poste_origine.code}: {cession.stock_avant} -> {cession.stock_apres}")
+    logger.info(f"TRANSFERT STOCK - Destination {poste_destination.code}: {reception.stock_avant} -> {reception.stock_apres}")
     logger.info(f"Historique ORIGINE créé - ID: {hist_origine.id}, Bordereau: {hist_origine.numero_bordereau}")
-    
-    # Créer l'historique pour le poste DESTINATION
-    hist_destination = HistoriqueStock.objects.create(
-        poste=poste_destination,
-        type_mouvement='CREDIT',
-        type_stock='reapprovisionnement',
-        montant=montant,
-        nombre_tickets=nombre_tickets,
-        stock_avant=stock_destination_avant,
-        stock_apres=stock_destination.valeur_monetaire,
-        effectue_par=user,
-        poste_origine=poste_origine,
-        poste_destination=poste_destination,
-        numero_bordereau=numero_bordereau,
-        commentaire=f"{commentaire}"
-    )
-    
     logger.info(f"Historique DESTINATION créé - ID: {hist_destination.id}, Bordereau: {hist_destination.numero_bordereau}")
     
-    # Notifier les chefs de poste concernés
-    # Chef du poste origine
-    chefs_origine = UtilisateurSUPPER.objects.filter(
-        poste_affectation=poste_origine,
-        habilitation__in=['chef_peage', 'chef_pesage'],
-        is_active=True
-    )
-    
-    for chef in chefs_origine:
-        NotificationUtilisateur.objects.create(
-            destinataire=chef,
-            expediteur=user,
-            titre="Stock cédé à un autre poste",
-            message=f"Votre stock a été réduit de {montant:,.0f} FCFA ({nombre_tickets} tickets) au profit de {poste_destination.nom}. Bordereau N°{numero_bordereau}",
-            type_notification='warning'
-        )
-    
-    # Chef du poste destination
-    chefs_destination = UtilisateurSUPPER.objects.filter(
-        poste_affectation=poste_destination,
-        habilitation__in=['chef_peage', 'chef_pesage'],
-        is_active=True
-    )
-    
-    for chef in chefs_destination:
-        NotificationUtilisateur.objects.create(
-            destinataire=chef,
-            expediteur=user,
-            titre="Nouveau stock reçu",
-            message=f"Votre stock a été augmenté de {montant:,.0f} FCFA ({nombre_tickets} tickets) en provenance de {poste_origine.nom}. Bordereau N°{numero_bordereau}",
-            type_notification='success'
-        )
+    # Notifier les chefs de poste concernés (une insertion groupée)
+    NotificationService.notifier_chefs_postes([
+        (
+            poste_origine,
+            "Stock cédé à un autre poste",
+            f"Votre stock a été réduit de {montant:,.0f} FCFA ({nombre_tickets} tickets) au profit de {poste_destination.nom}. Bordereau N°{numero_bordereau}",
+            'warning'
+        ),
+        (
+            poste_destination,
+            "Nouveau stock reçu",
+            f"Votre stock a été augmenté de {montant:,.0f} FCFA ({nombre_tickets} tickets) en provenance de {poste_origine.nom}. Bordereau N°{numero_bordereau}",
+            'success'
+        ),
+    ], cree_par=user)
     
     # Journaliser l'action
     log_user_action(
@@ -717,19 +650,10 @@ def executer_transfert_stock(poste_origine, poste_destination, montant,
 
 def generer_numero_bordereau():
     """Génère un numéro unique de bordereau de transfert"""
-    # Format : TR-YYYYMMDD-HHMMSS-XXX
-    now = datetime.now()
-    
-    # Compter les transferts du jour
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    count_today = HistoriqueStock.objects.filter(
-        type_stock='reapprovisionnement',
-        date_mouvement__gte=today_start
-    ).count()
-    
-    numero = f"TR-{now.strftime('%Y%m%d')}-{now.strftime('%H%M%S')}-{count_today+1:03d}"
+    # Format : TR-YYYYMMDD-HHMMSS-XXX (compteur journalier verrouillé)
+    from inventaire.services.numerotation_service import NumerotationService
     
-    return numero
+    return NumerotationService.numero_bordereau_transfert()
 
 
 # ===================================================================
@@ -14,7 +14,7 @@ Fonctionnalités : AJAX, notifications, validation, UX
 const SUPPER = {
     // URLs API pour les requêtes AJAX
     api: {
-        notifications: '/dashboard/api/notifications/',
+        notifications: '/common/admin/api/notifications/',
         stats: '/dashboard/api/stats/',
         search: '/dashboard/api/search/',
         status: '/dashboard/api/status/'
@@ -105,6 +105,9 @@ function initializeNotifications() {
     // Programmer l'actualisation périodique
     setInterval(loadNotifications, SUPPER.config.notificationRefresh);
     
+    // Actualiser au retour sur un onglet masqué
+    document.addEventListener('visibilitychange', loadNotifications);
+    
     // Gérer le clic sur les notifications
     setupNotificationHandlers();
     
@@ -113,6 +116,11 @@ function initializeNotifications() {
 
 // Charge les notifications via AJAX
 function loadNotifications() {
+    // Pas d'interrogation sans utilisateur connecté ni depuis un onglet masqué
+    if (!SUPPER.api.notifications || document.hidden) {
+        return;
+    }
+    
     // Éviter les requêtes trop fréquentes
     const now = Date.now();
     if (SUPPER.cache.lastNotificationCheck && 
@@ -153,12 +161,17 @@ function updateNotificationUI(data) {
     
     if (!badge || !container) return;
     
-    // Mettre à jour le badge
-    if (data.notifications && data.notifications.length > 0) {
-        badge.textContent = data.notifications.length;
+    // Mettre à jour le badge (notifications non lues)
+    if (data.unread_count > 0) {
+        badge.textContent = data.unread_count;
         badge.style.display = 'block';
         badge.classList.add('pulse'); // Animation d'attention
-        
+    } else {
+        badge.style.display = 'none';
+        badge.classList.remove('pulse');
+    }
+    
+    if (data.notifications && data.notifications.length > 0) {
         // Construire le HTML des notifications
         let html = '';
         data.notifications.forEach(notif => {
@@ -185,9 +198,6 @@ function updateNotificationUI(data) {
         container.innerHTML = html;
     } else {
         // Aucune notification
-        badge.style.display = 'none';
-        badge.classList.remove('pulse');
-        
         container.innerHTML = `
             <div class="text-muted text-center py-3">
                 <i class="fas fa-inbox me-2"></i>